@@ -3,14 +3,29 @@
 พัฒนาโดยใช้ Streamlit
 """
 
+import logging
+import os
+
 import streamlit as st
-import pandas as pd
-from tax_calculator import calculate_tax_complete
-from database import (
-    init_db, save_calculation, get_calculations, delete_calculation, get_statistics,
-    save_user_profile, get_user_profiles, get_user_profile_by_name, delete_user_profile
+import db_metrics
+from tax_cache import calculation_cache
+from tax_calculator import DEFAULT_TAX_YEAR
+from tax_rules import available_tax_years, get_rule_set
+from database import init_db_once, save_calculation, delete_calculation, save_user_profile, delete_user_profile
+# อ่านผ่านแคช: rerun ที่ข้อมูลไม่เปลี่ยนไม่ต้องอ่านฐานข้อมูล (save/delete ด้านบนล้างแคชที่เกี่ยวข้อง)
+from db_cache import (
+    search_calculations, count_calculations, get_calculation_by_id,
+    get_statistics, get_daily_statistics, get_bracket_statistics,
+    get_user_profiles, get_user_profile_by_name, search_user_profiles, count_user_profiles
 )
 
+# ระดับ log (เช่น TAX_LOG_LEVEL=DEBUG เพื่อดูข้อความ debug ของ database)
+logging.basicConfig(level=os.environ.get('TAX_LOG_LEVEL', 'WARNING').upper())
+
+# นับ query ของ rerun นี้ (เมื่อเปิด TAX_DB_METRICS=1)
+if db_metrics.get_collector() is not None:
+    db_metrics.begin_request('rerun')
+
 # ตั้งค่าหน้าเว็บ
 st.set_page_config(
     page_title="คำนวณภาษีเงินได้บุคคลธรรมดา 2568 (ยื่นในปี 2569)",
@@ -47,8 +62,33 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Initialize database
-init_db()
+# สร้าง/ปรับโครงสร้างฐานข้อมูลครั้งเดียวต่อ process (rerun ถัดไปข้าม)
+init_db_once()
+
+
+def page_cursors(key, query):
+    """
+    cursor ของหน้าที่เปิดผ่านมา (หน้าแรกคือ None) เก็บใน session_state เพื่อย้อนกลับ
+    เริ่มใหม่ที่หน้าแรกเมื่อคำค้นหา การเรียง หรือตัวกรองเปลี่ยน
+    """
+    if st.session_state.get(f'{key}_query') != query:
+        st.session_state[f'{key}_query'] = query
+        st.session_state[f'{key}_cursors'] = [None]
+    return st.session_state[f'{key}_cursors']
+
+
+def page_buttons(key, cursors, next_cursor):
+    """ปุ่มหน้าก่อน/หน้าถัดไปของตารางแบบแบ่งหน้า"""
+    col_prev, col_next = st.columns(2)
+    with col_prev:
+        if st.button("⬅️ หน้าก่อน", disabled=len(cursors) == 1, use_container_width=True, key=f"{key}_prev"):
+            cursors.pop()
+            st.rerun()
+    with col_next:
+        if st.button("หน้าถัดไป ➡️", disabled=next_cursor is None, use_container_width=True, key=f"{key}_next"):
+            cursors.append(next_cursor)
+            st.rerun()
+
 
 # Sidebar navigation
 st.sidebar.title("📋 เมนู")
@@ -56,6 +96,14 @@ page = st.sidebar.radio(
     "เลือกหน้า",
     ["คำนวณภาษี", "จัดการข้อมูลผู้ใช้", "ประวัติการคำนวณ", "สถิติ"]
 )
+tax_years = available_tax_years()
+tax_year = st.sidebar.selectbox(
+    "ปีภาษี",
+    tax_years,
+    index=tax_years.index(DEFAULT_TAX_YEAR) if DEFAULT_TAX_YEAR in tax_years else len(tax_years) - 1
+)
+if get_rule_set(tax_year).provisional:
+    st.sidebar.warning(f"อัตราภาษีปี {tax_year} เป็นค่าชั่วคราว")
 
 # หน้าคำนวณภาษี
 if page == "คำนวณภาษี":
@@ -335,8 +383,8 @@ if page == "คำนวณภาษี":
                     'social_enterprise': social_enterprise
                 }
                 
-                # คำนวณภาษี
-                result = calculate_tax_complete(income_data, deductions_data, withholding_tax)
+                # คำนวณภาษี (ใช้ผลเดิมถ้าเคยคำนวณข้อมูลชุดนี้แล้ว)
+                result = calculation_cache.calculate(income_data, deductions_data, withholding_tax, tax_year=tax_year)
                 
                 # แสดงผลการคำนวณ
                 st.success("✅ คำนวณสำเร็จ!")
@@ -358,6 +406,8 @@ if page == "คำนวณภาษี":
                     ["% ของเงินได้สุทธิ", f"{result['tax_percent_of_net']:.2f}%"],
                 ]
                 
+                import pandas as pd  # โหลดเมื่อมีผลการคำนวณให้แสดงเท่านั้น (ลดเวลาเริ่มแอพ)
+                
                 summary_df = pd.DataFrame(summary_data, columns=["รายการ", "จำนวนเงิน (บาท)"])
                 st.dataframe(summary_df, use_container_width=True, hide_index=True)
                 
@@ -419,11 +469,13 @@ if page == "คำนวณภาษี":
                         income_keys_count = len(income_data)
                         deductions_keys_count = len(deductions_data)
                         
+                        # กดคำนวณซ้ำด้วยข้อมูลเดิมบ่อย จึงไม่เขียนซ้ำถ้าข้อมูลไม่เปลี่ยน
                         user_id = save_user_profile(
                             name.strip(),
                             income_data,
                             deductions_data,
-                            withholding_tax
+                            withholding_tax,
+                            skip_unchanged=True
                         )
                         
                         st.success(f"💾 บันทึกข้อมูลผู้ใช้อัตโนมัติแล้ว (ID: {user_id})")
@@ -480,14 +532,30 @@ if page == "คำนวณภาษี":
 elif page == "จัดการข้อมูลผู้ใช้":
     st.title("👤 จัดการข้อมูลผู้ใช้")
     
-    user_profiles = get_user_profiles()
+    PROFILE_PAGE_SIZE = 50
+    PROFILE_SORTS = {
+        "ชื่อ (ก-ฮ)": ('name', False),
+        "ชื่อ (ฮ-ก)": ('name', True),
+        "อัปเดตล่าสุด": ('updated_at', True),
+    }
+    col_search, col_sort = st.columns([2, 1])
+    with col_search:
+        name_prefix = st.text_input("ค้นหาตามชื่อ (ขึ้นต้นด้วย)", key="profile_name_filter").strip() or None
+    with col_sort:
+        sort_label = st.selectbox("เรียงตาม", list(PROFILE_SORTS), key="profile_sort")
+    sort, descending = PROFILE_SORTS[sort_label]
+    
+    cursors = page_cursors('profile', (name_prefix, sort_label))
+    total = count_user_profiles(name_prefix)
+    page_data = search_user_profiles(name_prefix, sort, descending, cursors[-1], PROFILE_PAGE_SIZE)
+    user_profiles = page_data['profiles']
     
-    if not user_profiles:
-        st.info("ยังไม่มีข้อมูลผู้ใช้")
+    if total == 0:
+        st.info("ไม่พบผู้ใช้ที่ค้นหา" if name_prefix else "ยังไม่มีข้อมูลผู้ใช้")
     else:
-        st.write(f"**จำนวนผู้ใช้ทั้งหมด: {len(user_profiles)} คน**")
+        st.write(f"**จำนวนผู้ใช้: {total:,} คน** (หน้า {len(cursors)})")
         
-        # แสดงตารางผู้ใช้
+        # แสดงเฉพาะหน้าที่เปิดอยู่
         df_data = []
         for profile in user_profiles:
             df_data.append({
@@ -497,13 +565,17 @@ elif page == "จัดการข้อมูลผู้ใช้":
                 "สร้างเมื่อ": profile['created_at']
             })
         
+        import pandas as pd
+        
         df = pd.DataFrame(df_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
+        page_buttons('profile', cursors, page_data['next_cursor'])
         
-        # ส่วนลบข้อมูล
+        # ส่วนลบข้อมูล: เลือกจากผลค้นหาในหน้านี้ (ค้นหาชื่อด้านบนเพื่อหาผู้ใช้ที่อยู่หน้าอื่น)
         st.subheader("🗑️ ลบข้อมูลผู้ใช้")
         profile_names = [p['name'] for p in user_profiles]
-        selected_name = st.selectbox("เลือกผู้ใช้ที่ต้องการลบ", profile_names, key="delete_user_selector")
+        selected_name = st.selectbox("เลือกผู้ใช้ที่ต้องการลบ (จากผลค้นหาในหน้านี้)", profile_names,
+                                     key="delete_user_selector")
         
         if st.button("ลบข้อมูลผู้ใช้", type="primary", key="delete_user_btn"):
             if delete_user_profile(selected_name):
@@ -516,12 +588,45 @@ elif page == "จัดการข้อมูลผู้ใช้":
 elif page == "ประวัติการคำนวณ":
     st.title("📚 ประวัติการคำนวณ")
     
-    calculations = get_calculations()
+    HISTORY_PAGE_SIZE = 50
+    HISTORY_SORTS = {
+        "วันที่ (ใหม่ไปเก่า)": ('created_at', True),
+        "วันที่ (เก่าไปใหม่)": ('created_at', False),
+        "ภาษี (มากไปน้อย)": ('tax', True),
+        "ภาษี (น้อยไปมาก)": ('tax', False),
+        "รายได้รวม (มากไปน้อย)": ('income', True),
+        "รายได้รวม (น้อยไปมาก)": ('income', False),
+    }
+    col_search, col_sort = st.columns([2, 1])
+    with col_search:
+        name_prefix = st.text_input("ค้นหาตามชื่อ (ขึ้นต้นด้วย)", key="history_name_filter").strip() or None
+    with col_sort:
+        sort_label = st.selectbox("เรียงตาม", list(HISTORY_SORTS), key="history_sort")
+    sort, descending = HISTORY_SORTS[sort_label]
+    with st.expander("ตัวกรองภาษี"):
+        col_min, col_max = st.columns(2)
+        with col_min:
+            min_tax = st.number_input("ภาษีตั้งแต่ (บาท)", min_value=0.0, value=0.0, step=1000.0,
+                                      key="history_min_tax") or None
+        with col_max:
+            max_tax = st.number_input("ภาษีไม่เกิน (บาท, 0 = ไม่จำกัด)", min_value=0.0, value=0.0, step=1000.0,
+                                      key="history_max_tax") or None
+    
+    # ค้นหา เรียง และกรองใน SQL ดึงเฉพาะหน้าที่แสดง
+    cursors = page_cursors('history', (name_prefix, sort_label, min_tax, max_tax))
+    total = count_calculations(name_prefix, min_tax, max_tax)
+    page_data = search_calculations(
+        name_prefix, sort, descending, cursors[-1], HISTORY_PAGE_SIZE,
+        fields=('id', 'name', 'income', 'total_deductions', 'net_income', 'tax', 'created_at'),
+        min_tax=min_tax, max_tax=max_tax
+    )
+    calculations = page_data['calculations']
     
-    if not calculations:
-        st.info("ยังไม่มีประวัติการคำนวณ")
+    if total == 0:
+        filtered = name_prefix or min_tax or max_tax
+        st.info("ไม่พบประวัติที่ตรงกับเงื่อนไข" if filtered else "ยังไม่มีประวัติการคำนวณ")
     else:
-        st.write(f"**จำนวนรายการทั้งหมด: {len(calculations)} รายการ**")
+        st.write(f"**พบ {total:,} รายการ** (หน้า {len(cursors)}, {len(calculations)} รายการ)")
         
         # แสดงตาราง
         df_data = []
@@ -536,15 +641,24 @@ elif page == "ประวัติการคำนวณ":
                 "วันที่": calc['created_at']
             })
         
+        import pandas as pd
+        
         df = pd.DataFrame(df_data)
         st.dataframe(df, use_container_width=True, hide_index=True)
+        page_buttons('history', cursors, page_data['next_cursor'])
         
-        # ส่วนลบข้อมูล
+        # ส่วนลบข้อมูล: ระบุ ID (ดูจากตารางหรือค้นหาด้านบน) แทนการเลือกจากรายการทั้งหมด
         st.subheader("🗑️ ลบข้อมูล")
-        calc_ids = [calc['id'] for calc in calculations]
-        selected_id = st.selectbox("เลือก ID ที่ต้องการลบ", calc_ids)
+        default_id = calculations[0]['id'] if calculations else 1
+        selected_id = int(st.number_input("ID ที่ต้องการลบ", min_value=1, value=default_id, step=1,
+                                          key="delete_calc_id"))
+        selected = get_calculation_by_id(selected_id, fields=('name', 'tax', 'created_at'))
+        if selected is None:
+            st.warning(f"ไม่พบประวัติ ID {selected_id}")
+        else:
+            st.caption(f"{selected['name']} | ภาษี {selected['tax']:,.2f} บาท | {selected['created_at']}")
         
-        if st.button("ลบข้อมูล", type="primary"):
+        if st.button("ลบข้อมูล", type="primary", disabled=selected is None):
             if delete_calculation(selected_id):
                 st.success(f"✅ ลบข้อมูล ID {selected_id} สำเร็จ")
                 st.rerun()
@@ -567,3 +681,29 @@ elif page == "สถิติ":
         with col2:
             st.metric("ภาษีเฉลี่ย", f"{stats['avg_tax']:,.2f} บาท")
             st.metric("รายได้เฉลี่ย", f"{stats['avg_income']:,.2f} บาท")
+        
+        st.subheader("📅 รายวัน (30 วันล่าสุด)")
+        import pandas as pd
+        
+        daily = get_daily_statistics(30)
+        df_daily = pd.DataFrame([{
+            "วันที่": day['day'],
+            "จำนวนการคำนวณ": day['total_calculations'],
+            "ภาษีรวม": day['total_tax'],
+        } for day in reversed(daily)]).set_index("วันที่")
+        st.bar_chart(df_daily["จำนวนการคำนวณ"])
+        
+        st.subheader("📈 แยกตามขั้นภาษีสูงสุด")
+        df_brackets = pd.DataFrame([{
+            "อัตราภาษีสูงสุด": "ยกเว้นภาษี" if bracket['rate'] == 0 else f"{bracket['rate']:.0f}%",
+            "จำนวนการคำนวณ": bracket['total_calculations'],
+            "ภาษีรวม": f"{bracket['total_tax']:,.2f}",
+            "ภาษีเฉลี่ย": f"{bracket['avg_tax']:,.2f}",
+            "รายได้เฉลี่ย": f"{bracket['avg_income']:,.2f}",
+        } for bracket in get_bracket_statistics()])
+        st.dataframe(df_brackets, use_container_width=True, hide_index=True)
+
+# สรุปจำนวน query ของ rerun นี้
+if db_metrics.get_collector() is not None:
+    summary = db_metrics.end_request()
+    st.sidebar.caption(f"🗄️ ฐานข้อมูล: {summary['queries']} queries, {summary['query_ms']:.1f} ms")
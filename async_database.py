@@ -0,0 +1,93 @@
+"""
+ฟังก์ชันฐานข้อมูลแบบ async สำหรับใช้กับ web server แบบ asyncio
+
+ทุกฟังก์ชันเรียกฟังก์ชันชื่อเดียวกันใน database.py ใน thread pool จึงได้ผลลัพธ์รูปแบบเดียวกัน
+และ event loop ไม่ต้องรอ disk I/O การเขียนทั้งหมดผ่าน writer thread เดียว (SQLite เขียนได้
+ทีละ transaction อยู่แล้ว จึงไม่ต้องแย่ง lock กันเอง) ส่วนการอ่านใช้ reader หลาย thread พร้อมกัน
+ได้เพราะฐานข้อมูลเป็น WAL แต่ละ thread มี connection ของตัวเองจาก database.get_connection()
+
+ตัวอย่าง:
+    import async_database as adb
+
+    await adb.init_db()
+    calculation_id = await adb.save_calculation(name, result)
+    page = await adb.get_calculations_page(page_size=50)
+"""
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+
+# จำนวน thread สำหรับอ่าน
+READER_THREADS = 4
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def _executor(kind):
+    """thread pool ของ writer (1 thread) หรือ reader (READER_THREADS thread) สร้างเมื่อใช้ครั้งแรก"""
+    executor = _executors.get(kind)
+    if executor is None:
+        with _lock:
+            executor = _executors.get(kind)
+            if executor is None:
+                workers = 1 if kind == 'writer' else READER_THREADS
+                executor = _executors[kind] = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix=f'tax-db-{kind}'
+                )
+    return executor
+
+
+def _run_in(kind, func):
+    """สร้างฟังก์ชัน async ที่เรียก func ใน thread pool ชนิด kind"""
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor(kind), functools.partial(func, *args, **kwargs))
+    return wrapper
+
+
+def shutdown(wait: bool = True):
+    """
+    หยุด thread pool ทั้งหมด (เรียกตอนปิด server) ถ้าเรียกฟังก์ชันอีกจะสร้าง pool ใหม่
+
+    Args:
+        wait: รองานที่ค้างอยู่ให้เสร็จก่อน
+    """
+    with _lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+# เขียน (writer thread เดียว)
+init_db = _run_in('writer', database.init_db)
+save_calculation = _run_in('writer', database.save_calculation)
+save_calculations_bulk = _run_in('writer', database.save_calculations_bulk)
+delete_calculation = _run_in('writer', database.delete_calculation)
+save_user_profile = _run_in('writer', database.save_user_profile)
+save_user_profiles_bulk = _run_in('writer', database.save_user_profiles_bulk)
+delete_user_profile = _run_in('writer', database.delete_user_profile)
+
+# อ่าน (reader pool)
+get_calculations = _run_in('reader', database.get_calculations)
+get_calculations_page = _run_in('reader', database.get_calculations_page)
+search_calculations = _run_in('reader', database.search_calculations)
+count_calculations = _run_in('reader', database.count_calculations)
+get_calculation_by_id = _run_in('reader', database.get_calculation_by_id)
+get_statistics = _run_in('reader', database.get_statistics)
+get_daily_statistics = _run_in('reader', database.get_daily_statistics)
+get_bracket_statistics = _run_in('reader', database.get_bracket_statistics)
+aggregate_deductions = _run_in('reader', database.aggregate_deductions)
+count_calculations_at_least = _run_in('reader', database.count_calculations_at_least)
+get_user_profiles = _run_in('reader', database.get_user_profiles)
+get_user_profile_by_name = _run_in('reader', database.get_user_profile_by_name)
+search_user_profiles = _run_in('reader', database.search_user_profiles)
+count_user_profiles = _run_in('reader', database.count_user_profiles)
+aggregate_profile_values = _run_in('reader', database.aggregate_profile_values)
@@ -0,0 +1,116 @@
+"""
+เปรียบเทียบเวลาต่อการเรียก database.py ระหว่างการเปิด connection ใหม่ทุกครั้ง (แบบเดิม)
+กับ connection ที่ใช้ซ้ำต่อ thread (WAL, synchronous=NORMAL)
+
+ใช้ฐานข้อมูลชั่วคราว ไม่แตะ tax.db
+
+รันจากโฟลเดอร์หลักของโปรเจกต์:
+    python benchmarks/bench_database.py [จำนวนครั้ง]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+from bench_summary_mode import sample_profiles  # noqa: E402
+from tax_calculator import calculate_tax_record  # noqa: E402
+from tax_models import TaxInput  # noqa: E402
+
+
+def per_call_us(func, count, repeat=3):
+    """เวลาเฉลี่ยต่อการเรียก (ไมโครวินาที) จากรอบที่เร็วที่สุด"""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return best / count * 1e6
+
+
+def fresh_get_user_profiles(db_name):
+    """get_user_profiles() แบบเดิม: เปิดและปิด connection ทุกครั้ง"""
+    conn = sqlite3.connect(db_name)
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute('SELECT id, name, updated_at, created_at FROM user_profiles ORDER BY name').fetchall()
+    profiles = [dict(row) for row in rows]
+    conn.close()
+    return profiles
+
+
+def fresh_save_calculation(db_name, name, record):
+    """save_calculation() แบบเดิม: เปิด connection, INSERT, commit แล้วปิด"""
+    conn = sqlite3.connect(db_name)
+    cursor = conn.cursor()
+    cursor.execute('''
+        INSERT INTO calculations
+        (name, income, total_deductions, net_income, tax, deduction_details, tax_details)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        name, record['income'], record['total_deductions'], record['net_income'], record['tax'],
+        json.dumps(record['deduction_details'], ensure_ascii=False),
+        json.dumps(record['tax_details'], ensure_ascii=False),
+    ))
+    conn.commit()
+    conn.close()
+    return cursor.lastrowid
+
+
+def setup(db_name, profiles):
+    """สร้างตารางและผู้ใช้ตัวอย่าง"""
+    database.DB_NAME = db_name
+    database.init_db()
+    for index, (income_data, deductions_data, withholding_tax) in enumerate(profiles):
+        database.save_user_profile(f'user{index:03d}', income_data, deductions_data, withholding_tax)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    profiles = sample_profiles(50)
+    records = [calculate_tax_record(TaxInput.from_dicts(*profile)).to_calculation_record() for profile in profiles]
+
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        # ฐานข้อมูลแบบเดิมแยกไฟล์ เพราะ journal_mode=WAL ติดอยู่กับไฟล์
+        fresh_db = os.path.join(tmp, 'fresh.db')
+        pooled_db = os.path.join(tmp, 'pooled.db')
+        setup(fresh_db, profiles)
+        database.close_connections()
+        conn = sqlite3.connect(fresh_db)
+        conn.execute('PRAGMA journal_mode = DELETE')
+        conn.close()
+        setup(pooled_db, profiles)
+
+        def save_pooled():
+            for index in range(count):
+                database.save_calculation('bench', records[index % len(records)])
+
+        def save_fresh():
+            for index in range(count):
+                fresh_save_calculation(fresh_db, 'bench', records[index % len(records)])
+
+        cases = [
+            ('get_user_profiles', 'เปิดใหม่ทุกครั้ง',
+             lambda: [fresh_get_user_profiles(fresh_db) for _ in range(count)]),
+            ('get_user_profiles', 'ใช้ connection ซ้ำ',
+             lambda: [database.get_user_profiles() for _ in range(count)]),
+            ('save_calculation', 'เปิดใหม่ทุกครั้ง', save_fresh),
+            ('save_calculation', 'ใช้ connection ซ้ำ', save_pooled),
+        ]
+
+        results = []
+        for name, label, func in cases:
+            results.append((name, label, per_call_us(func, count)))
+        database.close_connections()
+
+    print(f"จำนวนครั้ง: {count:,} ครั้ง")
+    baseline = {}
+    for name, label, elapsed in results:
+        baseline.setdefault(name, elapsed)
+        print(f"{name:<20} {label:<20} {elapsed:10.1f} µs/ครั้ง   x{baseline[name] / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+วัดจำนวนการคำนวณต่อวินาทีของ tax_service.py ผ่าน HTTP (/calculate และ /calculate/batch)
+
+เปิด service ใน process แยกด้วยฐานข้อมูลชั่วคราว แล้วส่ง request จากหลาย client พร้อมกัน
+(keep-alive หนึ่ง connection ต่อ client)
+
+รันจากโฟลเดอร์หลักของโปรเจกต์:
+    python benchmarks/bench_service.py [จำนวน worker] [จำนวนรายการต่อ batch]
+"""
+
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+from bench_summary_mode import sample_profiles  # noqa: E402
+
+
+def free_port():
+    """พอร์ตว่างบนเครื่อง"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=10):
+    """รอจน service ตอบ /health"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/health')
+            conn.getresponse().read()
+            conn.close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise SystemExit("service ไม่ตอบภายในเวลาที่กำหนด")
+
+
+def run_clients(port, path, body, requests_per_client, clients):
+    """ส่ง request เดิมซ้ำจากหลาย thread คืนเวลารวม (วินาที)"""
+    data = json.dumps(body)
+
+    def client():
+        conn = http.client.HTTPConnection('127.0.0.1', port)
+        for _ in range(requests_per_client):
+            conn.request('POST', path, body=data, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                raise RuntimeError(f"{path} ตอบ {response.status}")
+        conn.close()
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    batch_size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    clients = max(2, workers * 2)
+    records = [
+        {'income_data': income_data, 'deductions_data': deductions_data, 'withholding_tax': withholding_tax}
+        for income_data, deductions_data, withholding_tax in sample_profiles(batch_size)
+    ]
+
+    port = free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        service = subprocess.Popen(
+            [sys.executable, os.path.join(PROJECT_DIR, 'tax_service.py'), '--port', str(port),
+             '--workers', str(workers), '--db', os.path.join(tmp, 'bench.db')],
+            env=dict(os.environ, TAX_LOG_LEVEL='WARNING')
+        )
+        try:
+            wait_ready(port)
+            # รอบแรกเติมแคชของทุก worker
+            run_clients(port, '/calculate/batch', {'records': records}, 2, clients)
+            single_count = 200
+            single = run_clients(port, '/calculate', records[0], single_count, clients)
+            batch_count = 5
+            batch = run_clients(port, '/calculate/batch', {'records': records}, batch_count, clients)
+        finally:
+            service.terminate()
+            service.wait()
+
+    print(f"worker: {workers}, client: {clients}, รายการต่อ batch: {batch_size:,}")
+    print(f"/calculate        {single_count * clients / single:12,.0f} รายการ/วินาที")
+    print(f"/calculate/batch  {batch_count * clients * batch_size / batch:12,.0f} รายการ/วินาที")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""
+วัดเวลาเริ่มแอพ (cold start) และเวลาต่อ rerun ของ app.py เทียบกับงบเวลา
+
+- cold start: process ใหม่ที่รัน app.py ครั้งแรก (streamlit.testing.v1.AppTest) ด้วย python -X importtime
+  แสดงเวลารวม (wall-clock) และ module ที่ import นานที่สุด
+- rerun: รัน app.py ซ้ำใน process เดียวกัน (import และฐานข้อมูลพร้อมแล้ว) แสดงค่ามัธยฐานต่อ rerun
+
+รันในโฟลเดอร์ชั่วคราว (tax.db ชั่วคราว) ไม่แตะ tax.db ของโปรเจกต์
+จบด้วย exit code 1 ถ้าเวลาใดเกินงบ
+
+รันจากโฟลเดอร์หลักของโปรเจกต์:
+    python benchmarks/bench_startup.py [--cold-budget-ms 5000] [--rerun-budget-ms 200] [--reruns 20]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(PROJECT_DIR, 'app.py')
+sys.path.insert(0, PROJECT_DIR)
+
+# งบเวลา (มิลลิวินาที)
+COLD_START_BUDGET_MS = 5000
+RERUN_BUDGET_MS = 200
+
+# module ที่ app.py ควรโหลดเมื่อใช้หน้าที่ต้องการเท่านั้น
+LAZY_MODULES = ('pandas',)
+
+# รัน app.py ครั้งแรกใน process ใหม่
+_COLD_START_SCRIPT = '''
+import sys
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(sys.argv[1], default_timeout=60)
+app.run()
+if app.exception:
+    sys.exit(str(app.exception[0].message))
+'''
+
+
+def parse_importtime(output):
+    """
+    แปลงผลของ python -X importtime
+
+    Returns:
+        list ของ (module, cumulative µs, ระดับ) ทุก module ตามลำดับที่ import
+        (ระดับ 0 คือ import โดยตรง ระดับถัดไปคือที่ module อื่น import ต่อ)
+    """
+    modules = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, package = line.split('|', 2)
+        name = package[1:]
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        modules.append((name.strip(), int(cumulative), depth))
+    return modules
+
+
+def measure_cold_start(workdir):
+    """เวลาเริ่มแอพใน process ใหม่ (มิลลิวินาที) และผลของ -X importtime"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_DIR, os.environ.get('PYTHONPATH')])))
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _COLD_START_SCRIPT, APP_PATH],
+        cwd=workdir, env=env, capture_output=True, text=True
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if completed.returncode != 0:
+        lines = [line for line in completed.stderr.splitlines() if not line.startswith('import time:')]
+        raise SystemExit('รัน app.py ไม่สำเร็จ:\n' + '\n'.join(lines))
+    return elapsed_ms, parse_importtime(completed.stderr)
+
+
+def measure_reruns(workdir, count):
+    """เวลาต่อ rerun (มิลลิวินาที) หลังรันครั้งแรกแล้วใน process นี้"""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(workdir)
+    app = AppTest.from_file(APP_PATH, default_timeout=60)
+    app.run()
+    timings = []
+    for _ in range(count):
+        start = time.perf_counter()
+        app.run()
+        timings.append((time.perf_counter() - start) * 1000)
+    if app.exception:
+        raise SystemExit(f'รัน app.py ไม่สำเร็จ: {app.exception[0].message}')
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='วัดเวลาเริ่มแอพและเวลาต่อ rerun ของ app.py')
+    parser.add_argument('--cold-budget-ms', type=float, default=COLD_START_BUDGET_MS,
+                        help=f'งบเวลาเริ่มแอพ (ค่าเริ่มต้น {COLD_START_BUDGET_MS})')
+    parser.add_argument('--rerun-budget-ms', type=float, default=RERUN_BUDGET_MS,
+                        help=f'งบเวลาต่อ rerun (มัธยฐาน, ค่าเริ่มต้น {RERUN_BUDGET_MS})')
+    parser.add_argument('--reruns', type=int, default=20, help='จำนวน rerun ที่วัด')
+    parser.add_argument('--top', type=int, default=10, help='จำนวน module ที่ import นานที่สุดที่แสดง')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cold_ms, modules = measure_cold_start(tmp)
+        timings = measure_reruns(tmp, args.reruns)
+    rerun_ms = statistics.median(timings)
+
+    direct = sorted(((name, us) for name, us, depth in modules if depth == 0),
+                    key=lambda item: item[1], reverse=True)
+    print(f"cold start: {cold_ms:,.0f} ms (import รวม {sum(us for _, us in direct) / 1000:,.0f} ms)")
+    for name, us in direct[:args.top]:
+        print(f"  {name:<30} {us / 1000:10.1f} ms")
+    imported = {name.split('.')[0] for name, _, _ in modules}
+    for name in LAZY_MODULES:
+        print(f"  {name}: {'import ตอนเริ่ม (ควรโหลดเมื่อใช้)' if name in imported else 'ไม่ได้ import ตอนเริ่ม'}")
+    print(f"rerun: มัธยฐาน {rerun_ms:.1f} ms, สูงสุด {max(timings):.1f} ms ({len(timings)} ครั้ง)")
+
+    failures = []
+    if cold_ms > args.cold_budget_ms:
+        failures.append(f"cold start {cold_ms:,.0f} ms เกินงบ {args.cold_budget_ms:,.0f} ms")
+    if rerun_ms > args.rerun_budget_ms:
+        failures.append(f"rerun {rerun_ms:.1f} ms เกินงบ {args.rerun_budget_ms:,.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: อยู่ในงบเวลา")
+
+
+if __name__ == '__main__':
+    main()
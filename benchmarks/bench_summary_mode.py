@@ -0,0 +1,94 @@
+"""
+เปรียบเทียบความเร็วการคำนวณแบบครบถ้วน (detail=True) กับแบบสรุป (detail=False)
+
+รันจากโฟลเดอร์หลักของโปรเจกต์:
+    python benchmarks/bench_summary_mode.py [จำนวนคน]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tax_calculator import calculate_tax_complete, calculate_tax_record  # noqa: E402
+from tax_models import TaxInput  # noqa: E402
+
+
+def sample_profiles(count, seed=2568):
+    """สร้างข้อมูลผู้เสียภาษีตัวอย่างในรูปแบบเดียวกับที่ app.py ส่งเข้ามา"""
+    rng = random.Random(seed)
+    profiles = []
+    for _ in range(count):
+        salary = rng.uniform(15000, 250000)
+        income_data = {
+            'salary_per_month': salary,
+            'salary_months': 12,
+            'bonus': salary * rng.choice([0, 1, 2]),
+            'expense_40_1_2': 100000.0,
+            'income_40_4': rng.choice([0.0, rng.uniform(0, 200000)]),
+            'income_40_5': 0.0,
+            'income_40_6': rng.choice([0.0, rng.uniform(0, 500000)]),
+            'income_40_7': 0.0,
+            'income_40_8': 0.0,
+        }
+        income_data['income_40_1_2'] = income_data['salary_per_month'] * 12 + income_data['bonus']
+        deductions_data = {
+            'personal': 60000.0,
+            'spouse': rng.random() < 0.3,
+            'children': rng.randint(0, 2),
+            'children_2nd': 0,
+            'parents': rng.randint(0, 2),
+            'life_insurance': rng.choice([0.0, rng.uniform(0, 150000)]),
+            'health_insurance_self': rng.choice([0.0, rng.uniform(0, 30000)]),
+            'health_insurance_parent': 0.0,
+            'rmf': rng.choice([0.0, rng.uniform(0, 400000)]),
+            'ssf': rng.choice([0.0, rng.uniform(0, 200000)]),
+            'pvd': rng.choice([0.0, rng.uniform(0, 300000)]),
+            'thai_esg': rng.choice([0.0, rng.uniform(0, 300000)]),
+            'nssf': 0.0,
+            'social_security': 9000.0,
+            'easy_e_receipt': rng.random() < 0.5,
+            'solar_cell': 0.0,
+            'home_construction': 0.0,
+            'home_interest': rng.choice([0.0, rng.uniform(0, 100000)]),
+            'donation': rng.choice([0.0, rng.uniform(0, 50000)]),
+            'education_donation': rng.choice([0.0, rng.uniform(0, 20000)]),
+            'political_donation': 0.0,
+            'social_enterprise': 0.0,
+        }
+        profiles.append((income_data, deductions_data, rng.uniform(0, 100000)))
+    return profiles
+
+
+def per_call_us(func, count, repeat=5):
+    """เวลาเฉลี่ยต่อคน (ไมโครวินาที) จากรอบที่เร็วที่สุด"""
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    return best / count * 1e6
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    profiles = sample_profiles(count)
+    inputs = [TaxInput.from_dicts(*profile) for profile in profiles]
+
+    cases = [
+        ('calculate_tax_complete (detail=True)',
+         lambda: [calculate_tax_complete(*p) for p in profiles]),
+        ('calculate_tax_complete (detail=False)',
+         lambda: [calculate_tax_complete(*p, detail=False) for p in profiles]),
+        ('calculate_tax_record (TaxInput สร้างไว้แล้ว)',
+         lambda: [calculate_tax_record(tax_input).tax for tax_input in inputs]),
+    ]
+
+    baseline = None
+    print(f"จำนวนผู้เสียภาษี: {count:,} คน")
+    for label, func in cases:
+        elapsed = per_call_us(func, count)
+        baseline = baseline or elapsed
+        print(f"{label:<48} {elapsed:8.2f} µs/คน   x{baseline / elapsed:.2f}")
+
+
+if __name__ == '__main__':
+    main()
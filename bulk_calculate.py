@@ -0,0 +1,291 @@
+"""
+คำนวณภาษีจากไฟล์ CSV ของพนักงานจำนวนมาก แล้วเขียนผลเป็นไฟล์ CSV
+
+แต่ละแถวมีคอลัมน์ของ income_data และ deductions_data (ชื่อเดียวกับ key ใน
+calculate_tax_complete()) และ withholding_tax ช่องว่างคือไม่ได้ระบุ ถ้าไม่มี
+income_40_1_2 แต่มี salary_per_month จะคำนวณจาก salary_per_month × salary_months + bonus
+
+อ่านและเขียนทีละก้อน (chunk) จึงใช้หน่วยความจำคงที่ ส่งแต่ละก้อนไปคำนวณแบบ
+batch (tax_batch) ใน process pool ตามจำนวน CPU และเขียนผลตามลำดับแถวเดิม
+ถ้าหยุดกลางคันให้รันซ้ำด้วย --resume เพื่อคำนวณต่อจากแถวที่เขียนไปแล้ว
+
+ตัวอย่าง:
+    python bulk_calculate.py employees.csv results.csv --id-column employee_id
+"""
+
+import argparse
+import csv
+import io
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+
+from tax_batch import SUMMARY_COLUMNS, calculate_tax_batch
+from tax_models import DeductionInput, IncomeInput
+
+
+INCOME_COLUMNS = tuple(IncomeInput.__slots__)
+DEDUCTION_COLUMNS = tuple(DeductionInput.__slots__)
+SALARY_COLUMNS = ('salary_per_month', 'salary_months', 'bonus')
+FLAG_COLUMNS = ('spouse', 'easy_e_receipt')
+
+_TRUE_VALUES = ('1', 'true', 'yes', 'y', 't')
+_FALSE_VALUES = ('', '0', 'false', 'no', 'n', 'f')
+
+# ขนาดบล็อกที่อ่านย้อนจากท้ายไฟล์ผลลัพธ์ตอน --resume
+_TAIL_BLOCK_SIZE = 64 * 1024
+
+
+def _parse_column(cells, key, first_line):
+    """แปลงค่าในคอลัมน์เป็น float array (ช่องว่าง = NaN)"""
+    flag = key in FLAG_COLUMNS
+    if not flag:
+        # ทางลัด: ให้ NumPy แปลงทั้งคอลัมน์ในครั้งเดียว
+        try:
+            values = np.array([cell or 'nan' for cell in cells], dtype=float)
+        except ValueError:
+            pass
+        else:
+            # NaN ต้องมาจากช่องว่างเท่านั้น ('nan'/'inf' ในไฟล์ให้แปลงทีละแถวเพื่อแจ้งแถวที่ผิด)
+            finite = np.isfinite(values)
+            if np.count_nonzero(~finite) == cells.count('') and not (values < 0).any():
+                return values
+
+    # แปลงทีละแถวเพื่อรองรับตัวคั่นหลักพัน และแจ้งแถวที่ผิดพลาด
+    values = np.empty(len(cells))
+    for index, cell in enumerate(cells):
+        text = cell.strip()
+        try:
+            if flag:
+                lowered = text.lower()
+                if lowered in _TRUE_VALUES:
+                    values[index] = 1.0
+                elif lowered in _FALSE_VALUES:
+                    values[index] = 0.0
+                else:
+                    raise ValueError(text)
+            elif text:
+                value = float(text.replace(',', ''))
+                if not math.isfinite(value):
+                    raise ValueError(text)
+                values[index] = value
+            else:
+                values[index] = np.nan
+        except ValueError:
+            raise ValueError(f"แถวที่ {first_line + index}: ค่า {key} ไม่ถูกต้อง: {text!r}") from None
+        if values[index] < 0:
+            raise ValueError(f"แถวที่ {first_line + index}: {key} ต้องไม่ติดลบ ได้รับ {text}")
+    return values
+
+
+def calculate_chunk(rows, fieldnames, first_line, id_column=None, tax_year=None):
+    """
+    คำนวณภาษีของแถวข้อมูลหนึ่งก้อน (ทำงานใน worker process)
+
+    Args:
+        rows: list ของแถวจาก csv.reader
+        fieldnames: ชื่อคอลัมน์ตามหัวตาราง
+        first_line: เลขบรรทัดของแถวแรก (ใช้แจ้งข้อผิดพลาด)
+        id_column: คอลัมน์รหัสที่คัดลอกไปยังผลลัพธ์
+        tax_year: ปีภาษี
+
+    Returns:
+        (จำนวนแถว, ข้อความ CSV ของผลลัพธ์) แต่ละแถวคือรหัส ตามด้วยค่าตาม SUMMARY_COLUMNS
+        (แปลงเป็นข้อความใน worker เพื่อไม่ให้ process หลักเป็นคอขวด)
+    """
+    width = len(fieldnames)
+    rows = [row if len(row) == width else (row + [''] * width)[:width] for row in rows]
+    columns = dict(zip(fieldnames, zip(*rows)))
+
+    income_columns = {
+        key: _parse_column(columns[key], key, first_line) for key in INCOME_COLUMNS if key in columns
+    }
+    deduction_columns = {
+        key: _parse_column(columns[key], key, first_line) for key in DEDUCTION_COLUMNS if key in columns
+    }
+
+    if 'salary_per_month' in columns:
+        salary = {key: _parse_column(columns[key], key, first_line) for key in SALARY_COLUMNS if key in columns}
+        months = np.nan_to_num(salary.get('salary_months', np.full(len(rows), 12.0)), nan=12.0)
+        from_salary = (np.nan_to_num(salary['salary_per_month']) * months
+                       + np.nan_to_num(salary.get('bonus', np.zeros(len(rows)))))
+        income_40_1_2 = income_columns.get('income_40_1_2')
+        if income_40_1_2 is None:
+            income_columns['income_40_1_2'] = from_salary
+        else:
+            income_columns['income_40_1_2'] = np.where(np.isnan(income_40_1_2), from_salary, income_40_1_2)
+
+    withholding_tax = (_parse_column(columns['withholding_tax'], 'withholding_tax', first_line)
+                       if 'withholding_tax' in columns else 0)
+    result = calculate_tax_batch(income_columns, deduction_columns, withholding_tax, tax_year=tax_year)
+
+    output = zip(*(result[key].tolist() for key in SUMMARY_COLUMNS))
+    if id_column:
+        output = ((row_id,) + values for row_id, values in zip(columns[id_column], output))
+    text = io.StringIO()
+    csv.writer(text).writerows(output)
+    return len(rows), text.getvalue()
+
+
+def _last_line_end(f):
+    """ตำแหน่งถัดจากตัวขึ้นบรรทัดใหม่ตัวสุดท้ายของไฟล์ (อ่านย้อนจากท้ายไฟล์ทีละบล็อก)"""
+    position = f.seek(0, os.SEEK_END)
+    while position > 0:
+        start = max(0, position - _TAIL_BLOCK_SIZE)
+        f.seek(start)
+        index = f.read(position - start).rfind(b'\n')
+        if index >= 0:
+            return start + index + 1
+        position = start
+    return 0
+
+
+def _completed_rows(path, header):
+    """
+    นับแถวผลลัพธ์ที่เขียนครบแล้วในไฟล์เดิม (ตัดบรรทัดสุดท้ายที่เขียนไม่ครบทิ้ง)
+
+    อ่านไฟล์ทีละแถวจึงใช้หน่วยความจำคงที่แม้ไฟล์ผลลัพธ์ใหญ่
+
+    Args:
+        path: ไฟล์ผลลัพธ์
+        header: หัวตารางที่ต้องตรงกับไฟล์เดิม
+
+    Returns:
+        จำนวนแถวข้อมูล (ไม่รวมหัวตาราง) หรือ None ถ้ายังไม่มีไฟล์/หัวตาราง
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb+') as f:
+        end = _last_line_end(f)
+        if end < f.seek(0, os.SEEK_END):
+            f.truncate(end)
+    if end == 0:
+        return None
+
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        existing = next(reader)
+        if existing != header:
+            raise ValueError(f"หัวตารางของ {path} ไม่ตรงกับผลลัพธ์ที่จะเขียนต่อ: "
+                             f"{','.join(existing)} (ต้องเป็น {','.join(header)})")
+        return sum(1 for _ in reader)
+
+
+def _chunks(reader, chunk_size):
+    """แบ่งแถวจาก csv reader เป็นก้อนละ chunk_size แถว"""
+    while True:
+        chunk = list(islice(reader, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run(input_path, output_path, chunk_size=10000, workers=None, id_column=None,
+        tax_year=None, resume=False, progress=sys.stderr):
+    """
+    คำนวณภาษีทั้งไฟล์
+
+    Args:
+        input_path: ไฟล์ CSV ข้อมูลเข้า
+        output_path: ไฟล์ CSV ผลลัพธ์
+        chunk_size: จำนวนแถวต่อก้อน
+        workers: จำนวน process (None = จำนวน CPU, 1 = คำนวณใน process นี้)
+        id_column: คอลัมน์รหัสที่คัดลอกไปยังผลลัพธ์ (None = ใช้ 'id' ถ้ามี)
+        tax_year: ปีภาษี
+        resume: คำนวณต่อจากแถวที่มีในไฟล์ผลลัพธ์แล้ว
+        progress: stream สำหรับแสดงความคืบหน้า (None = ไม่แสดง)
+
+    Returns:
+        จำนวนแถวที่คำนวณในรอบนี้
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with open(input_path, newline='', encoding='utf-8-sig') as input_file:
+        reader = csv.reader(input_file)
+        fieldnames = [name.strip() for name in next(reader, [])]
+        if id_column is None and 'id' in fieldnames:
+            id_column = 'id'
+        if id_column and id_column not in fieldnames:
+            raise ValueError(f"ไม่มีคอลัมน์ {id_column} ในไฟล์ {input_path}")
+        header = ([id_column] if id_column else []) + SUMMARY_COLUMNS
+        done = _completed_rows(output_path, header) if resume else None
+
+        if done is not None:
+            # ข้ามแถวที่คำนวณแล้ว
+            for _ in islice(reader, done):
+                pass
+            output_file = open(output_path, 'a', newline='', encoding='utf-8')
+        else:
+            done = 0
+            output_file = open(output_path, 'w', newline='', encoding='utf-8')
+
+        with output_file:
+            writer = csv.writer(output_file)
+            if output_file.tell() == 0:
+                writer.writerow(header)
+
+            started = time.perf_counter()
+            written = 0
+
+            def write(chunk_result):
+                nonlocal written
+                count, text = chunk_result
+                output_file.write(text)
+                output_file.flush()
+                written += count
+                if progress is not None:
+                    elapsed = time.perf_counter() - started
+                    rate = written / elapsed if elapsed > 0 else 0
+                    progress.write(f"\r{done + written:,} แถว ({rate:,.0f} แถว/วินาที)")
+                    progress.flush()
+
+            first_line = done + 2  # บรรทัดที่ 1 คือหัวตาราง
+            if workers == 1:
+                for chunk in _chunks(reader, chunk_size):
+                    write(calculate_chunk(chunk, fieldnames, first_line, id_column, tax_year))
+                    first_line += len(chunk)
+            else:
+                # ส่งงานล่วงหน้าไม่เกิน 2 ก้อนต่อ worker เพื่อจำกัดหน่วยความจำ และเขียนผลตามลำดับ
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    pending = deque()
+                    for chunk in _chunks(reader, chunk_size):
+                        pending.append(executor.submit(calculate_chunk, chunk, fieldnames, first_line, id_column, tax_year))
+                        first_line += len(chunk)
+                        if len(pending) >= workers * 2:
+                            write(pending.popleft().result())
+                    while pending:
+                        write(pending.popleft().result())
+
+            if progress is not None:
+                progress.write("\n")
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="คำนวณภาษีจากไฟล์ CSV ของพนักงานจำนวนมาก")
+    parser.add_argument('input', help="ไฟล์ CSV ข้อมูลเข้า")
+    parser.add_argument('output', help="ไฟล์ CSV ผลลัพธ์")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="จำนวนแถวต่อก้อน (ค่าเริ่มต้น 10000)")
+    parser.add_argument('--workers', type=int, default=None, help="จำนวน process (ค่าเริ่มต้นคือจำนวน CPU)")
+    parser.add_argument('--id-column', default=None, help="คอลัมน์รหัสที่คัดลอกไปยังผลลัพธ์ (ค่าเริ่มต้น 'id' ถ้ามี)")
+    parser.add_argument('--tax-year', type=int, default=None, help="ปีภาษี (พ.ศ.)")
+    parser.add_argument('--resume', action='store_true', help="คำนวณต่อจากแถวที่มีในไฟล์ผลลัพธ์แล้ว")
+    args = parser.parse_args(argv)
+
+    try:
+        run(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+            id_column=args.id_column, tax_year=args.tax_year, resume=args.resume)
+    except ValueError as e:
+        print(f"\nข้อผิดพลาด: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
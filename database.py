@@ -2,28 +2,214 @@
 โมดูลจัดการฐานข้อมูล SQLite สำหรับบันทึกผลการคำนวณภาษี
 """
 
+import atexit
+import copy
+import hashlib
+import logging
 import sqlite3
 import json
+import threading
 from datetime import datetime
-from typing import List, Dict, Optional
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from db_metrics import InstrumentedConnection, instrumented
+from tax_calculator import TAX_BRACKETS
 
 
 DB_NAME = 'tax.db'
 
+# ข้อความ debug เปิดด้วย logging.getLogger('database').setLevel(logging.DEBUG)
+logger = logging.getLogger(__name__)
 
-def get_connection():
-    """สร้าง connection กับฐานข้อมูล"""
-    conn = sqlite3.connect(DB_NAME)
+# ค่าตั้งต้นของ connection
+BUSY_TIMEOUT_MS = 5000  # รอ lock ของ writer อื่นได้นานสุด (มิลลิวินาที)
+CACHE_SIZE_KIB = 16384  # page cache ต่อ connection (16 MB)
+
+# connection ของแต่ละ thread (แยกตาม DB_NAME) และทะเบียน connection ทั้งหมดสำหรับปิดตอนจบ
+_local = threading.local()
+_registry = []
+_registry_lock = threading.Lock()
+_generation = 0
+
+
+def _open_connection(db_name):
+    """เปิด connection ใหม่พร้อมตั้งค่า PRAGMA"""
+    # check_same_thread=False เพื่อให้ close_connections() ปิดจาก thread อื่นได้
+    # (แต่ละ connection ยังใช้งานใน thread ที่สร้างเท่านั้น)
+    # InstrumentedConnection วัดทุก statement เมื่อเปิด db_metrics (ปิดอยู่แทบไม่มีต้นทุน)
+    conn = sqlite3.connect(db_name, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False,
+                           factory=InstrumentedConnection)
     conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{CACHE_SIZE_KIB}')
     return conn
 
 
-def init_db():
-    """สร้างตารางฐานข้อมูลถ้ายังไม่มี"""
-    conn = get_connection()
-    cursor = conn.cursor()
+def get_connection():
+    """
+    ดึง connection กับฐานข้อมูลของ thread ปัจจุบัน
+
+    สร้างครั้งแรกครั้งเดียวต่อ thread แล้วใช้ซ้ำ (WAL, busy_timeout, synchronous=NORMAL)
+    ผู้เรียกไม่ต้องปิด connection เอง
+    """
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.generation != _generation:
+        connections = _local.connections = {}
+        _local.generation = _generation
+
+    conn = connections.get(DB_NAME)
+    if conn is None:
+        conn = connections[DB_NAME] = _open_connection(DB_NAME)
+        with _registry_lock:
+            # ปิด connection ของ thread ที่จบไปแล้ว (เช่น thread ของ Streamlit rerun ก่อนหน้า)
+            alive = []
+            for thread, old_conn in _registry:
+                if thread.is_alive():
+                    alive.append((thread, old_conn))
+                else:
+                    old_conn.close()
+            alive.append((threading.current_thread(), conn))
+            _registry[:] = alive
+    return conn
+
+
+def close_connections():
+    """ปิด connection ทั้งหมดของทุก thread (เรียกอัตโนมัติเมื่อจบโปรแกรม)"""
+    global _generation
+    with _registry_lock:
+        for _, conn in _registry:
+            conn.close()
+        _registry.clear()
+        _generation += 1
+
+
+atexit.register(close_connections)
+
+
+# จำนวนครั้งที่แต่ละตารางถูกเขียนผ่านโมดูลนี้ (แยกตาม DB_NAME) ให้แคชของ db_cache รู้ว่าข้อมูลเปลี่ยน
+_write_generations = {}
+_write_generations_lock = threading.Lock()
+
+
+def _mark_written(table):
+    """เพิ่ม generation ของตารางหลังเขียนสำเร็จ"""
+    key = (DB_NAME, table)
+    with _write_generations_lock:
+        _write_generations[key] = _write_generations.get(key, 0) + 1
+
+
+def write_generation(table: str) -> int:
+    """
+    generation ของตาราง (เพิ่มขึ้นทุกครั้งที่ save_*/delete_* ใน process นี้เขียนตารางนั้นสำเร็จ)
     
-    cursor.execute('''
+    Args:
+        table: 'calculations' (รวมสถิติและ calculation_deductions) หรือ 'user_profiles' (รวม profile_values)
+    
+    Returns:
+        จำนวนครั้งที่เขียน (0 ถ้ายังไม่เคยเขียน)
+    """
+    return _write_generations.get((DB_NAME, table), 0)
+
+
+def _bracket_rate_sql(net_income):
+    """
+    SQL หาอัตราภาษี (เปอร์เซ็นต์ 0 = ไม่เสียภาษี) ของขั้นที่เงินได้สุทธิ net_income อยู่
+
+    ใช้ขอบขั้นของ TAX_BRACKETS แบบเดียวกับ TaxTable.tax() (ขั้นสุดท้ายที่ min_income < เงินได้สุทธิ)
+    จึงได้ขั้นของเงินได้สุทธิสุดท้ายหลังหักเงินบริจาค ไม่ขึ้นกับ tax_details ที่บันทึกไว้
+    """
+    cases = ' '.join(f'WHEN {net_income} > {min_income!r} THEN {rate * 100!r}'
+                     for min_income, _, rate in reversed(TAX_BRACKETS))
+    return f'CASE {cases} ELSE 0 END'
+
+
+def _statistics_sql(row, sign):
+    """
+    SQL ปรับตารางสถิติสะสมเมื่อแถว row ('NEW' หรือ 'OLD') ของ calculations ถูกเพิ่ม (sign='+')
+    หรือถูกลบ (sign='-')
+    """
+    statements = [
+        f'''UPDATE calculation_totals SET
+            calculation_count = calculation_count {sign} 1,
+            total_tax = total_tax {sign} {row}.tax,
+            total_income = total_income {sign} {row}.income
+        WHERE id = 1''',
+    ]
+    for table, key, value in (('calculation_daily', 'day', f'date({row}.created_at)'),
+                              ('calculation_brackets', 'rate', _bracket_rate_sql(f'{row}.net_income'))):
+        statements.append(f'''INSERT INTO {table} ({key}, calculation_count, total_tax, total_income)
+        VALUES ({value}, {sign}1, {sign}{row}.tax, {sign}{row}.income)
+        ON CONFLICT ({key}) DO UPDATE SET
+            calculation_count = calculation_count + excluded.calculation_count,
+            total_tax = total_tax + excluded.total_tax,
+            total_income = total_income + excluded.total_income''')
+        if sign == '-':
+            statements.append(f'DELETE FROM {table} WHERE calculation_count <= 0')
+    if sign == '-':
+        # ตั้งผลรวมเป็น 0 พอดีเมื่อไม่มีข้อมูลเหลือ (กันเศษทศนิยมสะสม)
+        statements.append('''UPDATE calculation_totals SET total_tax = 0, total_income = 0
+        WHERE id = 1 AND calculation_count = 0''')
+    return ';\n'.join(statements) + ';'
+
+
+def _json_values_sql(owner_id, source, table=None):
+    """
+    SQL แตก JSON object ในคอลัมน์ source เป็นแถว (owner_id, key, ค่าตัวเลข) เฉพาะค่าที่ไม่เป็น 0
+    (true = 1) table คือตารางของ source เมื่อแตกทุกแถว (None = แถวเดียวใน trigger)
+    """
+    tables = f'{table}, ' if table else ''
+    return (f"SELECT {owner_id}, item.key, CASE item.type WHEN 'true' THEN 1 ELSE item.value END "
+            f"FROM {tables}json_each(CASE WHEN json_valid({source}) THEN {source} ELSE '{{}}' END) AS item "
+            f"WHERE item.type IN ('integer', 'real', 'true') AND item.value != 0")
+
+
+# ส่วนของข้อมูลผู้ใช้ใน profile_values และคอลัมน์ JSON ต้นทาง
+_PROFILE_SECTION_COLUMNS = (('income', 'income_data'), ('deductions', 'deductions_data'))
+
+
+def _profile_values_sql(row, table=None):
+    """
+    รายการ SQL เพิ่มแถว profile_values ของแถว row ใน user_profiles
+    ('NEW' ใน trigger หรือ 'user_profiles' พร้อม table เมื่อแตกทุกแถว)
+    """
+    return [
+        f'''INSERT INTO profile_values (profile_id, section, key, value)
+        {_json_values_sql(f"{row}.id, '{section}'", f'{row}.{column}', table)}'''
+        for section, column in _PROFILE_SECTION_COLUMNS
+    ]
+
+
+# trigger ที่ปรับ profile_values ตาม user_profiles (สร้างใหม่เมื่อสร้างตาราง user_profiles ใหม่)
+_PROFILE_VALUES_TRIGGERS = (
+    f'''
+    CREATE TRIGGER user_profiles_values_insert AFTER INSERT ON user_profiles BEGIN
+    {';'.join(_profile_values_sql('NEW'))};
+    END
+    ''',
+    '''
+    CREATE TRIGGER user_profiles_values_delete AFTER DELETE ON user_profiles BEGIN
+    DELETE FROM profile_values WHERE profile_id = OLD.id;
+    END
+    ''',
+    f'''
+    CREATE TRIGGER user_profiles_values_update
+    AFTER UPDATE OF income_data, deductions_data ON user_profiles BEGIN
+    DELETE FROM profile_values WHERE profile_id = OLD.id;
+    {';'.join(_profile_values_sql('NEW'))};
+    END
+    ''',
+)
+
+
+# ขั้นตอนปรับโครงสร้างฐานข้อมูลตามลำดับ เวอร์ชันที่ใช้แล้วเก็บใน PRAGMA user_version
+# (เพิ่มขั้นตอนใหม่ต่อท้ายเท่านั้น ห้ามแก้ขั้นตอนเดิม)
+MIGRATIONS = (
+    # 1: ตารางเริ่มต้น (IF NOT EXISTS เพื่อรองรับฐานข้อมูลเดิมที่ยังไม่มี user_version)
+    (
+        '''
         CREATE TABLE IF NOT EXISTS calculations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
@@ -35,10 +221,9 @@ def init_db():
             tax_details TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
-    
-    # ตารางสำหรับเก็บข้อมูลผู้ใช้
-    cursor.execute('''
+        ''',
+        # ตารางสำหรับเก็บข้อมูลผู้ใช้ (UNIQUE สร้างดัชนีของ name ให้ จึงเรียงตามชื่อได้โดยไม่ต้อง sort)
+        '''
         CREATE TABLE IF NOT EXISTS user_profiles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL UNIQUE,
@@ -48,26 +233,218 @@ def init_db():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    ''')
+        ''',
+    ),
+    # 2: ดัชนีสำหรับประวัติการคำนวณ (ดัชนีมี id ต่อท้ายเสมอ จึงเรียง created_at, id ได้ทันที)
+    (
+        'CREATE INDEX IF NOT EXISTS idx_calculations_created_at ON calculations (created_at)',
+        'CREATE INDEX IF NOT EXISTS idx_calculations_name_created_at ON calculations (name, created_at)',
+    ),
+    # 3: สถิติสะสม (รวม รายวัน และตามขั้นภาษีของเงินได้สุทธิ) ปรับโดย trigger ทุกครั้งที่เพิ่ม/ลบ/แก้ไข
+    # calculations อ่านได้ทันทีโดยไม่ต้องสแกนตาราง แล้วเติมค่าจากข้อมูลเดิม
+    (
+        '''
+        CREATE TABLE calculation_totals (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            calculation_count INTEGER NOT NULL,
+            total_tax REAL NOT NULL,
+            total_income REAL NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE calculation_daily (
+            day TEXT PRIMARY KEY,
+            calculation_count INTEGER NOT NULL,
+            total_tax REAL NOT NULL,
+            total_income REAL NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE calculation_brackets (
+            rate REAL PRIMARY KEY,
+            calculation_count INTEGER NOT NULL,
+            total_tax REAL NOT NULL,
+            total_income REAL NOT NULL
+        )
+        ''',
+        '''
+        INSERT INTO calculation_totals
+        SELECT 1, COUNT(*), COALESCE(SUM(tax), 0), COALESCE(SUM(income), 0) FROM calculations
+        ''',
+        '''
+        INSERT INTO calculation_daily
+        SELECT date(created_at), COUNT(*), SUM(tax), SUM(income) FROM calculations GROUP BY 1
+        ''',
+        f'''
+        INSERT INTO calculation_brackets
+        SELECT {_bracket_rate_sql('net_income')} AS bracket_rate, COUNT(*), SUM(tax), SUM(income)
+        FROM calculations GROUP BY bracket_rate
+        ''',
+        f'''
+        CREATE TRIGGER calculations_statistics_insert AFTER INSERT ON calculations BEGIN
+        {_statistics_sql('NEW', '+')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER calculations_statistics_delete AFTER DELETE ON calculations BEGIN
+        {_statistics_sql('OLD', '-')}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER calculations_statistics_update
+        AFTER UPDATE OF income, net_income, tax, created_at ON calculations BEGIN
+        {_statistics_sql('OLD', '-')}
+        {_statistics_sql('NEW', '+')}
+        END
+        ''',
+    ),
+    # 4: แตก JSON ค่าลดหย่อนของ calculations และข้อมูลของ user_profiles เป็นตารางลูก (key, ค่า)
+    # ปรับโดย trigger และเติมจากข้อมูลเดิม เพื่อให้รวมยอด/กรองตาม key ได้ใน SQL ด้วยดัชนี
+    # (เก็บเฉพาะค่าที่ไม่เป็น 0 คอลัมน์ JSON เดิมยังคงเป็นข้อมูลหลัก)
+    (
+        '''
+        CREATE TABLE calculation_deductions (
+            calculation_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (calculation_id, key)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX idx_calculation_deductions_key ON calculation_deductions (key, amount)',
+        '''
+        CREATE TABLE profile_values (
+            profile_id INTEGER NOT NULL,
+            section TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value REAL NOT NULL,
+            PRIMARY KEY (profile_id, section, key)
+        ) WITHOUT ROWID
+        ''',
+        'CREATE INDEX idx_profile_values_key ON profile_values (section, key, value)',
+        f'''
+        INSERT INTO calculation_deductions (calculation_id, key, amount)
+        {_json_values_sql('calculations.id', 'calculations.deduction_details', 'calculations')}
+        ''',
+        *_profile_values_sql('user_profiles', 'user_profiles'),
+        f'''
+        CREATE TRIGGER calculations_deductions_insert AFTER INSERT ON calculations BEGIN
+        INSERT INTO calculation_deductions (calculation_id, key, amount)
+        {_json_values_sql('NEW.id', 'NEW.deduction_details')};
+        END
+        ''',
+        '''
+        CREATE TRIGGER calculations_deductions_delete AFTER DELETE ON calculations BEGIN
+        DELETE FROM calculation_deductions WHERE calculation_id = OLD.id;
+        END
+        ''',
+        f'''
+        CREATE TRIGGER calculations_deductions_update AFTER UPDATE OF deduction_details ON calculations BEGIN
+        DELETE FROM calculation_deductions WHERE calculation_id = OLD.id;
+        INSERT INTO calculation_deductions (calculation_id, key, amount)
+        {_json_values_sql('NEW.id', 'NEW.deduction_details')};
+        END
+        ''',
+        *_PROFILE_VALUES_TRIGGERS,
+    ),
+    # 5: hash ของข้อมูลผู้ใช้สำหรับ save_user_profile(skip_unchanged=True) และเลิกใช้ AUTOINCREMENT
+    # ของ user_profiles: UPSERT ที่ชนชื่อเดิมจองเลขลำดับไปหนึ่งเลขเสมอแม้จะกลายเป็น UPDATE ทำให้ ID
+    # ของผู้ใช้ใหม่กระโดด ส่วน rowid ปกติต่อจาก ID สูงสุดในตาราง (ID เดิมคงที่ ตารางลูกลบตาม trigger)
+    # SQLite เปลี่ยน AUTOINCREMENT ด้วย ALTER ไม่ได้จึงสร้างตารางใหม่แล้วคัดลอกข้อมูล
+    # (content_hash ของแถวเดิมเป็น NULL จึงถูกเขียนใหม่หนึ่งครั้งในการบันทึกครั้งถัดไป)
+    (
+        '''
+        CREATE TABLE user_profiles_new (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            income_data TEXT NOT NULL,
+            deductions_data TEXT NOT NULL,
+            withholding_tax REAL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            content_hash TEXT
+        )
+        ''',
+        '''
+        INSERT INTO user_profiles_new
+        (id, name, income_data, deductions_data, withholding_tax, updated_at, created_at)
+        SELECT id, name, income_data, deductions_data, withholding_tax, updated_at, created_at
+        FROM user_profiles
+        ''',
+        # DROP TABLE ลบ trigger ของตารางเดิมก่อน profile_values จึงไม่ถูกลบตาม
+        'DROP TABLE user_profiles',
+        'ALTER TABLE user_profiles_new RENAME TO user_profiles',
+        "DELETE FROM sqlite_sequence WHERE name = 'user_profiles'",
+        *_PROFILE_VALUES_TRIGGERS,
+    ),
+    # 6: ดัชนีเรียง (คอลัมน์ที่เรียง, id, name) สำหรับตารางประวัติ/ผู้ใช้ในหน้าเว็บ (search_calculations,
+    # search_user_profiles) เรียง (sort, id) ตามดัชนีได้ และค้นชื่อที่ขึ้นต้นด้วยข้อความแล้วเรียงตาม
+    # วันที่/ภาษี/รายได้ได้โดยไล่ดัชนีและกรองชื่อในดัชนี (ไม่ต้องเรียงในหน่วยความจำ)
+    # ดัชนี created_at ของขั้นที่ 2 ซ้ำซ้อนกับดัชนีใหม่จึงลบทิ้ง
+    (
+        'CREATE INDEX idx_calculations_created_at_name ON calculations (created_at, id, name)',
+        'CREATE INDEX idx_calculations_tax_name ON calculations (tax, id, name)',
+        'CREATE INDEX idx_calculations_income_name ON calculations (income, id, name)',
+        'CREATE INDEX idx_user_profiles_updated_at_name ON user_profiles (updated_at, id, name)',
+        'DROP INDEX idx_calculations_created_at',
+    ),
+)
+
+
+@instrumented
+def init_db():
+    """สร้างตารางฐานข้อมูลถ้ายังไม่มี และปรับโครงสร้างเป็นเวอร์ชันล่าสุดตาม MIGRATIONS"""
+    conn = get_connection()
+    
+    while True:
+        with conn:
+            # BEGIN IMMEDIATE กันไม่ให้หลาย process ปรับโครงสร้างขั้นเดียวกันซ้ำ
+            conn.execute('BEGIN IMMEDIATE')
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version >= len(MIGRATIONS):
+                break
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+        logger.info("Database migrated: %s -> version %d", DB_NAME, version + 1)
     
-    conn.commit()
-    conn.close()
-    print(f"[DEBUG] Database initialized: {DB_NAME}")
+    logger.debug("Database initialized: %s", DB_NAME)
 
 
-def save_calculation(name: str, calculation_result: Dict) -> int:
+# ไฟล์ฐานข้อมูลที่ init_db_once() เตรียมแล้วใน process นี้
+_initialized = set()
+_initialized_lock = threading.Lock()
+
+
+def init_db_once():
     """
-    บันทึกผลการคำนวณภาษี
+    เรียก init_db() ครั้งแรกครั้งเดียวต่อ DB_NAME ต่อ process
     
-    Args:
-        name: ชื่อผู้ใช้
-        calculation_result: ผลการคำนวณจาก calculate_tax_complete()
-    
-    Returns:
-        calculation_id: ID ของการคำนวณที่บันทึก
+    สำหรับโค้ดที่รันซ้ำบ่อย (เช่น app.py ทุก Streamlit rerun) ครั้งต่อไปไม่แตะฐานข้อมูลเลย
     """
-    conn = get_connection()
-    cursor = conn.cursor()
+    if DB_NAME in _initialized:
+        return
+    with _initialized_lock:
+        db_name = DB_NAME
+        if db_name not in _initialized:
+            init_db()
+            _initialized.add(db_name)
+
+
+_INSERT_CALCULATION = '''
+    INSERT INTO calculations 
+    (name, income, total_deductions, net_income, tax, deduction_details, tax_details)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+# จำนวนแถวต่อ transaction ของการบันทึกแบบกลุ่ม
+BULK_BATCH_SIZE = 5000
+
+
+def _calculation_row(name, calculation_result):
+    """แปลงผลการคำนวณเป็นค่าสำหรับ _INSERT_CALCULATION"""
+    # รองรับ TaxResult จาก tax_calculator.calculate_tax_record()
+    if hasattr(calculation_result, 'to_calculation_record'):
+        calculation_result = calculation_result.to_calculation_record()
     
     # แปลง dictionary เป็น JSON string
     deduction_details_json = json.dumps(calculation_result.get('deduction_details', {}), ensure_ascii=False)
@@ -81,11 +458,7 @@ def save_calculation(name: str, calculation_result: Dict) -> int:
         for detail in calculation_result.get('tax_details', [])
     ], ensure_ascii=False)
     
-    cursor.execute('''
-        INSERT INTO calculations 
-        (name, income, total_deductions, net_income, tax, deduction_details, tax_details)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    ''', (
+    return (
         name,
         calculation_result['income'],
         calculation_result['total_deductions'],
@@ -93,91 +466,450 @@ def save_calculation(name: str, calculation_result: Dict) -> int:
         calculation_result['tax'],
         deduction_details_json,
         tax_details_json
-    ))
+    )
+
+
+def _batches(items, batch_size):
+    """แบ่ง iterable เป็น list ละ batch_size รายการ"""
+    items = iter(items)
+    while True:
+        batch = list(islice(items, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+@instrumented
+def save_calculation(name: str, calculation_result: Dict) -> int:
+    """
+    บันทึกผลการคำนวณภาษี
+    
+    Args:
+        name: ชื่อผู้ใช้
+        calculation_result: ผลการคำนวณจาก calculate_tax_complete() หรือ TaxResult
+    
+    Returns:
+        calculation_id: ID ของการคำนวณที่บันทึก
+    """
+    row = _calculation_row(name, calculation_result)
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # with conn: commit เมื่อสำเร็จ / rollback เมื่อผิดพลาด (connection ใช้ซ้ำจึงต้องไม่ค้าง transaction)
+    with conn:
+        cursor.execute(_INSERT_CALCULATION, row)
+    _mark_written('calculations')
     
     calculation_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
     
-    print(f"[DEBUG] Calculation saved: ID={calculation_id}, Name={name}, Tax={calculation_result['tax']:,.2f}")
+    logger.debug("Calculation saved: ID=%s, Name=%s, Tax=%.2f", calculation_id, name, row[4])
     return calculation_id
 
 
-def get_calculations(limit: Optional[int] = None) -> List[Dict]:
+@instrumented
+def save_calculations_bulk(calculations: Iterable[Tuple[str, Dict]],
+                           batch_size: int = BULK_BATCH_SIZE) -> List[int]:
+    """
+    บันทึกผลการคำนวณภาษีหลายรายการ (executemany และ commit ทุก batch_size รายการ)
+    
+    Args:
+        calculations: iterable หรือ generator ของ (ชื่อผู้ใช้, ผลการคำนวณ) แบบเดียวกับ save_calculation()
+        batch_size: จำนวนรายการต่อ transaction
+    
+    Returns:
+        list ของ ID ตามลำดับที่ส่งเข้ามา
+    """
+    query = _INSERT_CALCULATION + ' RETURNING id'
+    conn = get_connection()
+    ids = []
+    for batch in _batches(calculations, batch_size):
+        rows = [_calculation_row(name, result) for name, result in batch]
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            # executemany คืนผลของ RETURNING ไม่ได้ จึงรันทีละแถว (statement ที่เตรียมแล้วใช้ซ้ำ)
+            # ได้ ID ของแต่ละแถวจริงโดยไม่ต้องเดาว่า ID ต่อเนื่องกัน
+            saved = [conn.execute(query, row).fetchone()[0] for row in rows]
+        if saved:
+            _mark_written('calculations')
+        ids.extend(saved)
+    
+    logger.debug("Calculations saved: %d rows", len(ids))
+    return ids
+
+
+# query อ่านประวัติการคำนวณ ({columns} คือคอลัมน์ที่เลือกจาก CALCULATION_FIELDS)
+_SELECT_CALCULATIONS = 'SELECT {columns} FROM calculations ORDER BY created_at DESC, id DESC'
+_SELECT_CALCULATIONS_BY_NAME = 'SELECT {columns} FROM calculations WHERE name = ? ORDER BY created_at DESC, id DESC'
+
+# หน้าถัดไปของประวัติ: เริ่มหาจากตำแหน่ง (created_at, id) ของแถวสุดท้ายในดัชนีโดยตรง
+_SELECT_CALCULATIONS_PAGE = '''
+    SELECT {columns} FROM calculations
+    WHERE (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC LIMIT ?
+'''
+_SELECT_CALCULATIONS_PAGE_BY_NAME = '''
+    SELECT {columns} FROM calculations
+    WHERE name = ? AND (created_at, id) < (?, ?)
+    ORDER BY created_at DESC, id DESC LIMIT ?
+'''
+
+# field ของประวัติการคำนวณที่เลือกได้ (ค่าเริ่มต้นคือทั้งหมด)
+CALCULATION_FIELDS = ('id', 'name', 'income', 'total_deductions', 'net_income', 'tax',
+                      'deduction_details', 'tax_details', 'created_at')
+
+# field ที่เก็บเป็น JSON และค่าเมื่อว่าง
+_JSON_FIELDS = {'deduction_details': dict, 'tax_details': list}
+
+_NOT_DECODED = object()
+
+
+class LazyJSON:
+    """
+    ค่า JSON ที่แปลงด้วย json.loads เมื่อถูกใช้งานครั้งแรกเท่านั้น
+    
+    ใช้งานได้เหมือน dict/list ที่แปลงแล้ว (เช่น ['key'], .items(), len(), for, ==)
+    ถ้าต้องการ object จริง (เช่น ส่งให้ json.dumps หรือ pandas) ใช้ .value
+    """
+    
+    __slots__ = ('_text', '_empty', '_value')
+    
+    def __init__(self, text: Optional[str], empty=dict):
+        self._text = text
+        self._empty = empty
+        self._value = _NOT_DECODED
+    
+    @property
+    def value(self):
+        """ค่าที่แปลงแล้ว"""
+        if self._value is _NOT_DECODED:
+            self._value = json.loads(self._text) if self._text else self._empty()
+            self._text = None
+        return self._value
+    
+    @property
+    def decoded(self) -> bool:
+        """แปลงแล้วหรือยัง"""
+        return self._value is not _NOT_DECODED
+    
+    def __getattr__(self, name):
+        # เมธอดของ dict/list เช่น get, items, keys
+        return getattr(self.value, name)
+    
+    def __deepcopy__(self, memo):
+        # ยังไม่แปลงก็ copy แค่ข้อความ JSON (ไม่ต้องแปลงเพื่อ copy)
+        clone = LazyJSON(self._text, self._empty)
+        if self.decoded:
+            clone._value = copy.deepcopy(self._value, memo)
+        return clone
+    
+    def __getitem__(self, key):
+        return self.value[key]
+    
+    def __iter__(self):
+        return iter(self.value)
+    
+    def __len__(self):
+        return len(self.value)
+    
+    def __contains__(self, item):
+        return item in self.value
+    
+    def __bool__(self):
+        return bool(self.value)
+    
+    def __eq__(self, other):
+        if isinstance(other, LazyJSON):
+            other = other.value
+        return self.value == other
+    
+    __hash__ = None
+    
+    def __repr__(self):
+        return repr(self.value)
+
+
+def _calculation_columns(fields, required=()):
+    """ตรวจ fields และคืน (รายการ field, คอลัมน์ที่ต้อง SELECT)"""
+    fields = CALCULATION_FIELDS if fields is None else tuple(fields)
+    unknown = [field for field in fields if field not in CALCULATION_FIELDS]
+    if unknown:
+        raise ValueError(f"ไม่มี field: {', '.join(unknown)} (เลือกได้จาก {', '.join(CALCULATION_FIELDS)})")
+    columns = fields + tuple(field for field in required if field not in fields)
+    return fields, ', '.join(columns)
+
+
+def _calculation_from_row(row, fields=CALCULATION_FIELDS) -> Dict:
+    """แปลงแถวของตาราง calculations เป็น dict (field JSON เป็น LazyJSON)"""
+    return {
+        field: LazyJSON(row[field], _JSON_FIELDS[field]) if field in _JSON_FIELDS else row[field]
+        for field in fields
+    }
+
+
+@instrumented
+def get_calculations(limit: Optional[int] = None, name: Optional[str] = None,
+                     fields: Optional[Sequence[str]] = None) -> List[Dict]:
     """
-    ดึงประวัติการคำนวณทั้งหมด
+    ดึงประวัติการคำนวณทั้งหมด (ใหม่ไปเก่า)
     
     Args:
         limit: จำนวนรายการที่ต้องการดึง (None = ทั้งหมด)
+        name: ดึงเฉพาะประวัติของผู้ใช้ชื่อนี้ (None = ทุกคน)
+        fields: field ที่ต้องการจาก CALCULATION_FIELDS (None = ทั้งหมด)
+            deduction_details/tax_details เป็น LazyJSON ที่แปลงเมื่อใช้งานเท่านั้น
     
     Returns:
         List of calculation records
     """
+    fields, columns = _calculation_columns(fields)
     conn = get_connection()
     cursor = conn.cursor()
     
-    query = 'SELECT * FROM calculations ORDER BY created_at DESC'
+    if name is None:
+        query, params = _SELECT_CALCULATIONS, ()
+    else:
+        query, params = _SELECT_CALCULATIONS_BY_NAME, (name,)
+    query = query.format(columns=columns)
     if limit:
-        query += f' LIMIT {limit}'
+        query += ' LIMIT ?'
+        params += (limit,)
     
-    cursor.execute(query)
+    cursor.execute(query, params)
     rows = cursor.fetchall()
     
-    calculations = []
-    for row in rows:
-        calculation = {
-            'id': row['id'],
-            'name': row['name'],
-            'income': row['income'],
-            'total_deductions': row['total_deductions'],
-            'net_income': row['net_income'],
-            'tax': row['tax'],
-            'deduction_details': json.loads(row['deduction_details']) if row['deduction_details'] else {},
-            'tax_details': json.loads(row['tax_details']) if row['tax_details'] else [],
-            'created_at': row['created_at']
-        }
-        calculations.append(calculation)
+    calculations = [_calculation_from_row(row, fields) for row in rows]
     
-    conn.close()
-    print(f"[DEBUG] Retrieved {len(calculations)} calculations")
+    logger.debug("Retrieved %d calculations", len(calculations))
     return calculations
 
 
-def get_calculation_by_id(calculation_id: int) -> Optional[Dict]:
+@instrumented
+def get_calculations_page(after_created_at: Optional[str] = None, after_id: Optional[int] = None,
+                          page_size: int = 50, name_filter: Optional[str] = None,
+                          fields: Optional[Sequence[str]] = None) -> Dict:
+    """
+    ดึงประวัติการคำนวณทีละหน้า (ใหม่ไปเก่า) แบบ keyset
+    
+    ต่างจาก LIMIT/OFFSET ตรงที่ไม่ต้องข้ามแถวของหน้าก่อน ๆ เวลาต่อหน้าจึงคงที่ไม่ว่าตารางจะใหญ่แค่ไหน
+    
+    Args:
+        after_created_at: created_at ของแถวสุดท้ายในหน้าก่อน (None = หน้าแรก)
+        after_id: id ของแถวสุดท้ายในหน้าก่อน
+        page_size: จำนวนรายการต่อหน้า
+        name_filter: ดึงเฉพาะประวัติของผู้ใช้ชื่อนี้ (None = ทุกคน)
+        fields: field ที่ต้องการจาก CALCULATION_FIELDS (None = ทั้งหมด)
+    
+    Returns:
+        dict ประกอบด้วย:
+            - calculations: รายการในหน้านี้
+            - next_cursor: (after_created_at, after_id) ของหน้าถัดไป หรือ None ถ้าเป็นหน้าสุดท้าย
+    """
+    if page_size < 1:
+        raise ValueError("page_size ต้องมากกว่า 0")
+    if (after_created_at is None) != (after_id is None):
+        raise ValueError("ต้องระบุ after_created_at และ after_id คู่กัน")
+    # cursor ของหน้าถัดไปต้องใช้ created_at และ id เสมอ
+    fields, columns = _calculation_columns(fields, required=('created_at', 'id'))
+    
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    # ดึงเกิน 1 แถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่
+    if after_id is None:
+        query = _SELECT_CALCULATIONS if name_filter is None else _SELECT_CALCULATIONS_BY_NAME
+        params = () if name_filter is None else (name_filter,)
+        cursor.execute(query.format(columns=columns) + ' LIMIT ?', params + (page_size + 1,))
+    elif name_filter is None:
+        cursor.execute(_SELECT_CALCULATIONS_PAGE.format(columns=columns),
+                       (after_created_at, after_id, page_size + 1))
+    else:
+        cursor.execute(_SELECT_CALCULATIONS_PAGE_BY_NAME.format(columns=columns),
+                       (name_filter, after_created_at, after_id, page_size + 1))
+    rows = cursor.fetchall()
+    
+    calculations = [_calculation_from_row(row, fields) for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = (last['created_at'], last['id'])
+    
+    return {'calculations': calculations, 'next_cursor': next_cursor}
+
+
+# field ที่ใช้เรียงใน search_calculations() (ทุก field มีดัชนี ซึ่งมี id ต่อท้ายเสมอ)
+CALCULATION_SORT_FIELDS = ('created_at', 'tax', 'income')
+
+
+def _prefix_range(prefix):
+    """ช่วง [prefix, prefix + อักขระสูงสุด) ของข้อความที่ขึ้นต้นด้วย prefix (ค้นในดัชนีได้ ต่างจาก LIKE)"""
+    return prefix, prefix + '\U0010ffff'
+
+
+# ชื่อที่ขึ้นต้นด้วย prefix ไม่เกินจำนวนนี้ ค้นจากดัชนีชื่อแล้วเรียงในหน่วยความจำ
+# (มากกว่านี้ไล่ดัชนีการเรียงแล้วกรองชื่อ จะพบครบหน้าเร็วกว่า)
+PREFIX_SORT_LIMIT = 1000
+
+_COUNT_PREFIX_MATCHES = 'SELECT COUNT(*) FROM (SELECT 1 FROM {table} WHERE name >= ? AND name < ? LIMIT ?)'
+
+
+def _prefix_condition(prefix, name_index=True):
+    """
+    เงื่อนไขชื่อที่ขึ้นต้นด้วย prefix
+
+    name_index=False ใส่ + หน้าคอลัมน์ให้ SQLite ไม่ใช้ดัชนีชื่อ แต่ไล่ดัชนีการเรียง
+    (sort, name) แล้วกรองชื่อในดัชนีแทน
+    """
+    column = 'name' if name_index else '+name'
+    return f'{column} >= ? AND {column} < ?', _prefix_range(prefix)
+
+
+def _prefix_uses_name_index(table, prefix, sort):
+    """
+    เลือกดัชนีของการค้นหาชื่อที่ขึ้นต้นด้วย prefix แล้วเรียงตาม sort
+
+    ดัชนีเดียวใช้ทั้งค้นช่วงชื่อและเรียงตามคอลัมน์อื่นไม่ได้ แผนที่ดีขึ้นกับจำนวนชื่อที่ตรงกัน:
+    ถ้ามีน้อยใช้ดัชนีชื่อแล้วเรียงแถวเหล่านั้น ถ้ามีมากไล่ดัชนีการเรียงซึ่งจะพบชื่อที่ตรงกันครบหน้า
+    ในไม่กี่แถว (แต่ไล่ทั้งดัชนีถ้าแทบไม่มีชื่อที่ตรงกัน)
+
+    รูปของ query บอกจำนวนนี้ไม่ได้ และ SQLite ก็ไม่รู้: ไม่มีสถิติการกระจายของค่า (ไม่ได้ ANALYZE
+    และ build ทั่วไปไม่เปิด SQLITE_ENABLE_STAT4) จึงประเมินช่วง name >= ? AND name < ? เป็นสัดส่วน
+    คงที่ของตารางและเลือกแผนเดียวกันทุก prefix จึงนับชื่อที่ตรงกันเองก่อน ซึ่งอ่านจากดัชนีชื่อ
+    (covering index) ไม่เกิน PREFIX_SORT_LIMIT + 1 รายการ
+    """
+    if sort == 'name':
+        return True
+    query = _COUNT_PREFIX_MATCHES.format(table=table)
+    matches = get_connection().execute(query, _prefix_range(prefix) + (PREFIX_SORT_LIMIT + 1,)).fetchone()[0]
+    return matches <= PREFIX_SORT_LIMIT
+
+
+def _calculation_filters(name_prefix=None, min_tax=None, max_tax=None, name_index=True):
+    """เงื่อนไข WHERE และพารามิเตอร์ของการค้นหาประวัติการคำนวณ"""
+    conditions, params = [], []
+    if name_prefix:
+        condition, prefix_params = _prefix_condition(name_prefix, name_index)
+        conditions.append(condition)
+        params.extend(prefix_params)
+    if min_tax is not None:
+        conditions.append('tax >= ?')
+        params.append(min_tax)
+    if max_tax is not None:
+        conditions.append('tax <= ?')
+        params.append(max_tax)
+    return conditions, params
+
+
+def _keyset_query(table, columns, conditions, params, sort, descending, after, limit):
+    """SELECT ทีละหน้าแบบ keyset เรียงตาม (sort, id) ต่อจากแถว after = (ค่า sort, id)"""
+    conditions, params = list(conditions), list(params)
+    direction, operator = ('DESC', '<') if descending else ('ASC', '>')
+    if after is not None:
+        conditions.append(f'({sort}, id) {operator} (?, ?)')
+        params.extend(after)
+    query = f'SELECT {columns} FROM {table}'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {sort} {direction}, id {direction} LIMIT ?'
+    return query, tuple(params) + (limit,)
+
+
+@instrumented
+def search_calculations(name_prefix: Optional[str] = None, sort: str = 'created_at', descending: bool = True,
+                        after: Optional[Tuple] = None, page_size: int = 50,
+                        fields: Optional[Sequence[str]] = None,
+                        min_tax: Optional[float] = None, max_tax: Optional[float] = None) -> Dict:
+    """
+    ค้นหาประวัติการคำนวณทีละหน้า (ค้นหา กรอง และเรียงใน SQL แบบ keyset)
+    
+    Args:
+        name_prefix: เฉพาะชื่อที่ขึ้นต้นด้วยข้อความนี้ (None/ว่าง = ทุกคน)
+        sort: field ที่ใช้เรียงจาก CALCULATION_SORT_FIELDS
+        descending: เรียงจากมากไปน้อย
+        after: next_cursor ของหน้าก่อน (None = หน้าแรก)
+        page_size: จำนวนรายการต่อหน้า
+        fields: field ที่ต้องการจาก CALCULATION_FIELDS (None = ทั้งหมด)
+        min_tax: ภาษีขั้นต่ำ (None = ไม่กรอง)
+        max_tax: ภาษีสูงสุด (None = ไม่กรอง)
+    
+    Returns:
+        dict ประกอบด้วย:
+            - calculations: รายการในหน้านี้
+            - next_cursor: ค่าสำหรับ after ของหน้าถัดไป หรือ None ถ้าเป็นหน้าสุดท้าย
+    """
+    if sort not in CALCULATION_SORT_FIELDS:
+        raise ValueError(f"sort ต้องเป็นหนึ่งใน {CALCULATION_SORT_FIELDS} ได้รับ {sort}")
+    if page_size < 1:
+        raise ValueError("page_size ต้องมากกว่า 0")
+    fields, columns = _calculation_columns(fields, required=(sort, 'id'))
+    name_index = not name_prefix or _prefix_uses_name_index('calculations', name_prefix, sort)
+    conditions, params = _calculation_filters(name_prefix, min_tax, max_tax, name_index)
+    # ดึงเกิน 1 แถวเพื่อรู้ว่ามีหน้าถัดไปหรือไม่
+    query, params = _keyset_query('calculations', columns, conditions, params,
+                                  sort, descending, after, page_size + 1)
+    rows = get_connection().execute(query, params).fetchall()
+    
+    calculations = [_calculation_from_row(row, fields) for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = (last[sort], last['id'])
+    return {'calculations': calculations, 'next_cursor': next_cursor}
+
+
+_COUNT_ALL_CALCULATIONS = 'SELECT calculation_count FROM calculation_totals WHERE id = 1'
+
+
+@instrumented
+def count_calculations(name_prefix: Optional[str] = None, min_tax: Optional[float] = None,
+                       max_tax: Optional[float] = None) -> int:
+    """
+    จำนวนประวัติการคำนวณที่ตรงกับเงื่อนไขเดียวกับ search_calculations()
+    
+    Returns:
+        จำนวนรายการ (ไม่มีเงื่อนไข = อ่านจากสถิติสะสม ไม่ต้องนับทั้งตาราง)
+    """
+    conditions, params = _calculation_filters(name_prefix, min_tax, max_tax)
+    conn = get_connection()
+    if not conditions:
+        row = conn.execute(_COUNT_ALL_CALCULATIONS).fetchone()
+        return row[0] if row else 0
+    query = 'SELECT COUNT(*) FROM calculations WHERE ' + ' AND '.join(conditions)
+    return conn.execute(query, params).fetchone()[0]
+
+
+_SELECT_CALCULATION_BY_ID = 'SELECT {columns} FROM calculations WHERE id = ?'
+
+
+@instrumented
+def get_calculation_by_id(calculation_id: int, fields: Optional[Sequence[str]] = None) -> Optional[Dict]:
     """
     ดึงข้อมูลการคำนวณตาม ID
     
     Args:
         calculation_id: ID ของการคำนวณ
+        fields: field ที่ต้องการจาก CALCULATION_FIELDS (None = ทั้งหมด)
     
     Returns:
         Calculation record or None
     """
+    fields, columns = _calculation_columns(fields)
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM calculations WHERE id = ?', (calculation_id,))
+    cursor.execute(_SELECT_CALCULATION_BY_ID.format(columns=columns), (calculation_id,))
     row = cursor.fetchone()
     
     if row:
-        calculation = {
-            'id': row['id'],
-            'name': row['name'],
-            'income': row['income'],
-            'total_deductions': row['total_deductions'],
-            'net_income': row['net_income'],
-            'tax': row['tax'],
-            'deduction_details': json.loads(row['deduction_details']) if row['deduction_details'] else {},
-            'tax_details': json.loads(row['tax_details']) if row['tax_details'] else [],
-            'created_at': row['created_at']
-        }
-        conn.close()
-        return calculation
+        return _calculation_from_row(row, fields)
     
-    conn.close()
     return None
 
 
+_DELETE_CALCULATION = 'DELETE FROM calculations WHERE id = ?'
+
+
+@instrumented
 def delete_calculation(calculation_id: int) -> bool:
     """
     ลบข้อมูลการคำนวณ
@@ -191,23 +923,38 @@ def delete_calculation(calculation_id: int) -> bool:
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('DELETE FROM calculations WHERE id = ?', (calculation_id,))
+    with conn:
+        cursor.execute(_DELETE_CALCULATION, (calculation_id,))
     deleted = cursor.rowcount > 0
     
-    conn.commit()
-    conn.close()
-    
     if deleted:
-        print(f"[DEBUG] Calculation deleted: ID={calculation_id}")
+        _mark_written('calculations')
+        logger.debug("Calculation deleted: ID=%s", calculation_id)
     else:
-        print(f"[DEBUG] Calculation not found: ID={calculation_id}")
+        logger.debug("Calculation not found: ID=%s", calculation_id)
     
     return deleted
 
 
+_SELECT_STATISTICS = '''
+    SELECT calculation_count AS total, total_tax,
+           total_tax / NULLIF(calculation_count, 0) AS avg_tax,
+           total_income / NULLIF(calculation_count, 0) AS avg_income
+    FROM calculation_totals WHERE id = 1
+'''
+_SELECT_DAILY_STATISTICS = '''
+    SELECT day, calculation_count, total_tax, total_income FROM calculation_daily
+    ORDER BY day DESC LIMIT ?
+'''
+_SELECT_BRACKET_STATISTICS = '''
+    SELECT rate, calculation_count, total_tax, total_income FROM calculation_brackets ORDER BY rate
+'''
+
+
+@instrumented
 def get_statistics() -> Dict:
     """
-    ดึงสถิติการคำนวณ
+    ดึงสถิติการคำนวณ (อ่านจากตารางสถิติสะสม ไม่สแกน calculations)
     
     Returns:
         Dictionary with statistics
@@ -215,19 +962,12 @@ def get_statistics() -> Dict:
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT COUNT(*) as total FROM calculations')
-    total = cursor.fetchone()['total']
-    
-    cursor.execute('SELECT SUM(tax) as total_tax FROM calculations')
-    total_tax = cursor.fetchone()['total_tax'] or 0
-    
-    cursor.execute('SELECT AVG(tax) as avg_tax FROM calculations')
-    avg_tax = cursor.fetchone()['avg_tax'] or 0
-    
-    cursor.execute('SELECT AVG(income) as avg_income FROM calculations')
-    avg_income = cursor.fetchone()['avg_income'] or 0
-    
-    conn.close()
+    cursor.execute(_SELECT_STATISTICS)
+    row = cursor.fetchone()
+    total = row['total']
+    total_tax = row['total_tax'] or 0
+    avg_tax = row['avg_tax'] or 0
+    avg_income = row['avg_income'] or 0
     
     return {
         'total_calculations': total,
@@ -237,59 +977,240 @@ def get_statistics() -> Dict:
     }
 
 
+def _statistics_from_row(row, key) -> Dict:
+    """แปลงแถวของตารางสถิติสะสมเป็น dict"""
+    count = row['calculation_count']
+    return {
+        key: row[key],
+        'total_calculations': count,
+        'total_tax': row['total_tax'],
+        'avg_tax': row['total_tax'] / count,
+        'avg_income': row['total_income'] / count,
+    }
+
+
+@instrumented
+def get_daily_statistics(days: int = 30) -> List[Dict]:
+    """
+    ดึงสถิติการคำนวณรายวัน (ตามวันที่ของ created_at)
+    
+    Args:
+        days: จำนวนวันล่าสุดที่มีการคำนวณ
+    
+    Returns:
+        list ของสถิติแต่ละวัน (ใหม่ไปเก่า) มี key day และ key เดียวกับ get_statistics()
+    """
+    conn = get_connection()
+    rows = conn.execute(_SELECT_DAILY_STATISTICS, (days,)).fetchall()
+    return [_statistics_from_row(row, 'day') for row in rows]
+
+
+@instrumented
+def get_bracket_statistics() -> List[Dict]:
+    """
+    ดึงสถิติการคำนวณแยกตามขั้นภาษีของเงินได้สุทธิ (หลังหักเงินบริจาค)
+    
+    Returns:
+        list ของสถิติแต่ละขั้น (อัตราน้อยไปมาก) มี key rate (เปอร์เซ็นต์ 0 = ไม่เสียภาษี)
+        และ key เดียวกับ get_statistics()
+    """
+    conn = get_connection()
+    rows = conn.execute(_SELECT_BRACKET_STATISTICS).fetchall()
+    return [_statistics_from_row(row, 'rate') for row in rows]
+
+
+# รวมยอดตาม key ในตารางลูก (keys ส่งเป็น JSON array เพื่อใช้ query เดียวกันทุกจำนวน key)
+_AGGREGATE_DEDUCTIONS = '''
+    SELECT key, COUNT(*) AS claim_count, SUM(amount) AS total, AVG(amount) AS average, MAX(amount) AS maximum
+    FROM calculation_deductions
+    GROUP BY key ORDER BY key
+'''
+_AGGREGATE_DEDUCTIONS_BY_KEYS = '''
+    SELECT key, COUNT(*) AS claim_count, SUM(amount) AS total, AVG(amount) AS average, MAX(amount) AS maximum
+    FROM calculation_deductions
+    WHERE key IN (SELECT value FROM json_each(?))
+    GROUP BY key ORDER BY key
+'''
+_COUNT_CALCULATIONS_AT_LEAST = '''
+    SELECT COUNT(*) FROM (
+        SELECT calculation_id FROM calculation_deductions
+        WHERE key IN (SELECT value FROM json_each(?))
+        GROUP BY calculation_id HAVING SUM(amount) >= ?
+    )
+'''
+
+# ผลรวมทศนิยมอาจต่ำกว่าเพดานเล็กน้อย จึงยอมให้ขาดได้ไม่เกินครึ่งสตางค์
+_AMOUNT_TOLERANCE = 0.005
+
+
+def _aggregates_from_rows(rows) -> Dict[str, Dict]:
+    """แปลงผลรวมยอดตาม key เป็น dict"""
+    return {
+        row['key']: {
+            'count': row['claim_count'],
+            'total': row['total'],
+            'avg': row['average'],
+            'max': row['maximum'],
+        }
+        for row in rows
+    }
+
+
+@instrumented
+def aggregate_deductions(keys: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    รวมยอดค่าลดหย่อนที่ใช้จริงจากประวัติการคำนวณทั้งหมดตาม key (คำนวณใน SQL)
+    
+    Args:
+        keys: key ของ deduction_details เช่น ['rmf', 'ssf'] (None = ทุก key)
+    
+    Returns:
+        dict ของ key -> {'count': จำนวนการคำนวณที่มีค่านี้ (ไม่เป็น 0), 'total', 'avg', 'max'}
+    """
+    conn = get_connection()
+    if keys is None:
+        rows = conn.execute(_AGGREGATE_DEDUCTIONS).fetchall()
+    else:
+        rows = conn.execute(_AGGREGATE_DEDUCTIONS_BY_KEYS, (json.dumps(list(keys), ensure_ascii=False),)).fetchall()
+    return _aggregates_from_rows(rows)
+
+
+@instrumented
+def count_calculations_at_least(keys: Iterable[str], amount: float) -> int:
+    """
+    นับการคำนวณที่ผลรวมค่าลดหย่อนของ keys ถึง amount (คลาดเคลื่อนได้ไม่เกินครึ่งสตางค์)
+    
+    เช่น count_calculations_at_least(['rmf', 'ssf', 'pvd'], 500000) คือจำนวนที่ใช้เพดานรวม
+    RMF/SSF/PVD เต็ม 500,000 บาท
+    
+    Args:
+        keys: key ของ deduction_details
+        amount: ยอดขั้นต่ำ
+    
+    Returns:
+        จำนวนการคำนวณ
+    """
+    conn = get_connection()
+    keys_json = json.dumps(list(keys), ensure_ascii=False)
+    return conn.execute(_COUNT_CALCULATIONS_AT_LEAST, (keys_json, amount - _AMOUNT_TOLERANCE)).fetchone()[0]
+
+
 # ฟังก์ชันจัดการข้อมูลผู้ใช้
-def save_user_profile(name: str, income_data: Dict, deductions_data: Dict, withholding_tax: float = 0) -> int:
+_UPSERT_USER_PROFILE = '''
+    INSERT INTO user_profiles (name, income_data, deductions_data, withholding_tax, content_hash)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(name) DO UPDATE SET
+        income_data = excluded.income_data,
+        deductions_data = excluded.deductions_data,
+        withholding_tax = excluded.withholding_tax,
+        content_hash = excluded.content_hash,
+        updated_at = CURRENT_TIMESTAMP
+'''
+# ไม่เขียนซ้ำเมื่อข้อมูลเหมือนเดิม (ไม่มีแถวที่ RETURNING เมื่อข้าม)
+_UPSERT_USER_PROFILE_IF_CHANGED = _UPSERT_USER_PROFILE + '''
+    WHERE user_profiles.content_hash IS NOT excluded.content_hash
+'''
+_SELECT_USER_PROFILE_ID = 'SELECT id FROM user_profiles WHERE name = ?'
+
+
+def _profile_row(name, income_data, deductions_data, withholding_tax=0):
+    """แปลงข้อมูลผู้ใช้เป็นค่าสำหรับ _UPSERT_USER_PROFILE (ท้ายสุดคือ hash ของเนื้อหา)"""
+    content_hash = hashlib.sha256(
+        json.dumps([income_data, deductions_data, withholding_tax], sort_keys=True).encode()
+    ).hexdigest()
+    return (
+        name,
+        json.dumps(income_data, ensure_ascii=False),
+        json.dumps(deductions_data, ensure_ascii=False),
+        withholding_tax,
+        content_hash
+    )
+
+
+@instrumented
+def save_user_profile(name: str, income_data: Dict, deductions_data: Dict, withholding_tax: float = 0,
+                      skip_unchanged: bool = False) -> int:
     """
-    บันทึกหรืออัปเดตข้อมูลผู้ใช้
+    บันทึกหรืออัปเดตข้อมูลผู้ใช้ (INSERT ... ON CONFLICT DO UPDATE คำสั่งเดียว)
     
     Args:
         name: ชื่อผู้ใช้
         income_data: ข้อมูลเงินได้
         deductions_data: ข้อมูลค่าลดหย่อน
         withholding_tax: ภาษีหัก ณ ที่จ่าย
+        skip_unchanged: ไม่เขียน (และไม่เปลี่ยน updated_at) ถ้าข้อมูลเหมือนที่บันทึกไว้
     
     Returns:
         user_id: ID ของผู้ใช้
     """
+    row = _profile_row(name, income_data, deductions_data, withholding_tax)
+    query = _UPSERT_USER_PROFILE_IF_CHANGED if skip_unchanged else _UPSERT_USER_PROFILE
+    
     conn = get_connection()
-    cursor = conn.cursor()
+    with conn:
+        saved = conn.execute(query + ' RETURNING id', row).fetchone()
+        if saved is None:
+            # ข้อมูลเหมือนเดิม ไม่ได้เขียน (อ่าน ID ใน transaction เดียวกันกับ UPSERT)
+            user_id = conn.execute(_SELECT_USER_PROFILE_ID, (name,)).fetchone()['id']
     
-    income_data_json = json.dumps(income_data, ensure_ascii=False)
-    deductions_data_json = json.dumps(deductions_data, ensure_ascii=False)
-    
-    # Debug: แสดงข้อมูลที่บันทึก
-    print(f"[DEBUG] Saving user profile: Name={name}")
-    print(f"[DEBUG] Income data keys: {list(income_data.keys())}")
-    print(f"[DEBUG] Deductions data keys: {list(deductions_data.keys())}")
-    print(f"[DEBUG] Withholding tax: {withholding_tax}")
-    
-    # ตรวจสอบว่ามีผู้ใช้อยู่แล้วหรือไม่
-    cursor.execute('SELECT id FROM user_profiles WHERE name = ?', (name,))
-    existing = cursor.fetchone()
-    
-    if existing:
-        # อัปเดตข้อมูล
-        cursor.execute('''
-            UPDATE user_profiles 
-            SET income_data = ?, deductions_data = ?, withholding_tax = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE name = ?
-        ''', (income_data_json, deductions_data_json, withholding_tax, name))
-        user_id = existing['id']
-        print(f"[DEBUG] User profile updated: ID={user_id}, Name={name}")
+    if saved is None:
+        logger.debug("User profile unchanged: ID=%s, Name=%s", user_id, name)
     else:
-        # สร้างใหม่
-        cursor.execute('''
-            INSERT INTO user_profiles (name, income_data, deductions_data, withholding_tax)
-            VALUES (?, ?, ?, ?)
-        ''', (name, income_data_json, deductions_data_json, withholding_tax))
-        user_id = cursor.lastrowid
-        print(f"[DEBUG] User profile saved: ID={user_id}, Name={name}")
-    
-    conn.commit()
-    conn.close()
+        _mark_written('user_profiles')
+        user_id = saved['id']
+        logger.debug("User profile saved: ID=%s, Name=%s", user_id, name)
     return user_id
 
 
+_SELECT_USER_PROFILE_IDS = 'SELECT name, id FROM user_profiles WHERE name IN (SELECT value FROM json_each(?))'
+
+
+@instrumented
+def save_user_profiles_bulk(profiles: Iterable[Tuple], batch_size: int = BULK_BATCH_SIZE,
+                            skip_unchanged: bool = False) -> List[int]:
+    """
+    บันทึกหรืออัปเดตข้อมูลผู้ใช้หลายคน (UPSERT ทีละแถว และ commit ทุก batch_size รายการ)
+    
+    ชื่อที่มีอยู่แล้วจะถูกอัปเดตพร้อม updated_at เหมือน save_user_profile()
+    
+    Args:
+        profiles: iterable หรือ generator ของ (name, income_data, deductions_data[, withholding_tax])
+        batch_size: จำนวนรายการต่อ transaction
+        skip_unchanged: ไม่เขียนแถวที่ข้อมูลเหมือนที่บันทึกไว้
+    
+    Returns:
+        list ของ ID ผู้ใช้ตามลำดับที่ส่งเข้ามา
+    """
+    query = (_UPSERT_USER_PROFILE_IF_CHANGED if skip_unchanged else _UPSERT_USER_PROFILE) + ' RETURNING id'
+    conn = get_connection()
+    ids = []
+    for batch in _batches(profiles, batch_size):
+        rows = [_profile_row(*profile) for profile in batch]
+        with conn:
+            # ล็อกการเขียนตั้งแต่ต้น ID ที่อ่านของแถวที่ไม่เปลี่ยนจึงเป็นของ transaction เดียวกัน
+            conn.execute('BEGIN IMMEDIATE')
+            # executemany คืนผลของ RETURNING ไม่ได้ จึงรันทีละแถว (statement ที่เตรียมแล้วใช้ซ้ำ)
+            # ชื่อซ้ำใน batch เดียวกันจึงได้ผลเหมือนบันทึกทีละรายการตามลำดับ
+            saved = [conn.execute(query, row).fetchone() for row in rows]
+            unchanged = [row[0] for row, returned in zip(rows, saved) if returned is None]
+            id_by_name = dict(conn.execute(
+                _SELECT_USER_PROFILE_IDS, (json.dumps(unchanged, ensure_ascii=False),)
+            ).fetchall()) if unchanged else {}
+        if len(unchanged) < len(rows):
+            _mark_written('user_profiles')
+        ids.extend(
+            returned['id'] if returned is not None else id_by_name[row[0]]
+            for row, returned in zip(rows, saved)
+        )
+    
+    logger.debug("User profiles saved: %d rows", len(ids))
+    return ids
+
+
+_SELECT_USER_PROFILES = 'SELECT id, name, updated_at, created_at FROM user_profiles ORDER BY name'
+
+
+@instrumented
 def get_user_profiles() -> List[Dict]:
     """
     ดึงรายชื่อผู้ใช้ทั้งหมด
@@ -300,7 +1221,7 @@ def get_user_profiles() -> List[Dict]:
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT id, name, updated_at, created_at FROM user_profiles ORDER BY name')
+    cursor.execute(_SELECT_USER_PROFILES)
     rows = cursor.fetchall()
     
     profiles = []
@@ -312,10 +1233,69 @@ def get_user_profiles() -> List[Dict]:
             'created_at': row['created_at']
         })
     
-    conn.close()
     return profiles
 
 
+# field ที่ใช้เรียงใน search_user_profiles()
+PROFILE_SORT_FIELDS = ('name', 'updated_at')
+_PROFILE_LIST_COLUMNS = 'id, name, updated_at, created_at'
+
+
+@instrumented
+def search_user_profiles(name_prefix: Optional[str] = None, sort: str = 'name', descending: bool = False,
+                         after: Optional[Tuple] = None, page_size: int = 50) -> Dict:
+    """
+    ค้นหารายชื่อผู้ใช้ทีละหน้า (ค้นหาและเรียงใน SQL แบบ keyset)
+    
+    Args:
+        name_prefix: เฉพาะชื่อที่ขึ้นต้นด้วยข้อความนี้ (None/ว่าง = ทุกคน)
+        sort: field ที่ใช้เรียงจาก PROFILE_SORT_FIELDS
+        descending: เรียงจากมากไปน้อย
+        after: next_cursor ของหน้าก่อน (None = หน้าแรก)
+        page_size: จำนวนรายการต่อหน้า
+    
+    Returns:
+        dict ประกอบด้วย:
+            - profiles: รายการในหน้านี้ (field เดียวกับ get_user_profiles())
+            - next_cursor: ค่าสำหรับ after ของหน้าถัดไป หรือ None ถ้าเป็นหน้าสุดท้าย
+    """
+    if sort not in PROFILE_SORT_FIELDS:
+        raise ValueError(f"sort ต้องเป็นหนึ่งใน {PROFILE_SORT_FIELDS} ได้รับ {sort}")
+    if page_size < 1:
+        raise ValueError("page_size ต้องมากกว่า 0")
+    conditions, params = [], []
+    if name_prefix:
+        condition, params = _prefix_condition(name_prefix, _prefix_uses_name_index('user_profiles', name_prefix, sort))
+        conditions.append(condition)
+    query, params = _keyset_query('user_profiles', _PROFILE_LIST_COLUMNS, conditions, params,
+                                  sort, descending, after, page_size + 1)
+    rows = get_connection().execute(query, params).fetchall()
+    
+    profiles = [dict(row) for row in rows[:page_size]]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = (last[sort], last['id'])
+    return {'profiles': profiles, 'next_cursor': next_cursor}
+
+
+_COUNT_USER_PROFILES = 'SELECT COUNT(*) FROM user_profiles'
+_COUNT_USER_PROFILES_BY_PREFIX = 'SELECT COUNT(*) FROM user_profiles WHERE name >= ? AND name < ?'
+
+
+@instrumented
+def count_user_profiles(name_prefix: Optional[str] = None) -> int:
+    """จำนวนผู้ใช้ (เฉพาะชื่อที่ขึ้นต้นด้วย name_prefix ถ้าระบุ)"""
+    conn = get_connection()
+    if not name_prefix:
+        return conn.execute(_COUNT_USER_PROFILES).fetchone()[0]
+    return conn.execute(_COUNT_USER_PROFILES_BY_PREFIX, _prefix_range(name_prefix)).fetchone()[0]
+
+
+_SELECT_USER_PROFILE = 'SELECT * FROM user_profiles WHERE name = ?'
+
+
+@instrumented
 def get_user_profile_by_name(name: str) -> Optional[Dict]:
     """
     ดึงข้อมูลผู้ใช้ตามชื่อ
@@ -329,18 +1309,15 @@ def get_user_profile_by_name(name: str) -> Optional[Dict]:
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('SELECT * FROM user_profiles WHERE name = ?', (name,))
+    cursor.execute(_SELECT_USER_PROFILE, (name,))
     row = cursor.fetchone()
     
     if row:
         income_data = json.loads(row['income_data']) if row['income_data'] else {}
         deductions_data = json.loads(row['deductions_data']) if row['deductions_data'] else {}
         
-        # Debug: แสดงข้อมูลที่โหลด
-        print(f"[DEBUG] Loading user profile: Name={name}")
-        print(f"[DEBUG] Income data keys: {list(income_data.keys())}")
-        print(f"[DEBUG] Deductions data keys: {list(deductions_data.keys())}")
-        print(f"[DEBUG] Withholding tax: {row['withholding_tax']}")
+        logger.debug("Loading user profile: Name=%s, income keys=%d, deduction keys=%d, withholding tax=%s",
+                     name, len(income_data), len(deductions_data), row['withholding_tax'])
         
         profile = {
             'id': row['id'],
@@ -351,13 +1328,56 @@ def get_user_profile_by_name(name: str) -> Optional[Dict]:
             'updated_at': row['updated_at'],
             'created_at': row['created_at']
         }
-        conn.close()
         return profile
     
-    conn.close()
     return None
 
 
+_AGGREGATE_PROFILE_VALUES = '''
+    SELECT key, COUNT(*) AS claim_count, SUM(value) AS total, AVG(value) AS average, MAX(value) AS maximum
+    FROM profile_values
+    WHERE section = ?
+    GROUP BY key ORDER BY key
+'''
+_AGGREGATE_PROFILE_VALUES_BY_KEYS = '''
+    SELECT key, COUNT(*) AS claim_count, SUM(value) AS total, AVG(value) AS average, MAX(value) AS maximum
+    FROM profile_values
+    WHERE section = ? AND key IN (SELECT value FROM json_each(?))
+    GROUP BY key ORDER BY key
+'''
+
+# ส่วนของข้อมูลผู้ใช้ใน profile_values
+PROFILE_SECTIONS = tuple(section for section, _ in _PROFILE_SECTION_COLUMNS)
+
+
+@instrumented
+def aggregate_profile_values(section: str, keys: Optional[Iterable[str]] = None) -> Dict[str, Dict]:
+    """
+    รวมยอดข้อมูลเงินได้หรือค่าลดหย่อนของผู้ใช้ทุกคนตาม key (คำนวณใน SQL)
+    
+    Args:
+        section: 'income' (income_data) หรือ 'deductions' (deductions_data)
+        keys: key ที่ต้องการ (None = ทุก key)
+    
+    Returns:
+        dict ของ key -> {'count': จำนวนผู้ใช้ที่มีค่านี้ (ไม่เป็น 0), 'total', 'avg', 'max'}
+        (ค่า true นับเป็น 1)
+    """
+    if section not in PROFILE_SECTIONS:
+        raise ValueError(f"section ต้องเป็นหนึ่งใน {PROFILE_SECTIONS} ได้รับ {section}")
+    conn = get_connection()
+    if keys is None:
+        rows = conn.execute(_AGGREGATE_PROFILE_VALUES, (section,)).fetchall()
+    else:
+        keys_json = json.dumps(list(keys), ensure_ascii=False)
+        rows = conn.execute(_AGGREGATE_PROFILE_VALUES_BY_KEYS, (section, keys_json)).fetchall()
+    return _aggregates_from_rows(rows)
+
+
+_DELETE_USER_PROFILE = 'DELETE FROM user_profiles WHERE name = ?'
+
+
+@instrumented
 def delete_user_profile(name: str) -> bool:
     """
     ลบข้อมูลผู้ใช้
@@ -371,16 +1391,101 @@ def delete_user_profile(name: str) -> bool:
     conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute('DELETE FROM user_profiles WHERE name = ?', (name,))
+    with conn:
+        cursor.execute(_DELETE_USER_PROFILE, (name,))
     deleted = cursor.rowcount > 0
     
-    conn.commit()
-    conn.close()
-    
     if deleted:
-        print(f"[DEBUG] User profile deleted: Name={name}")
+        _mark_written('user_profiles')
+        logger.debug("User profile deleted: Name=%s", name)
     else:
-        print(f"[DEBUG] User profile not found: Name={name}")
+        logger.debug("User profile not found: Name=%s", name)
     
     return deleted
 
+
+# query ทั้งหมดในโมดูล (ชื่อ, SQL, ตัวอย่างพารามิเตอร์) สำหรับ explain_queries()
+_QUERIES = (
+    ('save_calculation', _INSERT_CALCULATION, ('', 0, 0, 0, 0, '{}', '[]')),
+    ('save_calculations_bulk', _INSERT_CALCULATION + ' RETURNING id', ('', 0, 0, 0, 0, '{}', '[]')),
+    ('get_calculations', _SELECT_CALCULATIONS.format(columns='*'), ()),
+    ('get_calculations (limit)', _SELECT_CALCULATIONS.format(columns='*') + ' LIMIT ?', (50,)),
+    ('get_calculations (name)', _SELECT_CALCULATIONS_BY_NAME.format(columns='*'), ('',)),
+    ('get_calculations_page', _SELECT_CALCULATIONS_PAGE.format(columns='*'), ('', 0, 51)),
+    ('get_calculations_page (name)', _SELECT_CALCULATIONS_PAGE_BY_NAME.format(columns='*'), ('', '', 0, 51)),
+    ('search_calculations', *_keyset_query('calculations', '*', [], [], 'created_at', True, ('', 0), 51)),
+    ('search_calculations (tax)', *_keyset_query('calculations', '*', [], [], 'tax', True, (0, 0), 51)),
+    ('search_calculations (income, asc)', *_keyset_query('calculations', '*', [], [], 'income', False, (0, 0), 51)),
+    ('search_calculations (prefix)',
+     *_keyset_query('calculations', '*', *_calculation_filters('a', name_index=False), 'created_at', True, None, 51)),
+    ('search_calculations (prefix, tax)',
+     *_keyset_query('calculations', '*', *_calculation_filters('a', name_index=False), 'tax', True, None, 51)),
+    ('search_calculations (prefix, few matches)',
+     *_keyset_query('calculations', '*', *_calculation_filters('a'), 'created_at', True, None, 51)),
+    ('search_calculations (prefix matches)', _COUNT_PREFIX_MATCHES.format(table='calculations'),
+     _prefix_range('a') + (PREFIX_SORT_LIMIT + 1,)),
+    ('search_calculations (tax range)',
+     *_keyset_query('calculations', '*', *_calculation_filters(None, 0, 1000), 'tax', True, None, 51)),
+    ('count_calculations', _COUNT_ALL_CALCULATIONS, ()),
+    ('count_calculations (prefix)',
+     'SELECT COUNT(*) FROM calculations WHERE ' + _prefix_condition('a')[0], _prefix_range('a')),
+    ('get_calculation_by_id', _SELECT_CALCULATION_BY_ID.format(columns='*'), (0,)),
+    ('delete_calculation', _DELETE_CALCULATION, (0,)),
+    ('get_statistics', _SELECT_STATISTICS, ()),
+    ('get_daily_statistics', _SELECT_DAILY_STATISTICS, (30,)),
+    ('get_bracket_statistics', _SELECT_BRACKET_STATISTICS, ()),
+    ('aggregate_deductions', _AGGREGATE_DEDUCTIONS, ()),
+    ('aggregate_deductions (keys)', _AGGREGATE_DEDUCTIONS_BY_KEYS, ('["rmf"]',)),
+    ('count_calculations_at_least', _COUNT_CALCULATIONS_AT_LEAST, ('["rmf", "ssf", "pvd"]', 500000)),
+    ('save_user_profile', _UPSERT_USER_PROFILE + ' RETURNING id', ('', '{}', '{}', 0, '')),
+    ('save_user_profile (skip_unchanged)', _UPSERT_USER_PROFILE_IF_CHANGED + ' RETURNING id', ('', '{}', '{}', 0, '')),
+    ('save_user_profile (unchanged id)', _SELECT_USER_PROFILE_ID, ('',)),
+    ('save_user_profiles_bulk', _UPSERT_USER_PROFILE + ' RETURNING id', ('', '{}', '{}', 0, '')),
+    ('save_user_profiles_bulk (ids)', _SELECT_USER_PROFILE_IDS, ('[]',)),
+    ('get_user_profiles', _SELECT_USER_PROFILES, ()),
+    ('get_user_profile_by_name', _SELECT_USER_PROFILE, ('',)),
+    ('search_user_profiles', *_keyset_query('user_profiles', _PROFILE_LIST_COLUMNS, [], [],
+                                            'name', False, ('', 0), 51)),
+    ('search_user_profiles (updated_at)', *_keyset_query('user_profiles', _PROFILE_LIST_COLUMNS, [], [],
+                                                         'updated_at', True, ('', 0), 51)),
+    ('search_user_profiles (prefix)', *_keyset_query('user_profiles', _PROFILE_LIST_COLUMNS,
+                                                     [_prefix_condition('a')[0]], _prefix_range('a'),
+                                                     'name', False, None, 51)),
+    ('search_user_profiles (prefix, updated_at)',
+     *_keyset_query('user_profiles', _PROFILE_LIST_COLUMNS, [_prefix_condition('a', name_index=False)[0]],
+                    _prefix_range('a'), 'updated_at', True, None, 51)),
+    ('search_user_profiles (prefix matches)', _COUNT_PREFIX_MATCHES.format(table='user_profiles'),
+     _prefix_range('a') + (PREFIX_SORT_LIMIT + 1,)),
+    ('count_user_profiles', _COUNT_USER_PROFILES, ()),
+    ('count_user_profiles (prefix)', _COUNT_USER_PROFILES_BY_PREFIX, _prefix_range('a')),
+    ('aggregate_profile_values', _AGGREGATE_PROFILE_VALUES, ('deductions',)),
+    ('aggregate_profile_values (keys)', _AGGREGATE_PROFILE_VALUES_BY_KEYS, ('deductions', '["rmf"]')),
+    ('delete_user_profile', _DELETE_USER_PROFILE, ('',)),
+)
+
+
+def explain_queries() -> Dict[str, List[str]]:
+    """
+    ดึงแผนการทำงาน (EXPLAIN QUERY PLAN) ของทุก query ในโมดูล
+    
+    ใช้ตรวจว่า query ยังใช้ดัชนีอยู่ เช่น ถ้ามี "SCAN" ทั้งตารางหรือ "USE TEMP B-TREE
+    FOR ORDER BY" ใน query ประวัติการคำนวณแสดงว่าดัชนีหายไป (ยกเว้น "few matches"
+    ที่เรียงชื่อที่ตรงกันไม่เกิน PREFIX_SORT_LIMIT แถวในหน่วยความจำโดยตั้งใจ)
+    
+    Returns:
+        dict ของชื่อ query -> รายการขั้นตอนในแผน
+    """
+    conn = get_connection()
+    plans = {}
+    for label, query, params in _QUERIES:
+        rows = conn.execute('EXPLAIN QUERY PLAN ' + query, params).fetchall()
+        plans[label] = [row['detail'] for row in rows]
+    return plans
+
+
+if __name__ == '__main__':
+    init_db()
+    for label, plan in explain_queries().items():
+        print(label)
+        for step in plan:
+            print(f"    {step}")
@@ -0,0 +1,153 @@
+"""
+แคชผลการอ่านฐานข้อมูลสำหรับ Streamlit rerun
+
+Streamlit รัน app.py ใหม่ทั้งไฟล์ทุกครั้งที่ผู้ใช้กดปุ่มหรือเปลี่ยนค่า ฟังก์ชันในโมดูลนี้มีชื่อและ
+ผลลัพธ์เหมือนใน database.py แต่เก็บผลไว้ใน process (ใช้ร่วมกันทุก session) จนกว่า
+- ตารางที่เกี่ยวข้องถูกเขียนผ่าน save_*/delete_* ของ database.py (database.write_generation())
+  การบันทึกการคำนวณล้างเฉพาะแคชของประวัติ/สถิติ ไม่ล้างรายชื่อผู้ใช้ และกลับกัน
+- ครบ TTL (รองรับการเขียนจาก process อื่น เช่น bulk หรือ service ที่ใช้ไฟล์เดียวกัน)
+- ถูกดันออกเมื่อเกินจำนวนรายการสูงสุด (LRU)
+
+rerun ที่ข้อมูลไม่เปลี่ยนจึงไม่อ่านฐานข้อมูลเลย
+
+แคชใช้ร่วมกันทุก session จึงคืนสำเนาของ dict/list ทุกครั้ง (เหมือน st.cache_data) ผู้เรียก
+แก้ค่าที่ได้ (เช่น income_data ของผู้ใช้ที่โหลด) ได้โดยไม่กระทบค่าในแคชของ session อื่น
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict
+
+import database
+
+
+DEFAULT_TTL = 60.0  # วินาที
+DEFAULT_MAX_ENTRIES = 64  # ต่อฟังก์ชัน
+
+_caches = []
+
+
+# ค่าที่แก้ไขไม่ได้ คืนได้โดยไม่ต้อง copy
+_IMMUTABLE_TYPES = (str, int, float, bool, type(None))
+
+
+def _copy(value):
+    """สำเนาของค่าที่เก็บในแคช (copy dict/list ซ้อนกันเอง เร็วกว่า copy.deepcopy ทั้งก้อน)"""
+    value_type = type(value)
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    if value_type is dict:
+        return {key: _copy(item) for key, item in value.items()}
+    if value_type is list:
+        return [_copy(item) for item in value]
+    # LazyJSON ที่ยังไม่แปลงจะ copy แค่ข้อความ JSON
+    return copy.deepcopy(value)
+
+
+class _Cache:
+    """แคช LRU ที่มีอายุ ของฟังก์ชันเดียว"""
+
+    def __init__(self, func, tables, ttl, max_entries):
+        self.func = func
+        self.tables = tables
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> (generation, หมดอายุเมื่อ, ค่า)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, *args, **kwargs):
+        try:
+            key = (database.DB_NAME, args, tuple(sorted(kwargs.items())))
+            hash(key)
+        except TypeError:
+            # อาร์กิวเมนต์ที่ hash ไม่ได้ (เช่น list) ไม่แคช
+            return self.func(*args, **kwargs)
+
+        generation = tuple(database.write_generation(table) for table in self.tables)
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            hit = entry is not None and entry[0] == generation and entry[1] > now
+            if hit:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        if hit:
+            # ค่าในแคชไม่ถูกแก้ไขเลย จึง copy นอก lock ได้
+            return _copy(entry[2])
+
+        # generation อ่านก่อน query: ถ้ามีการเขียนระหว่างนี้ รอบหน้าจะไม่ตรงและอ่านใหม่
+        value = self.func(*args, **kwargs)
+        with self.lock:
+            self.entries[key] = (generation, now + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return _copy(value)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def cached(*tables, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+    """
+    decorator แคชผลของฟังก์ชันอ่านข้อมูล
+
+    Args:
+        tables: ตารางที่ผลลัพธ์ขึ้นอยู่ (ดู database.write_generation())
+        ttl: อายุของแต่ละรายการ (วินาที)
+        max_entries: จำนวนชุดอาร์กิวเมนต์สูงสุดที่เก็บ
+    """
+    def decorator(func):
+        cache = _Cache(func, tables, ttl, max_entries)
+        _caches.append(cache)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return cache(*args, **kwargs)
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def clear():
+    """ล้างแคชทั้งหมด"""
+    for cache in _caches:
+        cache.clear()
+
+
+def cache_info() -> Dict[str, Dict]:
+    """
+    สถิติของแคช
+
+    Returns:
+        dict ของชื่อฟังก์ชัน -> {'hits', 'misses', 'entries'}
+    """
+    return {
+        cache.func.__name__: {'hits': cache.hits, 'misses': cache.misses, 'entries': len(cache.entries)}
+        for cache in _caches
+    }
+
+
+get_calculations = cached('calculations')(database.get_calculations)
+get_calculations_page = cached('calculations')(database.get_calculations_page)
+search_calculations = cached('calculations')(database.search_calculations)
+count_calculations = cached('calculations')(database.count_calculations)
+get_calculation_by_id = cached('calculations')(database.get_calculation_by_id)
+get_statistics = cached('calculations')(database.get_statistics)
+get_daily_statistics = cached('calculations')(database.get_daily_statistics)
+get_bracket_statistics = cached('calculations')(database.get_bracket_statistics)
+aggregate_deductions = cached('calculations')(database.aggregate_deductions)
+count_calculations_at_least = cached('calculations')(database.count_calculations_at_least)
+get_user_profiles = cached('user_profiles')(database.get_user_profiles)
+get_user_profile_by_name = cached('user_profiles')(database.get_user_profile_by_name)
+search_user_profiles = cached('user_profiles')(database.search_user_profiles)
+count_user_profiles = cached('user_profiles')(database.count_user_profiles)
+aggregate_profile_values = cached('user_profiles')(database.aggregate_profile_values)
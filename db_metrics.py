@@ -0,0 +1,363 @@
+"""
+วัดการทำงานของฐานข้อมูล: จำนวนครั้ง เวลา (histogram) และจำนวนแถวที่ได้ ต่อฟังก์ชันและต่อ SQL
+
+ปิดอยู่เป็นค่าเริ่มต้น (เกือบไม่มีต้นทุน) เปิดด้วย enable() หรือตัวแปรสภาพแวดล้อม
+TAX_DB_METRICS=1 เมื่อเปิดแล้ว:
+
+- ทุก statement ที่ผ่าน connection ของ database.py ถูกบันทึกใน Collector
+- statement ที่ช้ากว่า slow_query_ms ถูกบันทึกใน log ระดับ WARNING พร้อม EXPLAIN QUERY PLAN
+- begin_request()/end_request() สรุปจำนวน query ของหนึ่งรอบการทำงาน (เช่น Streamlit rerun หนึ่งครั้ง)
+
+เปลี่ยนที่เก็บข้อมูลได้โดยส่ง object ที่มี record_query() และ record_call() ให้ enable()
+"""
+
+import functools
+import logging
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# ขอบบนของช่วงใน histogram (มิลลิวินาที) ช่วงสุดท้ายคือมากกว่าค่าสุดท้าย
+HISTOGRAM_BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# statement ที่ใช้เวลามากกว่านี้ (มิลลิวินาที) จะถูกบันทึกเป็น slow query
+DEFAULT_SLOW_QUERY_MS = 100.0
+
+_collector = None
+_slow_query_ms = DEFAULT_SLOW_QUERY_MS
+_local = threading.local()
+
+
+class Stats:
+    """สถิติของ SQL หรือฟังก์ชันหนึ่งรายการ"""
+
+    __slots__ = ('count', 'total_ms', 'max_ms', 'rows', 'queries', 'histogram')
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.queries = 0
+        self.histogram = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def add(self, elapsed_ms, rows=0, queries=0):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.rows += rows
+        self.queries += queries
+        self.histogram[bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction) -> float:
+        """ค่าประมาณ percentile จาก histogram (ขอบบนของช่วงที่ครอบคลุม)"""
+        target = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.histogram):
+            seen += count
+            if count and seen >= target:
+                return HISTOGRAM_BOUNDS_MS[index] if index < len(HISTOGRAM_BOUNDS_MS) else self.max_ms
+        return 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': self.total_ms,
+            'avg_ms': self.total_ms / self.count if self.count else 0.0,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'max_ms': self.max_ms,
+            'rows': self.rows,
+            'queries': self.queries,
+            'histogram': dict(zip([f'<={bound}ms' for bound in HISTOGRAM_BOUNDS_MS] + ['more'], self.histogram)),
+        }
+
+
+class Collector:
+    """เก็บสถิติไว้ในหน่วยความจำ (ค่าเริ่มต้นของ enable())"""
+
+    def __init__(self):
+        self.statements = {}
+        self.functions = {}
+        self._lock = threading.Lock()
+
+    def record_query(self, sql: str, elapsed_ms: float, rows: int):
+        with self._lock:
+            stats = self.statements.get(sql)
+            if stats is None:
+                stats = self.statements[sql] = Stats()
+            stats.add(elapsed_ms, rows)
+
+    def record_call(self, name: str, elapsed_ms: float, queries: int):
+        with self._lock:
+            stats = self.functions.get(name)
+            if stats is None:
+                stats = self.functions[name] = Stats()
+            stats.add(elapsed_ms, queries=queries)
+
+    def snapshot(self) -> Dict:
+        """สถิติทั้งหมดเป็น dict: {'statements': {sql: ...}, 'functions': {ชื่อ: ...}}"""
+        with self._lock:
+            return {
+                'statements': {sql: stats.to_dict() for sql, stats in self.statements.items()},
+                'functions': {name: stats.to_dict() for name, stats in self.functions.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.functions.clear()
+
+    def report(self, top: int = 20) -> str:
+        """ตารางสรุปฟังก์ชันและ SQL ที่ใช้เวลารวมมากที่สุด"""
+        snapshot = self.snapshot()
+        lines = [f"{'ฟังก์ชัน':<32} {'ครั้ง':>7} {'เฉลี่ย ms':>10} {'p95 ms':>8} {'query':>7}"]
+        for name, stats in sorted(snapshot['functions'].items(), key=lambda item: -item[1]['total_ms'])[:top]:
+            lines.append(f"{name:<32} {stats['count']:>7} {stats['avg_ms']:>10.3f} "
+                         f"{stats['p95_ms']:>8.2f} {stats['queries']:>7}")
+        lines.append('')
+        lines.append(f"{'SQL':<60} {'ครั้ง':>7} {'เฉลี่ย ms':>10} {'p95 ms':>8} {'แถว':>8}")
+        for sql, stats in sorted(snapshot['statements'].items(), key=lambda item: -item[1]['total_ms'])[:top]:
+            lines.append(f"{_short_sql(sql, 60):<60} {stats['count']:>7} {stats['avg_ms']:>10.3f} "
+                         f"{stats['p95_ms']:>8.2f} {stats['rows']:>8}")
+        return '\n'.join(lines)
+
+
+def _short_sql(sql, width):
+    text = ' '.join(sql.split())
+    return text if len(text) <= width else text[:width - 3] + '...'
+
+
+def enable(collector=None, slow_query_ms: Optional[float] = None):
+    """
+    เปิดการวัด
+
+    Args:
+        collector: object ที่มี record_query(sql, elapsed_ms, rows) และ
+            record_call(name, elapsed_ms, queries) (None = Collector ใหม่)
+        slow_query_ms: เกณฑ์ slow query (None = คงค่าเดิม)
+
+    Returns:
+        collector ที่ใช้
+    """
+    global _collector, _slow_query_ms
+    if slow_query_ms is not None:
+        _slow_query_ms = slow_query_ms
+    _collector = collector if collector is not None else Collector()
+    return _collector
+
+
+def disable():
+    """ปิดการวัด"""
+    global _collector
+    _collector = None
+
+
+def get_collector():
+    """collector ที่ใช้อยู่ (None = ปิดอยู่)"""
+    return _collector
+
+
+def _request():
+    return getattr(_local, 'request', None)
+
+
+def _record_query(connection, sql, params, elapsed_ms, rows):
+    """บันทึก statement ที่ทำงานเสร็จ"""
+    collector = _collector
+    if collector is None:
+        return
+    collector.record_query(sql, elapsed_ms, rows)
+    _local.queries = getattr(_local, 'queries', 0) + 1
+    request = _request()
+    if request is not None:
+        request['queries'] += 1
+        request['query_ms'] += elapsed_ms
+    if elapsed_ms >= _slow_query_ms:
+        _log_slow_query(connection, sql, params, elapsed_ms, rows)
+
+
+def _log_slow_query(connection, sql, params, elapsed_ms, rows):
+    """บันทึก slow query พร้อมแผนการทำงาน"""
+    plan = ''
+    if params is not None and not sql.lstrip().upper().startswith(('PRAGMA', 'BEGIN', 'EXPLAIN')):
+        try:
+            # ใช้ Cursor ธรรมดาเพื่อไม่ให้ EXPLAIN ถูกวัดซ้ำ
+            rows_plan = sqlite3.Cursor(connection).execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall()
+            plan = '\n'.join(f"    {row[-1]}" for row in rows_plan)
+        except sqlite3.Error as e:
+            plan = f"    (ดูแผนไม่ได้: {e})"
+    logger.warning("slow query %.1f ms, %d rows: %s\n%s", elapsed_ms, rows, ' '.join(sql.split()), plan)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor ที่วัดเวลา statement ตั้งแต่ execute จนอ่านแถวครบ (หรือเริ่ม statement ใหม่/ปิด cursor)
+    """
+
+    _statement = None
+
+    def _finish(self):
+        statement = self._statement
+        if statement is not None:
+            self._statement = None
+            sql, params, elapsed_ms, rows = statement
+            _record_query(self.connection, sql, params, elapsed_ms, rows)
+
+    def _run(self, method, sql, params, many):
+        self._finish()
+        if _collector is None:
+            return method(sql, params)
+        started = time.perf_counter()
+        try:
+            method(sql, params)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self._statement = (sql, None if many else params, elapsed_ms, 0)
+        if self.description is None:
+            self._finish()
+        return self
+
+    def execute(self, sql, params=()):
+        return self._run(super().execute, sql, params, False)
+
+    def executemany(self, sql, seq_of_params):
+        return self._run(super().executemany, sql, seq_of_params, True)
+
+    def _fetch(self, method, *args):
+        if self._statement is None:
+            return method(*args), False
+        started = time.perf_counter()
+        result = method(*args)
+        sql, params, elapsed_ms, rows = self._statement
+        self._statement = (sql, params, elapsed_ms + (time.perf_counter() - started) * 1000, rows)
+        return result, True
+
+    def _add_rows(self, count, done):
+        sql, params, elapsed_ms, rows = self._statement
+        self._statement = (sql, params, elapsed_ms, rows + count)
+        if done:
+            self._finish()
+
+    def fetchone(self):
+        row, measured = self._fetch(super().fetchone)
+        if measured:
+            self._add_rows(row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        rows, measured = self._fetch(super().fetchmany, self.arraysize if size is None else size)
+        if measured:
+            self._add_rows(len(rows), not rows)
+        return rows
+
+    def fetchall(self):
+        rows, measured = self._fetch(super().fetchall)
+        if measured:
+            self._add_rows(len(rows), True)
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection ที่ทุก statement ผ่าน InstrumentedCursor"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def instrumented(func):
+    """decorator วัดเวลาและจำนวน query ต่อการเรียกฟังก์ชัน"""
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        collector = _collector
+        if collector is None:
+            return func(*args, **kwargs)
+        queries_before = getattr(_local, 'queries', 0)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            collector.record_call(name, elapsed_ms, getattr(_local, 'queries', 0) - queries_before)
+
+    return wrapper
+
+
+def begin_request(label: str = 'request'):
+    """
+    เริ่มนับ query ของหนึ่งรอบการทำงานใน thread นี้ (เช่น Streamlit rerun หนึ่งครั้ง)
+
+    ถ้ารอบก่อนหน้ายังไม่จบ (เช่น ถูกขัดด้วย st.rerun()) จะสรุปรอบนั้นก่อน
+    """
+    if _request() is not None:
+        end_request()
+    _local.request = {'label': label, 'queries': 0, 'query_ms': 0.0, 'started': time.perf_counter()}
+
+
+def end_request() -> Optional[Dict]:
+    """
+    จบรอบการทำงานและบันทึกสรุปใน log ระดับ INFO
+
+    Returns:
+        dict ของ label, queries, query_ms, elapsed_ms หรือ None ถ้าไม่ได้ begin_request()
+    """
+    request = _request()
+    if request is None:
+        return None
+    _local.request = None
+    summary = {
+        'label': request['label'],
+        'queries': request['queries'],
+        'query_ms': request['query_ms'],
+        'elapsed_ms': (time.perf_counter() - request['started']) * 1000,
+    }
+    logger.info("%s: %d queries, %.1f ms in SQLite, %.1f ms total", summary['label'], summary['queries'],
+                summary['query_ms'], summary['elapsed_ms'])
+    return summary
+
+
+def current_request() -> Optional[Dict]:
+    """สรุประหว่างรอบการทำงานปัจจุบัน (None ถ้าไม่ได้ begin_request())"""
+    request = _request()
+    if request is None:
+        return None
+    return {
+        'label': request['label'],
+        'queries': request['queries'],
+        'query_ms': request['query_ms'],
+        'elapsed_ms': (time.perf_counter() - request['started']) * 1000,
+    }
+
+
+if os.environ.get('TAX_DB_METRICS', '').lower() in ('1', 'true', 'yes'):
+    enable(slow_query_ms=float(os.environ.get('TAX_DB_SLOW_QUERY_MS', DEFAULT_SLOW_QUERY_MS)))
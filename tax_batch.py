@@ -0,0 +1,263 @@
+"""
+โมดูลคำนวณภาษีแบบกลุ่ม (batch) สำหรับผู้เสียภาษีจำนวนมากในครั้งเดียว
+
+ข้อมูลเข้าเป็นคอลัมน์ (array) แทนการส่ง dictionary ทีละคน ทำให้คำนวณ
+ขั้นบันไดภาษี เพดานค่าลดหย่อน การปรับสัดส่วน RMF/SSF/PVD และเพดานเงินบริจาค
+ได้ในรอบเดียวด้วย NumPy โดยผลลัพธ์ตรงกับ calculate_tax_complete() ทุกประการ
+"""
+
+import numpy as np
+
+import tax_calculator as tc
+
+
+# คอลัมน์ผลลัพธ์ (ตรงกับ key ใน calculate_tax_complete() ยกเว้นส่วนรายละเอียด)
+SUMMARY_COLUMNS = [
+    'total_income',
+    'total_expenses',
+    'income_after_expenses',
+    'total_deductions',
+    'donation',
+    'education_donation',
+    'total_donation',
+    'net_income',
+    'tax',
+    'withholding_tax',
+    'tax_refund',
+    'tax_additional',
+    'tax_percent_of_income',
+    'tax_percent_of_net',
+    'net_income_after_tax',
+]
+
+
+def _row_count(*column_sets):
+    """หาจำนวนแถวจากคอลัมน์ที่เป็น array (ค่า scalar จะถูกกระจายให้ทุกแถว)"""
+    n = None
+    for columns in column_sets:
+        for key, value in columns.items():
+            if value is None or np.ndim(value) == 0:
+                continue
+            size = len(value)
+            if n is None:
+                n = size
+            elif size != n:
+                raise ValueError(f"คอลัมน์ {key} มี {size} แถว แต่คอลัมน์อื่นมี {n} แถว")
+    return 1 if n is None else n
+
+
+def _column(columns, key, n, default=0.0):
+    """
+    ดึงคอลัมน์เป็น float array ยาว n แถว (ไม่ตรวจค่า ใช้กับตัวเลือกมี/ไม่มี)
+
+    ถ้าไม่มีคอลัมน์จะใช้ค่า default และถ้าค่าในแถวเป็น NaN (เช่นช่องว่างจาก CSV)
+    จะถือว่าไม่ได้ระบุ และใช้ค่า default แทนเช่นกัน
+    """
+    value = columns.get(key)
+    if value is None:
+        return np.full(n, default, dtype=float)
+    column = np.asarray(value, dtype=float)
+    if column.ndim == 0:
+        column = np.full(n, float(column))
+    missing = np.isnan(column)
+    if missing.any():
+        column = np.where(missing, default, column)
+    return column
+
+
+def _amount_column(columns, key, n, default=0.0):
+    """เหมือน _column แต่ตรวจว่าไม่ติดลบ เช่นเดียวกับ _as_amount ใน tax_models"""
+    column = _column(columns, key, n, default)
+    negative = column < 0
+    if negative.any():
+        row = int(np.argmax(negative))
+        raise ValueError(f"{key} ต้องไม่ติดลบ ได้รับ {column[row]} (แถว {row})")
+    return column
+
+
+def _count_column(columns, key, n):
+    """เหมือน _column แต่ตรวจว่าเป็นจำนวนเต็มไม่ติดลบ เช่นเดียวกับ _as_count ใน tax_models"""
+    column = _column(columns, key, n)
+    invalid = (column < 0) | (column != np.floor(column))
+    if invalid.any():
+        row = int(np.argmax(invalid))
+        raise ValueError(f"{key} ต้องเป็นจำนวนเต็มไม่ติดลบ ได้รับ {column[row]} (แถว {row})")
+    return column
+
+
+def calculate_tax_brackets_batch(net_income, tax_year=None):
+    """
+    คำนวณภาษีขั้นบันไดของรายได้สุทธิทั้งคอลัมน์
+
+    ใช้ตาราง TaxTable เดียวกับ calculate_tax() หาขั้นด้วย searchsorted
+    แล้วคำนวณแบบปิด ผลลัพธ์จึงตรงกันทุกหลักทศนิยม
+
+    Args:
+        net_income: array รายได้สุทธิ
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        tax: array ภาษีที่ต้องจ่าย
+    """
+    net_income = np.asarray(net_income, dtype=float)
+    table = tc.get_rules(tax_year).get_tax_table()
+
+    index = np.searchsorted(np.asarray(table.lower, dtype=float), net_income, side='left') - 1
+    in_table = (index >= 0) & (net_income > 0)
+    index = np.maximum(index, 0)
+
+    base = np.asarray(table.base, dtype=float)[index]
+    rate = np.asarray(table.rate, dtype=float)[index]
+    upper = np.asarray(table.upper, dtype=float)[index]
+    offset = np.asarray(table.offset, dtype=float)[index]
+
+    tax = np.where(rate > 0, base + (np.minimum(net_income, upper) - offset) * rate, base)
+    return np.where(in_table, tax, 0.0)
+
+
+def calculate_tax_batch(income_columns, deduction_columns, withholding_tax=0, tax_year=None):
+    """
+    คำนวณภาษีแบบครบถ้วนสำหรับผู้เสียภาษีหลายคนพร้อมกัน
+
+    Args:
+        income_columns: dictionary ของคอลัมน์เงินได้ (key เดียวกับ income_data
+            ใน calculate_income_expenses) ค่าเป็น array หรือ scalar
+        deduction_columns: dictionary ของคอลัมน์ค่าลดหย่อน (key เดียวกับ
+            deductions_data ใน calculate_deductions) ค่าเป็น array หรือ scalar
+        withholding_tax: ภาษีหัก ณ ที่จ่าย (array หรือ scalar)
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict: คอลัมน์ผลลัพธ์ตาม SUMMARY_COLUMNS แต่ละคอลัมน์เป็น numpy array
+
+    Raises:
+        ValueError: ถ้าจำนวนเงินในแถวใดติดลบ หรือจำนวนบุตร/บิดามารดาไม่ใช่
+            จำนวนเต็มไม่ติดลบ (ตรงกับ TaxInput ที่ calculate_tax_complete() ใช้)
+    """
+    n = _row_count(income_columns, deduction_columns, {'withholding_tax': withholding_tax})
+    rules = tc.get_rules(tax_year)
+
+    def income(key, default=0.0):
+        return _amount_column(income_columns, key, n, default)
+
+    def deduction(key, default=0.0):
+        return _amount_column(deduction_columns, key, n, default)
+
+    def count(key):
+        return _count_column(deduction_columns, key, n)
+
+    def flag(key):
+        return _column(deduction_columns, key, n) != 0
+
+    # เงินได้และค่าใช้จ่าย
+    total_income = np.zeros(n)
+    total_expenses = np.zeros(n)
+
+    income_40_1_2 = income('income_40_1_2')
+    expense_40_1_2 = np.minimum(
+        income('expense_40_1_2', rules.EXPENSE_RATES['40_1_2']), rules.EXPENSE_RATES['40_1_2']
+    )
+    has_income = income_40_1_2 > 0
+    total_income = np.where(has_income, total_income + income_40_1_2, total_income)
+    total_expenses = np.where(has_income, total_expenses + expense_40_1_2, total_expenses)
+
+    for income_type in tc.PERCENT_INCOME_TYPES:
+        amount = income(f'income_{income_type}')
+        has_income = amount > 0
+        expense = amount * rules.EXPENSE_RATES[income_type]
+        total_income = np.where(has_income, total_income + amount, total_income)
+        total_expenses = np.where(has_income, total_expenses + expense, total_expenses)
+
+    income_after_expenses = np.maximum(0, total_income - total_expenses)
+
+    # ค่าลดหย่อนพื้นฐาน
+    personal = deduction('personal', rules.PERSONAL_DEDUCTION)
+    spouse = np.where(flag('spouse'), rules.SPOUSE_DEDUCTION, 0.0)
+    children = count('children')
+    children_2nd = count('children_2nd')
+    child_deduction = (children - children_2nd) * rules.CHILD_DEDUCTION + children_2nd * rules.CHILD_DEDUCTION_2ND
+    parent_deduction = count('parents') * rules.PARENT_DEDUCTION
+
+    life_insurance = np.minimum(deduction('life_insurance'), rules.MAX_LIFE_INSURANCE)
+    health_insurance_self = np.minimum(deduction('health_insurance_self'), rules.MAX_HEALTH_INSURANCE_SELF)
+    health_insurance_parent = np.minimum(deduction('health_insurance_parent'), rules.MAX_HEALTH_INSURANCE_PARENT)
+
+    # กองทุน RMF/SSF/PVD และการปรับสัดส่วนเมื่อรวมกันเกินเพดาน
+    rmf = np.minimum(np.minimum(deduction('rmf'), income_after_expenses * rules.MAX_RMF_PERCENT), rules.MAX_RMF_AMOUNT)
+    ssf = np.minimum(np.minimum(deduction('ssf'), income_after_expenses * rules.MAX_SSF_PERCENT), rules.MAX_SSF_AMOUNT)
+    pvd = np.minimum(np.minimum(deduction('pvd'), income_after_expenses * rules.MAX_PVD_PERCENT), rules.MAX_PVD_AMOUNT)
+
+    rmf_ssf_pvd_total = rmf + ssf + pvd
+    over_combined = rmf_ssf_pvd_total > rules.MAX_RMF_SSF_PVD_COMBINED
+    if over_combined.any():
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = rules.MAX_RMF_SSF_PVD_COMBINED / rmf_ssf_pvd_total
+            rmf = np.where(over_combined, rmf * ratio, rmf)
+            ssf = np.where(over_combined, ssf * ratio, ssf)
+            pvd = np.where(over_combined, pvd * ratio, pvd)
+
+    thai_esg = np.minimum(
+        np.minimum(deduction('thai_esg'), income_after_expenses * rules.MAX_THAI_ESG_PERCENT), rules.MAX_THAI_ESG_AMOUNT
+    )
+    nssf = np.minimum(deduction('nssf'), rules.MAX_NSSF)
+    social_security = np.minimum(deduction('social_security'), rules.MAX_SOCIAL_SECURITY)
+    easy_e_receipt = np.where(flag('easy_e_receipt'), rules.EASY_E_RECEIPT, 0.0)
+    solar_cell = np.minimum(deduction('solar_cell'), rules.MAX_SOLAR_CELL)
+    home_construction = np.minimum(deduction('home_construction'), rules.MAX_HOME_CONSTRUCTION)
+    home_interest = np.minimum(deduction('home_interest'), rules.MAX_HOME_INTEREST)
+
+    # รวมตามลำดับเดียวกับ calculate_deductions() เพื่อให้ผลบวกทศนิยมตรงกัน
+    basic_deductions = personal
+    for amount in (
+        spouse, child_deduction, parent_deduction,
+        life_insurance, health_insurance_self, health_insurance_parent,
+        rmf, ssf, pvd, thai_esg, nssf, social_security,
+        easy_e_receipt, solar_cell, home_construction, home_interest,
+    ):
+        basic_deductions = basic_deductions + amount
+
+    # เงินบริจาค (ไม่เกิน 10% ของเงินได้หลังหักค่าลดหย่อนพื้นฐาน)
+    income_after_basic = np.maximum(0, income_after_expenses - basic_deductions)
+    max_donation = income_after_basic * rules.MAX_DONATION_PERCENT
+    donation = np.minimum(deduction('donation'), max_donation)
+    education_donation = np.minimum(
+        deduction('education_donation') * rules.EDUCATION_DONATION_MULTIPLIER, max_donation
+    )
+    political_donation = np.minimum(deduction('political_donation'), rules.MAX_POLITICAL_DONATION)
+    social_enterprise = np.minimum(deduction('social_enterprise'), rules.MAX_SOCIAL_ENTERPRISE)
+
+    total_deductions = basic_deductions + donation + education_donation + political_donation + social_enterprise
+    net_income = np.maximum(0, income_after_expenses - total_deductions)
+
+    # เงินได้สุทธิหลังหักเงินบริจาคและภาษี
+    total_donation = donation + education_donation
+    net_income_after_donation = net_income - total_donation
+    tax = calculate_tax_brackets_batch(net_income_after_donation, tax_year)
+
+    withholding = _amount_column({'withholding_tax': withholding_tax}, 'withholding_tax', n)
+    tax_refund = np.maximum(0, withholding - tax)
+    tax_additional = np.maximum(0, tax - withholding)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tax_percent_of_income = np.where(total_income > 0, tax / total_income * 100, 0.0)
+        tax_percent_of_net = np.where(
+            net_income_after_donation > 0, tax / net_income_after_donation * 100, 0.0
+        )
+
+    return {
+        'total_income': total_income,
+        'total_expenses': total_expenses,
+        'income_after_expenses': income_after_expenses,
+        'total_deductions': total_deductions,
+        'donation': donation,
+        'education_donation': education_donation,
+        'total_donation': total_donation,
+        'net_income': net_income_after_donation,
+        'tax': tax,
+        'withholding_tax': withholding,
+        'tax_refund': tax_refund,
+        'tax_additional': tax_additional,
+        'tax_percent_of_income': tax_percent_of_income,
+        'tax_percent_of_net': tax_percent_of_net,
+        'net_income_after_tax': net_income_after_donation - tax,
+    }
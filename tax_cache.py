@@ -0,0 +1,132 @@
+"""
+แคชผลการคำนวณภาษี (memoization) แบบจำกัดขนาดด้วย LRU
+
+ใช้เมื่อมีการส่งข้อมูลชุดเดิมซ้ำบ่อย เช่นกดปุ่มคำนวณซ้ำหรือโหลดข้อมูลผู้ใช้เดิม
+คีย์ของแคชคือปีภาษีคู่กับ TaxInput.canonical_key() และแคชจะถูกล้างอัตโนมัติ
+เมื่อค่าคงที่อัตราภาษีใน tax_calculator ถูกเปลี่ยน (กฎภาษีของปีอื่นแก้ไขไม่ได้)
+"""
+
+import copy
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import tax_calculator
+from tax_models import TaxInput, TaxResult
+
+
+class CalculationCache:
+    """แคชผลการคำนวณแบบ LRU พร้อมตัวนับ hit/miss/eviction"""
+
+    def __init__(self, maxsize: int = 1024):
+        if maxsize < 1:
+            raise ValueError(f"maxsize ต้องมากกว่า 0 ได้รับ {maxsize}")
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._rates = copy.deepcopy(tax_calculator.rate_constants())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_rates(self):
+        """ล้างแคชถ้าค่าคงที่อัตราภาษีเปลี่ยนไปจากตอนที่เก็บผลไว้ (เรียกภายใต้ lock)"""
+        rates = tax_calculator.rate_constants()
+        if rates != self._rates:
+            self._entries.clear()
+            self._rates = copy.deepcopy(rates)
+            self.invalidations += 1
+
+    def _lookup(self, key):
+        """ค้นหาผลในแคช (คืน None ถ้าไม่มี)"""
+        with self._lock:
+            self._check_rates()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def _store(self, key, result):
+        """เก็บผลลงแคชและตัดรายการที่ใช้นานที่สุดออกเมื่อเกินขนาด"""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def calculate_record(self, tax_input: TaxInput, tax_year: Optional[int] = None) -> TaxResult:
+        """
+        คำนวณภาษีจาก TaxInput โดยใช้ผลในแคชถ้ามี
+
+        Args:
+            tax_input: ข้อมูลเข้าที่ตรวจสอบแล้ว
+            tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+        Returns:
+            TaxResult: ผลการคำนวณ (อาจเป็น object เดียวกับที่คืนให้ผู้เรียกก่อนหน้า
+            จึงไม่ควรแก้ไขค่าในผลลัพธ์)
+        """
+        key = (tax_year, tax_input.canonical_key())
+        result = self._lookup(key)
+        if result is None:
+            result = tax_calculator.calculate_tax_record(tax_input, tax_year)
+            self._store(key, result)
+        return result
+
+    def calculate(self, income_data: Dict, deductions_data: Dict, withholding_tax: float = 0,
+                  detail: bool = True, tax_year: Optional[int] = None) -> Dict:
+        """
+        คำนวณภาษีแบบเดียวกับ calculate_tax_complete() โดยใช้ผลในแคชถ้ามี
+
+        ตรวจสอบข้อมูลทุกครั้งก่อนค้นหา (คีย์คือ canonical_key() ของ TaxInput ที่ตรวจสอบแล้ว)
+        ข้อมูลผิดจึงเกิดข้อผิดพลาดเหมือนเดิมแม้ข้อมูลที่ถูกต้องและเท่ากันจะอยู่ในแคช
+
+        Args:
+            income_data: ข้อมูลเงินได้ตามมาตรา 40
+            deductions_data: ข้อมูลค่าลดหย่อน
+            withholding_tax: ภาษีหัก ณ ที่จ่าย
+            detail: False = คืนเฉพาะตัวเลขสรุป
+            tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+        Returns:
+            dict: ข้อมูลการคำนวณภาษีทั้งหมด (รายละเอียดเป็นสำเนา ผู้เรียกแก้ไขได้โดยไม่กระทบแคช)
+        """
+        tax_input = TaxInput.from_dicts(income_data, deductions_data, withholding_tax)
+        result = self.calculate_record(tax_input, tax_year)
+        if not detail:
+            return result.to_summary_dict()
+        # รายละเอียดใน TaxResult ที่แคชใช้ร่วมกันทุกผู้เรียก คืนเป็นสำเนา
+        data = result.to_dict()
+        data['income_details'] = {key: dict(value) for key, value in data['income_details'].items()}
+        data['deduction_details'] = dict(data['deduction_details'])
+        data['tax_details'] = [dict(step) for step in data['tax_details']]
+        return data
+
+    def clear(self):
+        """ล้างแคชและรีเซ็ตตัวนับ"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def stats(self) -> Dict:
+        """สถิติการใช้งานแคช"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+# แคชที่ใช้ร่วมกันภายใน process (เช่น app.py)
+calculation_cache = CalculationCache()
@@ -2,72 +2,218 @@
 โมดูลคำนวณภาษีเงินได้บุคคลธรรมดา ปี 2568 (ยื่นในปี 2569)
 """
 
+import json
+import os
+import sys
+from bisect import bisect_left
+from functools import partial
+
+from tax_models import DeductionInput, IncomeInput, TaxInput, TaxResult
+
+
+# ปีภาษีของค่าคงที่ในโมดูลนี้ (ค่าอ่านจากไฟล์กฎภาษีของปีนี้)
+DEFAULT_TAX_YEAR = 2568
+
+
+def _load_default_rates():
+    """
+    อ่านอัตราภาษีของปี DEFAULT_TAX_YEAR จาก rules/<ปี>.json
+
+    ไฟล์เดียวกับที่ tax_rules.get_rule_set() ใช้ ค่าคงที่ด้านล่างจึงตรงกับชุดกฎของปีเดียวกันเสมอ
+    (อ่านด้วย json โดยตรงเพราะ tax_rules import โมดูลนี้)
+    """
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules', f'{DEFAULT_TAX_YEAR}.json')
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+_DEFAULT_RATES = _load_default_rates()
+
 # อัตราภาษีขั้นบันไดปี 2568 (ยื่นในปี 2569)
 TAX_BRACKETS = [
-    (0, 150000, 0.0),
-    (150001, 300000, 0.05),
-    (300001, 500000, 0.10),
-    (500001, 750000, 0.15),
-    (750001, 1000000, 0.20),
-    (1000001, 2000000, 0.25),
-    (2000001, 5000000, 0.30),
-    (5000001, float('inf'), 0.35),
+    (min_income, float('inf') if max_income is None else max_income, rate)
+    for min_income, max_income, rate in _DEFAULT_RATES['tax_brackets']
 ]
 
 # ค่าลดหย่อนพื้นฐาน
-PERSONAL_DEDUCTION = 60000
-SPOUSE_DEDUCTION = 60000
-CHILD_DEDUCTION = 30000
-CHILD_DEDUCTION_2ND = 60000  # บุตรคนที่ 2 เกิดหลังปี 2561
-PARENT_DEDUCTION = 30000
+PERSONAL_DEDUCTION = _DEFAULT_RATES['personal_deduction']
+SPOUSE_DEDUCTION = _DEFAULT_RATES['spouse_deduction']
+CHILD_DEDUCTION = _DEFAULT_RATES['child_deduction']
+CHILD_DEDUCTION_2ND = _DEFAULT_RATES['child_deduction_2nd']  # บุตรคนที่ 2 เกิดหลังปี 2561
+PARENT_DEDUCTION = _DEFAULT_RATES['parent_deduction']
 
 # วงเงินค่าลดหย่อนสูงสุด ปี 2568
-MAX_LIFE_INSURANCE = 100000
-MAX_HEALTH_INSURANCE_SELF = 25000
-MAX_HEALTH_INSURANCE_PARENT = 15000
-MAX_SOCIAL_SECURITY = 9000
+MAX_LIFE_INSURANCE = _DEFAULT_RATES['max_life_insurance']
+MAX_HEALTH_INSURANCE_SELF = _DEFAULT_RATES['max_health_insurance_self']
+MAX_HEALTH_INSURANCE_PARENT = _DEFAULT_RATES['max_health_insurance_parent']
+MAX_SOCIAL_SECURITY = _DEFAULT_RATES['max_social_security']
 
 # กองทุนการออมและการลงทุน
-MAX_RMF_PERCENT = 0.30  # 30% ของเงินได้
-MAX_RMF_AMOUNT = 500000
-MAX_SSF_PERCENT = 0.30  # 30% ของเงินได้
-MAX_SSF_AMOUNT = 200000
-MAX_PVD_PERCENT = 0.15  # 15% ของเงินได้
-MAX_PVD_AMOUNT = 500000
-MAX_RMF_SSF_PVD_COMBINED = 500000  # รวม RMF + SSF + PVD ไม่เกิน 500,000
-MAX_THAI_ESG_PERCENT = 0.30  # 30% ของเงินได้
-MAX_THAI_ESG_AMOUNT = 300000  # ปรับเป็น 300,000 ตามปี 2568
-MAX_NSSF = 30000  # กองทุนการออมแห่งชาติ (กอช.)
+MAX_RMF_PERCENT = _DEFAULT_RATES['max_rmf_percent']  # 30% ของเงินได้
+MAX_RMF_AMOUNT = _DEFAULT_RATES['max_rmf_amount']
+MAX_SSF_PERCENT = _DEFAULT_RATES['max_ssf_percent']  # 30% ของเงินได้
+MAX_SSF_AMOUNT = _DEFAULT_RATES['max_ssf_amount']
+MAX_PVD_PERCENT = _DEFAULT_RATES['max_pvd_percent']  # 15% ของเงินได้
+MAX_PVD_AMOUNT = _DEFAULT_RATES['max_pvd_amount']
+MAX_RMF_SSF_PVD_COMBINED = _DEFAULT_RATES['max_rmf_ssf_pvd_combined']  # รวม RMF + SSF + PVD ไม่เกิน 500,000
+MAX_THAI_ESG_PERCENT = _DEFAULT_RATES['max_thai_esg_percent']  # 30% ของเงินได้
+MAX_THAI_ESG_AMOUNT = _DEFAULT_RATES['max_thai_esg_amount']  # ปรับเป็น 300,000 ตามปี 2568
+MAX_NSSF = _DEFAULT_RATES['max_nssf']  # กองทุนการออมแห่งชาติ (กอช.)
 
 # ค่าลดหย่อนเพื่อกระตุ้นเศรษฐกิจ
-EASY_E_RECEIPT = 50000  # Easy E-Receipt 2568
-MAX_SOLAR_CELL = 200000  # ค่าติดตั้งโซลาร์เซลล์
-MAX_HOME_CONSTRUCTION = 100000  # ค่าก่อสร้างบ้านใหม่
-MAX_HOME_INTEREST = 100000  # ดอกเบี้ยที่อยู่อาศัย
+EASY_E_RECEIPT = _DEFAULT_RATES['easy_e_receipt']  # Easy E-Receipt 2568
+MAX_SOLAR_CELL = _DEFAULT_RATES['max_solar_cell']  # ค่าติดตั้งโซลาร์เซลล์
+MAX_HOME_CONSTRUCTION = _DEFAULT_RATES['max_home_construction']  # ค่าก่อสร้างบ้านใหม่
+MAX_HOME_INTEREST = _DEFAULT_RATES['max_home_interest']  # ดอกเบี้ยที่อยู่อาศัย
 
 # ค่าลดหย่อนจากการบริจาค
-MAX_DONATION_PERCENT = 0.10  # 10% ของเงินได้หลังหักค่าลดหย่อน
-EDUCATION_DONATION_MULTIPLIER = 2  # 2 เท่าของเงินบริจาค
-MAX_POLITICAL_DONATION = 10000  # เงินบริจาคพรรคการเมือง
-MAX_SOCIAL_ENTERPRISE = 100000  # เงินลงทุนในธุรกิจวิสาหกิจเพื่อสังคม
-
-# อัตราหักค่าใช้จ่ายตามประเภทเงินได้มาตรา 40
-EXPENSE_RATES = {
-    '40_1_2': 100000,  # 40(1)(2) เงินเดือน/โบนัส - หัก 100,000 หรือตามจริง
-    '40_4': 0.10,  # 40(4) ดอกเบี้ย/เงินปันผล - หัก 10%
-    '40_5': 0.30,  # 40(5) ค่าเช่าทรัพย์สิน - หัก 30%
-    '40_6': 0.60,  # 40(6) เงินได้วิชาชีพอิสระ - หัก 60%
-    '40_7': 0.70,  # 40(7) เงินได้จากการรับเหมา - หัก 70%
-    '40_8': 0.92,  # 40(8) เงินได้อื่นๆ - หัก 92%
-}
-
-
-def calculate_income_expenses(income_data):
+MAX_DONATION_PERCENT = _DEFAULT_RATES['max_donation_percent']  # 10% ของเงินได้หลังหักค่าลดหย่อน
+EDUCATION_DONATION_MULTIPLIER = _DEFAULT_RATES['education_donation_multiplier']  # 2 เท่าของเงินบริจาค
+MAX_POLITICAL_DONATION = _DEFAULT_RATES['max_political_donation']  # เงินบริจาคพรรคการเมือง
+MAX_SOCIAL_ENTERPRISE = _DEFAULT_RATES['max_social_enterprise']  # เงินลงทุนในธุรกิจวิสาหกิจเพื่อสังคม
+
+# อัตราหักค่าใช้จ่ายตามประเภทเงินได้มาตรา 40: 40(1)(2) หัก 100,000 หรือตามจริง
+# 40(4) 10%, 40(5) 30%, 40(6) 60%, 40(7) 70%, 40(8) 92%
+EXPENSE_RATES = dict(_DEFAULT_RATES['expense_rates'])
+
+# ชื่อค่าคงที่อัตราภาษีและเพดานค่าลดหย่อนทั้งหมดที่ใช้ในการคำนวณ
+RATE_CONSTANT_NAMES = (
+    'TAX_BRACKETS',
+    'PERSONAL_DEDUCTION', 'SPOUSE_DEDUCTION', 'CHILD_DEDUCTION', 'CHILD_DEDUCTION_2ND', 'PARENT_DEDUCTION',
+    'MAX_LIFE_INSURANCE', 'MAX_HEALTH_INSURANCE_SELF', 'MAX_HEALTH_INSURANCE_PARENT', 'MAX_SOCIAL_SECURITY',
+    'MAX_RMF_PERCENT', 'MAX_RMF_AMOUNT', 'MAX_SSF_PERCENT', 'MAX_SSF_AMOUNT', 'MAX_PVD_PERCENT', 'MAX_PVD_AMOUNT',
+    'MAX_RMF_SSF_PVD_COMBINED', 'MAX_THAI_ESG_PERCENT', 'MAX_THAI_ESG_AMOUNT', 'MAX_NSSF',
+    'EASY_E_RECEIPT', 'MAX_SOLAR_CELL', 'MAX_HOME_CONSTRUCTION', 'MAX_HOME_INTEREST',
+    'MAX_DONATION_PERCENT', 'EDUCATION_DONATION_MULTIPLIER', 'MAX_POLITICAL_DONATION', 'MAX_SOCIAL_ENTERPRISE',
+    'EXPENSE_RATES',
+)
+
+
+def rate_constants():
+    """ค่าปัจจุบันของค่าคงที่ใน RATE_CONSTANT_NAMES (ใช้ตรวจว่ามีการเปลี่ยนอัตรา)"""
+    module_globals = globals()
+    return tuple(module_globals[name] for name in RATE_CONSTANT_NAMES)
+
+
+# ชุดกฎภาษีเริ่มต้นคือโมดูลนี้เอง (อ่านค่าคงที่ด้านบนตอนคำนวณ จึงยังแก้ค่าคงที่ได้เหมือนเดิม)
+# ชุดกฎของปีอื่นเป็น tax_rules.RuleSet ที่มีชื่อค่าคงที่และ get_tax_table() เหมือนกัน
+_module_rules = sys.modules[__name__]
+
+
+def get_rules(tax_year=None):
+    """
+    ดึงชุดกฎภาษีของปีภาษี
+
+    Args:
+        tax_year: ปีภาษี (พ.ศ.) เช่น 2567 (None = ค่าคงที่ในโมดูลนี้ ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        ชุดกฎภาษี (โมดูลนี้ หรือ tax_rules.RuleSet)
+    """
+    if tax_year is None:
+        return _module_rules
+    from tax_rules import get_rule_set
+    return get_rule_set(tax_year)
+
+
+# เงินได้ที่หักค่าใช้จ่ายเป็นเปอร์เซ็นต์ (เรียงตามลำดับการคำนวณ)
+PERCENT_INCOME_TYPES = ('40_4', '40_5', '40_6', '40_7', '40_8')
+
+# ลำดับรายการค่าลดหย่อน (ลำดับเดียวกับการรวมค่าลดหย่อนพื้นฐาน)
+BASIC_DEDUCTION_KEYS = (
+    'personal', 'spouse', 'children', 'parents',
+    'life_insurance', 'health_insurance_self', 'health_insurance_parent',
+    'rmf', 'ssf', 'pvd', 'thai_esg', 'nssf', 'social_security',
+    'easy_e_receipt', 'solar_cell', 'home_construction', 'home_interest',
+)
+DONATION_DEDUCTION_KEYS = ('donation', 'education_donation', 'political_donation', 'social_enterprise')
+DEDUCTION_DETAIL_KEYS = BASIC_DEDUCTION_KEYS + DONATION_DEDUCTION_KEYS
+
+
+def _percent_incomes(income):
+    """เงินได้ที่หักค่าใช้จ่ายเป็นเปอร์เซ็นต์ คู่กับประเภทเงินได้"""
+    return (
+        ('40_4', income.income_40_4),
+        ('40_5', income.income_40_5),
+        ('40_6', income.income_40_6),
+        ('40_7', income.income_40_7),
+        ('40_8', income.income_40_8),
+    )
+
+
+def salary_expense(income, rules=_module_rules):
+    """
+    ค่าใช้จ่าย 40(1)(2) (ถ้าไม่ระบุจะใช้ 100,000 และไม่เกิน 100,000)
+
+    Args:
+        income: IncomeInput
+        rules: ชุดกฎภาษีจาก get_rules()
+
+    Returns:
+        ค่าใช้จ่ายที่หักได้ (คงที่ ไม่ขึ้นกับจำนวนเงินเดือน)
+    """
+    expense_40_1_2 = income.expense_40_1_2
+    if expense_40_1_2 is None:
+        expense_40_1_2 = rules.EXPENSE_RATES['40_1_2']
+    return min(expense_40_1_2, rules.EXPENSE_RATES['40_1_2'])
+
+
+def income_totals(income, rules=_module_rules):
+    """
+    ขั้นตอนเงินได้ของ calculate_tax_record(): เงินได้รวม ค่าใช้จ่ายรวม และเงินได้หลังหักค่าใช้จ่าย
+
+    Args:
+        income: IncomeInput
+        rules: ชุดกฎภาษีจาก get_rules()
+
+    Returns:
+        (total_income, total_expenses, income_after_expenses)
+    """
+    total_income = 0
+    total_expenses = 0
+    
+    if income.income_40_1_2 > 0:
+        total_income += income.income_40_1_2
+        total_expenses += salary_expense(income, rules)
+    
+    for income_type, amount in _percent_incomes(income):
+        if amount > 0:
+            total_income += amount
+            total_expenses += amount * rules.EXPENSE_RATES[income_type]
+    
+    return total_income, total_expenses, max(0, total_income - total_expenses)
+
+
+def _income_details(income, rules=_module_rules):
+    """รายละเอียดเงินได้แต่ละประเภท จาก IncomeInput"""
+    income_details = {}
+    
+    if income.income_40_1_2 > 0:
+        expense_40_1_2 = salary_expense(income, rules)
+        income_details['40_1_2'] = {
+            'income': income.income_40_1_2,
+            'expense': expense_40_1_2,
+            'net': income.income_40_1_2 - expense_40_1_2
+        }
+    
+    for income_type, amount in _percent_incomes(income):
+        if amount > 0:
+            expense = amount * rules.EXPENSE_RATES[income_type]
+            income_details[income_type] = {
+                'income': amount,
+                'expense': expense,
+                'net': amount - expense
+            }
+    
+    return income_details
+
+
+def calculate_income_expenses(income_data, tax_year=None):
     """
     คำนวณหักค่าใช้จ่ายตามประเภทเงินได้มาตรา 40
     
     Args:
-        income_data: dictionary ประกอบด้วย:
+        income_data: dictionary (หรือ IncomeInput) ประกอบด้วย:
             - income_40_1_2: เงินเดือน/โบนัส 40(1)(2)
             - expense_40_1_2: ค่าใช้จ่าย 40(1)(2) (ถ้าไม่ระบุจะใช้ 100,000)
             - income_40_4: ดอกเบี้ย/เงินปันผล 40(4)
@@ -75,6 +221,7 @@ def calculate_income_expenses(income_data):
             - income_40_6: เงินได้วิชาชีพอิสระ 40(6)
             - income_40_7: เงินได้จากการรับเหมา 40(7)
             - income_40_8: เงินได้อื่นๆ 40(8)
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
     
     Returns:
         total_income: เงินได้รวม
@@ -82,95 +229,119 @@ def calculate_income_expenses(income_data):
         income_after_expenses: เงินได้หลังหักค่าใช้จ่าย
         income_details: รายละเอียดเงินได้แต่ละประเภท
     """
-    income_details = {}
-    total_income = 0
-    total_expenses = 0
+    if not isinstance(income_data, IncomeInput):
+        income_data = IncomeInput.from_dict(income_data)
     
-    # 40(1)(2) เงินเดือน/โบนัส
-    income_40_1_2 = income_data.get('income_40_1_2', 0)
-    if income_40_1_2 > 0:
-        expense_40_1_2 = income_data.get('expense_40_1_2', EXPENSE_RATES['40_1_2'])
-        expense_40_1_2 = min(expense_40_1_2, EXPENSE_RATES['40_1_2'])  # ไม่เกิน 100,000
-        income_details['40_1_2'] = {
-            'income': income_40_1_2,
-            'expense': expense_40_1_2,
-            'net': income_40_1_2 - expense_40_1_2
-        }
-        total_income += income_40_1_2
-        total_expenses += expense_40_1_2
-    
-    # 40(4) ดอกเบี้ย/เงินปันผล
-    income_40_4 = income_data.get('income_40_4', 0)
-    if income_40_4 > 0:
-        expense_40_4 = income_40_4 * EXPENSE_RATES['40_4']
-        income_details['40_4'] = {
-            'income': income_40_4,
-            'expense': expense_40_4,
-            'net': income_40_4 - expense_40_4
-        }
-        total_income += income_40_4
-        total_expenses += expense_40_4
-    
-    # 40(5) ค่าเช่าทรัพย์สิน
-    income_40_5 = income_data.get('income_40_5', 0)
-    if income_40_5 > 0:
-        expense_40_5 = income_40_5 * EXPENSE_RATES['40_5']
-        income_details['40_5'] = {
-            'income': income_40_5,
-            'expense': expense_40_5,
-            'net': income_40_5 - expense_40_5
-        }
-        total_income += income_40_5
-        total_expenses += expense_40_5
-    
-    # 40(6) เงินได้วิชาชีพอิสระ
-    income_40_6 = income_data.get('income_40_6', 0)
-    if income_40_6 > 0:
-        expense_40_6 = income_40_6 * EXPENSE_RATES['40_6']
-        income_details['40_6'] = {
-            'income': income_40_6,
-            'expense': expense_40_6,
-            'net': income_40_6 - expense_40_6
-        }
-        total_income += income_40_6
-        total_expenses += expense_40_6
-    
-    # 40(7) เงินได้จากการรับเหมา
-    income_40_7 = income_data.get('income_40_7', 0)
-    if income_40_7 > 0:
-        expense_40_7 = income_40_7 * EXPENSE_RATES['40_7']
-        income_details['40_7'] = {
-            'income': income_40_7,
-            'expense': expense_40_7,
-            'net': income_40_7 - expense_40_7
-        }
-        total_income += income_40_7
-        total_expenses += expense_40_7
-    
-    # 40(8) เงินได้อื่นๆ
-    income_40_8 = income_data.get('income_40_8', 0)
-    if income_40_8 > 0:
-        expense_40_8 = income_40_8 * EXPENSE_RATES['40_8']
-        income_details['40_8'] = {
-            'income': income_40_8,
-            'expense': expense_40_8,
-            'net': income_40_8 - expense_40_8
-        }
-        total_income += income_40_8
-        total_expenses += expense_40_8
+    rules = get_rules(tax_year)
+    total_income, total_expenses, income_after_expenses = income_totals(income_data, rules)
+    return total_income, total_expenses, income_after_expenses, _income_details(income_data, rules)
+
+
+def basic_deduction_amounts(income, deductions, rules=_module_rules):
+    """
+    ขั้นตอนค่าลดหย่อนพื้นฐาน (ไม่รวมเงินบริจาค) ของ calculate_tax_record()
+
+    Args:
+        income: เงินได้หลังหักค่าใช้จ่าย (ฐานของเพดานตามเปอร์เซ็นต์)
+        deductions: DeductionInput
+        rules: ชุดกฎภาษีจาก get_rules()
+
+    Returns:
+        tuple ของค่าลดหย่อนหลังใช้เพดาน เรียงตาม BASIC_DEDUCTION_KEYS
+    """
+    # ค่าลดหย่อนส่วนตัวและครอบครัว
+    personal = rules.PERSONAL_DEDUCTION if deductions.personal is None else deductions.personal
+    spouse_deduction = rules.SPOUSE_DEDUCTION if deductions.spouse else 0
+    children_2nd = deductions.children_2nd
+    child_deduction = (deductions.children - children_2nd) * rules.CHILD_DEDUCTION + children_2nd * rules.CHILD_DEDUCTION_2ND
+    parent_deduction = deductions.parents * rules.PARENT_DEDUCTION
+    
+    # เบี้ยประกัน
+    life_insurance = min(deductions.life_insurance, rules.MAX_LIFE_INSURANCE)
+    health_insurance_self = min(deductions.health_insurance_self, rules.MAX_HEALTH_INSURANCE_SELF)
+    health_insurance_parent = min(deductions.health_insurance_parent, rules.MAX_HEALTH_INSURANCE_PARENT)
+    
+    # กองทุน RMF/SSF/PVD (ตามเปอร์เซ็นต์ของเงินได้และเพดานของแต่ละกองทุน)
+    rmf = min(deductions.rmf, income * rules.MAX_RMF_PERCENT, rules.MAX_RMF_AMOUNT)
+    ssf = min(deductions.ssf, income * rules.MAX_SSF_PERCENT, rules.MAX_SSF_AMOUNT)
+    pvd = min(deductions.pvd, income * rules.MAX_PVD_PERCENT, rules.MAX_PVD_AMOUNT)
+    
+    # รวม RMF + SSF + PVD ไม่เกิน 500,000 (ปรับสัดส่วน)
+    rmf_ssf_pvd_total = rmf + ssf + pvd
+    if rmf_ssf_pvd_total > rules.MAX_RMF_SSF_PVD_COMBINED:
+        ratio = rules.MAX_RMF_SSF_PVD_COMBINED / rmf_ssf_pvd_total
+        rmf = rmf * ratio
+        ssf = ssf * ratio
+        pvd = pvd * ratio
+    
+    thai_esg = min(deductions.thai_esg, income * rules.MAX_THAI_ESG_PERCENT, rules.MAX_THAI_ESG_AMOUNT)
+    nssf = min(deductions.nssf, rules.MAX_NSSF)
+    social_security = min(deductions.social_security, rules.MAX_SOCIAL_SECURITY)
+    
+    # ค่าลดหย่อนเพื่อกระตุ้นเศรษฐกิจและที่อยู่อาศัย
+    easy_e_receipt = rules.EASY_E_RECEIPT if deductions.easy_e_receipt else 0
+    solar_cell = min(deductions.solar_cell, rules.MAX_SOLAR_CELL)
+    home_construction = min(deductions.home_construction, rules.MAX_HOME_CONSTRUCTION)
+    home_interest = min(deductions.home_interest, rules.MAX_HOME_INTEREST)
+    
+    return (
+        personal, spouse_deduction, child_deduction, parent_deduction,
+        life_insurance, health_insurance_self, health_insurance_parent,
+        rmf, ssf, pvd, thai_esg, nssf, social_security,
+        easy_e_receipt, solar_cell, home_construction, home_interest,
+    )
+
+
+def donation_deduction_amounts(income, basic_deductions, deductions, rules=_module_rules):
+    """
+    ขั้นตอนค่าลดหย่อนจากเงินบริจาคของ calculate_tax_record()
+
+    Args:
+        income: เงินได้หลังหักค่าใช้จ่าย
+        basic_deductions: ผลรวมของ basic_deduction_amounts() (ฐานของเพดานเงินบริจาค 10%)
+        deductions: DeductionInput
+        rules: ชุดกฎภาษีจาก get_rules()
+
+    Returns:
+        tuple ของค่าลดหย่อนหลังใช้เพดาน เรียงตาม DONATION_DEDUCTION_KEYS
+    """
+    # เงินได้หลังหักค่าลดหย่อนพื้นฐาน
+    income_after_basic = max(0, income - basic_deductions)
+    max_donation = income_after_basic * rules.MAX_DONATION_PERCENT
     
-    income_after_expenses = max(0, total_income - total_expenses)
+    # เงินบริจาคทั่วไป (ไม่เกิน 10% ของเงินได้หลังหักค่าลดหย่อน)
+    donation = min(deductions.donation, max_donation)
     
-    return total_income, total_expenses, income_after_expenses, income_details
+    # เงินบริจาคเพื่อการศึกษา (2 เท่า แต่ไม่เกิน 10% ของเงินได้หลังหักค่าลดหย่อน)
+    education_donation = min(deductions.education_donation * rules.EDUCATION_DONATION_MULTIPLIER, max_donation)
+    
+    political_donation = min(deductions.political_donation, rules.MAX_POLITICAL_DONATION)
+    social_enterprise = min(deductions.social_enterprise, rules.MAX_SOCIAL_ENTERPRISE)
+    
+    return donation, education_donation, political_donation, social_enterprise
+
+
+def _total_deductions(basic_deductions, donation_amounts):
+    """ค่าลดหย่อนรวมจากผลรวมค่าลดหย่อนพื้นฐานและค่าลดหย่อนจากเงินบริจาคแต่ละรายการ"""
+    donation, education_donation, political_donation, social_enterprise = donation_amounts
+    return basic_deductions + donation + education_donation + political_donation + social_enterprise
+
+
+def _deduction_amounts(income, deductions, rules=_module_rules):
+    """ค่าลดหย่อนรวม ค่าลดหย่อนพื้นฐาน และค่าลดหย่อนจากเงินบริจาคแต่ละรายการ"""
+    basic_amounts = basic_deduction_amounts(income, deductions, rules)
+    basic_deductions = sum(basic_amounts)
+    donation_amounts = donation_deduction_amounts(income, basic_deductions, deductions, rules)
+    return _total_deductions(basic_deductions, donation_amounts), basic_amounts, donation_amounts
 
 
-def calculate_deductions(income, deductions_data):
+def calculate_deductions(income, deductions_data, tax_year=None):
     """
     คำนวณค่าลดหย่อนทั้งหมด
     
     Args:
         income: รายได้รวม
-        deductions_data: dictionary ประกอบด้วย:
+        deductions_data: dictionary (หรือ DeductionInput) ประกอบด้วย:
             - personal: ค่าลดหย่อนส่วนตัว (default: 60000)
             - spouse: มีคู่สมรส (boolean)
             - children: จำนวนบุตร
@@ -186,161 +357,124 @@ def calculate_deductions(income, deductions_data):
             - home_interest: ดอกเบี้ยที่อยู่อาศัย
             - donation: เงินบริจาคทั่วไป
             - education_donation: เงินบริจาคเพื่อการศึกษา
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
     
     Returns:
         total_deductions: ค่าลดหย่อนรวม
         deduction_details: รายละเอียดค่าลดหย่อนแต่ละประเภท
     """
-    deduction_details = {}
-    
-    # ค่าลดหย่อนส่วนตัว
-    personal = deductions_data.get('personal', PERSONAL_DEDUCTION)
-    deduction_details['personal'] = personal
-    
-    # ค่าลดหย่อนคู่สมรส
-    spouse_deduction = SPOUSE_DEDUCTION if deductions_data.get('spouse', False) else 0
-    deduction_details['spouse'] = spouse_deduction
-    
-    # ค่าลดหย่อนบุตร
-    children = deductions_data.get('children', 0)
-    children_2nd = deductions_data.get('children_2nd', 0)
-    child_deduction = (children - children_2nd) * CHILD_DEDUCTION + children_2nd * CHILD_DEDUCTION_2ND
-    deduction_details['children'] = child_deduction
-    
-    # ค่าลดหย่อนบิดามารดา
-    parents = deductions_data.get('parents', 0)
-    parent_deduction = parents * PARENT_DEDUCTION
-    deduction_details['parents'] = parent_deduction
-    
-    # เบี้ยประกันชีวิต
-    life_insurance = min(deductions_data.get('life_insurance', 0), MAX_LIFE_INSURANCE)
-    deduction_details['life_insurance'] = life_insurance
-    
-    # เบี้ยประกันสุขภาพตนเอง
-    health_insurance_self = min(deductions_data.get('health_insurance_self', 0), MAX_HEALTH_INSURANCE_SELF)
-    deduction_details['health_insurance_self'] = health_insurance_self
-    
-    # เบี้ยประกันสุขภาพบิดามารดา
-    health_insurance_parent = min(deductions_data.get('health_insurance_parent', 0), MAX_HEALTH_INSURANCE_PARENT)
-    deduction_details['health_insurance_parent'] = health_insurance_parent
-    
-    # กองทุน RMF (30% ของเงินได้ สูงสุด 500,000)
-    rmf_amount = deductions_data.get('rmf', 0)
-    rmf_limit_by_percent = income * MAX_RMF_PERCENT
-    rmf = min(rmf_amount, rmf_limit_by_percent, MAX_RMF_AMOUNT)
-    deduction_details['rmf'] = rmf
-    
-    # กองทุน SSF (30% ของเงินได้ สูงสุด 200,000)
-    ssf_amount = deductions_data.get('ssf', 0)
-    ssf_limit_by_percent = income * MAX_SSF_PERCENT
-    ssf = min(ssf_amount, ssf_limit_by_percent, MAX_SSF_AMOUNT)
-    deduction_details['ssf'] = ssf
-    
-    # กองทุนสำรองเลี้ยงชีพ (PVD) (15% ของเงินได้ สูงสุด 500,000)
-    pvd_amount = deductions_data.get('pvd', 0)
-    pvd_limit_by_percent = income * MAX_PVD_PERCENT
-    pvd = min(pvd_amount, pvd_limit_by_percent, MAX_PVD_AMOUNT)
-    deduction_details['pvd'] = pvd
-    
-    # รวม RMF + SSF + PVD ไม่เกิน 500,000
-    rmf_ssf_pvd_total = rmf + ssf + pvd
-    if rmf_ssf_pvd_total > MAX_RMF_SSF_PVD_COMBINED:
-        # ปรับสัดส่วน
-        ratio = MAX_RMF_SSF_PVD_COMBINED / rmf_ssf_pvd_total
-        rmf = rmf * ratio
-        ssf = ssf * ratio
-        pvd = pvd * ratio
-        deduction_details['rmf'] = rmf
-        deduction_details['ssf'] = ssf
-        deduction_details['pvd'] = pvd
-    
-    # กองทุน Thai ESG (30% ของเงินได้ สูงสุด 300,000)
-    thai_esg_amount = deductions_data.get('thai_esg', 0)
-    thai_esg_limit_by_percent = income * MAX_THAI_ESG_PERCENT
-    thai_esg = min(thai_esg_amount, thai_esg_limit_by_percent, MAX_THAI_ESG_AMOUNT)
-    deduction_details['thai_esg'] = thai_esg
-    
-    # กองทุนการออมแห่งชาติ (กอช.)
-    nssf = min(deductions_data.get('nssf', 0), MAX_NSSF)
-    deduction_details['nssf'] = nssf
-    
-    # เงินสมทบกองทุนประกันสังคม
-    social_security = min(deductions_data.get('social_security', 0), MAX_SOCIAL_SECURITY)
-    deduction_details['social_security'] = social_security
-    
-    # Easy E-Receipt 2568
-    easy_e_receipt = EASY_E_RECEIPT if deductions_data.get('easy_e_receipt', False) else 0
-    deduction_details['easy_e_receipt'] = easy_e_receipt
-    
-    # ค่าติดตั้งโซลาร์เซลล์
-    solar_cell = min(deductions_data.get('solar_cell', 0), MAX_SOLAR_CELL)
-    deduction_details['solar_cell'] = solar_cell
-    
-    # ค่าก่อสร้างบ้านใหม่
-    home_construction = min(deductions_data.get('home_construction', 0), MAX_HOME_CONSTRUCTION)
-    deduction_details['home_construction'] = home_construction
-    
-    # ดอกเบี้ยที่อยู่อาศัย
-    home_interest = min(deductions_data.get('home_interest', 0), MAX_HOME_INTEREST)
-    deduction_details['home_interest'] = home_interest
-    
-    # คำนวณค่าลดหย่อนพื้นฐานก่อน (ไม่รวมเงินบริจาค)
-    basic_deductions = sum([
-        personal, spouse_deduction, child_deduction, parent_deduction,
-        life_insurance, health_insurance_self, health_insurance_parent,
-        rmf, ssf, pvd, thai_esg, nssf, social_security, 
-        easy_e_receipt, solar_cell, home_construction, home_interest
-    ])
-    
-    # เงินได้หลังหักค่าลดหย่อนพื้นฐาน
-    income_after_basic = max(0, income - basic_deductions)
-    
-    # เงินบริจาคทั่วไป (ไม่เกิน 10% ของเงินได้หลังหักค่าลดหย่อน)
-    donation = deductions_data.get('donation', 0)
-    max_donation = income_after_basic * MAX_DONATION_PERCENT
-    donation = min(donation, max_donation)
-    deduction_details['donation'] = donation
-    
-    # เงินบริจาคเพื่อการศึกษา (2 เท่า แต่ไม่เกิน 10% ของเงินได้หลังหักค่าลดหย่อน)
-    education_donation = deductions_data.get('education_donation', 0)
-    education_donation_deduction = education_donation * EDUCATION_DONATION_MULTIPLIER
-    max_education_donation = income_after_basic * MAX_DONATION_PERCENT
-    education_donation_deduction = min(education_donation_deduction, max_education_donation)
-    deduction_details['education_donation'] = education_donation_deduction
-    
-    # เงินบริจาคพรรคการเมือง
-    political_donation = min(deductions_data.get('political_donation', 0), MAX_POLITICAL_DONATION)
-    deduction_details['political_donation'] = political_donation
-    
-    # เงินลงทุนในธุรกิจวิสาหกิจเพื่อสังคม
-    social_enterprise = min(deductions_data.get('social_enterprise', 0), MAX_SOCIAL_ENTERPRISE)
-    deduction_details['social_enterprise'] = social_enterprise
-    
-    # ค่าลดหย่อนรวม
-    total_deductions = basic_deductions + donation + education_donation_deduction + political_donation + social_enterprise
+    if not isinstance(deductions_data, DeductionInput):
+        deductions_data = DeductionInput.from_dict(deductions_data)
     
-    return total_deductions, deduction_details
+    total_deductions, basic_amounts, donation_amounts = _deduction_amounts(income, deductions_data, get_rules(tax_year))
+    return total_deductions, dict(zip(DEDUCTION_DETAIL_KEYS, basic_amounts + donation_amounts))
 
 
-def calculate_net_income(income_after_expenses, deductions_data):
+def calculate_net_income(income_after_expenses, deductions_data, tax_year=None):
     """
     คำนวณรายได้สุทธิ
     
     Args:
         income_after_expenses: เงินได้หลังหักค่าใช้จ่าย
         deductions_data: ข้อมูลค่าลดหย่อน
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
     
     Returns:
         net_income: รายได้สุทธิ
         total_deductions: ค่าลดหย่อนรวม
         deduction_details: รายละเอียดค่าลดหย่อน
     """
-    total_deductions, deduction_details = calculate_deductions(income_after_expenses, deductions_data)
+    total_deductions, deduction_details = calculate_deductions(income_after_expenses, deductions_data, tax_year)
     net_income = max(0, income_after_expenses - total_deductions)
     return net_income, total_deductions, deduction_details
 
 
-def calculate_tax(net_income):
+class TaxTable:
+    """
+    ตารางขั้นบันไดภาษีที่คอมไพล์ไว้ล่วงหน้าจาก TAX_BRACKETS
+
+    เก็บจุดเริ่มต้น อัตราภาษี และภาษีสะสมของขั้นก่อนหน้าไว้ล่วงหน้า
+    จึงหาขั้นของรายได้ด้วย bisect แล้วคำนวณภาษีแบบปิดได้ทันที:
+        ภาษี = ภาษีสะสม + (min(รายได้, เพดานขั้น) - (min_income - 1)) × อัตรา
+
+    ลำดับการบวกภาษีสะสมเหมือนการวนทีละขั้นใน calculate_tax() แบบเดิม
+    ผลลัพธ์จึงตรงกันทุกหลักทศนิยม
+    """
+
+    __slots__ = ('brackets', 'lower', 'offset', 'upper', 'rate', 'base', 'labels')
+
+    def __init__(self, brackets):
+        self.brackets = [tuple(bracket) for bracket in brackets]
+        self.lower = tuple(min_income for min_income, _, _ in self.brackets)
+        # min_income คือจุดเริ่มต้นของขั้น แต่ฐานที่ใช้หักคือ min_income - 1
+        self.offset = tuple(min_income - 1 for min_income, _, _ in self.brackets)
+        self.upper = tuple(max_income for _, max_income, _ in self.brackets)
+        self.rate = tuple(rate for _, _, rate in self.brackets)
+
+        base = []
+        cumulative_tax = 0
+        for min_income, max_income, rate in self.brackets:
+            base.append(cumulative_tax)
+            if rate > 0 and max_income != float('inf'):
+                cumulative_tax += (max_income - (min_income - 1)) * rate
+        self.base = tuple(base)
+
+        self.labels = tuple(
+            f'{min_income:,.0f} - {max_income:,}' if max_income != float('inf') else f'{min_income:,.0f} - ∞'
+            for min_income, max_income, _ in self.brackets
+        )
+
+    def bracket_index(self, net_income):
+        """หาขั้นภาษีของรายได้สุทธิ (-1 ถ้ารายได้ไม่ถึงขั้นแรก)"""
+        return bisect_left(self.lower, net_income) - 1
+
+    def tax(self, net_income):
+        """คำนวณภาษีของรายได้สุทธิ โดยไม่สร้างรายละเอียดแต่ละขั้น"""
+        if net_income <= 0:
+            return 0
+        index = bisect_left(self.lower, net_income) - 1
+        if index < 0:
+            return 0
+        rate = self.rate[index]
+        if rate <= 0:
+            return self.base[index]
+        return self.base[index] + (min(net_income, self.upper[index]) - self.offset[index]) * rate
+
+    def details(self, net_income):
+        """รายละเอียดการคำนวณภาษีแต่ละขั้น (เฉพาะขั้นที่มีอัตราภาษี > 0)"""
+        if net_income <= 0:
+            return []
+        tax_details = []
+        for index in range(bisect_left(self.lower, net_income)):
+            rate = self.rate[index]
+            if rate <= 0:
+                continue
+            taxable_amount = min(net_income, self.upper[index]) - self.offset[index]
+            tax_details.append({
+                'range': self.labels[index],
+                'taxable_amount': taxable_amount,
+                'rate': rate * 100,
+                'tax': taxable_amount * rate
+            })
+        return tax_details
+
+
+_tax_table = TaxTable(TAX_BRACKETS)
+
+
+def get_tax_table():
+    """
+    ดึงตารางภาษีที่คอมไพล์แล้ว
+
+    คอมไพล์ใหม่อัตโนมัติถ้า TAX_BRACKETS ถูกเปลี่ยน
+    """
+    global _tax_table
+    if _tax_table.brackets != TAX_BRACKETS:
+        _tax_table = TaxTable(TAX_BRACKETS)
+    return _tax_table
+
+
+def calculate_tax(net_income, tax_year=None):
     """
     คำนวณภาษีตามขั้นบันได (Progressive Tax)
     
@@ -352,6 +486,7 @@ def calculate_tax(net_income):
     
     Args:
         net_income: รายได้สุทธิ
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
     
     Returns:
         tax: ภาษีที่ต้องจ่าย
@@ -360,77 +495,63 @@ def calculate_tax(net_income):
     if net_income <= 0:
         return 0, []
     
-    tax = 0
-    tax_details = []
-    
-    for min_income, max_income, rate in TAX_BRACKETS:
-        # ข้ามขั้นที่รายได้ไม่ถึง
-        if net_income <= min_income:
-            continue
-        
-        # คำนวณจำนวนเงินที่ต้องเสียภาษีในขั้นนี้
-        # ใช้ min เพื่อหาว่ารายได้อยู่ในขั้นไหน
-        if max_income == float('inf'):
-            # ขั้นสุดท้าย
-            taxable_amount = net_income - (min_income - 1)  # ลบ 1 เพราะ min_income คือจุดเริ่มต้นของขั้น
-        else:
-            # ขั้นอื่นๆ
-            bracket_max = min(net_income, max_income)
-            # taxable_amount = bracket_max - (min_income - 1) เพราะ min_income คือจุดเริ่มต้นของขั้น
-            # ตัวอย่าง: 150,001-300,000 หมายความว่า 150,001 เป็นจุดเริ่มต้น
-            # แต่ในการคำนวณ ต้องหัก 150,000 (ไม่ใช่ 150,001)
-            taxable_amount = bracket_max - (min_income - 1)
-        
-        # ตรวจสอบว่ามีเงินที่ต้องเสียภาษีในขั้นนี้หรือไม่
-        if taxable_amount > 0 and rate > 0:  # แสดงเฉพาะขั้นที่มีอัตราภาษี > 0
-            bracket_tax = taxable_amount * rate
-            tax += bracket_tax
-            
-            tax_details.append({
-                'range': f'{min_income:,.0f} - {max_income if max_income != float("inf") else "∞":,}',
-                'taxable_amount': taxable_amount,
-                'rate': rate * 100,
-                'tax': bracket_tax
-            })
-            
-            # ถ้ารายได้อยู่ในขั้นนี้แล้ว ให้หยุด
-            if net_income <= max_income:
-                break
-    
-    return tax, tax_details
+    table = get_rules(tax_year).get_tax_table()
+    return table.tax(net_income), table.details(net_income)
 
 
-def calculate_tax_complete(income_data, deductions_data, withholding_tax=0):
+def _result_details(income, basic_amounts, donation_amounts, net_income, table, rules):
+    """สร้างรายละเอียดของ TaxResult (เรียกเมื่อมีการใช้รายละเอียดครั้งแรก)"""
+    return (
+        _income_details(income, rules),
+        dict(zip(DEDUCTION_DETAIL_KEYS, basic_amounts + donation_amounts)),
+        table.details(net_income),
+    )
+
+
+def calculate_tax_record(tax_input, tax_year=None):
     """
-    คำนวณภาษีแบบครบถ้วน
+    คำนวณภาษีแบบครบถ้วนจาก TaxInput
+    
+    คำนวณเฉพาะตัวเลขสรุปและภาษีหลังหักเงินบริจาคเพียงรอบเดียว
+    ส่วนรายละเอียด (เงินได้ ค่าลดหย่อน ภาษีแต่ละขั้นก่อนหักเงินบริจาค)
+    จะถูกสร้างเมื่อเรียกใช้ครั้งแรกผ่าน TaxResult
     
     Args:
-        income_data: ข้อมูลเงินได้ตามมาตรา 40
-        deductions_data: ข้อมูลค่าลดหย่อน
-        withholding_tax: ภาษีหัก ณ ที่จ่าย
+        tax_input: ข้อมูลเข้า (TaxInput) ที่ตรวจสอบแล้ว
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
     
     Returns:
-        dict: ข้อมูลการคำนวณภาษีทั้งหมด
+        TaxResult: ผลการคำนวณภาษีทั้งหมด
     """
-    # คำนวณเงินได้และค่าใช้จ่าย
-    total_income, total_expenses, income_after_expenses, income_details = calculate_income_expenses(income_data)
-    
-    # คำนวณค่าลดหย่อนและรายได้สุทธิ
-    net_income, total_deductions, deduction_details = calculate_net_income(income_after_expenses, deductions_data)
+    rules = get_rules(tax_year)
     
-    # คำนวณภาษี
-    tax, tax_details = calculate_tax(net_income)
+    # คำนวณเงินได้และค่าใช้จ่าย
+    income = tax_input.income
+    totals = income_totals(income, rules)
+    
+    # คำนวณค่าลดหย่อน
+    total_deductions, basic_amounts, donation_amounts = _deduction_amounts(
+        totals[2], tax_input.deductions, rules
+    )
+    return _tax_result(income, totals, total_deductions, basic_amounts, donation_amounts,
+                       tax_input.withholding_tax, rules)
+
+
+def _tax_result(income, totals, total_deductions, basic_amounts, donation_amounts, withholding_tax, rules):
+    """รายได้สุทธิ ภาษีตามขั้นบันได และเงินคืน/เงินเพิ่ม จากผลของขั้นตอนเงินได้และค่าลดหย่อน"""
+    total_income, total_expenses, income_after_expenses = totals
+    net_income = max(0, income_after_expenses - total_deductions)
     
     # คำนวณเงินบริจาค
-    donation = deduction_details.get('donation', 0)
-    education_donation = deduction_details.get('education_donation', 0)
+    donation, education_donation = donation_amounts[0], donation_amounts[1]
     total_donation = donation + education_donation
     
     # เงินได้สุทธิหลังหักเงินบริจาค
     net_income_after_donation = net_income - total_donation
     
-    # คำนวณภาษีใหม่หลังหักเงินบริจาค
-    tax_after_donation, _ = calculate_tax(net_income_after_donation)
+    # คำนวณภาษีหลังหักเงินบริจาค
+    table = rules.get_tax_table()
+    tax_after_donation = table.tax(net_income_after_donation)
     
     # เงินคืน/เงินเพิ่ม
     tax_refund = max(0, withholding_tax - tax_after_donation)
@@ -440,24 +561,45 @@ def calculate_tax_complete(income_data, deductions_data, withholding_tax=0):
     tax_percent_of_income = (tax_after_donation / total_income * 100) if total_income > 0 else 0
     tax_percent_of_net = (tax_after_donation / net_income_after_donation * 100) if net_income_after_donation > 0 else 0
     
-    return {
-        'total_income': total_income,
-        'total_expenses': total_expenses,
-        'income_after_expenses': income_after_expenses,
-        'income_details': income_details,
-        'total_deductions': total_deductions,
-        'deduction_details': deduction_details,
-        'donation': donation,
-        'education_donation': education_donation,
-        'total_donation': total_donation,
-        'net_income': net_income_after_donation,
-        'tax': tax_after_donation,
-        'tax_details': tax_details,
-        'withholding_tax': withholding_tax,
-        'tax_refund': tax_refund,
-        'tax_additional': tax_additional,
-        'tax_percent_of_income': tax_percent_of_income,
-        'tax_percent_of_net': tax_percent_of_net,
-        'net_income_after_tax': net_income_after_donation - tax_after_donation
-    }
+    return TaxResult(
+        total_income=total_income,
+        total_expenses=total_expenses,
+        income_after_expenses=income_after_expenses,
+        total_deductions=total_deductions,
+        donation=donation,
+        education_donation=education_donation,
+        total_donation=total_donation,
+        net_income=net_income_after_donation,
+        tax=tax_after_donation,
+        withholding_tax=withholding_tax,
+        tax_refund=tax_refund,
+        tax_additional=tax_additional,
+        tax_percent_of_income=tax_percent_of_income,
+        tax_percent_of_net=tax_percent_of_net,
+        net_income_after_tax=net_income_after_donation - tax_after_donation,
+        _detail_source=partial(_result_details, income, basic_amounts, donation_amounts, net_income, table, rules)
+    )
 
+
+def calculate_tax_complete(income_data, deductions_data, withholding_tax=0, detail=True, tax_year=None):
+    """
+    คำนวณภาษีแบบครบถ้วน
+    
+    Args:
+        income_data: ข้อมูลเงินได้ตามมาตรา 40
+        deductions_data: ข้อมูลค่าลดหย่อน
+        withholding_tax: ภาษีหัก ณ ที่จ่าย
+        detail: False = คืนเฉพาะตัวเลขสรุป ไม่สร้าง income_details,
+            deduction_details และ tax_details (เร็วกว่าสำหรับงานคำนวณจำนวนมาก)
+        tax_year: ปีภาษี (พ.ศ.) เช่น 2567, 2568, 2569 (None = ปี DEFAULT_TAX_YEAR)
+    
+    Returns:
+        dict: ข้อมูลการคำนวณภาษีทั้งหมด
+    
+    ข้อมูลเข้าถูกตรวจสอบก่อนคำนวณ (TaxInput.from_dicts): จำนวนเงินติดลบหรือ NaN และจำนวนคน
+    ที่ไม่ใช่จำนวนเต็มไม่ติดลบจะเกิด ValueError ค่าที่ไม่ใช่ตัวเลข (รวมถึง True/False ในช่อง
+    จำนวนเงินหรือจำนวนคน) จะเกิด TypeError จำนวนเงินทุกช่องถูกแปลงเป็น float
+    (ก่อนหน้านี้ค่าเหล่านี้ถูกนำไปคำนวณต่อโดยไม่แจ้ง เช่น เงินได้ติดลบทำให้ภาษีผิด)
+    """
+    result = calculate_tax_record(TaxInput.from_dicts(income_data, deductions_data, withholding_tax), tax_year)
+    return result.to_dict() if detail else result.to_summary_dict()
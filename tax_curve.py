@@ -0,0 +1,184 @@
+"""
+โมดูลเส้นกราฟภาษีตลอดช่วงเงินได้ (เช่น ภาษีตามเงินเดือน หรืออัตราภาษีส่วนเพิ่มตามโบนัส)
+
+ภาษีเป็นฟังก์ชันเส้นตรงเป็นช่วงของเงินได้แต่ละประเภท เมื่อหาจุดหักเหครบแล้ว
+(จากเพดานค่าใช้จ่าย เพดานค่าลดหย่อนตามเปอร์เซ็นต์ เพดานเงินบริจาค และ TAX_BRACKETS)
+ค่าภาษี อัตราภาษีส่วนเพิ่ม และอัตราภาษีที่แท้จริงที่จุดใดก็ได้จะได้จากการประมาณค่า
+ในช่วง (interpolation) โดยไม่ต้องเรียก calculate_tax_complete() ทุกจุด
+จุดหักเหได้จาก tax_solver.net_income_breakpoints() ทั้งหมด การสร้างเส้นกราฟหนึ่งเส้น
+จึงเรียก calculate_tax_record() เพียง 2 ครั้ง (เงินได้รวมที่ปลายทั้งสองข้าง)
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from tax_calculator import calculate_tax_record, get_rules
+from tax_models import IncomeInput
+from tax_solver import SALARY_FIELDS, field_setter, net_income_breakpoints, tax_pieces
+
+
+# field เงินได้ที่ใช้เป็นแกนของเส้นกราฟได้
+CURVE_FIELDS = SALARY_FIELDS + tuple(
+    field for field in IncomeInput.__slots__ if field.startswith('income_')
+)
+
+
+class TaxCurve:
+    """
+    ภาษีตามค่าของ field เงินได้หนึ่งรายการ เก็บเป็นช่วงเส้นตรง
+
+    ในแต่ละช่วง (x0, x1] เงินได้สุทธิและภาษีเป็นเส้นตรงตาม x ภาษีอาจกระโดดระหว่างช่วง
+    ตามขั้นบันไดภาษี (ค่าที่จุดกระโดดพอดีเป็นค่าของช่วงด้านซ้าย เหมือน calculate_tax())
+    จุดที่เงินได้สุทธิกระโดด (เช่น เงินเดือนเริ่มจาก 0) เป็นช่วงกว้าง 0 ที่เก็บค่า ณ จุดนั้น
+    """
+
+    __slots__ = ('field', 'x0', 'x1', 'n0', 'n1', 't0', 't1', 'income_start', 'income_slope')
+
+    def __init__(self, field, pieces, income_start, income_slope):
+        self.field = field
+        self.x0 = [piece[0] for piece in pieces]
+        self.x1 = [piece[1] for piece in pieces]
+        self.n0 = [piece[2] for piece in pieces]
+        self.n1 = [piece[3] for piece in pieces]
+        self.t0 = [piece[4] for piece in pieces]
+        self.t1 = [piece[5] for piece in pieces]
+        # เงินได้รวมเป็นเส้นตรงตาม x (total_income = income_start + income_slope × x)
+        self.income_start = income_start
+        self.income_slope = income_slope
+
+    @property
+    def lo(self) -> float:
+        return self.x0[0]
+
+    @property
+    def hi(self) -> float:
+        return self.x1[-1]
+
+    @property
+    def breakpoints(self) -> List[Tuple[float, float]]:
+        """จุดปลายของทุกช่วงเป็น (x, ภาษี) (จุดที่ภาษีกระโดดจะมีค่า x ซ้ำสองจุด)"""
+        points = [(self.x0[0], self.t0[0])]
+        for x0, x1, t0, t1 in zip(self.x0, self.x1, self.t0, self.t1):
+            if t0 != points[-1][1]:
+                points.append((x0, t0))
+            if (x1, t1) != points[-1]:
+                points.append((x1, t1))
+        return points
+
+    def _piece(self, x):
+        """ช่วงที่ x อยู่ (x0 < x <= x1 หรือช่วงกว้าง 0 ที่ x0 = x)"""
+        if not self.lo <= x <= self.hi:
+            raise ValueError(f"{self.field} = {x} อยู่นอกช่วง [{self.lo}, {self.hi}]")
+        return max(bisect_left(self.x1, x), 0)
+
+    def _interpolate(self, x, index, start, end):
+        x0 = self.x0[index]
+        width = self.x1[index] - x0
+        if width == 0:
+            return start[index]
+        return start[index] + (end[index] - start[index]) * (x - x0) / width
+
+    def tax_at(self, x: float) -> float:
+        """ภาษีเมื่อ field มีค่า x"""
+        return self._interpolate(x, self._piece(x), self.t0, self.t1)
+
+    def net_income_at(self, x: float) -> float:
+        """เงินได้สุทธิหลังหักเงินบริจาคเมื่อ field มีค่า x"""
+        return self._interpolate(x, self._piece(x), self.n0, self.n1)
+
+    def total_income_at(self, x: float) -> float:
+        """เงินได้รวมเมื่อ field มีค่า x"""
+        return self.income_start + self.income_slope * x
+
+    def marginal_rate(self, x: float) -> float:
+        """
+        อัตราภาษีส่วนเพิ่ม (ภาษีที่เพิ่มต่อเงินได้รวม 1 บาทถัดไป) เป็นสัดส่วน เช่น 0.25
+
+        ที่จุดหักเหพอดีจะใช้ความชันของช่วงด้านขวา
+        """
+        if not self.lo <= x <= self.hi:
+            raise ValueError(f"{self.field} = {x} อยู่นอกช่วง [{self.lo}, {self.hi}]")
+        index = min(bisect_right(self.x0, x), len(self.x0)) - 1
+        slope = (self.t1[index] - self.t0[index]) / (self.x1[index] - self.x0[index])
+        return slope / self.income_slope
+
+    def effective_rate(self, x: float) -> float:
+        """อัตราภาษีที่แท้จริง (ภาษี / เงินได้รวม) เป็นสัดส่วน"""
+        total_income = self.total_income_at(x)
+        return self.tax_at(x) / total_income if total_income > 0 else 0.0
+
+    def sample(self, xs) -> Dict[str, np.ndarray]:
+        """
+        คำนวณเส้นกราฟที่จุด xs จำนวนมากในครั้งเดียว
+
+        Args:
+            xs: array ของค่า field (อยู่ในช่วง [lo, hi])
+
+        Returns:
+            dict ของ numpy array: x, total_income, net_income, tax,
+            net_income_after_tax, marginal_rate, effective_rate
+        """
+        xs = np.asarray(xs, dtype=float)
+        if xs.size and (xs.min() < self.lo or xs.max() > self.hi):
+            raise ValueError(f"ค่า {self.field} ต้องอยู่ในช่วง [{self.lo}, {self.hi}]")
+        x0 = np.asarray(self.x0)
+        x1 = np.asarray(self.x1)
+        width = x1 - x0
+
+        # ภาษีใช้ช่วงด้านซ้าย (x0 < x <= x1) อัตราส่วนเพิ่มใช้ช่วงด้านขวา (x0 <= x < x1)
+        index = np.searchsorted(x1, xs, side='left')
+        fraction = np.divide(xs - x0[index], width[index], out=np.zeros_like(xs), where=width[index] > 0)
+        n0, n1 = np.asarray(self.n0), np.asarray(self.n1)
+        t0, t1 = np.asarray(self.t0), np.asarray(self.t1)
+        net_income = n0[index] + (n1[index] - n0[index]) * fraction
+        tax = t0[index] + (t1[index] - t0[index]) * fraction
+
+        right = np.minimum(np.searchsorted(x0, xs, side='right'), len(x0)) - 1
+        marginal_rate = (t1[right] - t0[right]) / width[right] / self.income_slope
+
+        total_income = self.income_start + self.income_slope * xs
+        with np.errstate(divide='ignore', invalid='ignore'):
+            effective_rate = np.where(total_income > 0, tax / total_income, 0.0)
+
+        return {
+            'x': xs,
+            'total_income': total_income,
+            'net_income': net_income,
+            'tax': tax,
+            'net_income_after_tax': net_income - tax,
+            'marginal_rate': marginal_rate,
+            'effective_rate': effective_rate,
+        }
+
+
+def tax_curve(income_data: Dict, deductions_data: Dict, field: str, lo: float, hi: float,
+              tax_year: Optional[int] = None) -> TaxCurve:
+    """
+    สร้างเส้นกราฟภาษีตามค่าของ field เงินได้หนึ่งรายการ โดยค่าอื่นคงที่
+
+    Args:
+        income_data: ข้อมูลเงินได้ (รูปแบบเดียวกับ calculate_tax_complete())
+        deductions_data: ข้อมูลค่าลดหย่อน
+        field: field เงินได้ใน CURVE_FIELDS เช่น 'salary_per_month', 'bonus', 'income_40_8'
+        lo: ค่าต่ำสุดของ field
+        hi: ค่าสูงสุดของ field
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        TaxCurve (เรียก calculate_tax_record() 2 ครั้ง ไม่ขึ้นกับจำนวนจุดหักเห)
+    """
+    if field not in CURVE_FIELDS:
+        raise ValueError(f"field ต้องเป็นหนึ่งใน {CURVE_FIELDS} ได้รับ {field}")
+    if hi <= lo:
+        raise ValueError("hi ต้องมากกว่า lo")
+
+    make_input = field_setter(income_data, deductions_data, 0, field)
+    pieces = tax_pieces(net_income_breakpoints(make_input, lo, hi, tax_year), get_rules(tax_year).get_tax_table())
+
+    # เงินได้รวมเป็นเส้นตรงตาม x จึงใช้ค่าที่ปลายทั้งสองข้าง
+    income_lo = calculate_tax_record(make_input(lo), tax_year).total_income
+    income_hi = calculate_tax_record(make_input(hi), tax_year).total_income
+    income_slope = (income_hi - income_lo) / (hi - lo)
+    return TaxCurve(field, pieces, income_lo - income_slope * lo, income_slope)
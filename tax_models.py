@@ -0,0 +1,339 @@
+"""
+โครงสร้างข้อมูล (record) แบบมีชนิดสำหรับข้อมูลเข้าและผลการคำนวณภาษี
+
+ใช้ dataclass แบบ __slots__ แทน dictionary อิสระ ตรวจสอบและแปลงชนิดข้อมูล
+ครั้งเดียวตอนสร้าง record ทำให้ขั้นตอนคำนวณไม่ต้องเรียก .get(..., 0) ซ้ำทุกครั้ง
+และใช้หน่วยความจำน้อยลงเมื่อเก็บผลจำนวนมาก
+
+record ข้อมูลเข้าถือเป็นค่าคงที่หลังสร้าง ถ้าต้องการเปลี่ยนค่าให้ใช้ .replace()
+(ตรวจสอบเฉพาะ field ที่เปลี่ยน) หรือ dataclasses.replace() (ตรวจสอบทุก field อีกครั้ง)
+"""
+
+import math
+import numbers
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def _as_amount(name, value):
+    """แปลงจำนวนเงินเป็น float และตรวจสอบว่าไม่ติดลบ (True/False ไม่ถือเป็นจำนวนเงิน)"""
+    if type(value) is not float:
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise TypeError(f"{name} ต้องเป็นตัวเลข ได้รับ {type(value).__name__}")
+        value = float(value)
+    if not value >= 0:  # ติดลบหรือ NaN
+        raise ValueError(f"{name} ต้องไม่ติดลบ ได้รับ {value}")
+    return value
+
+
+def _as_count(name, value):
+    """แปลงจำนวน (คน) เป็น int และตรวจสอบว่าเป็นจำนวนเต็มไม่ติดลบ (True/False ไม่ถือเป็นจำนวน)"""
+    if type(value) is not int:
+        if isinstance(value, bool) or not isinstance(value, numbers.Real):
+            raise TypeError(f"{name} ต้องเป็นจำนวนเต็ม ได้รับ {type(value).__name__}")
+        if value != int(value):
+            raise ValueError(f"{name} ต้องเป็นจำนวนเต็มไม่ติดลบ ได้รับ {value}")
+        value = int(value)
+    if value < 0:
+        raise ValueError(f"{name} ต้องเป็นจำนวนเต็มไม่ติดลบ ได้รับ {value}")
+    return value
+
+
+def _as_flag(name, value):
+    """แปลงค่าที่เป็นตัวเลือก (มี/ไม่มี) เป็น bool"""
+    return value if type(value) is bool else bool(value)
+
+
+def _as_optional_amount(name, value):
+    """เหมือน _as_amount แต่ยอมให้เป็น None (ใช้ค่าเริ่มต้นตอนคำนวณ)"""
+    return None if value is None else _as_amount(name, value)
+
+
+def _normalize(record, validators):
+    """ตรวจสอบและแปลงชนิดทุก field ของ record (เรียกจาก __post_init__)"""
+    for name, validate, _ in validators:
+        value = getattr(record, name)
+        normalized = validate(name, value)
+        if normalized is not value:
+            setattr(record, name, normalized)
+
+
+def _validators(cls, counts=(), flags=(), optional=()):
+    """จับคู่ field ของ record กับฟังก์ชันตรวจสอบและค่าเริ่มต้น (คำนวณครั้งเดียวต่อคลาส)"""
+    validators = []
+    for name in cls.__slots__:
+        if name in flags:
+            validate = _as_flag
+        elif name in counts:
+            validate = _as_count
+        elif name in optional:
+            validate = _as_optional_amount
+        else:
+            validate = _as_amount
+        validators.append((name, validate, cls.__dataclass_fields__[name].default))
+    return tuple(validators)
+
+
+def _from_dict(cls, data, validators):
+    """
+    สร้าง record จาก dictionary โดยข้าม key ที่ไม่ได้ใช้คำนวณ
+
+    ตรวจสอบเฉพาะ field ที่ระบุมา ส่วน field ที่ไม่ได้ระบุจะใช้ค่าเริ่มต้นของคลาส
+    """
+    record = cls.__new__(cls)
+    for name, validate, default in validators:
+        value = data.get(name)
+        setattr(record, name, default if value is None else validate(name, value))
+    return record
+
+
+def _replace(record, changes, validate_by_name):
+    """สำเนาของ record ที่เปลี่ยนค่าบาง field โดยตรวจสอบเฉพาะ field ที่เปลี่ยน"""
+    cls = type(record)
+    unknown = [name for name in changes if name not in validate_by_name]
+    if unknown:
+        raise TypeError(f"{cls.__name__} ไม่มี field: {', '.join(unknown)}")
+    copied = cls.__new__(cls)
+    for name in cls.__slots__:
+        setattr(copied, name, getattr(record, name))
+    for name, value in changes.items():
+        setattr(copied, name, validate_by_name[name](name, value))
+    return copied
+
+
+def _changed_items(record, validators):
+    """ชุดคู่ (field, ค่า) เฉพาะ field ที่ไม่ใช่ค่าเริ่มต้น"""
+    return frozenset(
+        (name, getattr(record, name)) for name, _, default in validators if getattr(record, name) != default
+    )
+
+
+def _to_dict(record):
+    """แปลง record ข้อมูลเข้ากลับเป็น dictionary (ไม่รวม field ที่เป็น None)"""
+    data = {}
+    for name in type(record).__slots__:
+        value = getattr(record, name)
+        if value is not None:
+            data[name] = value
+    return data
+
+
+@dataclass(slots=True)
+class IncomeInput:
+    """ข้อมูลเงินได้ตามมาตรา 40 (key เดียวกับ income_data)"""
+
+    income_40_1_2: float = 0.0
+    expense_40_1_2: Optional[float] = None  # None = ใช้ค่าใช้จ่ายสูงสุดตาม EXPENSE_RATES
+    income_40_4: float = 0.0
+    income_40_5: float = 0.0
+    income_40_6: float = 0.0
+    income_40_7: float = 0.0
+    income_40_8: float = 0.0
+
+    def __post_init__(self):
+        _normalize(self, _INCOME_VALIDATORS)
+
+    @classmethod
+    def from_dict(cls, income_data: Dict) -> 'IncomeInput':
+        """สร้างจาก income_data (key อื่นเช่น salary_per_month จะถูกข้าม)"""
+        return _from_dict(cls, income_data, _INCOME_VALIDATORS)
+
+    def to_dict(self) -> Dict:
+        """แปลงกลับเป็น income_data (ไม่รวม field ที่ไม่ได้ระบุ)"""
+        return _to_dict(self)
+
+    def replace(self, **changes) -> 'IncomeInput':
+        """สำเนาที่เปลี่ยนค่าตาม changes (ตรวจสอบเฉพาะ field ที่เปลี่ยน)"""
+        return _replace(self, changes, _INCOME_VALIDATE)
+
+
+@dataclass(slots=True)
+class DeductionInput:
+    """ข้อมูลค่าลดหย่อน (key เดียวกับ deductions_data)"""
+
+    personal: Optional[float] = None  # None = ใช้ PERSONAL_DEDUCTION
+    spouse: bool = False
+    children: int = 0
+    children_2nd: int = 0
+    parents: int = 0
+    life_insurance: float = 0.0
+    health_insurance_self: float = 0.0
+    health_insurance_parent: float = 0.0
+    rmf: float = 0.0
+    ssf: float = 0.0
+    pvd: float = 0.0
+    thai_esg: float = 0.0
+    nssf: float = 0.0
+    social_security: float = 0.0
+    easy_e_receipt: bool = False
+    solar_cell: float = 0.0
+    home_construction: float = 0.0
+    home_interest: float = 0.0
+    donation: float = 0.0
+    education_donation: float = 0.0
+    political_donation: float = 0.0
+    social_enterprise: float = 0.0
+
+    def __post_init__(self):
+        _normalize(self, _DEDUCTION_VALIDATORS)
+
+    @classmethod
+    def from_dict(cls, deductions_data: Dict) -> 'DeductionInput':
+        """สร้างจาก deductions_data"""
+        return _from_dict(cls, deductions_data, _DEDUCTION_VALIDATORS)
+
+    def to_dict(self) -> Dict:
+        """แปลงกลับเป็น deductions_data (ไม่รวม field ที่ไม่ได้ระบุ)"""
+        return _to_dict(self)
+
+    def replace(self, **changes) -> 'DeductionInput':
+        """สำเนาที่เปลี่ยนค่าตาม changes (ตรวจสอบเฉพาะ field ที่เปลี่ยน)"""
+        return _replace(self, changes, _DEDUCTION_VALIDATE)
+
+
+_INCOME_VALIDATORS = _validators(IncomeInput, optional=('expense_40_1_2',))
+_DEDUCTION_VALIDATORS = _validators(
+    DeductionInput,
+    counts=('children', 'children_2nd', 'parents'),
+    flags=('spouse', 'easy_e_receipt'),
+    optional=('personal',),
+)
+_INCOME_VALIDATE = {name: validate for name, validate, _ in _INCOME_VALIDATORS}
+_DEDUCTION_VALIDATE = {name: validate for name, validate, _ in _DEDUCTION_VALIDATORS}
+
+
+@dataclass(slots=True)
+class TaxInput:
+    """ข้อมูลเข้าทั้งหมดของการคำนวณภาษีหนึ่งครั้ง"""
+
+    income: IncomeInput
+    deductions: DeductionInput
+    withholding_tax: float = 0.0
+
+    def __post_init__(self):
+        self.withholding_tax = _as_amount('withholding_tax', self.withholding_tax)
+
+    @classmethod
+    def from_dicts(cls, income_data: Dict, deductions_data: Dict, withholding_tax: float = 0) -> 'TaxInput':
+        """สร้างจากอาร์กิวเมนต์ชุดเดียวกับ calculate_tax_complete()"""
+        return cls(IncomeInput.from_dict(income_data), DeductionInput.from_dict(deductions_data), withholding_tax)
+
+    def canonical_key(self) -> Tuple:
+        """
+        คีย์มาตรฐานของข้อมูลเข้า (ใช้เป็นคีย์ cache)
+
+        ตัด field ที่เป็นค่าเริ่มต้นออก (ศูนย์ / ไม่ระบุ / False) และใช้ค่าที่ตรวจสอบแล้ว
+        ข้อมูลที่ต่างกันแค่ชนิด (1 กับ 1.0, 1 กับ True) หรือการมี/ไม่มี field ที่เป็นศูนย์
+        จึงได้คีย์เดียวกัน (field ที่ค่าเริ่มต้นเป็น None เช่น personal จะไม่ถูกตัดเมื่อเป็นศูนย์)
+        """
+        return (
+            _changed_items(self.income, _INCOME_VALIDATORS),
+            _changed_items(self.deductions, _DEDUCTION_VALIDATORS),
+            self.withholding_tax,
+        )
+
+
+@dataclass(slots=True)
+class TaxResult:
+    """
+    ผลการคำนวณภาษี (field เดียวกับ dictionary ที่ calculate_tax_complete() คืนค่า)
+
+    รายละเอียด (income_details, deduction_details, tax_details) จะถูกสร้าง
+    เมื่อเรียกใช้ครั้งแรกเท่านั้น ถ้าต้องการแค่ตัวเลขสรุปจะไม่เสียเวลาสร้างรายละเอียด
+    """
+
+    total_income: float
+    total_expenses: float
+    income_after_expenses: float
+    total_deductions: float
+    donation: float
+    education_donation: float
+    total_donation: float
+    net_income: float
+    tax: float
+    withholding_tax: float
+    tax_refund: float
+    tax_additional: float
+    tax_percent_of_income: float
+    tax_percent_of_net: float
+    net_income_after_tax: float
+    # ฟังก์ชันสร้างรายละเอียด คืนค่า (income_details, deduction_details, tax_details)
+    _detail_source: Optional[Callable[[], Tuple[Dict, Dict, List[Dict]]]] = field(default=None, repr=False, compare=False)
+    _details: Optional[Tuple[Dict, Dict, List[Dict]]] = field(default=None, repr=False, compare=False)
+
+    def _resolve_details(self):
+        """สร้างรายละเอียดครั้งแรกที่ถูกเรียกใช้ แล้วเก็บไว้ใช้ซ้ำ"""
+        if self._details is None:
+            self._details = self._detail_source() if self._detail_source is not None else ({}, {}, [])
+            self._detail_source = None
+        return self._details
+
+    @property
+    def income_details(self) -> Dict:
+        """รายละเอียดเงินได้แต่ละประเภท"""
+        return self._resolve_details()[0]
+
+    @property
+    def deduction_details(self) -> Dict:
+        """รายละเอียดค่าลดหย่อนแต่ละประเภท"""
+        return self._resolve_details()[1]
+
+    @property
+    def tax_details(self) -> List[Dict]:
+        """รายละเอียดการคำนวณภาษีแต่ละขั้น"""
+        return self._resolve_details()[2]
+
+    def to_summary_dict(self) -> Dict:
+        """แปลงเป็น dictionary เฉพาะตัวเลขสรุป (ไม่สร้างรายละเอียด)"""
+        return {
+            'total_income': self.total_income,
+            'total_expenses': self.total_expenses,
+            'income_after_expenses': self.income_after_expenses,
+            'total_deductions': self.total_deductions,
+            'donation': self.donation,
+            'education_donation': self.education_donation,
+            'total_donation': self.total_donation,
+            'net_income': self.net_income,
+            'tax': self.tax,
+            'withholding_tax': self.withholding_tax,
+            'tax_refund': self.tax_refund,
+            'tax_additional': self.tax_additional,
+            'tax_percent_of_income': self.tax_percent_of_income,
+            'tax_percent_of_net': self.tax_percent_of_net,
+            'net_income_after_tax': self.net_income_after_tax
+        }
+
+    def to_dict(self) -> Dict:
+        """แปลงเป็น dictionary รูปแบบเดียวกับ calculate_tax_complete()"""
+        income_details, deduction_details, tax_details = self._resolve_details()
+        return {
+            'total_income': self.total_income,
+            'total_expenses': self.total_expenses,
+            'income_after_expenses': self.income_after_expenses,
+            'income_details': income_details,
+            'total_deductions': self.total_deductions,
+            'deduction_details': deduction_details,
+            'donation': self.donation,
+            'education_donation': self.education_donation,
+            'total_donation': self.total_donation,
+            'net_income': self.net_income,
+            'tax': self.tax,
+            'tax_details': tax_details,
+            'withholding_tax': self.withholding_tax,
+            'tax_refund': self.tax_refund,
+            'tax_additional': self.tax_additional,
+            'tax_percent_of_income': self.tax_percent_of_income,
+            'tax_percent_of_net': self.tax_percent_of_net,
+            'net_income_after_tax': self.net_income_after_tax
+        }
+
+    def to_calculation_record(self) -> Dict:
+        """แปลงเป็นข้อมูลสำหรับ database.save_calculation()"""
+        return {
+            'income': self.total_income,
+            'total_deductions': self.total_deductions,
+            'net_income': self.net_income,
+            'tax': self.tax,
+            'deduction_details': self.deduction_details,
+            'tax_details': self.tax_details
+        }
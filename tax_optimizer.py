@@ -0,0 +1,292 @@
+"""
+โมดูลหาการแบ่งเงินลงทุน/เงินบริจาคที่ทำให้ภาษีต่ำที่สุดภายใต้งบประมาณที่กำหนด
+
+เงินแต่ละบาทที่ใส่ในค่าลดหย่อนพื้นฐาน (RMF, SSF, PVD, Thai ESG, กอช., ประกันชีวิต)
+ลดเงินได้สุทธิได้ไม่เกิน 1 บาท และยังลดเพดานเงินบริจาค 10% ลงด้วย ขณะที่เงินบริจาค
+ลดเงินได้สุทธิได้มากกว่า (เงินบริจาคเพื่อการศึกษานับ 2 เท่า) แต่มีเพดานที่ขึ้นกับ
+ค่าลดหย่อนพื้นฐาน ดังนั้นเมื่อกำหนดยอดรวมค่าลดหย่อนพื้นฐานแล้ว การใส่เงินที่เหลือ
+ในรายการที่ลดเงินได้สุทธิต่อบาทได้มากที่สุดก่อนจะดีที่สุดเสมอ โมดูลนี้จึงหา
+ยอดค่าลดหย่อนพื้นฐานที่ดีที่สุดจากจุดหักเหของเงินได้สุทธิในรูปฟังก์ชันเส้นตรงเป็นช่วง
+(tax_piecewise.net_income_function) แทนการลองทุกสัดส่วน
+
+เมื่อเงินได้สุทธิลดลงถึงช่วงที่อัตราภาษีเป็น 0 (หรือถึง 0 บาท) เงินที่ใส่เพิ่มไม่ทำให้ภาษีลดลงอีก
+จึงหาการแบ่งเงินที่ใช้เงินน้อยที่สุดที่ยังอยู่ในช่วงนั้นแทนการใช้งบทั้งหมด
+การหาคำตอบหนึ่งครั้งเรียก calculate_tax_record() 2 ครั้ง (ภาษีก่อนและหลังแบ่งเงิน)
+"""
+
+import math
+from dataclasses import replace
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import tax_calculator as tc
+from tax_calculator import calculate_tax_record
+from tax_models import TaxInput
+from tax_piecewise import PiecewiseLinear, maximum, minimum, net_income_function
+from tax_solver import tax_pieces
+
+
+# รายการค่าลดหย่อนพื้นฐานที่ใช้แบ่งเงินได้ (เรียงตามลำดับที่จะใส่เงิน)
+BASIC_OPTION_FIELDS = ('rmf', 'ssf', 'pvd', 'thai_esg', 'nssf', 'life_insurance')
+
+# รายการเงินบริจาค เรียงตามเงินได้สุทธิที่ลดได้ต่อบาท (มากไปน้อย)
+DONATION_OPTION_FIELDS = ('education_donation', 'donation', 'political_donation', 'social_enterprise')
+
+OPTION_FIELDS = BASIC_OPTION_FIELDS + DONATION_OPTION_FIELDS
+
+# กองทุนที่อยู่ภายใต้เพดานรวม MAX_RMF_SSF_PVD_COMBINED
+_COMBINED_FIELDS = ('rmf', 'ssf', 'pvd')
+
+
+def _basic_headroom(income, deductions, rules):
+    """วงเงินที่ยังใส่เพิ่มได้ของค่าลดหย่อนพื้นฐานแต่ละรายการ (ก่อนคิดเพดานรวม)"""
+    caps = {
+        'rmf': min(income * rules.MAX_RMF_PERCENT, rules.MAX_RMF_AMOUNT),
+        'ssf': min(income * rules.MAX_SSF_PERCENT, rules.MAX_SSF_AMOUNT),
+        'pvd': min(income * rules.MAX_PVD_PERCENT, rules.MAX_PVD_AMOUNT),
+        'thai_esg': min(income * rules.MAX_THAI_ESG_PERCENT, rules.MAX_THAI_ESG_AMOUNT),
+        'nssf': rules.MAX_NSSF,
+        'life_insurance': rules.MAX_LIFE_INSURANCE,
+    }
+    return {field: max(0, cap - getattr(deductions, field)) for field, cap in caps.items()}
+
+
+class _Allocator:
+    """แบ่งงบประมาณของผู้เสียภาษีหนึ่งคนตามยอดค่าลดหย่อนพื้นฐานที่กำหนด"""
+
+    def __init__(self, tax_input, budget, options, tax_year):
+        self.tax_input = tax_input
+        self.budget = budget
+        self.tax_year = tax_year
+        self.rules = rules = tc.get_rules(tax_year)
+        income = tax_input.income
+        deductions = tax_input.deductions
+        _, _, self.income_after_expenses = tc.income_totals(income, rules)
+
+        basic_amounts = tc.basic_deduction_amounts(self.income_after_expenses, deductions, rules)
+        self.basic_deductions = sum(basic_amounts)
+        rmf, ssf, pvd = basic_amounts[7:10]
+        self.combined_room = max(0, rules.MAX_RMF_SSF_PVD_COMBINED - (rmf + ssf + pvd))
+
+        headroom = _basic_headroom(self.income_after_expenses, deductions, rules)
+        self.basic_fields = [field for field in BASIC_OPTION_FIELDS if field in options]
+        self.basic_room = [headroom[field] for field in self.basic_fields]
+        self.donation_fields = [field for field in DONATION_OPTION_FIELDS if field in options]
+
+        # ยอดค่าลดหย่อนพื้นฐานสูงสุดที่ใส่เพิ่มได้จริง
+        combined = min(sum(room for field, room in zip(self.basic_fields, self.basic_room)
+                           if field in _COMBINED_FIELDS), self.combined_room)
+        other = sum(room for field, room in zip(self.basic_fields, self.basic_room)
+                    if field not in _COMBINED_FIELDS)
+        self.max_basic = min(budget, combined + other)
+
+    def allocate(self, basic, budget=None):
+        """
+        แบ่งเงินเมื่อใส่ค่าลดหย่อนพื้นฐานรวม basic บาท คืน dict ของจำนวนเงินที่เพิ่ม
+
+        basic และ budget (None = งบประมาณทั้งหมด) เป็นตัวเลข หรือ PiecewiseLinear ของตัวแปรเดียวกัน
+        (ได้จำนวนเงินแต่ละรายการเป็น PiecewiseLinear บนช่วงเดียวกัน)
+        """
+        allocation = {}
+        remaining = basic
+        combined_room = self.combined_room
+        for field, room in zip(self.basic_fields, self.basic_room):
+            if field in _COMBINED_FIELDS:
+                room = minimum(room, combined_room)
+            amount = minimum(room, remaining)
+            allocation[field] = amount
+            remaining = remaining - amount
+            if field in _COMBINED_FIELDS:
+                combined_room = combined_room - amount
+
+        # เพดานเงินบริจาคหลังเพิ่มค่าลดหย่อนพื้นฐาน
+        rules = self.rules
+        deductions = self.tax_input.deductions
+        max_donation = maximum(0, self.income_after_expenses - (self.basic_deductions + basic - remaining))
+        max_donation = max_donation * rules.MAX_DONATION_PERCENT
+        rooms = {
+            'education_donation': max_donation * (1 / rules.EDUCATION_DONATION_MULTIPLIER) - deductions.education_donation,
+            'donation': max_donation - deductions.donation,
+            'political_donation': rules.MAX_POLITICAL_DONATION - deductions.political_donation,
+            'social_enterprise': rules.MAX_SOCIAL_ENTERPRISE - deductions.social_enterprise,
+        }
+        spend = (self.budget if budget is None else budget) - (basic - remaining)
+        for field in self.donation_fields:
+            amount = minimum(maximum(0, rooms[field]), spend)
+            allocation[field] = amount
+            spend = spend - amount
+        return allocation
+
+    def net_income(self, allocation):
+        """เงินได้สุทธิหลังหักเงินบริจาคเมื่อเพิ่มเงินตาม allocation ที่เป็น PiecewiseLinear"""
+        deductions = self.tax_input.deductions
+        changes = {field: getattr(deductions, field) + amount for field, amount in allocation.items()}
+        return net_income_function(self.tax_input, changes, self.rules)
+
+    def evaluate(self, allocation):
+        """คำนวณภาษีเมื่อเพิ่มเงินตาม allocation"""
+        deductions = self.tax_input.deductions
+        changes = {field: getattr(deductions, field) + amount for field, amount in allocation.items() if amount}
+        tax_input = self.tax_input
+        if changes:
+            tax_input = TaxInput(tax_input.income, replace(deductions, **changes), tax_input.withholding_tax)
+        return calculate_tax_record(tax_input, self.tax_year)
+
+    def cheapest(self, limit):
+        """
+        การแบ่งเงินที่ใช้เงินน้อยที่สุดที่ทำให้เงินได้สุทธิไม่เกิน limit (None ถ้างบประมาณไม่พอ)
+
+        เงินบริจาคลดเงินได้สุทธิต่อบาทได้ไม่น้อยกว่าค่าลดหย่อนพื้นฐาน (ซึ่งยังลดเพดานเงินบริจาคด้วย)
+        จึงดูก่อนว่าใช้เงินบริจาคอย่างเดียวพอหรือไม่ (เงินได้สุทธิตามงบที่ใช้) ถ้าไม่พอจึงไล่ยอด
+        ค่าลดหย่อนพื้นฐานโดยใส่เงินบริจาคเต็มเพดานที่เหลือ แล้วเลือกจุดแรกที่ไม่เกิน limit
+        """
+        if self.donation_fields:
+            spend = PiecewiseLinear.line(0.0, self.budget)
+            amount = _first_at_most(self.net_income(self.allocate(0.0, spend)).points(), limit)
+            if amount is not None:
+                return self.allocate(0.0, min(_ceil_satang(amount), self.budget))
+        elif self.net_income(self.allocate(0.0, 0.0)) <= limit:
+            return self.allocate(0.0, 0.0)
+        if self.max_basic <= 0:
+            return None
+
+        # งบที่พอใส่เงินบริจาคเต็มเพดานได้ทุกยอดค่าลดหย่อนพื้นฐาน
+        unbounded = self.max_basic + sum(self.allocate(0.0, math.inf).values())
+        basic = PiecewiseLinear.line(0.0, self.max_basic)
+        amount = _first_at_most(self.net_income(self.allocate(basic, unbounded)).points(), limit)
+        if amount is None:
+            return None
+        allocation = self.allocate(min(_ceil_satang(amount), self.max_basic), unbounded)
+        if sum(allocation.values()) > self.budget:
+            return None
+        return allocation
+
+
+def _ceil_satang(amount):
+    """ปัดขึ้นเป็นสตางค์ (เงินได้สุทธิจึงต่ำกว่าจุดตัดพอที่ความคลาดเคลื่อนของทศนิยมไม่ทำให้เกิน)"""
+    return math.ceil(round(amount * 100, 6)) / 100
+
+
+def _first_at_most(points, limit):
+    """ค่า x แรกที่ฟังก์ชันเส้นตรงเป็นช่วง (จุด (x, y) เรียงตาม x) มีค่าไม่เกิน limit"""
+    x0, y0 = points[0]
+    if y0 <= limit:
+        return x0
+    for x1, y1 in points[1:]:
+        if y1 <= limit:
+            return x0 + (y0 - limit) / (y0 - y1) * (x1 - x0)
+        x0, y0 = x1, y1
+    return None
+
+
+def _zero_tax_limit(table):
+    """เงินได้สุทธิสูงสุดที่ภาษียังเป็น 0 (ขอบล่างของขั้นแรกที่อัตราภาษีมากกว่า 0)"""
+    for lower, rate in zip(table.lower, table.rate):
+        if rate > 0:
+            return max(float(lower), 0.0)
+    return math.inf
+
+
+def _optimize(tax_input: TaxInput, budget: float, options: Sequence[str], tax_year: Optional[int]) -> Dict:
+    """หาการแบ่งเงินที่ดีที่สุดสำหรับ TaxInput หนึ่งรายการ"""
+    allocator = _Allocator(tax_input, budget, options, tax_year)
+    before = calculate_tax_record(tax_input, tax_year)
+
+    # เงินได้สุทธิเป็นเส้นตรงเป็นช่วงตามยอดค่าลดหย่อนพื้นฐาน ค่าต่ำสุดจึงอยู่ที่จุดหักเห
+    # (ภาษีไม่ลดลงเมื่อเงินได้สุทธิเพิ่ม จึงเลือกจุดที่เงินได้สุทธิต่ำสุด)
+    best_basic, best_net = 0.0, allocator.net_income(allocator.allocate(0.0))
+    if allocator.max_basic > 0:
+        basic = PiecewiseLinear.line(0.0, allocator.max_basic)
+        points = allocator.net_income(allocator.allocate(basic)).points()
+        best_basic, best_net = min(points, key=lambda point: (point[1], point[0]))
+    allocation = allocator.allocate(best_basic)
+
+    # ถึงช่วงอัตราภาษี 0 แล้ว เงินที่เกินจากที่ทำให้เงินได้สุทธิถึงช่วงนั้นไม่ลดภาษีอีก
+    limit = _zero_tax_limit(allocator.rules.get_tax_table())
+    if best_net <= limit and budget > 0:
+        cheapest = allocator.cheapest(limit)
+        if cheapest is not None:
+            allocation = cheapest
+    result = allocator.evaluate(allocation)
+    invested = sum(allocation.values())
+    return {
+        'allocation': allocation,
+        'invested': invested,
+        'unallocated': budget - invested,
+        'tax_before': before.tax,
+        'tax': result.tax,
+        'tax_saved': before.tax - result.tax,
+        'net_income': result.net_income,
+    }
+
+
+def optimize_allocation(income_data: Dict, deductions_data: Dict, budget: float,
+                        withholding_tax: float = 0, options: Optional[Iterable[str]] = None,
+                        tax_year: Optional[int] = None) -> Dict:
+    """
+    หาการแบ่งงบประมาณลงทุน/บริจาคที่ทำให้ภาษีต่ำที่สุด
+
+    เงินที่แบ่งได้จะบวกเพิ่มจากค่าลดหย่อนที่มีอยู่แล้วใน deductions_data และไม่เกิน
+    เพดานทุกข้อใน calculate_deductions() (เพดานตามจำนวนเงิน ตามเปอร์เซ็นต์ของเงินได้
+    เพดานรวม RMF/SSF/PVD 500,000 บาท และเพดานเงินบริจาค 10%) และหยุดใส่เงินเมื่อ
+    เงินได้สุทธิลดถึงช่วงที่อัตราภาษีเป็น 0 หรือถึง 0 บาทแล้ว
+
+    Args:
+        income_data: ข้อมูลเงินได้
+        deductions_data: ข้อมูลค่าลดหย่อนที่มีอยู่แล้ว
+        budget: งบประมาณที่ต้องการลงทุน/บริจาค
+        withholding_tax: ภาษีหัก ณ ที่จ่าย
+        options: รายการที่เลือกได้ (ค่าเริ่มต้นคือ OPTION_FIELDS ทั้งหมด)
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        dict ประกอบด้วย:
+            - allocation: จำนวนเงินที่ควรเพิ่มในแต่ละรายการ
+            - invested: เงินที่แบ่งได้ทั้งหมด
+            - unallocated: เงินที่เหลือเพราะทุกรายการเต็มเพดานแล้ว หรือใส่เพิ่มแล้วภาษีไม่ลดลง
+            - tax_before / tax / tax_saved: ภาษีก่อน หลัง และภาษีที่ลดได้
+            - net_income: เงินได้สุทธิหลังหักเงินบริจาคหลังแบ่งเงิน
+    """
+    options = _check_options(options)
+    tax_input = TaxInput.from_dicts(income_data, deductions_data, withholding_tax)
+    return _optimize(tax_input, budget, options, tax_year)
+
+
+def optimize_allocation_batch(profiles: Iterable[Tuple[Dict, Dict]], budget: Union[float, Sequence[float]],
+                              withholding_tax: Union[float, Sequence[float]] = 0,
+                              options: Optional[Iterable[str]] = None,
+                              tax_year: Optional[int] = None) -> List[Dict]:
+    """
+    หาการแบ่งงบประมาณที่ดีที่สุดของพนักงานหลายคน
+
+    Args:
+        profiles: รายการ (income_data, deductions_data) ของแต่ละคน
+        budget: งบประมาณ (ค่าเดียวกันทุกคน หรือรายการตามลำดับ profiles)
+        withholding_tax: ภาษีหัก ณ ที่จ่าย (ค่าเดียวหรือรายการ)
+        options: รายการที่เลือกได้ (ใช้กับทุกคน)
+        tax_year: ปีภาษี (ใช้กับทุกคน)
+
+    Returns:
+        list ของผลลัพธ์แบบเดียวกับ optimize_allocation() ตามลำดับ profiles
+    """
+    options = _check_options(options)
+    profiles = list(profiles)
+    budgets = budget if isinstance(budget, Sequence) else [budget] * len(profiles)
+    withholdings = withholding_tax if isinstance(withholding_tax, Sequence) else [withholding_tax] * len(profiles)
+    if len(budgets) != len(profiles) or len(withholdings) != len(profiles):
+        raise ValueError("จำนวน budget/withholding_tax ต้องเท่ากับจำนวน profiles")
+
+    return [
+        _optimize(TaxInput.from_dicts(income_data, deductions_data, withholding), amount, options, tax_year)
+        for (income_data, deductions_data), amount, withholding in zip(profiles, budgets, withholdings)
+    ]
+
+
+def _check_options(options):
+    """ตรวจรายการที่เลือกได้"""
+    if options is None:
+        return OPTION_FIELDS
+    options = tuple(options)
+    unknown = [field for field in options if field not in OPTION_FIELDS]
+    if unknown:
+        raise ValueError(f"ไม่รองรับรายการ: {', '.join(unknown)}")
+    return options
@@ -0,0 +1,308 @@
+"""
+ฟังก์ชันเส้นตรงเป็นช่วง (piecewise linear) และเงินได้สุทธิของ calculate_tax_record() ในรูปฟังก์ชันนั้น
+
+ทุกขั้นตอนของการคำนวณเงินได้สุทธิเป็นการบวก คูณค่าคงที่ และ min/max กับเพดาน
+(เพดานค่าใช้จ่าย 40(1)(2) เพดานตามเปอร์เซ็นต์ของเงินได้ เพดานรวม RMF/SSF/PVD
+เพดานเงินบริจาค 10%) เมื่อค่าของ field หนึ่งหรือหลาย field เป็นเส้นตรงเป็นช่วงของตัวแปร x
+เงินได้สุทธิจึงเป็นเส้นตรงเป็นช่วงของ x ด้วย โมดูลนี้คำนวณขั้นตอนเดียวกันกับ
+PiecewiseLinear โดยตรง จุดหักเหจึงได้จากการแก้สมการเส้นตรงที่แต่ละ min/max
+(ไม่ต้องลองคำนวณภาษีที่จุดใดเลย)
+"""
+
+import math
+from bisect import bisect_right
+from numbers import Real
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import tax_calculator as tc
+from tax_models import TaxInput
+
+
+def _close(a, b, tolerance=1e-9):
+    """เปรียบเทียบจำนวนเงินโดยเผื่อความคลาดเคลื่อนของทศนิยม"""
+    return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+
+
+class PiecewiseLinear:
+    """
+    ฟังก์ชันเส้นตรงเป็นช่วงที่ต่อเนื่องบนช่วง [xs[0], xs[-1]] หรือ [xs[0], ∞)
+
+    เก็บจุดหักเห (xs, ys) เรียงตาม x ระหว่างจุดที่ติดกันเป็นเส้นตรง ถ้า end_slope
+    ไม่เป็น None ฟังก์ชันต่อเป็นเส้นตรงความชัน end_slope หลังจุดสุดท้ายไปจนถึงอนันต์
+
+    รองรับ +, - และการคูณด้วยค่าคงที่ (กับ PiecewiseLinear บนช่วงเดียวกันหรือตัวเลข)
+    ส่วน min/max ใช้ minimum() / maximum() ซึ่งเพิ่มจุดตัดของสองฟังก์ชันเป็นจุดหักเห
+    """
+
+    __slots__ = ('xs', 'ys', 'end_slope')
+
+    def __init__(self, xs: Sequence[float], ys: Sequence[float], end_slope: Optional[float] = None):
+        self.xs = tuple(xs)
+        self.ys = tuple(ys)
+        self.end_slope = end_slope
+
+    @classmethod
+    def line(cls, lo: float, hi: float = math.inf, slope: float = 1.0, intercept: float = 0.0) -> 'PiecewiseLinear':
+        """เส้นตรง intercept + slope × x บนช่วง [lo, hi] (hi = math.inf คือไม่มีขอบบน)"""
+        if hi == math.inf:
+            return cls((lo,), (intercept + slope * lo,), slope)
+        if hi == lo:
+            return cls((lo,), (intercept + slope * lo,))
+        return cls((lo, hi), (intercept + slope * lo, intercept + slope * hi))
+
+    @property
+    def lo(self) -> float:
+        return self.xs[0]
+
+    @property
+    def hi(self) -> float:
+        return self.xs[-1] if self.end_slope is None else math.inf
+
+    def __call__(self, x: float) -> float:
+        xs, ys = self.xs, self.ys
+        if x >= xs[-1]:
+            if x == xs[-1]:
+                return ys[-1]
+            if self.end_slope is None:
+                raise ValueError(f"x = {x} อยู่นอกช่วง [{self.lo}, {self.hi}]")
+            return ys[-1] + self.end_slope * (x - xs[-1])
+        index = bisect_right(xs, x) - 1
+        if index < 0:
+            raise ValueError(f"x = {x} อยู่นอกช่วง [{self.lo}, {self.hi}]")
+        x0, x1 = xs[index], xs[index + 1]
+        return ys[index] + (ys[index + 1] - ys[index]) * (x - x0) / (x1 - x0)
+
+    def points(self, hi: Optional[float] = None) -> List[Tuple[float, float]]:
+        """
+        จุดหักเหเป็น list ของ (x, ค่า)
+
+        Args:
+            hi: ตัดช่วงที่ x = hi (None = ขอบบนของฟังก์ชัน ซึ่งต้องไม่ใช่อนันต์)
+        """
+        if hi is None:
+            if self.end_slope is not None:
+                raise ValueError("ฟังก์ชันไม่มีขอบบน ต้องระบุ hi")
+            return list(zip(self.xs, self.ys))
+        points = [(x, y) for x, y in zip(self.xs, self.ys) if x < hi]
+        points.append((hi, self(hi)))
+        return points
+
+    def _constant(self, value):
+        """ค่าคงที่บนช่วงเดียวกับฟังก์ชันนี้"""
+        if self.end_slope is not None:
+            return PiecewiseLinear((self.xs[0],), (value,), 0.0)
+        if len(self.xs) == 1:
+            return PiecewiseLinear(self.xs, (value,))
+        return PiecewiseLinear((self.xs[0], self.xs[-1]), (value, value))
+
+    def _coerce(self, other):
+        if isinstance(other, PiecewiseLinear):
+            if other.xs[0] != self.xs[0] or other.hi != self.hi:
+                raise ValueError("PiecewiseLinear ต้องอยู่บนช่วงเดียวกัน")
+            return other
+        if isinstance(other, Real):
+            return self._constant(other)
+        return NotImplemented
+
+    def _linear(self, other, a, b):
+        """a × self + b × other"""
+        other = self._coerce(other)
+        if other is NotImplemented:
+            return other
+        xs = sorted(set(self.xs) | set(other.xs))
+        ys = [a * self(x) + b * other(x) for x in xs]
+        end_slope = None if self.end_slope is None else a * self.end_slope + b * other.end_slope
+        return _simplified(xs, ys, end_slope)
+
+    def __add__(self, other):
+        return self._linear(other, 1.0, 1.0)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        return self._linear(other, 1.0, -1.0)
+
+    def __rsub__(self, other):
+        return self._linear(other, -1.0, 1.0)
+
+    def __mul__(self, factor):
+        if not isinstance(factor, Real):
+            return NotImplemented
+        end_slope = None if self.end_slope is None else self.end_slope * factor
+        return _simplified(self.xs, [y * factor for y in self.ys], end_slope)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return self * -1.0
+
+    def _select(self, other, smaller):
+        """min (smaller=True) หรือ max ทีละจุดกับ other พร้อมจุดตัดเป็นจุดหักเหใหม่"""
+        other = self._coerce(other)
+        xs = sorted(set(self.xs) | set(other.xs))
+        pick = min if smaller else max
+        out_x, out_y = [], []
+        previous = None
+        for x in xs:
+            a, b = self(x), other(x)
+            diff = a - b
+            if previous is not None and (previous[1] < 0 < diff or diff < 0 < previous[1]):
+                # สองเส้นตัดกันภายในช่วง
+                x0 = previous[0]
+                crossing = x0 + (x - x0) * previous[1] / (previous[1] - diff)
+                if x0 < crossing < x:
+                    out_x.append(crossing)
+                    out_y.append(self(crossing))
+            out_x.append(x)
+            out_y.append(pick(a, b))
+            previous = (x, diff)
+
+        end_slope = None
+        if self.end_slope is not None:
+            diff, slope_diff = previous[1], self.end_slope - other.end_slope
+            if diff * slope_diff < 0:
+                # ตัดกันอีกครั้งหลังจุดสุดท้าย
+                crossing = xs[-1] - diff / slope_diff
+                if crossing > xs[-1]:
+                    out_x.append(crossing)
+                    out_y.append(self(crossing))
+            # หลังจุดตัดสุดท้าย min คือเส้นที่ชันน้อยกว่า max คือเส้นที่ชันมากกว่า
+            end_slope = pick(self.end_slope, other.end_slope)
+        return _simplified(out_x, out_y, end_slope)
+
+
+def _simplified(xs, ys, end_slope):
+    """ตัดจุดซ้ำและจุดที่ไม่ใช่จุดหักเหจริง (อยู่บนเส้นตรงเดียวกับจุดสองข้าง) ออก"""
+    out_x, out_y = [xs[0]], [ys[0]]
+    for x, y in zip(xs[1:], ys[1:]):
+        if x == out_x[-1]:
+            continue
+        if len(out_x) >= 2:
+            x0, y0 = out_x[-2], out_y[-2]
+            if _close(out_y[-1], y0 + (y - y0) * (out_x[-1] - x0) / (x - x0)):
+                out_x[-1], out_y[-1] = x, y
+                continue
+        out_x.append(x)
+        out_y.append(y)
+    if end_slope is not None and len(out_x) >= 2:
+        # จุดสุดท้ายที่ความชันเท่ากับส่วนที่ต่อไปถึงอนันต์ไม่ใช่จุดหักเห
+        x0, y0 = out_x[-2], out_y[-2]
+        if _close(out_y[-1] - y0, end_slope * (out_x[-1] - x0)):
+            out_x.pop()
+            out_y.pop()
+    return PiecewiseLinear(out_x, out_y, end_slope)
+
+
+Value = Union[float, PiecewiseLinear]
+
+
+def minimum(*values: Value) -> Value:
+    """min ทีละจุดของตัวเลขและ/หรือ PiecewiseLinear"""
+    result = values[0]
+    for value in values[1:]:
+        if isinstance(result, PiecewiseLinear):
+            result = result._select(value, True)
+        elif isinstance(value, PiecewiseLinear):
+            result = value._select(result, True)
+        else:
+            result = min(result, value)
+    return result
+
+
+def maximum(*values: Value) -> Value:
+    """max ทีละจุดของตัวเลขและ/หรือ PiecewiseLinear"""
+    result = values[0]
+    for value in values[1:]:
+        if isinstance(result, PiecewiseLinear):
+            result = result._select(value, False)
+        elif isinstance(value, PiecewiseLinear):
+            result = value._select(result, False)
+        else:
+            result = max(result, value)
+    return result
+
+
+def net_income_function(tax_input: TaxInput, changes: Dict[str, Value], rules=tc) -> Value:
+    """
+    เงินได้สุทธิหลังหักเงินบริจาค (TaxResult.net_income) เมื่อบาง field เป็นฟังก์ชันของ x
+
+    คำนวณตามขั้นตอนเดียวกับ tc.income_totals(), tc.basic_deduction_amounts()
+    และ tc.donation_deduction_amounts() แต่ใช้ minimum()/maximum() แทน min/max
+    จุดหักเหของผลลัพธ์จึงมาจากเพดานแต่ละข้อเท่านั้น โดยแต่ละ min/max เพิ่มจุดหักเห
+    ได้ไม่เกินหนึ่งจุดต่อช่วงเส้นตรงของค่าที่นำมาเปรียบเทียบ
+
+    Args:
+        tax_input: ข้อมูลเข้าของ field อื่นที่คงที่
+        changes: ค่าของ field ที่เปลี่ยน (ชื่อ field ของ IncomeInput หรือ DeductionInput
+            -> ตัวเลข หรือ PiecewiseLinear ที่ไม่ติดลบบนช่วงเดียวกันทั้งหมด)
+            ถ้า income_40_1_2 เป็น PiecewiseLinear ต้องมากกว่า 0 ตลอดช่วง ยกเว้นที่ขอบล่าง
+            (ค่าใช้จ่าย 40(1)(2) กระโดดที่เงินเดือน 0 ผู้เรียกต้องคำนวณจุดนั้นแยก)
+        rules: ชุดกฎภาษีจาก tc.get_rules()
+
+    Returns:
+        PiecewiseLinear (หรือตัวเลขถ้า changes ไม่มี PiecewiseLinear)
+    """
+    income = tax_input.income
+    deductions = tax_input.deductions
+
+    def value(record, name):
+        return changes[name] if name in changes else getattr(record, name)
+
+    # ขั้นตอนเงินได้ (เงินได้ตามเปอร์เซ็นต์ที่เป็น 0 บวกเพิ่มเป็น 0 เหมือนข้ามไป)
+    salary = value(income, 'income_40_1_2')
+    total_income = 0.0
+    total_expenses = 0.0
+    if isinstance(salary, PiecewiseLinear) or salary > 0:
+        total_income = total_income + salary
+        total_expenses = tc.salary_expense(income, rules)
+    for income_type in tc.PERCENT_INCOME_TYPES:
+        amount = value(income, 'income_' + income_type)
+        total_income = total_income + amount
+        total_expenses = total_expenses + amount * rules.EXPENSE_RATES[income_type]
+    income_after_expenses = maximum(0.0, total_income - total_expenses)
+
+    # ขั้นตอนค่าลดหย่อนพื้นฐาน (ค่าที่ไม่ขึ้นกับ x รวมจาก tc.basic_deduction_amounts() โดยตรง)
+    percent_caps = {
+        'rmf': (rules.MAX_RMF_PERCENT, rules.MAX_RMF_AMOUNT),
+        'ssf': (rules.MAX_SSF_PERCENT, rules.MAX_SSF_AMOUNT),
+        'pvd': (rules.MAX_PVD_PERCENT, rules.MAX_PVD_AMOUNT),
+        'thai_esg': (rules.MAX_THAI_ESG_PERCENT, rules.MAX_THAI_ESG_AMOUNT),
+    }
+    capped = {
+        field: minimum(value(deductions, field), income_after_expenses * percent, amount)
+        for field, (percent, amount) in percent_caps.items()
+    }
+    fixed_caps = {
+        'life_insurance': rules.MAX_LIFE_INSURANCE,
+        'health_insurance_self': rules.MAX_HEALTH_INSURANCE_SELF,
+        'health_insurance_parent': rules.MAX_HEALTH_INSURANCE_PARENT,
+        'nssf': rules.MAX_NSSF,
+        'social_security': rules.MAX_SOCIAL_SECURITY,
+        'solar_cell': rules.MAX_SOLAR_CELL,
+        'home_construction': rules.MAX_HOME_CONSTRUCTION,
+        'home_interest': rules.MAX_HOME_INTEREST,
+    }
+    # ค่าลดหย่อนที่ไม่มีเพดานตามเงินได้และไม่อยู่ใน changes คงที่ ใช้ค่าจาก tc.basic_deduction_amounts()
+    constant = dict(zip(tc.BASIC_DEDUCTION_KEYS, tc.basic_deduction_amounts(0.0, deductions, rules)))
+    basic_deductions = minimum(capped['rmf'] + capped['ssf'] + capped['pvd'], rules.MAX_RMF_SSF_PVD_COMBINED)
+    basic_deductions = basic_deductions + capped['thai_esg']
+    for key in tc.BASIC_DEDUCTION_KEYS:
+        if key in percent_caps:
+            continue
+        if key in changes:
+            basic_deductions = basic_deductions + minimum(changes[key], fixed_caps[key])
+        else:
+            basic_deductions = basic_deductions + constant[key]
+
+    # ขั้นตอนค่าลดหย่อนจากเงินบริจาค
+    max_donation = maximum(0.0, income_after_expenses - basic_deductions) * rules.MAX_DONATION_PERCENT
+    donation = minimum(value(deductions, 'donation'), max_donation)
+    education_donation = minimum(
+        value(deductions, 'education_donation') * rules.EDUCATION_DONATION_MULTIPLIER, max_donation
+    )
+    political_donation = minimum(value(deductions, 'political_donation'), rules.MAX_POLITICAL_DONATION)
+    social_enterprise = minimum(value(deductions, 'social_enterprise'), rules.MAX_SOCIAL_ENTERPRISE)
+
+    total_deductions = basic_deductions + donation + education_donation + political_donation + social_enterprise
+    net_income = maximum(0.0, income_after_expenses - total_deductions)
+    return net_income - donation - education_donation
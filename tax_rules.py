@@ -0,0 +1,157 @@
+"""
+ชุดกฎภาษีแยกตามปีภาษี (RuleSet) โหลดจากไฟล์ JSON ในโฟลเดอร์ rules/
+
+ไฟล์ของแต่ละปีชื่อ <ปีภาษี>.json ใช้ชื่อ key เป็นชื่อค่าคงที่ใน tax_calculator
+แบบตัวพิมพ์เล็ก (เช่น max_rmf_amount) และระบุ "extends" เพื่อใช้ค่าของอีกปี
+แล้วเขียนทับเฉพาะค่าที่ต่างกันได้ ขั้นบันไดที่ไม่มีเพดานใช้ null
+
+แต่ละปีถูกโหลดและคอมไพล์ครั้งเดียวต่อ process แล้วใช้ซ้ำ ตาราง TaxTable และ
+อัตราหักค่าใช้จ่ายที่เหมือนกันระหว่างปีจะใช้ object เดียวกัน
+"""
+
+import json
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List
+
+from tax_calculator import RATE_CONSTANT_NAMES, TaxTable
+
+
+# โฟลเดอร์ไฟล์กฎภาษี
+RULES_DIR = Path(__file__).resolve().parent / 'rules'
+
+# key ข้อมูลประกอบที่ไม่ใช่ค่าคงที่
+_METADATA_KEYS = ('tax_year', 'filing_year', 'extends', 'provisional', 'note')
+
+_rule_sets = {}
+_shared = {}
+_lock = threading.Lock()
+
+
+def _intern(key, factory):
+    """ใช้ object เดียวกันสำหรับค่าที่เหมือนกันระหว่างปี"""
+    value = _shared.get(key)
+    if value is None:
+        value = _shared[key] = factory()
+    return value
+
+
+class RuleSet:
+    """
+    กฎภาษีของปีภาษีหนึ่ง (แก้ไขไม่ได้)
+
+    มี attribute ชื่อเดียวกับค่าคงที่ใน tax_calculator (เช่น MAX_RMF_AMOUNT) และ
+    get_tax_table() เหมือนโมดูล tax_calculator จึงส่งเข้าฟังก์ชันคำนวณแทนกันได้
+    """
+
+    __slots__ = RATE_CONSTANT_NAMES + ('tax_year', 'filing_year', 'provisional', 'note', '_tax_table')
+
+    def __init__(self, tax_year: int, values: Dict, filing_year: int = None,
+                 provisional: bool = False, note: str = ''):
+        missing = [name for name in RATE_CONSTANT_NAMES if name.lower() not in values]
+        if missing:
+            raise ValueError(f"กฎภาษีปี {tax_year} ไม่มีค่า: {', '.join(name.lower() for name in missing)}")
+
+        assign = object.__setattr__
+        for name in RATE_CONSTANT_NAMES:
+            assign(self, name, values[name.lower()])
+
+        brackets = tuple(
+            (min_income, float('inf') if max_income is None else max_income, rate)
+            for min_income, max_income, rate in values['tax_brackets']
+        )
+        expense_rates = tuple(values['expense_rates'].items())
+        assign(self, 'TAX_BRACKETS', brackets)
+        assign(self, 'EXPENSE_RATES', _intern(('expense_rates', expense_rates),
+                                              lambda: MappingProxyType(dict(expense_rates))))
+        assign(self, '_tax_table', _intern(('tax_table', brackets), lambda: TaxTable(brackets)))
+        assign(self, 'tax_year', tax_year)
+        assign(self, 'filing_year', filing_year)
+        assign(self, 'provisional', provisional)
+        assign(self, 'note', note)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"กฎภาษีปี {self.tax_year} แก้ไขไม่ได้")
+
+    def __repr__(self):
+        provisional = ' (ชั่วคราว)' if self.provisional else ''
+        return f"RuleSet({self.tax_year}{provisional})"
+
+    def get_tax_table(self) -> TaxTable:
+        """ตารางขั้นบันไดภาษีที่คอมไพล์แล้ว"""
+        return self._tax_table
+
+    def rate_constants(self):
+        """ค่าของค่าคงที่ตามลำดับ RATE_CONSTANT_NAMES"""
+        return tuple(getattr(self, name) for name in RATE_CONSTANT_NAMES)
+
+
+def _load_values(tax_year, seen=()):
+    """อ่านไฟล์กฎภาษีของปี พร้อมรวมค่าจากปีที่ extends"""
+    if tax_year in seen:
+        raise ValueError(f"กฎภาษี extends วนซ้ำ: {' -> '.join(map(str, seen + (tax_year,)))}")
+    path = RULES_DIR / f'{tax_year}.json'
+    if not path.exists():
+        raise ValueError(f"ไม่มีกฎภาษีปี {tax_year} (มี {', '.join(map(str, available_tax_years()))})")
+
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+
+    known = set(_METADATA_KEYS) | {name.lower() for name in RATE_CONSTANT_NAMES}
+    unknown = sorted(set(data) - known)
+    if unknown:
+        raise ValueError(f"กฎภาษีปี {tax_year} มี key ที่ไม่รู้จัก: {', '.join(unknown)}")
+
+    values = {}
+    if 'extends' in data:
+        values.update(_load_values(data['extends'], seen + (tax_year,)))
+        # ข้อมูลประกอบไม่สืบทอดจากปีต้นแบบ
+        for key in _METADATA_KEYS:
+            values.pop(key, None)
+    values.update(data)
+    return values
+
+
+def load_rule_set(tax_year: int) -> RuleSet:
+    """
+    โหลดและคอมไพล์กฎภาษีของปีจากไฟล์ (ไม่ใช้ค่าที่เก็บไว้)
+
+    Args:
+        tax_year: ปีภาษี (พ.ศ.)
+
+    Returns:
+        RuleSet
+    """
+    values = _load_values(tax_year)
+    return RuleSet(
+        tax_year,
+        values,
+        filing_year=values.get('filing_year'),
+        provisional=values.get('provisional', False),
+        note=values.get('note', ''),
+    )
+
+
+def get_rule_set(tax_year: int) -> RuleSet:
+    """
+    ดึงกฎภาษีของปี (โหลดครั้งแรกครั้งเดียว แล้วใช้ object เดิมทุกครั้ง)
+
+    Args:
+        tax_year: ปีภาษี (พ.ศ.) เช่น 2567, 2568, 2569
+
+    Returns:
+        RuleSet
+    """
+    rule_set = _rule_sets.get(tax_year)
+    if rule_set is None:
+        with _lock:
+            rule_set = _rule_sets.get(tax_year)
+            if rule_set is None:
+                rule_set = _rule_sets[tax_year] = load_rule_set(tax_year)
+    return rule_set
+
+
+def available_tax_years() -> List[int]:
+    """ปีภาษีที่มีไฟล์กฎภาษี เรียงจากน้อยไปมาก"""
+    return sorted(int(path.stem) for path in RULES_DIR.glob('*.json') if path.stem.isdigit())
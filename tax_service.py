@@ -0,0 +1,395 @@
+"""
+HTTP JSON API สำหรับระบบอื่นที่ต้องการคำนวณภาษีโดยไม่ผ่านหน้า Streamlit
+
+ใช้เฉพาะ standard library (http.server) รันได้ทันทีโดยไม่ต้องมีบริการภายนอก
+
+Endpoints (ข้อมูลเข้าและผลลัพธ์เป็น JSON แบบ UTF-8):
+    GET    /health                     สถานะของ worker
+    POST   /calculate                  {"income_data", "deductions_data", "withholding_tax", "detail", "tax_year"}
+                                       -> ผลแบบเดียวกับ calculate_tax_complete()
+    POST   /calculate/batch            {"records": [ข้อมูลแบบ /calculate ...], "detail", "tax_year"}
+                                       -> {"results": [...]} ตามลำดับเดิม รายการที่ผิดเป็น {"error": ...}
+    GET    /profiles                   ?prefix=&sort=name|updated_at&desc=true|false&limit=&cursor=
+                                       -> {"profiles": [...], "next_cursor"} ทีละหน้า (database.search_user_profiles())
+                                       ส่ง next_cursor เป็น cursor เพื่อดึงหน้าถัดไป (null = หน้าสุดท้าย)
+    GET    /profiles/<name>            ข้อมูลผู้ใช้ (404 ถ้าไม่มี)
+    PUT    /profiles/<name>            {"income_data", "deductions_data", "withholding_tax"} -> {"id"}
+    DELETE /profiles/<name>            -> {"deleted": true} (404 ถ้าไม่มี)
+
+ข้อมูลผิดรูปแบบตอบ 400 พร้อม {"error": ข้อความ} (detail ต้องเป็น true/false เท่านั้น)
+
+แบบ prefork: process หลักเปิด socket และเตรียมฐานข้อมูลครั้งเดียว แล้วแยก worker หลาย process
+(os.fork) ที่รับ connection จาก socket เดียวกัน แต่ละ worker เก็บแคชผลการคำนวณ กฎภาษี และ
+connection ฐานข้อมูลไว้ตลอดอายุ process และรับหลาย connection พร้อมกันด้วย thread
+worker ที่หยุดผิดปกติจะถูกสร้างใหม่ บนระบบที่ไม่มี os.fork (Windows) รัน worker เดียว
+
+ตัวอย่าง:
+    python tax_service.py --port 8000 --workers 4
+    curl -X POST localhost:8000/calculate -d '{"income_data": {"income_40_1_2": 600000}, "deductions_data": {}}'
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import logging
+import os
+import signal
+import sys
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote
+
+import database
+from tax_cache import calculation_cache
+
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 16 * 1024 * 1024  # ขนาดข้อมูลเข้าสูงสุดต่อ request
+MAX_BATCH_SIZE = 10000  # จำนวนรายการสูงสุดต่อ /calculate/batch
+DEFAULT_PAGE_SIZE = 50  # จำนวนผู้ใช้ต่อหน้าของ GET /profiles
+MAX_PAGE_SIZE = 1000
+
+_PROFILE_PREFIX = '/profiles/'
+
+
+class RequestError(Exception):
+    """ข้อผิดพลาดที่ตอบกลับผู้เรียกเป็น JSON พร้อม HTTP status"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _object(body, key):
+    """ค่า dict ของ key ใน body (ไม่มี = dict ว่าง)"""
+    value = body.get(key)
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise ValueError(f"{key} ต้องเป็น object ได้รับ {type(value).__name__}")
+    return value
+
+
+def _flag(value, name):
+    """ค่า true/false ของ JSON (ไม่แปลงข้อความหรือตัวเลขตาม truthiness เช่น "false" หรือ 0)"""
+    if not isinstance(value, bool):
+        raise ValueError(f"{name} ต้องเป็น true หรือ false ได้รับ {json.dumps(value, ensure_ascii=False)}")
+    return value
+
+
+def calculate(record, detail=True, tax_year=None):
+    """
+    คำนวณภาษีหนึ่งรายการจากข้อมูล JSON (ใช้แคชผลการคำนวณของ worker)
+
+    Args:
+        record: dict ที่มี income_data, deductions_data, withholding_tax (ไม่บังคับ)
+        detail: ค่าเริ่มต้นของ detail ถ้า record ไม่ได้ระบุ
+        tax_year: ค่าเริ่มต้นของ tax_year ถ้า record ไม่ได้ระบุ
+
+    Returns:
+        dict: ผลแบบเดียวกับ calculate_tax_complete()
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"ข้อมูลต้องเป็น object ได้รับ {type(record).__name__}")
+    return calculation_cache.calculate(
+        _object(record, 'income_data'),
+        _object(record, 'deductions_data'),
+        record.get('withholding_tax', 0),
+        detail=_flag(record.get('detail', detail), 'detail'),
+        tax_year=record.get('tax_year', tax_year)
+    )
+
+
+def calculate_batch(body):
+    """
+    คำนวณหลายรายการในครั้งเดียว รายการที่ข้อมูลผิดไม่ทำให้รายการอื่นล้ม
+
+    Args:
+        body: dict ที่มี records (list) และ detail/tax_year สำหรับทุกรายการ (ค่าเริ่มต้น detail=False)
+
+    Returns:
+        dict: {'results': list ของผลหรือ {'error': ข้อความ} ตามลำดับของ records}
+    """
+    records = body.get('records')
+    if not isinstance(records, list):
+        raise ValueError("records ต้องเป็น list")
+    if len(records) > MAX_BATCH_SIZE:
+        raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                           f"records ได้สูงสุด {MAX_BATCH_SIZE} รายการ ได้รับ {len(records)}")
+    detail = _flag(body.get('detail', False), 'detail')
+    tax_year = body.get('tax_year')
+
+    results = []
+    for record in records:
+        try:
+            results.append(calculate(record, detail, tax_year))
+        except (ValueError, TypeError, KeyError) as e:
+            results.append({'error': str(e)})
+    return {'results': results}
+
+
+def save_profile(name, body):
+    """บันทึกข้อมูลผู้ใช้จาก JSON (ไม่เขียนซ้ำถ้าข้อมูลเหมือนเดิม)"""
+    user_id = database.save_user_profile(
+        name,
+        _object(body, 'income_data'),
+        _object(body, 'deductions_data'),
+        body.get('withholding_tax', 0),
+        skip_unchanged=True
+    )
+    return {'id': user_id}
+
+
+def _encode_cursor(cursor):
+    """แปลง next_cursor (ค่าที่เรียง, id) เป็นข้อความสำหรับส่งกลับใน query string"""
+    if cursor is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
+
+
+def _decode_cursor(text):
+    """แปลงข้อความจาก _encode_cursor() กลับเป็น (ค่าที่เรียง, id)"""
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(text.encode('ascii')))
+    except (ValueError, binascii.Error):
+        raise ValueError("cursor ไม่ถูกต้อง") from None
+    if not (isinstance(cursor, list) and len(cursor) == 2 and isinstance(cursor[0], str)
+            and isinstance(cursor[1], int) and not isinstance(cursor[1], bool)):
+        raise ValueError("cursor ไม่ถูกต้อง")
+    return tuple(cursor)
+
+
+def list_profiles(query):
+    """
+    รายชื่อผู้ใช้ทีละหน้าจาก query string ของ GET /profiles
+
+    Args:
+        query: dict จาก parse_qs() (prefix, sort, desc, limit, cursor)
+
+    Returns:
+        dict: {'profiles': รายการในหน้านี้, 'next_cursor': ข้อความ cursor ของหน้าถัดไปหรือ None}
+    """
+    def param(name, default=None):
+        values = query.get(name)
+        return values[-1] if values else default
+
+    sort = param('sort', 'name')
+    if sort not in database.PROFILE_SORT_FIELDS:
+        raise ValueError(f"sort ต้องเป็นหนึ่งใน {', '.join(database.PROFILE_SORT_FIELDS)} ได้รับ {sort}")
+    desc = param('desc', 'false')
+    if desc not in ('true', 'false'):
+        raise ValueError(f"desc ต้องเป็น true หรือ false ได้รับ {desc}")
+    limit = param('limit', str(DEFAULT_PAGE_SIZE))
+    if not limit.isdigit() or not 1 <= int(limit) <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit ต้องเป็นจำนวนเต็ม 1-{MAX_PAGE_SIZE} ได้รับ {limit}")
+    cursor = param('cursor')
+
+    page = database.search_user_profiles(
+        param('prefix') or None, sort, desc == 'true',
+        _decode_cursor(cursor) if cursor else None, int(limit)
+    )
+    return {'profiles': page['profiles'], 'next_cursor': _encode_cursor(page['next_cursor'])}
+
+
+class TaxRequestHandler(BaseHTTPRequestHandler):
+    """แปลง HTTP request เป็นการเรียกฟังก์ชันและตอบกลับเป็น JSON"""
+
+    # keep-alive: ระบบที่เรียกถี่ไม่ต้องเปิด TCP connection ใหม่ทุกครั้ง
+    protocol_version = 'HTTP/1.1'
+    # ส่ง header และ body ทันที (ไม่รอ ACK ตาม Nagle ซึ่งทำให้ request เล็กช้าหลายสิบมิลลิวินาที)
+    disable_nagle_algorithm = True
+    server_version = 'TaxService/1.0'
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise RequestError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                               f"ข้อมูลเข้าได้สูงสุด {MAX_BODY_BYTES} bytes")
+        if length == 0:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError as e:
+            raise RequestError(HTTPStatus.BAD_REQUEST, f"JSON ไม่ถูกต้อง: {e}")
+        if not isinstance(body, dict):
+            raise RequestError(HTTPStatus.BAD_REQUEST, "ข้อมูลเข้าต้องเป็น JSON object")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self, method):
+        """คืน (status, payload) ของ request"""
+        path, _, query = self.path.partition('?')
+        if path.startswith(_PROFILE_PREFIX) and len(path) > len(_PROFILE_PREFIX):
+            name = unquote(path[len(_PROFILE_PREFIX):])
+            if method == 'GET':
+                profile = database.get_user_profile_by_name(name)
+                if profile is None:
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"ไม่พบผู้ใช้ {name}")
+                return HTTPStatus.OK, profile
+            if method == 'PUT':
+                return HTTPStatus.OK, save_profile(name, self._read_json())
+            if method == 'DELETE':
+                if not database.delete_user_profile(name):
+                    raise RequestError(HTTPStatus.NOT_FOUND, f"ไม่พบผู้ใช้ {name}")
+                return HTTPStatus.OK, {'deleted': True}
+        elif path == '/calculate' and method == 'POST':
+            return HTTPStatus.OK, calculate(self._read_json())
+        elif path == '/calculate/batch' and method == 'POST':
+            return HTTPStatus.OK, calculate_batch(self._read_json())
+        elif path in ('/profiles', '/profiles/') and method == 'GET':
+            return HTTPStatus.OK, list_profiles(parse_qs(query))
+        elif path == '/health' and method == 'GET':
+            return HTTPStatus.OK, {'status': 'ok', 'pid': os.getpid(), 'cache': calculation_cache.stats()}
+        raise RequestError(HTTPStatus.NOT_FOUND, f"ไม่มี {method} {path}")
+
+    def _handle(self, method):
+        try:
+            status, payload = self._route(method)
+        except RequestError as e:
+            status, payload = e.status, {'error': str(e)}
+        except (ValueError, TypeError, KeyError) as e:
+            status, payload = HTTPStatus.BAD_REQUEST, {'error': str(e)}
+        except Exception:
+            logger.exception("Request failed: %s %s", method, self.path)
+            status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {'error': 'เกิดข้อผิดพลาดภายใน'}
+        if status >= 400:
+            # ข้อมูลเข้าที่อาจยังไม่ได้อ่านจะค้างใน connection แบบ keep-alive
+            self.close_connection = True
+        self._send_json(status, payload)
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PUT(self):
+        self._handle('PUT')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class TaxServer(ThreadingHTTPServer):
+    """HTTP server ของหนึ่ง worker (หนึ่ง thread ต่อ connection)"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def make_server(host: str = '127.0.0.1', port: int = 8000) -> TaxServer:
+    """
+    สร้าง server ที่ bind แล้ว (ใช้ทดสอบใน process เดียวด้วย serve_forever() ใน thread ได้)
+
+    Args:
+        host: ที่อยู่ที่รับ connection
+        port: พอร์ต (0 = ให้ระบบเลือก ดูพอร์ตจริงที่ server.server_address)
+    """
+    database.init_db()
+    return TaxServer((host, port), TaxRequestHandler)
+
+
+def _start_worker(server):
+    """แยก process ใหม่ที่รับ request จาก socket ของ server จนกว่าจะถูกหยุด"""
+    pid = os.fork()
+    if pid:
+        return pid
+    # worker: ใช้ signal ค่าเริ่มต้น (SIGTERM จบ process) และ connection ฐานข้อมูลของตัวเอง
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    status = 0
+    try:
+        server.serve_forever()
+    except Exception:
+        logger.exception("Worker %d failed", os.getpid())
+        status = 1
+    finally:
+        database.close_connections()
+        os._exit(status)
+
+
+def serve(host: str = '127.0.0.1', port: int = 8000, workers: int = None):
+    """
+    รัน service จนกว่าจะได้รับ SIGINT/SIGTERM
+
+    Args:
+        host: ที่อยู่ที่รับ connection
+        port: พอร์ต
+        workers: จำนวน worker process (ค่าเริ่มต้นคือจำนวน CPU)
+    """
+    workers = workers or os.cpu_count() or 1
+    server = make_server(host, port)
+    logger.info("Tax service listening on %s:%d (%d workers)", host, server.server_address[1], workers)
+
+    if workers == 1 or not hasattr(os, 'fork'):
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+        return
+
+    # connection ที่เปิดตอน init_db ต้องไม่ถูกใช้ร่วมกันหลัง fork
+    database.close_connections()
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    children = set()
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        children.add(_start_worker(server))
+
+    try:
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            children.discard(pid)
+            if not stopping:
+                logger.warning("Worker %d exited (status %d), restarting", pid, status)
+                children.add(_start_worker(server))
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP JSON API สำหรับคำนวณภาษีและจัดการข้อมูลผู้ใช้")
+    parser.add_argument('--host', default='127.0.0.1', help="ที่อยู่ที่รับ connection (ค่าเริ่มต้น 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8000, help="พอร์ต (ค่าเริ่มต้น 8000)")
+    parser.add_argument('--workers', type=int, default=None, help="จำนวน worker process (ค่าเริ่มต้นคือจำนวน CPU)")
+    parser.add_argument('--db', default=database.DB_NAME, help=f"ไฟล์ฐานข้อมูล (ค่าเริ่มต้น {database.DB_NAME})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.environ.get('TAX_LOG_LEVEL', 'INFO').upper())
+    database.DB_NAME = args.db
+    serve(args.host, args.port, args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
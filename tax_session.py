@@ -0,0 +1,173 @@
+"""
+การคำนวณภาษีแบบต่อเนื่อง (what-if) ที่คำนวณใหม่เฉพาะขั้นตอนที่ได้รับผลจาก field ที่เปลี่ยน
+
+ลำดับขั้นตอนและการพึ่งพากัน (STAGES):
+    income            เงินได้ ค่าใช้จ่าย เงินได้หลังหักค่าใช้จ่าย          <- field ใน income_data
+    basic_deductions  ค่าลดหย่อนพื้นฐาน รวมเพดานตามเปอร์เซ็นต์ของเงินได้    <- income + field ค่าลดหย่อน (ยกเว้นเงินบริจาค)
+    donations         เงินบริจาค (เพดาน 10% ของเงินได้หลังหักค่าลดหย่อน)    <- income, basic_deductions + field เงินบริจาค
+    tax               รายได้สุทธิ ภาษีขั้นบันได เงินคืน/เงินเพิ่ม           <- ทุกขั้นก่อนหน้า + withholding_tax
+                                                                    + field ใน income_data (income_details)
+
+ขั้นตอนจะถูกคำนวณใหม่เมื่อ field ของตัวเองเปลี่ยน หรือผลของขั้นก่อนหน้าที่ใช้เปลี่ยนจริง
+(เช่นเพิ่มเงินบริจาคที่เกินเพดานอยู่แล้ว ขั้นตอน tax จะไม่ถูกคำนวณใหม่) แต่ละขั้นใช้ฟังก์ชัน
+เดียวกับ tax_calculator.calculate_tax_record() ผลจึงตรงกันทุกหลักทศนิยม
+
+ตัวอย่าง:
+    session = TaxSession(income_data, deductions_data)
+    session.update(rmf=100000)       # คำนวณใหม่เฉพาะ basic_deductions, donations, tax
+    session.last_recomputed          # ('basic_deductions', 'donations', 'tax')
+    session.to_dict()                # แบบเดียวกับ calculate_tax_complete()
+"""
+
+from typing import Dict, Optional, Tuple
+
+import tax_calculator as tc
+from tax_models import DeductionInput, IncomeInput, TaxInput, TaxResult
+
+
+INCOME_FIELDS = tuple(IncomeInput.__slots__)
+DONATION_FIELDS = tc.DONATION_DEDUCTION_KEYS
+BASIC_DEDUCTION_FIELDS = tuple(name for name in DeductionInput.__slots__ if name not in DONATION_FIELDS)
+
+# (ชื่อขั้นตอน, ขั้นตอนก่อนหน้าที่ใช้ผล, field ข้อมูลเข้าที่ใช้) เรียงตามลำดับการคำนวณ
+STAGES = (
+    ('income', (), INCOME_FIELDS),
+    ('basic_deductions', ('income',), BASIC_DEDUCTION_FIELDS),
+    ('donations', ('income', 'basic_deductions'), DONATION_FIELDS),
+    ('tax', ('income', 'basic_deductions', 'donations'), ('withholding_tax',)),
+)
+
+_STAGE_BY_FIELD = {name: stage for stage, _, fields in STAGES for name in fields}
+# ขั้นตอนที่มีขั้นตอนอื่นใช้ผล (ต้องเทียบผลเก่า/ใหม่เพื่อตัดสินว่าต้องคำนวณขั้นถัดไปหรือไม่)
+_UPSTREAM_STAGES = frozenset(stage for _, depends_on, _ in STAGES for stage in depends_on)
+
+
+class TaxSession:
+    """
+    ข้อมูลเข้าและผลของทุกขั้นตอนของผู้เสียภาษีหนึ่งคน
+
+    แก้ไขข้อมูลผ่าน update() เท่านั้น ผลล่าสุดอยู่ที่ result
+    """
+
+    def __init__(self, income_data: Optional[Dict] = None, deductions_data: Optional[Dict] = None,
+                 withholding_tax: float = 0, tax_year: Optional[int] = None):
+        """
+        Args:
+            income_data: ข้อมูลเงินได้ตามมาตรา 40
+            deductions_data: ข้อมูลค่าลดหย่อน
+            withholding_tax: ภาษีหัก ณ ที่จ่าย
+            tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+        """
+        self.tax_year = tax_year
+        self._rules = tc.get_rules(tax_year)
+        self._input = TaxInput.from_dicts(income_data or {}, deductions_data or {}, withholding_tax)
+        self._outputs = {}
+        self.last_recomputed = ()
+        self.recompute_counts = {stage: 0 for stage, _, _ in STAGES}
+        self._recompute({stage for stage, _, _ in STAGES})
+
+    @property
+    def tax_input(self) -> TaxInput:
+        """ข้อมูลเข้าปัจจุบัน"""
+        return self._input
+
+    @property
+    def result(self) -> TaxResult:
+        """ผลการคำนวณล่าสุด"""
+        return self._outputs['tax']
+
+    def to_dict(self, detail: bool = True) -> Dict:
+        """ผลล่าสุดในรูปแบบเดียวกับ calculate_tax_complete()"""
+        return self.result.to_dict() if detail else self.result.to_summary_dict()
+
+    def update(self, **fields) -> TaxResult:
+        """
+        เปลี่ยนค่าข้อมูลเข้าแล้วคำนวณใหม่เฉพาะขั้นตอนที่ได้รับผล
+
+        Args:
+            **fields: field ของ income_data, deductions_data หรือ withholding_tax เช่น update(donation=5000)
+
+        Returns:
+            TaxResult: ผลการคำนวณใหม่ (ข้อมูลผิดจะเกิด ValueError/TypeError และไม่เปลี่ยนสถานะเดิม)
+        """
+        current = self._input
+        income_changes = {}
+        deduction_changes = {}
+        withholding_tax = current.withholding_tax
+        for name, value in fields.items():
+            stage = _STAGE_BY_FIELD.get(name)
+            if stage is None:
+                raise ValueError(f"ไม่มี field: {name}")
+            if stage == 'income':
+                income_changes[name] = value
+            elif stage == 'tax':
+                withholding_tax = value
+            else:
+                deduction_changes[name] = value
+        # replace() ตรวจสอบข้อมูลใหม่ก่อนเปลี่ยนสถานะ
+        tax_input = TaxInput(
+            current.income.replace(**income_changes) if income_changes else current.income,
+            current.deductions.replace(**deduction_changes) if deduction_changes else current.deductions,
+            withholding_tax,
+        )
+
+        dirty = set()
+        if tax_input.withholding_tax != current.withholding_tax:
+            dirty.add('tax')
+        for name in income_changes:
+            if getattr(tax_input.income, name) != getattr(current.income, name):
+                # income_details ของผลลัพธ์สร้างจาก income_data โดยตรง แม้ยอดรวมไม่เปลี่ยน
+                # (เช่นย้ายเงินได้ระหว่างประเภท) ก็ต้องสร้างผลใหม่
+                dirty.update(('income', 'tax'))
+        for name in deduction_changes:
+            if getattr(tax_input.deductions, name) != getattr(current.deductions, name):
+                dirty.add(_STAGE_BY_FIELD[name])
+
+        self._input = tax_input
+        self._recompute(dirty)
+        return self.result
+
+    def _recompute(self, dirty):
+        """คำนวณขั้นตอนที่ข้อมูลเข้าเปลี่ยน และขั้นตอนถัดไปที่ผลของขั้นก่อนหน้าเปลี่ยนจริง"""
+        changed = set()
+        recomputed = []
+        for stage, depends_on, _ in STAGES:
+            if stage not in dirty and changed.isdisjoint(depends_on):
+                continue
+            output = self._COMPUTE[stage](self)
+            recomputed.append(stage)
+            self.recompute_counts[stage] += 1
+            if stage in _UPSTREAM_STAGES and self._outputs.get(stage) != output:
+                changed.add(stage)
+            self._outputs[stage] = output
+        self.last_recomputed = tuple(recomputed)
+
+    def _compute_income(self) -> Tuple:
+        return tc.income_totals(self._input.income, self._rules)
+
+    def _compute_basic_deductions(self) -> Tuple:
+        income_after_expenses = self._outputs['income'][2]
+        amounts = tc.basic_deduction_amounts(income_after_expenses, self._input.deductions, self._rules)
+        return amounts, sum(amounts)
+
+    def _compute_donations(self) -> Tuple:
+        income_after_expenses = self._outputs['income'][2]
+        basic_deductions = self._outputs['basic_deductions'][1]
+        return tc.donation_deduction_amounts(income_after_expenses, basic_deductions,
+                                              self._input.deductions, self._rules)
+
+    def _compute_tax(self) -> TaxResult:
+        basic_amounts, basic_deductions = self._outputs['basic_deductions']
+        donation_amounts = self._outputs['donations']
+        return tc._tax_result(
+            self._input.income, self._outputs['income'],
+            tc._total_deductions(basic_deductions, donation_amounts), basic_amounts, donation_amounts,
+            self._input.withholding_tax, self._rules
+        )
+
+    _COMPUTE = {
+        'income': _compute_income,
+        'basic_deductions': _compute_basic_deductions,
+        'donations': _compute_donations,
+        'tax': _compute_tax,
+    }
@@ -0,0 +1,370 @@
+"""
+โมดูลคำนวณย้อนกลับ (inverse solver) เช่น หาเงินเดือนที่ได้รายได้สุทธิหลังภาษีตามเป้าหมาย
+หรือหาเงินลงทุน RMF / Thai ESG ที่ทำให้ภาษีเหลือตามที่ต้องการ
+
+ทุกขั้นตอนของ calculate_tax_complete() (เพดานค่าใช้จ่าย เพดานตามเปอร์เซ็นต์
+ขั้นบันไดภาษี และเพดานเงินบริจาค) เป็นฟังก์ชันเส้นตรงเป็นช่วง (piecewise linear)
+โมดูลนี้จึงหาจุดหักเห (breakpoint) ของเงินได้สุทธิหลังหักเงินบริจาคจากเพดานเหล่านั้นโดยตรง
+(tax_piecewise.net_income_function) แล้วประกอบเข้ากับตาราง TaxTable
+เพื่อแก้สมการเส้นตรงในช่วงที่มีคำตอบ การแก้สมการหนึ่งครั้งเรียก calculate_tax_record()
+ไม่เกิน 2 ครั้ง ไม่ว่าช่วงค้นหาจะกว้างเท่าใด
+"""
+
+import math
+from dataclasses import replace
+from typing import Dict, List, Optional, Tuple
+
+from tax_calculator import calculate_tax_record, get_rules
+from tax_models import DeductionInput, IncomeInput, TaxInput
+from tax_piecewise import PiecewiseLinear, net_income_function
+
+
+# เป้าหมายที่แก้สมการได้ (key เดียวกับผลลัพธ์ของ calculate_tax_complete())
+SOLVE_TARGETS = ('tax', 'net_income_after_tax', 'tax_refund', 'tax_additional')
+
+# field ที่เกี่ยวกับเงินเดือน (คำนวณ income_40_1_2 ใหม่จาก salary_per_month × salary_months + bonus)
+SALARY_FIELDS = ('salary_per_month', 'bonus')
+
+# ความชันที่เล็กกว่านี้ถือเป็น 0 (เศษทศนิยมจากการรวมความชันของแต่ละขั้นตอน)
+_FLAT_SLOPE = 1e-9
+
+
+def _close(a, b, tolerance=1e-9):
+    """เปรียบเทียบจำนวนเงินโดยเผื่อความคลาดเคลื่อนของทศนิยม"""
+    return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+
+
+class FieldSetter:
+    """
+    field หนึ่งของ TaxInput ที่มีค่าเป็นเส้นตรงของตัวแปร x: name = scale × x + offset
+
+    เรียก setter(x) จะได้ TaxInput ที่เปลี่ยนค่า field แล้ว (ค่าอื่นคงเดิมตาม base)
+    """
+
+    __slots__ = ('base', 'name', 'scale', 'offset')
+
+    def __init__(self, base: TaxInput, name: str, scale: float = 1.0, offset: float = 0.0):
+        self.base = base
+        self.name = name
+        self.scale = scale
+        self.offset = offset
+
+    def value(self, x: float) -> float:
+        """ค่าของ field เมื่อตัวแปรเป็น x"""
+        return x * self.scale + self.offset
+
+    def __call__(self, x: float) -> TaxInput:
+        base = self.base
+        changes = {self.name: self.value(x)}
+        if self.name in IncomeInput.__slots__:
+            return TaxInput(replace(base.income, **changes), base.deductions, base.withholding_tax)
+        return TaxInput(base.income, replace(base.deductions, **changes), base.withholding_tax)
+
+
+def field_setter(income_data: Dict, deductions_data: Dict, withholding_tax: float, field: str) -> FieldSetter:
+    """
+    สร้าง FieldSetter ของ field ที่ต้องการแก้สมการหรือสร้างเส้นกราฟ
+
+    Args:
+        income_data: ข้อมูลเงินได้ (รูปแบบเดียวกับ calculate_tax_complete())
+        deductions_data: ข้อมูลค่าลดหย่อน
+        withholding_tax: ภาษีหัก ณ ที่จ่าย
+        field: field ของ IncomeInput / DeductionInput ที่เป็นจำนวนเงิน หรือหนึ่งใน SALARY_FIELDS
+
+    Returns:
+        FieldSetter (SALARY_FIELDS เปลี่ยน income_40_1_2 ตามเงินเดือน × salary_months + โบนัส)
+    """
+    base = TaxInput.from_dicts(income_data, deductions_data, withholding_tax)
+
+    if field in SALARY_FIELDS:
+        months = income_data.get('salary_months', 12)
+        bonus = income_data.get('bonus', 0)
+        if 'salary_per_month' in income_data:
+            salary = income_data['salary_per_month'] * months
+        elif field == 'bonus':
+            # ข้อมูลแบบเดิมที่มีแค่ income_40_1_2: ส่วนที่ไม่ใช่โบนัสคือ income_40_1_2 - โบนัสเดิม
+            salary = base.income.income_40_1_2 - bonus
+        elif base.income.income_40_1_2:
+            raise ValueError("ต้องระบุ salary_per_month เมื่อหาเงินเดือนจากข้อมูลที่มี income_40_1_2")
+        else:
+            salary = 0
+
+        if field == 'salary_per_month':
+            return FieldSetter(base, 'income_40_1_2', months, bonus)
+        return FieldSetter(base, 'income_40_1_2', 1, salary)
+
+    if field in IncomeInput.__slots__ and field != 'expense_40_1_2':
+        return FieldSetter(base, field)
+
+    if field in DeductionInput.__slots__ and field not in (
+            'personal', 'spouse', 'children', 'children_2nd', 'parents', 'easy_e_receipt'):
+        return FieldSetter(base, field)
+
+    raise ValueError(f"ไม่รองรับการแก้สมการสำหรับ field: {field}")
+
+
+def _tax_breakpoints(table):
+    """จุดที่ภาษีเปลี่ยนความชันหรือกระโดด (ตามเงินได้สุทธิ) เรียงจากน้อยไปมาก"""
+    points = {0.0}
+    for lower, upper in zip(table.lower, table.upper):
+        points.add(float(lower))
+        if upper != float('inf'):
+            points.add(float(upper))
+    return sorted(points)
+
+
+def _tax_line(table, n_left, n_right):
+    """
+    สมการเส้นตรงของภาษีในช่วงเงินได้สุทธิ (n_left, n_right) ที่ไม่มีจุดหักเหภายใน
+
+    Returns:
+        (จุดอ้างอิง, ภาษี ณ จุดอ้างอิง, อัตราภาษีส่วนเพิ่ม)
+    """
+    mid = (n_left + n_right) / 2
+    index = table.bracket_index(mid)
+    if mid <= 0 or index < 0 or mid > table.upper[index]:
+        rate = 0
+    else:
+        rate = table.rate[index]
+    return mid, table.tax(mid), rate
+
+
+def _linear_end(net, table):
+    """
+    ค่า x ที่หลังจากนั้นทั้งเงินได้สุทธิและภาษีเป็นเส้นตรงไปจนถึงอนันต์
+
+    หลังจุดหักเหสุดท้ายของ net เงินได้สุทธิเป็นเส้นตรง ภาษีจึงเปลี่ยนความชันได้อีก
+    เฉพาะตอนที่เงินได้สุทธิข้ามขอบขั้นภาษี ซึ่งหาได้จากสมการเส้นตรงโดยตรง
+    """
+    x, n = net.xs[-1], net.ys[-1]
+    slope = net.end_slope
+    edges = _tax_breakpoints(table)
+    if slope > _FLAT_SLOPE:
+        x += max(0.0, (edges[-1] - n) / slope)
+    elif slope < -_FLAT_SLOPE:
+        x += max(0.0, (n - edges[0]) / -slope)
+    # ต่ออีกหนึ่งช่วงให้ช่วงสุดท้ายเป็นเส้นตรงเดียวกับส่วนที่ต่อไปถึงอนันต์
+    return x + 1.0
+
+
+def net_income_breakpoints(setter: FieldSetter, lo: float, hi: Optional[float] = None,
+                           tax_year: Optional[int] = None) -> List[Tuple[float, float]]:
+    """
+    จุดหักเหของเงินได้สุทธิหลังหักเงินบริจาคตามค่า x ของ setter บนช่วง [lo, hi]
+
+    จุดหักเหได้จากเพดานของแต่ละขั้นตอนโดยตรง (tax_piecewise.net_income_function)
+    จึงไม่เรียก calculate_tax_record() และจำนวนจุดขึ้นกับจำนวนเพดานที่ x ผ่าน
+    ไม่ขึ้นกับความกว้างของช่วง
+
+    Args:
+        setter: FieldSetter จาก field_setter()
+        lo: ค่า x ต่ำสุด
+        hi: ค่า x สูงสุด (None = ไม่มีขอบบน จุดสุดท้ายจะอยู่หลังจุดที่ทั้งเงินได้สุทธิ
+            และภาษีเป็นเส้นตรงไปจนถึงอนันต์ ต่อเส้นตรงของช่วงสุดท้ายออกไปได้)
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        list ของ (x, เงินได้สุทธิ) เรียงตาม x โดยเงินได้สุทธิเป็นเส้นตรงระหว่างจุดที่ติดกัน
+        (ถ้าเงินได้สุทธิกระโดดที่ lo เช่นค่าใช้จ่าย 40(1)(2) เมื่อเงินเดือนเริ่มมากกว่า 0
+        จะมีสองจุดที่ x = lo โดยจุดแรกคือค่าที่ lo พอดี)
+    """
+    rules = get_rules(tax_year)
+    setter(lo)  # ตรวจสอบข้อมูลที่ขอบล่าง (เช่น จำนวนเงินติดลบ)
+    at_lo = net_income_function(setter.base, {setter.name: setter.value(lo)}, rules)
+    end = math.inf if hi is None else hi
+    if setter.scale and end > lo:
+        field_value = PiecewiseLinear.line(lo, end, setter.scale, setter.offset)
+        net = net_income_function(setter.base, {setter.name: field_value}, rules)
+    else:
+        net = PiecewiseLinear.line(lo, end, 0.0, at_lo)
+
+    if hi is None:
+        end = _linear_end(net, rules.get_tax_table())
+    points = net.points(end)
+    if not _close(points[0][1], at_lo):
+        points.insert(0, (lo, at_lo))
+    return points
+
+
+def tax_pieces(net_points: List[Tuple[float, float]], table=None) -> List[Tuple[float, float, float, float, float, float]]:
+    """
+    ประกอบจุดหักเหของเงินได้สุทธิเข้ากับขั้นบันไดภาษี
+
+    Args:
+        net_points: list ของ (x, เงินได้สุทธิหลังหักเงินบริจาค) จาก net_income_breakpoints()
+        table: TaxTable (ค่าเริ่มต้นคือตารางของปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        list ของช่วง (x0, x1, n0, n1, t0, t1) ที่ทั้งเงินได้สุทธิ n และภาษี t
+        เป็นเส้นตรงตาม x ภายในช่วง (t0, t1 คือค่าลิมิตที่ปลายช่วง ภาษีอาจกระโดด
+        ระหว่างช่วงที่ติดกันตามขั้นบันไดภาษี) จุดที่เงินได้สุทธิกระโดดเป็นช่วงกว้าง 0
+        ที่เก็บค่า ณ จุดนั้น
+    """
+    table = table or get_rules().get_tax_table()
+    breakpoints = _tax_breakpoints(table)
+    pieces = []
+
+    for (x0, n0), (x1, n1) in zip(net_points, net_points[1:]):
+        if x1 <= x0:
+            # เงินได้สุทธิกระโดดที่ x0 (จุดแรกคือค่า ณ x0)
+            t = table.tax(n0)
+            pieces.append((x0, x0, n0, n0, t, t))
+            continue
+        # แบ่งช่วงตามจุดหักเหของภาษีที่อยู่ระหว่าง n0 กับ n1
+        low, high = min(n0, n1), max(n0, n1)
+        inner = [n for n in breakpoints if low < n < high]
+        if n1 < n0:
+            inner.reverse()
+        cuts = [(x0, n0)]
+        for n in inner:
+            cuts.append((x0 + (n - n0) / (n1 - n0) * (x1 - x0), n))
+        cuts.append((x1, n1))
+
+        for (xa, na), (xb, nb) in zip(cuts, cuts[1:]):
+            if na == nb:
+                t = table.tax(na)
+                pieces.append((xa, xb, na, nb, t, t))
+                continue
+            ref, t_ref, rate = _tax_line(table, min(na, nb), max(na, nb))
+            pieces.append((xa, xb, na, nb, t_ref + rate * (na - ref), t_ref + rate * (nb - ref)))
+
+    return pieces
+
+
+def _target_line(target, withholding_tax):
+    """
+    แปลงเป้าหมายเป็นสมการ a_n × เงินได้สุทธิ + a_t × ภาษี = ค่าเป้าหมาย (หลังปรับค่า)
+
+    Returns:
+        (a_n, a_t, ฟังก์ชันแปลงค่าเป้าหมาย)
+    """
+    if target == 'tax':
+        return 0, 1, lambda value: value
+    if target == 'net_income_after_tax':
+        return 1, -1, lambda value: value
+    if target == 'tax_refund':
+        # เงินคืน = ภาษีหัก ณ ที่จ่าย - ภาษี
+        return 0, 1, lambda value: withholding_tax - value
+    if target == 'tax_additional':
+        # เงินเพิ่ม = ภาษี - ภาษีหัก ณ ที่จ่าย
+        return 0, 1, lambda value: withholding_tax + value
+    raise ValueError(f"เป้าหมายต้องเป็นหนึ่งใน {SOLVE_TARGETS} ได้รับ {target}")
+
+
+def _first_crossing(pieces, a_n, a_t, goal):
+    """หาค่า x แรกที่ a_n × n + a_t × t เท่ากับ goal (หรือกระโดดข้าม goal)"""
+    previous = None
+    for x0, x1, n0, n1, t0, t1 in pieces:
+        y0 = a_n * n0 + a_t * t0
+        y1 = a_n * n1 + a_t * t1
+        if previous is not None and min(previous, y0) < goal < max(previous, y0):
+            return x0
+        if _close(y0, goal):
+            return x0
+        if min(y0, y1) <= goal <= max(y0, y1) or _close(y1, goal):
+            if y1 == y0:
+                return x0
+            return min(max(x0 + (goal - y0) / (y1 - y0) * (x1 - x0), x0), x1)
+        previous = y1
+    return None
+
+
+def _extend_last(pieces, a_n, a_t, goal):
+    """หาจุดตัดบนเส้นตรงของช่วงสุดท้ายที่ต่อออกไปถึงอนันต์"""
+    x0, x1, n0, n1, t0, t1 = pieces[-1]
+    y0 = a_n * n0 + a_t * t0
+    y1 = a_n * n1 + a_t * t1
+    if x1 <= x0 or y1 == y0:
+        return None
+    x = x1 + (goal - y1) / (y1 - y0) * (x1 - x0)
+    return x if x >= x1 else None
+
+
+def solve_for_target(income_data: Dict, deductions_data: Dict, field: str, target: str, value: float,
+                     withholding_tax: float = 0, lo: float = 0.0, hi: Optional[float] = None,
+                     tax_year: Optional[int] = None) -> Optional[float]:
+    """
+    หาค่าของ field ที่ทำให้ผลการคำนวณ target เท่ากับ value
+
+    เรียก calculate_tax_record() ครั้งเดียว (ตรวจค่าที่ขอบล่าง) ส่วนที่เหลือแก้สมการ
+    จากจุดหักเหของ net_income_breakpoints()
+
+    Args:
+        income_data: ข้อมูลเงินได้ (รูปแบบเดียวกับ calculate_tax_complete())
+        deductions_data: ข้อมูลค่าลดหย่อน
+        field: field ที่ต้องการหาค่า เช่น 'salary_per_month', 'bonus', 'income_40_6',
+            'rmf', 'thai_esg', 'donation'
+        target: ผลลัพธ์เป้าหมาย หนึ่งใน SOLVE_TARGETS
+        value: ค่าเป้าหมาย
+        withholding_tax: ภาษีหัก ณ ที่จ่าย
+        lo: ค่าต่ำสุดของ field ที่ค้นหา
+        hi: ค่าสูงสุดของ field ที่ค้นหา (None = ไม่มีขอบบน)
+        tax_year: ปีภาษี (None = ปี DEFAULT_TAX_YEAR)
+
+    Returns:
+        ค่า field ที่น้อยที่สุดในช่วง [lo, hi] ที่ให้ผลตามเป้าหมาย
+        (ถ้าผลลัพธ์กระโดดข้ามเป้าหมายตามขั้นบันไดภาษี จะคืนจุดที่กระโดด)
+        หรือ None ถ้าไม่มีค่าในช่วงที่ให้ผลตามเป้าหมาย
+    """
+    a_n, a_t, adjust = _target_line(target, withholding_tax)
+    goal = adjust(value)
+    setter = field_setter(income_data, deductions_data, withholding_tax, field)
+
+    # ค่าที่ขอบล่างตรงเป้าหมายอยู่แล้ว (เช่น เงินเพิ่ม 0 บาท)
+    if _close(getattr(calculate_tax_record(setter(lo), tax_year), target), value):
+        return lo
+
+    table = get_rules(tax_year).get_tax_table()
+    pieces = tax_pieces(net_income_breakpoints(setter, lo, hi, tax_year), table)
+    x = _first_crossing(pieces, a_n, a_t, goal)
+    if x is None and hi is None and pieces:
+        x = _extend_last(pieces, a_n, a_t, goal)
+    return x
+
+
+def solve_salary_for_net_pay(income_data: Dict, deductions_data: Dict, net_income_after_tax: float,
+                             withholding_tax: float = 0, tax_year: Optional[int] = None) -> Optional[float]:
+    """
+    หาเงินเดือนต่อเดือน (gross-up) ที่ทำให้ได้รายได้สุทธิหลังภาษีตามเป้าหมาย
+
+    Returns:
+        เงินเดือนต่อเดือน หรือ None ถ้าไม่มีคำตอบ
+    """
+    return solve_for_target(income_data, deductions_data, 'salary_per_month',
+                            'net_income_after_tax', net_income_after_tax, withholding_tax, tax_year=tax_year)
+
+
+def solve_deduction_for_tax(income_data: Dict, deductions_data: Dict, field: str, tax: float,
+                            withholding_tax: float = 0, tax_year: Optional[int] = None) -> Optional[float]:
+    """
+    หาจำนวนเงินลงทุน/ค่าลดหย่อน (เช่น rmf, thai_esg) ที่น้อยที่สุดที่ทำให้ภาษีไม่เกินเป้าหมาย
+
+    เรียก calculate_tax_record() ไม่เกิน 2 ครั้ง: ภาษีที่ 0 บาท และตรวจคำตอบหลังปัดเป็นสตางค์
+
+    Returns:
+        จำนวนเงินของ field (0 ถ้าภาษีไม่เกินเป้าหมายอยู่แล้ว) หรือ None ถ้าลงทุนเท่าใดก็ไม่ถึง
+    """
+    setter = field_setter(income_data, deductions_data, withholding_tax, field)
+
+    def tax_at(amount):
+        return calculate_tax_record(setter(amount), tax_year).tax
+
+    if tax_at(0.0) <= tax:
+        return 0.0
+
+    # ค่าลดหย่อนไม่ทำให้ภาษีเพิ่ม ภาษีต่ำสุดจึงอยู่ที่ช่วงสุดท้าย (หลังถึงเพดานทุกข้อ)
+    table = get_rules(tax_year).get_tax_table()
+    pieces = tax_pieces(net_income_breakpoints(setter, 0.0, None, tax_year), table)
+    lowest = pieces[-1][5]
+    if lowest > tax and not _close(lowest, tax):
+        return None
+    amount = _first_crossing(pieces, 0, 1, tax)
+    if amount is None:
+        return None
+
+    # ปัดขึ้นเป็นสตางค์ คำตอบจากสมการคลาดเคลื่อนจากจุดตัดจริงน้อยกว่า 1 สตางค์มาก
+    # ถ้าภาษียังเกินเป้าหมายเล็กน้อย การเพิ่มอีก 1 สตางค์จึงพ้นจุดตัดแน่นอน
+    amount = math.ceil(round(amount * 100, 6)) / 100
+    if tax_at(amount) > tax:
+        amount = round(amount + 0.01, 2)
+    return amount
@@ -0,0 +1,25 @@
+"""
+ตั้งค่าร่วมของ pytest: ให้ import โมดูลในโฟลเดอร์หลักของโปรเจกต์ได้ และใช้ฐานข้อมูลชั่วคราว
+
+รันจากโฟลเดอร์หลักของโปรเจกต์:
+    python -m pytest -q
+"""
+
+import os
+import sys
+
+import pytest
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import database  # noqa: E402
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """ฐานข้อมูลชั่วคราวที่สร้างโครงสร้างแล้ว (ไม่แตะ tax.db ของโปรเจกต์)"""
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'test.db'))
+    database.init_db()
+    yield database
+    database.close_connections()
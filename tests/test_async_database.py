@@ -0,0 +1,92 @@
+"""ทดสอบ async_database: งานเขียนไปที่ writer thread เดียว งานอ่านไปที่ reader pool และผลตรงกับ database"""
+
+import asyncio
+import threading
+
+import pytest
+
+import async_database as adb
+import database
+
+WRITES = ('init_db', 'save_calculation', 'save_calculations_bulk', 'delete_calculation',
+          'save_user_profile', 'save_user_profiles_bulk', 'delete_user_profile')
+READS = ('get_calculations', 'get_calculations_page', 'get_calculation_by_id', 'get_statistics',
+         'get_daily_statistics', 'get_bracket_statistics', 'aggregate_deductions',
+         'count_calculations_at_least', 'get_user_profiles', 'get_user_profile_by_name',
+         'aggregate_profile_values')
+
+
+@pytest.fixture
+def adb_pools(db):
+    """เริ่มจาก pool ว่าง และหยุด thread (พร้อม connection ของ thread) เมื่อจบ"""
+    adb.shutdown()
+    yield adb
+    adb.shutdown()
+
+
+def _calculation(tax):
+    return {'income': 500000, 'total_deductions': 60000, 'net_income': 440000, 'tax': tax,
+            'deduction_details': {'rmf': tax}, 'tax_details': []}
+
+
+@pytest.mark.parametrize('name', WRITES + READS)
+def test_wraps_database_function(name):
+    assert getattr(adb, name).__wrapped__ is getattr(database, name)
+
+
+def test_writes_and_reads_use_their_own_pools(adb_pools):
+    async def scenario():
+        await adb.save_calculation('alice', _calculation(1))
+        assert set(adb._executors) == {'writer'}
+        rows = await adb.get_calculations()
+        assert set(adb._executors) == {'writer', 'reader'}
+        return rows
+
+    rows = asyncio.run(scenario())
+    assert [row['name'] for row in rows] == ['alice']
+    assert adb._executors['writer']._max_workers == 1
+    assert adb._executors['reader']._max_workers == adb.READER_THREADS
+
+
+def test_thread_names():
+    async def thread_name(kind):
+        return await adb._run_in(kind, lambda: threading.current_thread().name)()
+
+    async def scenario():
+        return await asyncio.gather(*(thread_name(kind) for kind in ('writer', 'reader') * 8))
+
+    try:
+        names = asyncio.run(scenario())
+    finally:
+        adb.shutdown()
+    writers = set(names[::2])
+    readers = set(names[1::2])
+    assert len(writers) == 1 and writers.pop().startswith('tax-db-writer')
+    assert all(name.startswith('tax-db-reader') for name in readers)
+
+
+def test_concurrent_writes_and_reads_match_sync(adb_pools):
+    async def scenario():
+        ids = await asyncio.gather(*(adb.save_calculation(f'user{i % 4}', _calculation(i)) for i in range(40)))
+        await asyncio.gather(*(adb.save_user_profile(f'user{i}', {'income_40_1_2': i}, {}) for i in range(4)))
+        reads = await asyncio.gather(
+            adb.get_calculations(), adb.get_statistics(), adb.aggregate_deductions(['rmf']),
+            adb.get_user_profiles(), adb.get_calculations_page(page_size=10),
+        )
+        return ids, reads
+
+    ids, (calculations, statistics, aggregates, profiles, page) = asyncio.run(scenario())
+    assert len(set(ids)) == 40
+    assert calculations == database.get_calculations()
+    assert statistics == database.get_statistics()
+    assert statistics['total_calculations'] == 40
+    assert aggregates == database.aggregate_deductions(['rmf'])
+    assert profiles == database.get_user_profiles()
+    assert page == database.get_calculations_page(page_size=10)
+
+
+def test_pools_recreated_after_shutdown(adb_pools):
+    asyncio.run(adb.get_statistics())
+    adb.shutdown()
+    assert adb._executors == {}
+    assert asyncio.run(adb.get_statistics())['total_calculations'] == 0
@@ -0,0 +1,51 @@
+"""ทดสอบ bulk_calculate: คำนวณต่อด้วย --resume และการตรวจค่าในไฟล์ CSV"""
+
+import pytest
+
+import bulk_calculate
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / 'employees.csv'
+    lines = ['id,income_40_1_2,rmf']
+    lines += [f'{i},{300000 + i * 1000},{"" if i % 3 else 1000}' for i in range(1000)]
+    path.write_text('\n'.join(lines) + '\n')
+    return path
+
+
+def test_resume_after_partial_write_matches_full_run(tmp_path, input_csv):
+    full = tmp_path / 'full.csv'
+    partial = tmp_path / 'partial.csv'
+    bulk_calculate.run(input_csv, full, chunk_size=100, workers=1, progress=None)
+    lines = full.read_text().split('\n')
+    # 399 แถวที่เขียนครบ ตามด้วยแถวที่เขียนค้างครึ่งแถว
+    partial.write_text('\n'.join(lines[:400]) + '\n' + lines[400][:5])
+
+    written = bulk_calculate.run(input_csv, partial, chunk_size=100, workers=1, resume=True, progress=None)
+    assert written == 601
+    assert partial.read_text() == full.read_text()
+
+
+def test_resume_rejects_different_header(tmp_path, input_csv):
+    output = tmp_path / 'results.csv'
+    bulk_calculate.run(input_csv, output, chunk_size=100, workers=1, progress=None)
+    with pytest.raises(ValueError):
+        bulk_calculate.run(input_csv, output, chunk_size=100, workers=1, id_column='rmf', resume=True, progress=None)
+
+
+def test_resume_without_output_starts_over(tmp_path, input_csv):
+    output = tmp_path / 'results.csv'
+    assert bulk_calculate.run(input_csv, output, chunk_size=100, workers=1, resume=True, progress=None) == 1000
+
+
+@pytest.mark.parametrize('text', ['inf', 'nan', '-inf', '1e400', '-1', 'abc'])
+def test_non_finite_or_negative_amount_is_rejected(text):
+    with pytest.raises(ValueError, match='แถวที่ 3'):
+        bulk_calculate._parse_column(('1', text, ''), 'rmf', 2)
+
+
+def test_blank_and_thousands_separator():
+    values = bulk_calculate._parse_column(('1', '', '2,000'), 'rmf', 2)
+    assert values[0] == 1 and values[2] == 2000
+    assert values[1] != values[1]  # ช่องว่างคือ NaN (ไม่ได้ระบุ)
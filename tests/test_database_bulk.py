@@ -0,0 +1,68 @@
+"""ทดสอบการบันทึกแบบกลุ่ม: ID ของแต่ละแถวจาก RETURNING และ generation ของตารางที่เขียนจริง"""
+
+from tax_calculator import calculate_tax_record
+from tax_models import TaxInput
+
+
+def _result(salary):
+    return calculate_tax_record(TaxInput.from_dicts({'income_40_1_2': salary}, {'rmf': salary / 10}))
+
+
+def test_calculation_ids_match_saved_rows(db):
+    db.save_calculation('first', _result(100_000))
+    records = [(f'user{i}', _result(300_000 + i * 1_000)) for i in range(7)]
+    ids = db.save_calculations_bulk(iter(records), batch_size=3)
+
+    assert len(ids) == len(set(ids)) == 7
+    for calculation_id, (name, result) in zip(ids, records):
+        row = db.get_calculation_by_id(calculation_id)
+        assert row['name'] == name
+        assert row['tax'] == result.tax
+
+
+def test_calculation_ids_skip_gaps_in_the_table(db):
+    # ID ที่ไม่ต่อเนื่อง (แถวที่ใส่ ID เองไว้ล่วงหน้า) ต้องไม่ทำให้ ID ที่คืนผิดแถว
+    conn = db.get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO calculations (id, name, income, total_deductions, net_income, tax) "
+            "VALUES (50, 'manual', 0, 0, 0, 0)"
+        )
+    ids = db.save_calculations_bulk([('a', _result(500_000)), ('b', _result(600_000))])
+    assert [db.get_calculation_by_id(i)['name'] for i in ids] == ['a', 'b']
+    assert ids[0] > 50
+
+
+def test_calculations_mark_written_once_per_batch(db):
+    before = db.write_generation('calculations')
+    assert db.save_calculations_bulk([]) == []
+    assert db.write_generation('calculations') == before
+
+    db.save_calculations_bulk([(str(i), _result(400_000)) for i in range(5)], batch_size=2)
+    assert db.write_generation('calculations') == before + 3
+
+
+def test_unchanged_profiles_do_not_mark_written(db):
+    profiles = [('a', {'salary': 1}, {}), ('b', {'salary': 2}, {})]
+    ids = db.save_user_profiles_bulk(profiles)
+    before = db.write_generation('user_profiles')
+
+    assert db.save_user_profiles_bulk(profiles, skip_unchanged=True) == ids
+    assert db.write_generation('user_profiles') == before
+
+    assert db.save_user_profiles_bulk(profiles + [('c', {}, {})], skip_unchanged=True) == ids + [3]
+    assert db.write_generation('user_profiles') == before + 1
+
+
+def test_failed_batch_keeps_earlier_batches(db):
+    def rows():
+        yield 'a', _result(500_000)
+        yield 'b', _result(600_000)
+        raise RuntimeError('input ended early')
+
+    try:
+        db.save_calculations_bulk(rows(), batch_size=1)
+    except RuntimeError:
+        pass
+    assert [row['name'] for row in db.get_calculations()] == ['b', 'a']
+    assert not db.get_connection().in_transaction
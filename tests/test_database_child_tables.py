@@ -0,0 +1,113 @@
+"""ทดสอบตารางลูก calculation_deductions/profile_values ที่ trigger ปรับตามคอลัมน์ JSON"""
+
+import json
+import random
+
+import pytest
+
+
+def _deductions(rng):
+    details = {'personal': 60000}
+    for key in ('rmf', 'ssf', 'pvd', 'donation'):
+        details[key] = rng.choice([0, round(rng.uniform(0, 300_000), 2)])
+    details['spouse'] = rng.random() < 0.5
+    details['note'] = 'ไม่ใช่ตัวเลข'
+    return details
+
+
+def _calculation(details):
+    return {'income': 1_000_000, 'total_deductions': 0, 'net_income': 0, 'tax': 0,
+            'deduction_details': details, 'tax_details': []}
+
+
+def _recount(values_by_owner, keys=None):
+    """รวมยอดตาม key จาก dict ใน Python (ข้ามค่าที่ไม่ใช่ตัวเลขและค่า 0 นับ true เป็น 1)"""
+    groups = {}
+    for values in values_by_owner:
+        for key, value in values.items():
+            if isinstance(value, str) or not value or (keys is not None and key not in keys):
+                continue
+            groups.setdefault(key, []).append(float(value))
+    return {key: {'count': len(amounts), 'total': sum(amounts), 'avg': sum(amounts) / len(amounts),
+                  'max': max(amounts)}
+            for key, amounts in groups.items()}
+
+
+def _assert_aggregates(actual, expected):
+    assert set(actual) == set(expected)
+    for key, aggregate in expected.items():
+        assert actual[key]['count'] == aggregate['count'], key
+        for name in ('total', 'avg', 'max'):
+            assert actual[key][name] == pytest.approx(aggregate[name]), (key, name)
+
+
+def _saved_deductions(db):
+    rows = db.get_connection().execute('SELECT deduction_details FROM calculations').fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def test_calculation_deductions_follow_inserts_updates_and_deletes(db):
+    rng = random.Random(17)
+    ids = [db.save_calculation(f'user{i}', _calculation(_deductions(rng))) for i in range(60)]
+    _assert_aggregates(db.aggregate_deductions(), _recount(_saved_deductions(db)))
+    _assert_aggregates(db.aggregate_deductions(['rmf', 'spouse', 'missing']),
+                       _recount(_saved_deductions(db), {'rmf', 'spouse'}))
+
+    conn = db.get_connection()
+    with conn:
+        for calculation_id in ids[::3]:
+            conn.execute('UPDATE calculations SET deduction_details = ? WHERE id = ?',
+                         (json.dumps(_deductions(rng)), calculation_id))
+        # JSON ที่เสียหายไม่ทำให้บันทึกล้มเหลว แต่ไม่มีแถวในตารางลูก
+        conn.execute("UPDATE calculations SET deduction_details = 'not json' WHERE id = ?", (ids[1],))
+    for calculation_id in ids[::4]:
+        db.delete_calculation(calculation_id)
+
+    rows = conn.execute('SELECT id, deduction_details FROM calculations').fetchall()
+    expected = [json.loads(row[1]) for row in rows if row[0] != ids[1]]
+    _assert_aggregates(db.aggregate_deductions(), _recount(expected))
+
+    for calculation_id in ids:
+        db.delete_calculation(calculation_id)
+    assert db.aggregate_deductions() == {}
+    assert conn.execute('SELECT COUNT(*) FROM calculation_deductions').fetchone()[0] == 0
+
+
+def test_count_calculations_at_least(db):
+    # ผลรวมทศนิยมที่ควรเท่าเพดานพอดีต้องนับด้วย
+    cases = [
+        {'rmf': 200000.1, 'ssf': 199999.7, 'pvd': 100000.2},
+        {'rmf': 500000},
+        {'rmf': 499999.99},
+        {'ssf': 300000, 'pvd': 250000},
+        {'personal': 600000},
+        {},
+    ]
+    for details in cases:
+        db.save_calculation('cap', _calculation(details))
+    assert db.count_calculations_at_least(['rmf', 'ssf', 'pvd'], 500000) == 3
+    assert db.count_calculations_at_least(['rmf'], 499999.99) == 2
+    assert db.count_calculations_at_least(['pvd'], 0.01) == 2
+    assert db.count_calculations_at_least([], 1) == 0
+
+
+def test_profile_values_follow_saves_and_deletes(db):
+    rng = random.Random(7)
+    profiles = {}
+    for i in range(30):
+        name = f'user{i % 20}'
+        income = {'income_40_1_2': rng.choice([0, rng.uniform(0, 2_000_000)]), 'income_40_8': rng.uniform(0, 1)}
+        profiles[name] = (income, _deductions(rng))
+        db.save_user_profile(name, *profiles[name])
+    for name in ('user3', 'user11'):
+        db.delete_user_profile(name)
+        del profiles[name]
+
+    for index, section in enumerate(('income', 'deductions')):
+        expected = _recount(values[index] for values in profiles.values())
+        _assert_aggregates(db.aggregate_profile_values(section), expected)
+    _assert_aggregates(db.aggregate_profile_values('deductions', ['spouse']),
+                       _recount((values[1] for values in profiles.values()), {'spouse'}))
+
+    with pytest.raises(ValueError):
+        db.aggregate_profile_values('withholding')
@@ -0,0 +1,60 @@
+"""ทดสอบการใช้ connection ซ้ำต่อ thread"""
+
+import sqlite3
+import threading
+
+import pytest
+
+
+def _in_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0], thread
+
+
+def test_connection_reused_per_thread(db):
+    conn = db.get_connection()
+    assert db.get_connection() is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    other, _ = _in_thread(db.get_connection)
+    assert other is not conn
+
+
+def test_connection_per_database(db, tmp_path, monkeypatch):
+    conn = db.get_connection()
+    db_name = db.DB_NAME
+    monkeypatch.setattr(db, 'DB_NAME', str(tmp_path / 'other.db'))
+    assert db.get_connection() is not conn
+    monkeypatch.setattr(db, 'DB_NAME', db_name)
+    assert db.get_connection() is conn
+
+
+def test_close_connections_reopens(db):
+    conn = db.get_connection()
+    db.close_connections()
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute('SELECT 1')
+    assert db.get_connection() is not conn
+    assert db.get_statistics()['total_calculations'] == 0
+
+
+def test_connection_of_finished_thread_closed(db):
+    other, thread = _in_thread(db.get_connection)
+    assert not thread.is_alive()
+    db.get_connection()
+    _in_thread(db.get_connection)
+    with pytest.raises(sqlite3.ProgrammingError):
+        other.execute('SELECT 1')
+
+
+def test_failed_write_does_not_leave_transaction(db):
+    with pytest.raises(KeyError):
+        db.save_calculation('broken', {'tax_details': []})
+    with pytest.raises(sqlite3.IntegrityError):
+        db.save_calculation('broken', {'income': None, 'total_deductions': 0, 'net_income': 0, 'tax': 0})
+    conn = db.get_connection()
+    assert not conn.in_transaction
+    assert db.get_statistics()['total_calculations'] == 0
@@ -0,0 +1,98 @@
+"""ทดสอบการเลือก field ของประวัติการคำนวณและ LazyJSON ที่แปลง JSON เมื่อใช้งานครั้งแรก"""
+
+import copy
+import json
+
+import pytest
+
+from database import CALCULATION_FIELDS, LazyJSON
+
+DEDUCTIONS = {'personal': 60000, 'rmf': 25000.5}
+TAX_DETAILS = [{'range': '150,001 - 300,000', 'taxable_amount': 150000, 'rate': 5.0, 'tax': 7500}]
+
+
+def _calculation(income):
+    return {'income': income, 'total_deductions': 85000.5, 'net_income': income - 185000.5, 'tax': 7500,
+            'deduction_details': DEDUCTIONS, 'tax_details': TAX_DETAILS}
+
+
+def test_lazy_json_decodes_on_first_use():
+    details = LazyJSON(json.dumps(DEDUCTIONS))
+    assert not details.decoded
+    assert details['rmf'] == 25000.5
+    assert details.decoded
+
+    rows = LazyJSON(json.dumps(TAX_DETAILS), list)
+    assert len(rows) == 1 and rows[0]['rate'] == 5.0
+    assert [row['tax'] for row in rows] == [7500]
+
+
+@pytest.mark.parametrize('text, empty', [(json.dumps(DEDUCTIONS), dict), (json.dumps(TAX_DETAILS), list)])
+def test_lazy_json_behaves_like_value(text, empty):
+    details = LazyJSON(text, empty)
+    expected = json.loads(text)
+    assert details == expected and expected == details
+    assert details == LazyJSON(text, empty)
+    assert list(details) == list(expected)
+    assert bool(details) and len(details) == len(expected)
+    assert details.value == expected and type(details.value) is empty
+    with pytest.raises(TypeError):
+        hash(details)
+
+
+@pytest.mark.parametrize('text', [None, ''])
+def test_lazy_json_empty_text(text):
+    assert LazyJSON(text).value == {}
+    assert LazyJSON(text, list).value == []
+    assert not LazyJSON(text)
+
+
+def test_lazy_json_methods_and_deepcopy():
+    details = LazyJSON(json.dumps(DEDUCTIONS))
+    clone = copy.deepcopy(details)
+    # copy ก่อนแปลงต้องไม่ทำให้ต้นฉบับถูกแปลง
+    assert not details.decoded and not clone.decoded
+    assert dict(clone.items()) == DEDUCTIONS
+    assert details.get('missing', 0) == 0
+    assert 'personal' in details
+
+    clone.value['rmf'] = 0
+    assert details['rmf'] == 25000.5
+    decoded_clone = copy.deepcopy(details)
+    decoded_clone.value['rmf'] = 1
+    assert details['rmf'] == 25000.5
+
+
+def test_full_rows_round_trip(db):
+    calculation_id = db.save_calculation('alice', _calculation(500000))
+    row = db.get_calculation_by_id(calculation_id)
+    assert tuple(row) == CALCULATION_FIELDS
+    assert row['deduction_details'] == DEDUCTIONS
+    assert row['tax_details'] == TAX_DETAILS
+    assert db.get_calculations() == [row]
+
+
+def test_fields_projection(db):
+    for income in (400000, 500000, 600000):
+        calculation_id = db.save_calculation('bob', _calculation(income))
+
+    rows = db.get_calculations(fields=['name', 'tax'])
+    assert [tuple(row) for row in rows] == [('name', 'tax')] * 3
+    assert db.get_calculations(name='bob', limit=1, fields=('income',)) == [{'income': 600000}]
+    assert db.get_calculation_by_id(calculation_id, fields=['tax_details']) == {'tax_details': TAX_DETAILS}
+
+    # หน้าถัดไปยังต้องมี cursor แม้ไม่ได้ขอ created_at/id
+    page = db.get_calculations_page(page_size=2, fields=['income'])
+    assert page['calculations'] == [{'income': 600000}, {'income': 500000}]
+    page = db.get_calculations_page(*page['next_cursor'], page_size=2, fields=['income'])
+    assert page == {'calculations': [{'income': 400000}], 'next_cursor': None}
+
+
+@pytest.mark.parametrize('read', [
+    lambda db: db.get_calculations(fields=['income', 'salary']),
+    lambda db: db.get_calculations_page(fields=['password']),
+    lambda db: db.get_calculation_by_id(1, fields=['*']),
+])
+def test_unknown_fields_rejected(db, read):
+    with pytest.raises(ValueError):
+        read(db)
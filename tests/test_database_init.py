@@ -0,0 +1,84 @@
+"""ทดสอบ init_db_once(): เรียก init_db() ครั้งเดียวต่อไฟล์ฐานข้อมูลต่อ process"""
+
+import ast
+import os
+import threading
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def init_calls(tmp_path, monkeypatch):
+    """นับการเรียก init_db() โดยเริ่มจากยังไม่มีไฟล์ใดถูกเตรียม"""
+    monkeypatch.setattr(database, '_initialized', set())
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'first.db'))
+    calls = []
+    original = database.init_db
+    monkeypatch.setattr(database, 'init_db', lambda: calls.append(database.DB_NAME) or original())
+    yield calls
+    database.close_connections()
+
+
+def test_runs_once_per_database(init_calls, tmp_path, monkeypatch):
+    for _ in range(3):
+        database.init_db_once()
+    assert init_calls == [str(tmp_path / 'first.db')]
+    assert database.get_connection().execute('PRAGMA user_version').fetchone()[0] == len(database.MIGRATIONS)
+
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / 'second.db'))
+    database.init_db_once()
+    database.init_db_once()
+    assert init_calls == [str(tmp_path / 'first.db'), str(tmp_path / 'second.db')]
+
+
+def test_concurrent_first_calls_run_once(init_calls):
+    barrier = threading.Barrier(8)
+
+    def start():
+        barrier.wait()
+        database.init_db_once()
+
+    threads = [threading.Thread(target=start) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(init_calls) == 1
+
+
+def test_failed_init_is_retried(init_calls, monkeypatch):
+    original = database.init_db  # ตัวนับของ init_calls
+
+    def fail_once():
+        if not init_calls:
+            init_calls.append('failed')
+            raise OSError('disk full')
+        original()
+
+    monkeypatch.setattr(database, 'init_db', fail_once)
+    with pytest.raises(OSError):
+        database.init_db_once()
+    assert database.DB_NAME not in database._initialized
+
+    database.init_db_once()
+    assert database.DB_NAME in database._initialized
+    assert init_calls == ['failed', database.DB_NAME]
+
+
+def test_app_imports_pandas_lazily():
+    # app.py ต้องไม่ import pandas ตอนโหลดโมดูล (import ภายในส่วนที่สร้าง DataFrame เท่านั้น)
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+    top_level = set()
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            top_level.update(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            top_level.add(node.module)
+    assert 'pandas' not in top_level
+    # ทุก rerun ของ Streamlit รันทั้งไฟล์ จึงต้องเรียก init_db_once() แทน init_db()
+    called = {node.func.id for node in ast.walk(tree) if isinstance(node, ast.Call) and isinstance(node.func, ast.Name)}
+    assert 'init_db_once' in called and 'init_db' not in called
@@ -0,0 +1,154 @@
+"""ทดสอบการปรับโครงสร้างฐานข้อมูลเดิม (ก่อนมี user_version) เป็นเวอร์ชันล่าสุดตาม MIGRATIONS"""
+
+import json
+import sqlite3
+
+import pytest
+
+import database
+from tax_calculator import calculate_tax_record
+from tax_models import TaxInput
+
+
+# โครงสร้างตารางของฐานข้อมูลรุ่นแรก (user_version = 0 ไม่มีดัชนีหรือ trigger)
+BASELINE_SCHEMA = '''
+    CREATE TABLE calculations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL,
+        income REAL NOT NULL,
+        total_deductions REAL NOT NULL,
+        net_income REAL NOT NULL,
+        tax REAL NOT NULL,
+        deduction_details TEXT,
+        tax_details TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE user_profiles (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT NOT NULL UNIQUE,
+        income_data TEXT NOT NULL,
+        deductions_data TEXT NOT NULL,
+        withholding_tax REAL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+def _record(salary):
+    """ผลการคำนวณในรูปแบบที่บันทึกลง calculations"""
+    tax_input = TaxInput.from_dicts({'income_40_1_2': salary}, {'rmf': salary * 0.1, 'spouse': True})
+    return calculate_tax_record(tax_input).to_calculation_record()
+
+
+SALARIES = (200_000, 600_000, 1_500_000, 6_000_000)
+PROFILES = (
+    ('a', {'income_40_1_2': 600_000, 'income_40_8': 50_000}, {'rmf': 20_000, 'spouse': True}),
+    ('b', {'income_40_1_2': 0}, {}),
+)
+
+
+@pytest.fixture
+def baseline_db(tmp_path, monkeypatch):
+    """ไฟล์ฐานข้อมูลโครงสร้างรุ่นแรกที่มีข้อมูลแล้ว (บันทึกแบบเดียวกับโค้ดรุ่นแรก)"""
+    path = str(tmp_path / 'baseline.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    for day, salary in enumerate(SALARIES, start=1):
+        result = _record(salary)
+        tax_details = [
+            {key: detail[key] for key in ('range', 'taxable_amount', 'rate', 'tax')}
+            for detail in result['tax_details']
+        ]
+        conn.execute(
+            'INSERT INTO calculations (name, income, total_deductions, net_income, tax, '
+            'deduction_details, tax_details, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (f'user{salary}', result['income'], result['total_deductions'], result['net_income'],
+             result['tax'], json.dumps(result['deduction_details'], ensure_ascii=False),
+             json.dumps(tax_details, ensure_ascii=False), f'2024-01-0{day} 10:00:00'),
+        )
+    # แถวที่ JSON เสียต้องไม่ทำให้การปรับโครงสร้างล้ม
+    conn.execute(
+        "INSERT INTO calculations (name, income, total_deductions, net_income, tax, deduction_details, "
+        "tax_details, created_at) VALUES ('broken', 100, 0, 100, 0, 'not json', 'not json', "
+        "'2024-01-01 12:00:00')"
+    )
+    for name, income_data, deductions_data in PROFILES:
+        conn.execute(
+            'INSERT INTO user_profiles (name, income_data, deductions_data, withholding_tax) VALUES (?, ?, ?, 0)',
+            (name, json.dumps(income_data), json.dumps(deductions_data)),
+        )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, 'DB_NAME', path)
+    yield database
+    database.close_connections()
+
+
+def _names(conn, kind):
+    return {row[0] for row in conn.execute('SELECT name FROM sqlite_master WHERE type = ?', (kind,))}
+
+
+def test_upgrade_from_baseline(baseline_db):
+    baseline_db.init_db()
+    conn = baseline_db.get_connection()
+
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(baseline_db.MIGRATIONS)
+    assert conn.execute('SELECT COUNT(*) FROM calculations').fetchone()[0] == len(SALARIES) + 1
+    assert {'idx_calculations_name_created_at', 'idx_calculations_created_at_name',
+            'idx_calculations_tax_name', 'idx_calculations_income_name',
+            'idx_user_profiles_updated_at_name'} <= _names(conn, 'index')
+    assert not {'idx_calculations_created_at', 'idx_calculations_tax',
+                'idx_calculations_income', 'idx_user_profiles_updated_at'} & _names(conn, 'index')
+
+    # สถิติสะสมเติมจากข้อมูลเดิม
+    rows = conn.execute('SELECT income, tax, tax_details, created_at FROM calculations').fetchall()
+    statistics = baseline_db.get_statistics()
+    assert statistics['total_calculations'] == len(rows)
+    assert statistics['total_tax'] == pytest.approx(sum(row['tax'] for row in rows))
+    daily = {row['day']: row['total_calculations'] for row in baseline_db.get_daily_statistics()}
+    assert daily == {'2024-01-01': 2, '2024-01-02': 1, '2024-01-03': 1, '2024-01-04': 1}
+    brackets = {row['rate']: row['total_calculations'] for row in baseline_db.get_bracket_statistics()}
+    assert sum(brackets.values()) == len(rows)
+    assert brackets[35] == 1
+
+    # ตารางลูกเติมจาก JSON เดิม
+    rmf = baseline_db.aggregate_deductions(['rmf'])['rmf']
+    assert rmf['count'] == len(SALARIES)
+    assert rmf['total'] == pytest.approx(sum(_record(s)['deduction_details']['rmf'] for s in SALARIES))
+    income = baseline_db.aggregate_profile_values('income')
+    assert income['income_40_1_2']['count'] == 1
+    assert income['income_40_8']['total'] == 50_000
+    assert baseline_db.aggregate_profile_values('deductions')['spouse']['total'] == 1
+
+    # ข้อมูลผู้ใช้เดิมยังอ่านได้ และ hash ที่ว่างทำให้บันทึกใหม่ได้ครั้งแรก
+    profile = baseline_db.get_user_profile_by_name('a')
+    assert profile['income_data'] == PROFILES[0][1]
+    assert conn.execute('SELECT content_hash FROM user_profiles WHERE name = ?', ('a',)).fetchone()[0] is None
+    assert baseline_db.save_user_profile('a', *PROFILES[0][1:], skip_unchanged=True) == profile['id']
+    assert conn.execute('SELECT content_hash FROM user_profiles WHERE name = ?', ('a',)).fetchone()[0]
+
+    # ID เดิมคงที่หลังสร้างตาราง user_profiles ใหม่ (ไม่มี AUTOINCREMENT) และ trigger ยังทำงาน
+    assert [row['id'] for row in baseline_db.get_user_profiles()] == [1, 2]
+    assert baseline_db.save_user_profile('c', {'income_40_8': 10_000}, {}) == 3
+    assert baseline_db.aggregate_profile_values('income')['income_40_8']['count'] == 2
+    assert baseline_db.delete_user_profile('c')
+    assert baseline_db.aggregate_profile_values('income')['income_40_8']['count'] == 1
+
+
+def test_triggers_after_upgrade(baseline_db):
+    baseline_db.init_db()
+    before = baseline_db.get_statistics()['total_calculations']
+    calculation_id = baseline_db.save_calculation('new', _record(900_000))
+    assert baseline_db.get_statistics()['total_calculations'] == before + 1
+    assert baseline_db.aggregate_deductions(['rmf'])['rmf']['count'] == len(SALARIES) + 1
+    assert baseline_db.delete_calculation(calculation_id)
+    assert baseline_db.get_statistics()['total_calculations'] == before
+
+
+def test_init_db_is_idempotent(baseline_db):
+    baseline_db.init_db()
+    baseline_db.init_db()
+    conn = baseline_db.get_connection()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(baseline_db.MIGRATIONS)
+    assert baseline_db.get_statistics()['total_calculations'] == len(SALARIES) + 1
@@ -0,0 +1,71 @@
+"""ทดสอบ get_calculations_page(): เปิดทุกหน้าตาม cursor แล้วได้ลำดับเดียวกับ get_calculations()"""
+
+import pytest
+
+
+def _calculation(i):
+    income = 300000 + i * 1000
+    return {'income': income, 'total_deductions': 60000, 'net_income': income - 160000,
+            'tax': float(i), 'deduction_details': {}, 'tax_details': []}
+
+
+@pytest.fixture
+def calculations(db):
+    for i in range(37):
+        db.save_calculation(('alice', 'bob', 'carol')[i % 3], _calculation(i))
+    conn = db.get_connection()
+    # created_at ซ้ำกันหลายแถว ลำดับต้องตัดสินต่อด้วย id
+    with conn:
+        conn.execute("UPDATE calculations SET created_at = datetime('2025-01-01', '+' || (id % 4) || ' days')")
+    return db
+
+
+def _walk(db, page_size, name_filter=None):
+    """เปิดทุกหน้าตาม next_cursor คืน id ทุกแถวตามลำดับ"""
+    ids, cursor = [], (None, None)
+    while True:
+        page = db.get_calculations_page(*cursor, page_size=page_size, name_filter=name_filter)
+        assert len(page['calculations']) <= page_size
+        ids.extend(row['id'] for row in page['calculations'])
+        if page['next_cursor'] is None:
+            return ids
+        assert len(page['calculations']) == page_size
+        cursor = page['next_cursor']
+
+
+@pytest.mark.parametrize('page_size', [1, 5, 36, 37, 100])
+def test_pages_cover_history_in_order(calculations, page_size):
+    expected = [row['id'] for row in calculations.get_calculations()]
+    assert _walk(calculations, page_size) == expected
+
+
+@pytest.mark.parametrize('name', ['alice', 'carol', 'nobody'])
+def test_pages_filtered_by_name(calculations, name):
+    expected = [row['id'] for row in calculations.get_calculations(name=name)]
+    assert _walk(calculations, 4, name) == expected
+
+
+def _walk_from(db, cursor):
+    ids = []
+    while cursor is not None:
+        page = db.get_calculations_page(*cursor, page_size=10)
+        ids.extend(row['id'] for row in page['calculations'])
+        cursor = page['next_cursor']
+    return ids
+
+
+def test_rows_inserted_while_paging_are_not_repeated(calculations):
+    # แถวใหม่อยู่ก่อนหน้าแรก cursor ต้องไม่พาให้เห็นแถวเดิมซ้ำ
+    first = calculations.get_calculations_page(page_size=10)
+    calculations.save_calculation('dave', _calculation(99))
+    rest = _walk_from(calculations, first['next_cursor'])
+    ids = [row['id'] for row in first['calculations']] + rest
+    assert len(ids) == len(set(ids)) == 37
+
+
+def test_invalid_arguments(db):
+    with pytest.raises(ValueError):
+        db.get_calculations_page(page_size=0)
+    with pytest.raises(ValueError):
+        db.get_calculations_page(after_created_at='2025-01-01 00:00:00')
+    assert db.get_calculations_page() == {'calculations': [], 'next_cursor': None}
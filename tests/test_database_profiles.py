@@ -0,0 +1,63 @@
+"""ทดสอบการบันทึกข้อมูลผู้ใช้ (ID คงที่ และ UPSERT ที่ชนชื่อเดิมไม่ทำให้ ID ของผู้ใช้ใหม่กระโดด)"""
+
+
+def _updated_at(db, user_id):
+    return db.get_connection().execute(
+        'SELECT updated_at FROM user_profiles WHERE id = ?', (user_id,)
+    ).fetchone()[0]
+
+
+def test_update_keeps_id_and_sequence(db):
+    user_id = db.save_user_profile('a', {'salary': 1}, {})
+    for salary in (2, 3, 3):
+        assert db.save_user_profile('a', {'salary': salary}, {}) == user_id
+    assert db.get_user_profile_by_name('a')['income_data'] == {'salary': 3}
+    assert db.save_user_profile('b', {}, {}) == user_id + 1
+
+
+def test_skip_unchanged_does_not_write(db):
+    user_id = db.save_user_profile('a', {'salary': 1}, {})
+    db.get_connection().execute(
+        "UPDATE user_profiles SET updated_at = '2000-01-01 00:00:00' WHERE id = ?", (user_id,)
+    )
+    assert db.save_user_profile('a', {'salary': 1}, {}, skip_unchanged=True) == user_id
+    assert _updated_at(db, user_id) == '2000-01-01 00:00:00'
+    assert db.save_user_profile('a', {'salary': 2}, {}, skip_unchanged=True) == user_id
+    assert _updated_at(db, user_id) != '2000-01-01 00:00:00'
+    assert db.save_user_profile('b', {}, {}, skip_unchanged=True) == user_id + 1
+
+
+def test_bulk_keeps_ids_and_sequence(db):
+    first = db.save_user_profiles_bulk([('a', {}, {}), ('b', {}, {})])
+    assert first == [1, 2]
+    ids = db.save_user_profiles_bulk(
+        [('b', {'salary': 1}, {}), ('c', {}, {}), ('a', {}, {}), ('c', {'salary': 2}, {})],
+        batch_size=3, skip_unchanged=True,
+    )
+    assert ids == [2, 3, 1, 3]
+    assert db.save_user_profiles_bulk([('d', {}, {})]) == [4]
+    assert db.get_user_profile_by_name('b')['income_data'] == {'salary': 1}
+    assert db.get_user_profile_by_name('c')['income_data'] == {'salary': 2}
+
+
+def test_bulk_duplicate_names_use_last_row(db):
+    db.save_user_profile('a', {'salary': 1}, {})
+    ids = db.save_user_profiles_bulk(
+        [('a', {'salary': 1}, {}), ('a', {'salary': 2}, {}), ('a', {'salary': 1}, {})],
+        skip_unchanged=True,
+    )
+    assert ids == [1, 1, 1]
+    assert db.get_user_profile_by_name('a')['income_data'] == {'salary': 1}
+    assert db.save_user_profile('b', {}, {}) == 2
+
+
+def test_table_has_no_autoincrement(db):
+    sql = db.get_connection().execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'user_profiles'"
+    ).fetchone()[0]
+    assert 'AUTOINCREMENT' not in sql
+    for name in ('a', 'b'):
+        db.save_user_profile(name, {}, {})
+    assert db.get_connection().execute(
+        "SELECT COUNT(*) FROM sqlite_sequence WHERE name = 'user_profiles'"
+    ).fetchone()[0] == 0
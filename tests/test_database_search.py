@@ -0,0 +1,108 @@
+"""ทดสอบการค้นหา/เรียง/แบ่งหน้าแบบ keyset ของ database: ทุกหน้าต่อกันครบ ไม่ซ้ำ ไม่ขาด"""
+
+import pytest
+
+import database
+
+NAMES = ['alice', 'alan', 'albert', 'bob', 'bobby', 'carol', 'ขวัญ', 'ขจร']
+
+
+def _calculation(i):
+    income = 300000 + (i * 7919) % 900000
+    # ภาษีซ้ำกันหลายแถวเพื่อทดสอบการเรียงต่อด้วย id
+    return {'income': income, 'total_deductions': 60000, 'net_income': income - 160000,
+            'tax': float((i * 31) % 17 * 1000), 'deduction_details': {}, 'tax_details': []}
+
+
+@pytest.fixture
+def calculations(db):
+    records = [(NAMES[i % len(NAMES)] + str(i % 5), _calculation(i)) for i in range(400)]
+    db.save_calculations_bulk(records)
+    conn = db.get_connection()
+    # วันที่ซ้ำกันหลายแถว (บันทึกในวินาทีเดียวกันได้)
+    with conn:
+        conn.execute("UPDATE calculations SET created_at = datetime('2025-01-01', '+' || (id % 13) || ' days')")
+    return db
+
+
+def _walk(search, key, page_size, **kwargs):
+    """เปิดทุกหน้าตาม next_cursor คืนทุกแถวตามลำดับ"""
+    rows, after = [], None
+    while True:
+        page = search(after=after, page_size=page_size, **kwargs)
+        rows.extend(page[key])
+        assert len(page[key]) <= page_size
+        after = page['next_cursor']
+        if after is None:
+            return rows
+
+
+def _expected(rows, sort, descending, name_prefix=None, min_tax=None, max_tax=None):
+    rows = [row for row in rows
+            if (not name_prefix or row['name'].startswith(name_prefix))
+            and (min_tax is None or row['tax'] >= min_tax)
+            and (max_tax is None or row['tax'] <= max_tax)]
+    return sorted(rows, key=lambda row: (row[sort], row['id']), reverse=descending)
+
+
+@pytest.mark.parametrize('sort', database.CALCULATION_SORT_FIELDS)
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('name_prefix', [None, 'al', 'ขวั', 'zzz'])
+@pytest.mark.parametrize('prefix_sort_limit', [0, 1000])
+def test_calculation_pages_have_no_gaps_or_duplicates(calculations, monkeypatch, sort, descending,
+                                                      name_prefix, prefix_sort_limit):
+    # prefix_sort_limit=0 บังคับให้ไล่ดัชนีการเรียง 1000 ให้ค้นจากดัชนีชื่อ
+    monkeypatch.setattr(database, 'PREFIX_SORT_LIMIT', prefix_sort_limit)
+    fields = ('id', 'name', 'tax', 'income', 'created_at')
+    everything = calculations.get_calculations(fields=fields)
+    rows = _walk(calculations.search_calculations, 'calculations', 7, name_prefix=name_prefix, sort=sort,
+                 descending=descending, fields=fields)
+    expected = _expected(everything, sort, descending, name_prefix)
+    assert [row['id'] for row in rows] == [row['id'] for row in expected]
+    assert calculations.count_calculations(name_prefix) == len(expected)
+
+
+def test_tax_range_filter(calculations):
+    fields = ('id', 'name', 'tax', 'income', 'created_at')
+    everything = calculations.get_calculations(fields=fields)
+    rows = _walk(calculations.search_calculations, 'calculations', 10, name_prefix='b', sort='tax',
+                 descending=True, fields=fields, min_tax=3000, max_tax=9000)
+    expected = _expected(everything, 'tax', True, 'b', 3000, 9000)
+    assert [row['id'] for row in rows] == [row['id'] for row in expected]
+    assert calculations.count_calculations('b', 3000, 9000) == len(expected)
+
+
+def test_search_rejects_unknown_sort(db):
+    with pytest.raises(ValueError):
+        db.search_calculations(sort='name; DROP TABLE calculations')
+    with pytest.raises(ValueError):
+        db.search_user_profiles(sort='income_data')
+
+
+@pytest.mark.parametrize('sort', database.PROFILE_SORT_FIELDS)
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('name_prefix', [None, 'bo', 'ข'])
+@pytest.mark.parametrize('prefix_sort_limit', [0, 1000])
+def test_profile_pages_have_no_gaps_or_duplicates(db, monkeypatch, sort, descending, name_prefix,
+                                                  prefix_sort_limit):
+    monkeypatch.setattr(database, 'PREFIX_SORT_LIMIT', prefix_sort_limit)
+    db.save_user_profiles_bulk([(f'{NAMES[i % len(NAMES)]}{i}', {'income_40_1_2': i}, {}) for i in range(120)])
+    conn = db.get_connection()
+    with conn:
+        conn.execute("UPDATE user_profiles SET updated_at = datetime('2025-01-01', '+' || (id % 9) || ' hours')")
+    rows = _walk(db.search_user_profiles, 'profiles', 9, name_prefix=name_prefix, sort=sort, descending=descending)
+    expected = _expected(db.get_user_profiles(), sort, descending, name_prefix)
+    assert [row['id'] for row in rows] == [row['id'] for row in expected]
+    assert db.count_user_profiles(name_prefix) == len(expected)
+
+
+def test_search_plans_use_indexes(db):
+    plans = database.explain_queries()
+    for label, plan in plans.items():
+        if label.startswith(('search_', 'count_', 'get_calculations')) and 'few matches' not in label:
+            assert not any('TEMP B-TREE FOR ORDER BY' in step or 'RIGHT PART OF ORDER BY' in step
+                           for step in plan), (label, plan)
+    assert 'count_user_profiles' in plans
+    # การนับชื่อที่ตรงกันก่อนเลือกแผนอ่านจากดัชนีชื่ออย่างเดียว (ไม่แตะแถวในตาราง)
+    for label in ('search_calculations (prefix matches)', 'search_user_profiles (prefix matches)'):
+        assert any('COVERING INDEX' in step for step in plans[label]), (label, plans[label])
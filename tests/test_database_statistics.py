@@ -0,0 +1,82 @@
+"""ทดสอบสถิติสะสมที่ปรับโดย trigger เทียบกับการนับใหม่จากตาราง calculations โดยตรง"""
+
+import random
+
+import pytest
+
+from tax_calculator import calculate_tax_record, get_tax_table
+from tax_models import TaxInput
+
+
+def _record(rng):
+    salary = rng.choice([0, rng.uniform(0, 8_000_000)])
+    deductions = {'donation': rng.choice([0, rng.uniform(0, 200_000)]), 'rmf': rng.uniform(0, 300_000)}
+    tax_input = TaxInput.from_dicts({'income_40_1_2': salary}, deductions)
+    return calculate_tax_record(tax_input).to_calculation_record()
+
+
+def _bracket_rate(net_income):
+    table = get_tax_table()
+    index = table.bracket_index(net_income)
+    return table.rate[index] * 100 if net_income > 0 and index >= 0 else 0
+
+
+def _recount(conn):
+    """สถิติทั้งหมดนับใหม่จากแถวของ calculations"""
+    rows = conn.execute('SELECT income, net_income, tax, date(created_at) AS day FROM calculations').fetchall()
+    totals = (len(rows), sum(row['tax'] for row in rows))
+    daily, brackets = {}, {}
+    for row in rows:
+        for groups, key in ((daily, row['day']), (brackets, _bracket_rate(row['net_income']))):
+            count, tax, income = groups.get(key, (0, 0, 0))
+            groups[key] = (count + 1, tax + row['tax'], income + row['income'])
+    return totals, daily, brackets
+
+
+def _assert_matches_recount(db):
+    (count, total_tax), daily, brackets = _recount(db.get_connection())
+    statistics = db.get_statistics()
+    assert statistics['total_calculations'] == count
+    assert statistics['total_tax'] == pytest.approx(total_tax, abs=1e-6)
+
+    for groups, rows, key in ((daily, db.get_daily_statistics(10_000), 'day'),
+                              (brackets, db.get_bracket_statistics(), 'rate')):
+        assert {row[key] for row in rows} == set(groups)
+        for row in rows:
+            expected_count, expected_tax, expected_income = groups[row[key]]
+            assert row['total_calculations'] == expected_count
+            assert row['total_tax'] == pytest.approx(expected_tax, abs=1e-6)
+            assert row['avg_income'] == pytest.approx(expected_income / expected_count)
+
+
+def test_triggers_match_recount_after_inserts_updates_and_deletes(db):
+    rng = random.Random(15)
+    ids = db.save_calculations_bulk((f'user{i}', _record(rng)) for i in range(200))
+    conn = db.get_connection()
+    with conn:
+        conn.execute("UPDATE calculations SET created_at = datetime('2025-03-01', '+' || (id % 9) || ' days')")
+    _assert_matches_recount(db)
+
+    for calculation_id in rng.sample(ids, 80):
+        assert db.delete_calculation(calculation_id)
+    _assert_matches_recount(db)
+
+    with conn:
+        conn.execute('UPDATE calculations SET net_income = net_income + 400000, tax = tax + 1 WHERE id % 3 = 0')
+    _assert_matches_recount(db)
+
+    for calculation_id in ids:
+        db.delete_calculation(calculation_id)
+    assert db.get_statistics()['total_calculations'] == 0
+    assert db.get_statistics()['total_tax'] == 0
+    assert db.get_daily_statistics() == []
+    assert db.get_bracket_statistics() == []
+
+
+def test_bracket_follows_net_income_without_tax_details(db):
+    # ผลแบบสรุปไม่มี tax_details ขั้นภาษีต้องมาจากเงินได้สุทธิที่บันทึกไว้
+    for net_income in (-5_000, 0, 150_001, 150_002, 600_000, 6_000_000):
+        db.save_calculation('summary', {'income': net_income + 200_000, 'total_deductions': 200_000,
+                                        'net_income': net_income, 'tax': 0, 'tax_details': []})
+    brackets = {row['rate']: row['total_calculations'] for row in db.get_bracket_statistics()}
+    assert brackets == {0: 3, 5: 1, 15: 1, 35: 1}
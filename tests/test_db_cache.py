@@ -0,0 +1,92 @@
+"""ทดสอบแคชผลการอ่านฐานข้อมูลและการล้างแคชเมื่อมีการเขียน"""
+
+import pytest
+
+import db_cache
+
+
+RECORD = {'income': 600_000, 'total_deductions': 160_000, 'net_income': 340_000, 'tax': 11_000,
+          'deduction_details': {'personal': 60_000}, 'tax_details': []}
+
+
+@pytest.fixture
+def cache(db):
+    db_cache.clear()
+    yield db_cache
+    db_cache.clear()
+
+
+def _counts(func):
+    return func.cache.hits, func.cache.misses
+
+
+def test_hit_returns_cached_value(cache):
+    hits, misses = _counts(cache.get_statistics)
+    first = cache.get_statistics()
+    assert cache.get_statistics() == first
+    assert _counts(cache.get_statistics) == (hits + 1, misses + 1)
+
+
+def test_mutating_result_does_not_change_cache(cache, db):
+    db.save_user_profile('a', {'income_40_1_2': 600_000}, {'rmf': 1_000})
+    db.save_calculation('a', RECORD)
+
+    profile = cache.get_user_profile_by_name('a')
+    profile['income_data']['salary_per_month'] = 50_000
+    profile['income_data'].pop('income_40_1_2')
+    assert cache.get_user_profile_by_name('a')['income_data'] == {'income_40_1_2': 600_000}
+
+    rows = cache.get_calculations()
+    rows[0]['deduction_details'].value['personal'] = 0
+    rows.clear()
+    again = cache.get_calculations()
+    assert again[0]['deduction_details'] == {'personal': 60_000}
+    assert not again[0]['tax_details'].decoded
+
+
+def test_write_invalidates_only_its_table(cache, db):
+    statistics = cache.get_statistics()
+    cache.get_user_profiles()
+
+    db.save_calculation('a', RECORD)
+    hits, misses = _counts(cache.get_user_profiles)
+    assert cache.get_statistics()['total_calculations'] == statistics['total_calculations'] + 1
+    assert cache.get_user_profiles() == []
+    assert _counts(cache.get_user_profiles) == (hits + 1, misses)
+
+    db.save_user_profile('a', {}, {})
+    assert [profile['name'] for profile in cache.get_user_profiles()] == ['a']
+
+
+def test_ttl_expiry(cache, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(db_cache.time, 'monotonic', lambda: now[0])
+    cache.count_calculations()
+    now[0] += db_cache.DEFAULT_TTL - 1
+    misses = cache.count_calculations.cache.misses
+    cache.count_calculations()
+    assert cache.count_calculations.cache.misses == misses
+    now[0] += 2
+    cache.count_calculations()
+    assert cache.count_calculations.cache.misses == misses + 1
+
+
+def test_database_name_is_part_of_key(cache, db, tmp_path, monkeypatch):
+    db.save_calculation('a', RECORD)
+    assert cache.count_calculations() == 1
+    monkeypatch.setattr(db, 'DB_NAME', str(tmp_path / 'other.db'))
+    db.init_db()
+    assert cache.count_calculations() == 0
+
+
+def test_lru_eviction_and_unhashable_arguments(cache):
+    entries = cache.count_calculations.cache
+    for prefix in range(db_cache.DEFAULT_MAX_ENTRIES + 5):
+        cache.count_calculations(str(prefix))
+    assert len(entries.entries) == db_cache.DEFAULT_MAX_ENTRIES
+
+    aggregate = cache.aggregate_deductions.cache
+    misses = aggregate.misses
+    cache.aggregate_deductions(['rmf'])
+    cache.aggregate_deductions(['rmf'])
+    assert aggregate.misses == misses and not aggregate.entries
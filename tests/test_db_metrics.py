@@ -0,0 +1,119 @@
+"""ทดสอบ db_metrics: ตัวนับต่อ SQL/ฟังก์ชัน จำนวน query ต่อรอบการทำงาน และ log ของ slow query"""
+
+import logging
+
+import pytest
+
+import db_metrics
+from db_metrics import HISTOGRAM_BOUNDS_MS, Collector, Stats
+
+
+@pytest.fixture
+def metrics(db, monkeypatch):
+    """เปิดการวัดด้วย Collector ใหม่ (คืนเกณฑ์ slow query เดิมและปิดเมื่อจบ)"""
+    monkeypatch.setattr(db_metrics, '_slow_query_ms', db_metrics.DEFAULT_SLOW_QUERY_MS)
+    collector = db_metrics.enable()
+    yield collector
+    db_metrics.disable()
+    db_metrics.end_request()
+
+
+def _calculation(tax):
+    return {'income': 500000, 'total_deductions': 60000, 'net_income': 440000, 'tax': tax,
+            'deduction_details': {}, 'tax_details': []}
+
+
+def test_disabled_records_nothing(db):
+    assert db_metrics.get_collector() is None
+    db.save_calculation('alice', _calculation(1))
+    assert len(db.get_calculations()) == 1
+
+
+def test_counts_calls_queries_and_rows(db, metrics):
+    for tax in range(5):
+        db.save_calculation('alice', _calculation(tax))
+    metrics.reset()
+
+    assert len(db.get_calculations()) == 5
+    assert db.get_calculation_by_id(1)['tax'] == 0
+    snapshot = metrics.snapshot()
+
+    assert snapshot['functions']['get_calculations']['count'] == 1
+    assert snapshot['functions']['get_calculations']['queries'] == 1
+    assert snapshot['functions']['get_calculation_by_id']['queries'] == 1
+    rows = sorted(stats['rows'] for stats in snapshot['statements'].values())
+    assert rows == [1, 5]
+    report = metrics.report()
+    assert 'get_calculations' in report and 'get_calculation_by_id' in report
+
+
+def test_rows_counted_when_iterating_cursor(db, metrics):
+    for tax in range(3):
+        db.save_calculation('bob', _calculation(tax))
+    metrics.reset()
+
+    cursor = db.get_connection().cursor()
+    assert len(list(cursor.execute('SELECT id FROM calculations'))) == 3
+    cursor.close()
+    (stats,) = metrics.snapshot()['statements'].values()
+    assert stats['count'] == 1 and stats['rows'] == 3
+
+
+def test_request_summary(db, metrics):
+    db_metrics.begin_request('rerun')
+    db.get_calculations()
+    db.get_statistics()
+    assert db_metrics.current_request()['queries'] == 2
+    summary = db_metrics.end_request()
+    assert summary['label'] == 'rerun' and summary['queries'] == 2
+    assert db_metrics.end_request() is None
+
+
+def test_slow_query_logged_with_plan(db, metrics, caplog):
+    db_metrics.enable(metrics, slow_query_ms=0)
+    with caplog.at_level(logging.WARNING, logger='db_metrics'):
+        db.get_calculations(name='alice')
+    messages = [record.getMessage() for record in caplog.records if 'slow query' in record.getMessage()]
+    assert messages
+    assert any('SEARCH' in message or 'SCAN' in message for message in messages)
+
+
+def test_custom_collector(db):
+    class Recorder:
+        def __init__(self):
+            self.calls = []
+
+        def record_query(self, sql, elapsed_ms, rows):
+            pass
+
+        def record_call(self, name, elapsed_ms, queries):
+            self.calls.append((name, queries))
+
+    recorder = Recorder()
+    assert db_metrics.enable(recorder) is recorder
+    try:
+        db.get_statistics()
+    finally:
+        db_metrics.disable()
+    assert recorder.calls == [('get_statistics', 1)]
+
+
+def test_stats_percentiles():
+    stats = Stats()
+    for elapsed_ms in [0.05] * 90 + [7] * 9 + [5000]:
+        stats.add(elapsed_ms)
+    summary = stats.to_dict()
+    assert summary['count'] == 100
+    assert summary['p50_ms'] == HISTOGRAM_BOUNDS_MS[0]
+    assert summary['p95_ms'] == 10
+    assert summary['max_ms'] == 5000
+    assert summary['histogram']['more'] == 1
+    assert Stats().percentile(0.5) == 0.0
+
+
+def test_collector_reset():
+    collector = Collector()
+    collector.record_query('SELECT 1', 1.0, 1)
+    collector.record_call('f', 1.0, 1)
+    collector.reset()
+    assert collector.snapshot() == {'statements': {}, 'functions': {}}
@@ -0,0 +1,123 @@
+"""ทดสอบว่า calculate_tax_batch() ให้ผลตรงกับ calculate_tax_complete() ทีละคน"""
+
+import numpy as np
+import pytest
+
+import tax_calculator as tc
+from tax_batch import SUMMARY_COLUMNS, calculate_tax_batch, calculate_tax_brackets_batch
+
+
+AMOUNT_KEYS = (
+    'life_insurance', 'health_insurance_self', 'health_insurance_parent',
+    'rmf', 'ssf', 'pvd', 'thai_esg', 'nssf', 'social_security',
+    'solar_cell', 'home_construction', 'home_interest',
+    'donation', 'education_donation', 'political_donation', 'social_enterprise',
+)
+
+
+def _random_people(n, seed=0):
+    """สร้างข้อมูลผู้เสียภาษีแบบสุ่ม (ค่าส่วนใหญ่เป็นศูนย์ เหมือนข้อมูลจริง)"""
+    rng = np.random.default_rng(seed)
+
+    def amounts(scale):
+        return np.where(rng.random(n) < 0.4, np.round(rng.random(n) * scale, 2), 0.0)
+
+    income = {'income_40_1_2': amounts(3_000_000)}
+    income['expense_40_1_2'] = np.where(rng.random(n) < 0.2, np.round(rng.random(n) * 150_000), np.nan)
+    for income_type in tc.PERCENT_INCOME_TYPES:
+        income[f'income_{income_type}'] = amounts(1_000_000)
+
+    deductions = {key: amounts(600_000) for key in AMOUNT_KEYS}
+    deductions['personal'] = np.where(rng.random(n) < 0.1, 30_000.0, np.nan)
+    deductions['spouse'] = rng.random(n) < 0.3
+    deductions['easy_e_receipt'] = rng.random(n) < 0.3
+    for key in ('children', 'children_2nd', 'parents'):
+        deductions[key] = rng.integers(0, 3, n)
+    withholding = amounts(200_000)
+    return income, deductions, withholding
+
+
+def _row(columns, i):
+    """แปลงแถวที่ i เป็น dictionary แบบที่ calculate_tax_complete() รับ (ข้าม NaN)"""
+    row = {}
+    for key, column in columns.items():
+        value = column[i].item()
+        if isinstance(value, float) and np.isnan(value):
+            continue
+        row[key] = value
+    return row
+
+
+@pytest.mark.parametrize('tax_year', [2567, 2568, 2569])
+def test_batch_matches_scalar(tax_year):
+    income, deductions, withholding = _random_people(400, seed=tax_year)
+    batch = calculate_tax_batch(income, deductions, withholding, tax_year=tax_year)
+
+    for i in range(len(withholding)):
+        expected = tc.calculate_tax_complete(
+            _row(income, i), _row(deductions, i), withholding[i].item(), detail=False, tax_year=tax_year
+        )
+        for key in SUMMARY_COLUMNS:
+            assert batch[key][i] == pytest.approx(expected[key], rel=1e-12, abs=1e-9), (i, key)
+
+
+def test_bracket_boundaries_match_scalar():
+    edges = [0.0, -1.0]
+    for lower, upper, _ in tc.TAX_BRACKETS:
+        edges += [lower - 0.01, lower, lower + 0.01]
+        if upper != float('inf'):
+            edges += [upper - 0.01, upper, upper + 0.01]
+
+    tax = calculate_tax_brackets_batch(edges)
+    for net_income, batch_tax in zip(edges, tax):
+        assert batch_tax == pytest.approx(tc.calculate_tax(net_income)[0], abs=1e-9), net_income
+
+
+def test_scalar_columns_broadcast():
+    batch = calculate_tax_batch({'income_40_1_2': [600_000, 1_200_000]}, {'spouse': True}, 5_000)
+    for i, salary in enumerate((600_000, 1_200_000)):
+        expected = tc.calculate_tax_complete({'income_40_1_2': salary}, {'spouse': True}, 5_000, detail=False)
+        assert batch['tax'][i] == pytest.approx(expected['tax'])
+        assert batch['tax_refund'][i] == pytest.approx(expected['tax_refund'])
+
+
+def test_mismatched_columns_rejected():
+    with pytest.raises(ValueError):
+        calculate_tax_batch({'income_40_1_2': [1, 2]}, {'rmf': [1, 2, 3]})
+
+
+@pytest.mark.parametrize('income, deductions, withholding', [
+    ({'income_40_1_2': [600_000, -1]}, {}, 0),
+    ({'income_40_8': [-0.01, 200_000]}, {}, 0),
+    ({'income_40_1_2': [600_000, 700_000]}, {'rmf': [10_000, -5]}, 0),
+    ({'income_40_1_2': [600_000, 700_000]}, {'personal': [-60_000, np.nan]}, 0),
+    ({'income_40_1_2': [600_000, 700_000]}, {'children': [1, -1]}, 0),
+    ({'income_40_1_2': [600_000, 700_000]}, {'parents': [1.5, 0]}, 0),
+    ({'income_40_1_2': [600_000, 700_000]}, {}, [0, -100]),
+])
+def test_invalid_rows_rejected_like_scalar(income, deductions, withholding):
+    with pytest.raises(ValueError):
+        calculate_tax_batch(income, deductions, withholding)
+
+    # แถวที่ผิดต้องทำให้ calculate_tax_complete() ล้มเหลวเหมือนกัน
+    withholding = np.broadcast_to(np.asarray(withholding, dtype=float), (2,))
+    income = {key: np.asarray(value, dtype=float) for key, value in income.items()}
+    deductions = {key: np.asarray(value, dtype=float) for key, value in deductions.items()}
+    errors = 0
+    for i in range(2):
+        try:
+            tc.calculate_tax_complete(_row(income, i), _row(deductions, i), withholding[i].item(), detail=False)
+        except ValueError:
+            errors += 1
+    assert errors == 1
+
+
+def test_flags_and_missing_values_accepted():
+    # ตัวเลือกมี/ไม่มีรับค่าใดก็ได้ และ NaN ถือว่าไม่ได้ระบุ เหมือนทางคำนวณทีละคน
+    income = {'income_40_1_2': np.array([600_000, np.nan])}
+    deductions = {'spouse': np.array([-1.0, 0.0]), 'rmf': np.array([np.nan, 20_000])}
+    batch = calculate_tax_batch(income, deductions)
+    for i in range(2):
+        expected = tc.calculate_tax_complete(_row(income, i), _row(deductions, i), detail=False)
+        assert batch['tax'][i] == pytest.approx(expected['tax'])
+        assert batch['total_deductions'][i] == pytest.approx(expected['total_deductions'])
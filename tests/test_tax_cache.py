@@ -0,0 +1,68 @@
+"""ทดสอบ tax_cache: ผลตรงกับการคำนวณปกติ ตรวจสอบข้อมูลแม้พบในแคช และไม่แชร์รายละเอียด"""
+
+import pytest
+
+import tax_calculator
+from tax_cache import CalculationCache
+from tax_calculator import calculate_tax_complete
+
+INCOME = {'income_40_1_2': 900000, 'income_40_6': 120000}
+DEDUCTIONS = {'spouse': True, 'rmf': 50000, 'donation': 10000}
+
+
+def test_hit_matches_uncached_result():
+    cache = CalculationCache()
+    expected = calculate_tax_complete(INCOME, DEDUCTIONS, 20000)
+    assert cache.calculate(INCOME, DEDUCTIONS, 20000) == expected
+    assert cache.calculate(INCOME, DEDUCTIONS, 20000) == expected
+    assert cache.stats()['hits'] == 1
+
+
+def test_equivalent_inputs_share_entry():
+    cache = CalculationCache()
+    cache.calculate({'income_40_1_2': 900000}, {})
+    cache.calculate({'income_40_1_2': 900000.0, 'income_40_4': 0}, {'rmf': 0})
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+
+@pytest.mark.parametrize('deductions, error', [
+    ({'rmf': True}, TypeError),
+    ({'rmf': -1}, ValueError),
+    ({'rmf': float('nan')}, ValueError),
+    ({'children': 1.5}, ValueError),
+])
+def test_invalid_input_rejected_even_when_equal_key_is_cached(deductions, error):
+    cache = CalculationCache()
+    valid = {key: 1 for key in deductions}
+    cache.calculate(INCOME, valid)
+    with pytest.raises(error):
+        cache.calculate(INCOME, deductions)
+
+
+def test_returned_details_are_not_shared():
+    cache = CalculationCache()
+    first = cache.calculate(INCOME, DEDUCTIONS)
+    first['tax_details'][0]['tax'] = -1
+    first['tax_details'].clear()
+    first['income_details']['40_1_2']['net'] = -1
+    first['deduction_details']['rmf'] = -1
+
+    second = cache.calculate(INCOME, DEDUCTIONS)
+    assert second == calculate_tax_complete(INCOME, DEDUCTIONS)
+
+
+def test_rate_change_invalidates(monkeypatch):
+    cache = CalculationCache()
+    before = cache.calculate(INCOME, DEDUCTIONS)['tax']
+    monkeypatch.setattr(tax_calculator, 'PERSONAL_DEDUCTION', 0)
+    assert cache.calculate(INCOME, DEDUCTIONS)['tax'] > before
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_lru_eviction():
+    cache = CalculationCache(maxsize=2)
+    for salary in (100000, 200000, 300000):
+        cache.calculate({'income_40_1_2': salary}, {})
+    assert cache.stats()['size'] == 2
+    assert cache.stats()['evictions'] == 1
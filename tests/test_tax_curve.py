@@ -0,0 +1,89 @@
+"""ทดสอบเส้นกราฟภาษีเทียบกับ calculate_tax_complete() ที่แต่ละจุด"""
+
+import numpy as np
+import pytest
+
+from tax_calculator import calculate_tax_complete
+from tax_curve import tax_curve
+
+
+INCOME = {'income_40_1_2': 900_000, 'bonus': 100_000, 'income_40_8': 200_000}
+DEDUCTIONS = {'rmf': 200_000, 'donation': 50_000, 'spouse': True}
+
+
+def _expected(income_data):
+    return calculate_tax_complete(income_data, DEDUCTIONS, detail=False)
+
+
+def test_matches_calculator_along_income_40_8():
+    curve = tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 0, 8_000_000)
+    xs = np.concatenate([np.linspace(0, 8_000_000, 97), [x for x, _ in curve.breakpoints]])
+    for x in xs:
+        expected = _expected(dict(INCOME, income_40_8=float(x)))
+        assert curve.tax_at(x) == pytest.approx(expected['tax'], abs=1e-4), x
+        assert curve.net_income_at(x) == pytest.approx(expected['net_income'], abs=1e-4), x
+        assert curve.total_income_at(x) == pytest.approx(expected['total_income']), x
+
+
+def test_bonus_curve_keeps_other_salary():
+    curve = tax_curve(INCOME, DEDUCTIONS, 'bonus', 0, 2_000_000)
+    for bonus in (0, 100_000, 555_555.55, 2_000_000):
+        expected = _expected(dict(INCOME, income_40_1_2=800_000 + bonus))
+        assert curve.tax_at(bonus) == pytest.approx(expected['tax'], abs=1e-4), bonus
+
+
+def test_sample_matches_scalar_methods():
+    curve = tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 0, 8_000_000)
+    xs = np.linspace(0, 8_000_000, 1001)
+    sample = curve.sample(xs)
+    for i in range(0, len(xs), 50):
+        x = xs[i]
+        assert sample['tax'][i] == pytest.approx(curve.tax_at(x))
+        assert sample['net_income'][i] == pytest.approx(curve.net_income_at(x))
+        assert sample['marginal_rate'][i] == pytest.approx(curve.marginal_rate(x))
+        assert sample['effective_rate'][i] == pytest.approx(curve.effective_rate(x))
+
+
+def test_marginal_rate_matches_finite_difference():
+    curve = tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 0, 8_000_000)
+    for x0, x1 in zip(curve.x0, curve.x1):
+        if x1 - x0 < 1_000:
+            continue
+        x = (x0 + x1) / 2
+        before = _expected(dict(INCOME, income_40_8=x))
+        after = _expected(dict(INCOME, income_40_8=x + 1))
+        expected = (after['tax'] - before['tax']) / (after['total_income'] - before['total_income'])
+        assert curve.marginal_rate(x) == pytest.approx(expected, abs=1e-6), x
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        tax_curve(INCOME, DEDUCTIONS, 'expense_40_1_2', 0, 1)
+    with pytest.raises(ValueError):
+        tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 1, 1)
+    curve = tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 0, 1_000)
+    with pytest.raises(ValueError):
+        curve.tax_at(1_001)
+    with pytest.raises(ValueError):
+        curve.sample([-1])
+
+
+def test_salary_curve_from_zero_has_expense_jump():
+    curve = tax_curve({'income_40_8': 400_000}, {}, 'salary_per_month', 0, 50_000)
+    for salary in (0, 0.01, 1_000, 12_345.67, 50_000):
+        expected = calculate_tax_complete({'income_40_1_2': salary * 12, 'income_40_8': 400_000}, {}, detail=False)
+        assert curve.tax_at(salary) == pytest.approx(expected['tax'], abs=1e-4), salary
+        assert curve.net_income_at(salary) == pytest.approx(expected['net_income'], abs=1e-4), salary
+    sample = curve.sample([0, 0.01, 50_000])
+    assert sample['tax'][0] == pytest.approx(curve.tax_at(0))
+    assert sample['net_income'][1] == pytest.approx(curve.net_income_at(0.01))
+
+
+def test_curve_uses_two_evaluations(monkeypatch):
+    import tax_curve as module
+
+    calls = []
+    original = module.calculate_tax_record
+    monkeypatch.setattr(module, 'calculate_tax_record', lambda *args: calls.append(1) or original(*args))
+    tax_curve(INCOME, DEDUCTIONS, 'income_40_8', 0, 1e9)
+    assert len(calls) == 2
@@ -0,0 +1,77 @@
+"""ทดสอบการตรวจสอบและแปลงชนิดข้อมูลเข้าของ tax_models (และผ่าน calculate_tax_complete())"""
+
+import math
+
+import numpy as np
+import pytest
+
+from tax_calculator import calculate_tax_complete
+from tax_models import DeductionInput, IncomeInput, TaxInput
+
+
+def test_amounts_become_floats():
+    income = IncomeInput.from_dict({'income_40_1_2': 600000, 'income_40_8': np.int64(5), 'salary_months': 12})
+    assert type(income.income_40_1_2) is float and income.income_40_1_2 == 600000
+    assert type(income.income_40_8) is float
+    assert income.expense_40_1_2 is None
+    assert type(IncomeInput(income_40_4=3).income_40_4) is float
+    assert type(TaxInput.from_dicts({}, {}, 1000).withholding_tax) is float
+
+
+def test_counts_and_flags():
+    deductions = DeductionInput.from_dict({'children': 2.0, 'parents': np.int64(1), 'spouse': 1, 'easy_e_receipt': 0})
+    assert deductions.children == 2 and type(deductions.children) is int
+    assert deductions.parents == 1 and type(deductions.parents) is int
+    assert deductions.spouse is True and deductions.easy_e_receipt is False
+
+
+@pytest.mark.parametrize('data', [
+    {'income_40_1_2': -1},
+    {'income_40_8': -0.01},
+    {'income_40_1_2': math.nan},
+    {'expense_40_1_2': -5},
+])
+def test_negative_or_nan_income_raises(data):
+    with pytest.raises(ValueError):
+        IncomeInput.from_dict(data)
+    with pytest.raises(ValueError):
+        calculate_tax_complete(data, {})
+
+
+@pytest.mark.parametrize('data', [
+    {'rmf': -100},
+    {'personal': -1},
+    {'children': -1},
+    {'children': 1.5},
+])
+def test_invalid_deductions_raise_value_error(data):
+    with pytest.raises(ValueError):
+        DeductionInput.from_dict(data)
+
+
+@pytest.mark.parametrize('data, model', [
+    ({'income_40_1_2': True}, IncomeInput),
+    ({'income_40_1_2': '600000'}, IncomeInput),
+    ({'rmf': False}, DeductionInput),
+    ({'children': True}, DeductionInput),
+    ({'parents': '2'}, DeductionInput),
+])
+def test_non_numbers_raise_type_error(data, model):
+    with pytest.raises(TypeError):
+        model.from_dict(data)
+
+
+def test_withholding_tax_is_validated():
+    with pytest.raises(ValueError):
+        calculate_tax_complete({'income_40_1_2': 600000}, {}, withholding_tax=-1)
+    with pytest.raises(TypeError):
+        TaxInput.from_dicts({}, {}, True)
+
+
+def test_replace_validates_only_changed_fields():
+    income = IncomeInput(income_40_1_2=600000)
+    assert income.replace(income_40_8=1).income_40_8 == 1.0
+    with pytest.raises(ValueError):
+        income.replace(income_40_8=-1)
+    with pytest.raises(TypeError):
+        DeductionInput().replace(rmf=True)
@@ -0,0 +1,97 @@
+"""ทดสอบการแบ่งงบประมาณลงทุน/บริจาคที่ทำให้ภาษีต่ำที่สุด"""
+
+import itertools
+
+import pytest
+
+from tax_calculator import calculate_tax_complete
+from tax_optimizer import OPTION_FIELDS, optimize_allocation, optimize_allocation_batch
+
+
+INCOME = {'income_40_1_2': 1_800_000}
+DEDUCTIONS = {'rmf': 100_000, 'life_insurance': 50_000}
+
+
+def _tax_with(allocation, income_data=INCOME, deductions_data=DEDUCTIONS):
+    deductions = dict(deductions_data)
+    for field, amount in allocation.items():
+        deductions[field] = deductions.get(field, 0) + amount
+    return calculate_tax_complete(income_data, deductions, detail=False)['tax']
+
+
+@pytest.mark.parametrize('budget', [0, 30_000, 150_000, 400_000])
+def test_not_worse_than_grid_search(budget):
+    options = ('rmf', 'thai_esg', 'education_donation', 'donation')
+    result = optimize_allocation(INCOME, DEDUCTIONS, budget, options=options)
+    assert result['tax'] == pytest.approx(_tax_with(result['allocation']))
+
+    step = 10_000
+    shares = range(0, budget + 1, step)
+    for rmf, thai_esg, education in itertools.product(shares, repeat=3):
+        if rmf + thai_esg + education > budget:
+            continue
+        allocation = {'rmf': rmf, 'thai_esg': thai_esg, 'education_donation': education,
+                      'donation': budget - rmf - thai_esg - education}
+        assert result['tax'] <= _tax_with(allocation) + 1e-6, allocation
+
+
+def test_allocation_stays_within_caps():
+    result = optimize_allocation(INCOME, DEDUCTIONS, 5_000_000)
+    assert result['invested'] + result['unallocated'] == pytest.approx(5_000_000)
+    assert result['unallocated'] > 0
+    assert result['tax_saved'] == pytest.approx(result['tax_before'] - result['tax'])
+
+    # ทุกบาทที่แบ่งให้ค่าลดหย่อนพื้นฐานต้องถูกนับจริง (ไม่เกินเพดานจนเสียเปล่า)
+    deductions = dict(DEDUCTIONS)
+    for field, amount in result['allocation'].items():
+        deductions[field] = deductions.get(field, 0) + amount
+    details = calculate_tax_complete(INCOME, deductions)['deduction_details']
+    for field in ('rmf', 'ssf', 'pvd', 'thai_esg', 'nssf', 'life_insurance'):
+        assert details[field] == pytest.approx(deductions.get(field, 0)), field
+    assert result['tax'] == pytest.approx(_tax_with(result['allocation']))
+
+
+def test_batch_matches_single():
+    profiles = [(INCOME, DEDUCTIONS), ({'income_40_1_2': 500_000}, {}), ({}, {})]
+    budgets = [100_000, 20_000, 10_000]
+    results = optimize_allocation_batch(profiles, budgets, options=OPTION_FIELDS[:4])
+    for (income_data, deductions_data), budget, result in zip(profiles, budgets, results):
+        assert result == optimize_allocation(income_data, deductions_data, budget, options=OPTION_FIELDS[:4])
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        optimize_allocation(INCOME, DEDUCTIONS, 1_000, options=['lottery'])
+    with pytest.raises(ValueError):
+        optimize_allocation_batch([(INCOME, DEDUCTIONS)], [1_000, 2_000])
+
+
+@pytest.mark.parametrize('income', [300_000, 600_000, 900_000])
+def test_budget_larger_than_useful_is_not_spent(income):
+    income_data = {'income_40_1_2': income}
+    result = optimize_allocation(income_data, {}, 5_000_000)
+    assert result['tax'] == pytest.approx(0)
+    assert result['tax'] == pytest.approx(_tax_with(result['allocation'], income_data, {}))
+
+    # หยุดที่ช่วงอัตราภาษี 0 (เงินได้สุทธิไม่ถูกดันต่ำลงไปอีก) และไม่ใช้เงินที่ไม่ลดภาษี
+    assert 0 < result['net_income'] <= 150_001
+    assert result['unallocated'] > 0
+    smaller = optimize_allocation(income_data, {}, result['invested'])
+    assert smaller['tax'] == pytest.approx(0)
+    assert smaller['invested'] == pytest.approx(result['invested'])
+
+
+def test_no_investment_when_tax_is_already_zero():
+    result = optimize_allocation({'income_40_1_2': 200_000}, {}, 100_000)
+    assert result['invested'] == 0
+    assert result['unallocated'] == 100_000
+
+
+def test_optimizer_uses_two_evaluations(monkeypatch):
+    import tax_optimizer
+
+    calls = []
+    original = tax_optimizer.calculate_tax_record
+    monkeypatch.setattr(tax_optimizer, 'calculate_tax_record', lambda *args: calls.append(1) or original(*args))
+    optimize_allocation(INCOME, DEDUCTIONS, 400_000)
+    assert len(calls) == 2
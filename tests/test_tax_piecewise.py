@@ -0,0 +1,72 @@
+"""ทดสอบ tax_piecewise: ฟังก์ชันเส้นตรงเป็นช่วงและเงินได้สุทธิเทียบกับ calculate_tax_record()"""
+
+import random
+
+import pytest
+
+from tax_calculator import calculate_tax_record
+from tax_models import TaxInput
+from tax_piecewise import PiecewiseLinear, maximum, minimum, net_income_function
+
+
+def test_arithmetic_and_min_max():
+    x = PiecewiseLinear.line(0, 10)
+    f = minimum(x * 2, 8) + maximum(x - 5, 0)
+    assert f.xs == (0, 4, 5, 10)
+    for value in (0, 1.5, 4, 4.5, 5, 7, 10):
+        assert f(value) == pytest.approx(min(2 * value, 8) + max(value - 5, 0))
+    with pytest.raises(ValueError):
+        f(10.5)
+
+
+def test_crossing_after_last_point_on_unbounded_line():
+    x = PiecewiseLinear.line(0)
+    f = minimum(x * 0.3, 100_000)
+    assert f.xs == (0, pytest.approx(100_000 / 0.3))
+    assert f.end_slope == 0
+    assert f(1e9) == pytest.approx(100_000)
+    assert f.points(500_000)[-1] == (500_000, pytest.approx(100_000))
+
+
+def test_rejects_functions_on_different_ranges():
+    with pytest.raises(ValueError):
+        PiecewiseLinear.line(0, 10) + PiecewiseLinear.line(0, 20)
+
+
+FIELDS = ('income_40_1_2', 'income_40_8', 'rmf', 'thai_esg', 'life_insurance', 'donation', 'education_donation')
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_net_income_matches_calculator(seed):
+    rng = random.Random(seed)
+    income_data = {
+        'income_40_1_2': rng.choice([0, rng.uniform(0, 3_000_000)]),
+        'income_40_2': rng.choice([0, rng.uniform(0, 500_000)]),
+        'income_40_8': rng.choice([0, rng.uniform(0, 2_000_000)]),
+    }
+    deductions_data = {
+        'spouse': rng.random() < 0.5,
+        'rmf': rng.uniform(0, 400_000),
+        'ssf': rng.uniform(0, 200_000),
+        'pvd': rng.uniform(0, 200_000),
+        'social_security': rng.uniform(0, 9_000),
+        'donation': rng.uniform(0, 100_000),
+        'education_donation': rng.uniform(0, 50_000),
+    }
+    base = TaxInput.from_dicts(income_data, deductions_data, 0)
+    field = rng.choice(FIELDS)
+    lo = 1.0 if field == 'income_40_1_2' else 0.0
+    slope = rng.uniform(0.5, 12)
+    offset = getattr(base.income, field, None)
+    if offset is None:
+        offset = getattr(base.deductions, field)
+    net = net_income_function(base, {field: PiecewiseLinear.line(lo, 5_000_000, slope, offset)})
+
+    for x in [lo, 5_000_000] + [rng.uniform(lo, 5_000_000) for _ in range(30)] + list(net.xs):
+        value = offset + slope * x
+        if field in base.income.__slots__:
+            tax_input = TaxInput.from_dicts(dict(income_data, **{field: value}), deductions_data, 0)
+        else:
+            tax_input = TaxInput.from_dicts(income_data, dict(deductions_data, **{field: value}), 0)
+        expected = calculate_tax_record(tax_input).net_income
+        assert net(x) == pytest.approx(expected, abs=1e-6), (field, x)
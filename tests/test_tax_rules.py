@@ -0,0 +1,35 @@
+"""ทดสอบว่าค่าคงที่ของ tax_calculator กับชุดกฎ JSON ของปีเดียวกันตรงกัน"""
+
+import pytest
+
+import tax_calculator
+from tax_calculator import DEFAULT_TAX_YEAR, RATE_CONSTANT_NAMES, calculate_tax_complete
+from tax_rules import available_tax_years, get_rule_set
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    if hasattr(value, 'items'):
+        return dict(value)
+    return value
+
+
+@pytest.mark.parametrize('name', RATE_CONSTANT_NAMES)
+def test_module_constants_match_default_rule_set(name):
+    rule_set = get_rule_set(DEFAULT_TAX_YEAR)
+    assert _normalize(getattr(tax_calculator, name)) == _normalize(getattr(rule_set, name))
+
+
+def test_default_year_results_match_rule_set():
+    income_data = {'income_40_1_2': 1200000, 'income_40_6': 300000, 'income_40_8': 50000}
+    deductions_data = {'spouse': True, 'children': 2, 'rmf': 100000, 'thai_esg': 150000, 'donation': 20000}
+    assert calculate_tax_complete(income_data, deductions_data) == \
+        calculate_tax_complete(income_data, deductions_data, tax_year=DEFAULT_TAX_YEAR)
+
+
+@pytest.mark.parametrize('tax_year', available_tax_years())
+def test_rule_sets_load(tax_year):
+    rule_set = get_rule_set(tax_year)
+    assert rule_set.tax_year == tax_year
+    assert get_rule_set(tax_year) is rule_set
@@ -0,0 +1,120 @@
+"""ทดสอบ tax_service ผ่าน HTTP จริง (server ใน thread ของ process นี้ ฐานข้อมูลชั่วคราว)"""
+
+import http.client
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+
+import tax_service
+from tax_calculator import calculate_tax_complete
+
+INCOME = {'income_40_1_2': 600000}
+
+
+@pytest.fixture
+def client(db):
+    server = tax_service.make_server('127.0.0.1', 0)
+    thread = threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.01}, daemon=True)
+    thread.start()
+    port = server.server_address[1]
+
+    def request(method, path, body=None, raw=None):
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        data = raw if raw is not None else (None if body is None else json.dumps(body))
+        conn.request(method, path, body=data, headers={'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    yield request
+    server.shutdown()
+    server.server_close()
+
+
+def test_health(client):
+    status, payload = client('GET', '/health')
+    assert status == 200 and payload['status'] == 'ok'
+
+
+def test_calculate_matches_calculator(client):
+    status, payload = client('POST', '/calculate', {'income_data': INCOME, 'deductions_data': {'rmf': 50000}})
+    assert status == 200
+    assert payload == json.loads(json.dumps(calculate_tax_complete(INCOME, {'rmf': 50000}), ensure_ascii=False))
+
+
+@pytest.mark.parametrize('detail', ['false', '0', 0, 1, None, 'true'])
+def test_detail_must_be_boolean(client, detail):
+    status, payload = client('POST', '/calculate', {'income_data': INCOME, 'detail': detail})
+    assert status == 400
+    assert 'detail' in payload['error']
+
+
+def test_detail_false_returns_summary(client):
+    status, payload = client('POST', '/calculate', {'income_data': INCOME, 'detail': False})
+    assert status == 200
+    assert 'tax_details' not in payload
+    assert payload['tax'] == calculate_tax_complete(INCOME, {})['tax']
+
+
+def test_batch_reports_errors_per_record(client):
+    records = [{'income_data': INCOME}, {'income_data': {'income_40_1_2': -1}}, {'income_data': INCOME, 'detail': 'no'}]
+    status, payload = client('POST', '/calculate/batch', {'records': records})
+    assert status == 200
+    results = payload['results']
+    assert results[0]['tax'] == calculate_tax_complete(INCOME, {})['tax']
+    assert 'error' in results[1] and 'error' in results[2]
+
+
+def test_batch_rejects_non_boolean_detail(client):
+    status, _ = client('POST', '/calculate/batch', {'records': [], 'detail': 'false'})
+    assert status == 400
+
+
+@pytest.mark.parametrize('raw, status', [('{', 400), ('[]', 400), ('{"income_data": []}', 400)])
+def test_malformed_body(client, raw, status):
+    assert client('POST', '/calculate', raw=raw)[0] == status
+
+
+def test_unknown_path(client):
+    assert client('GET', '/nope')[0] == 404
+
+
+def test_profile_crud(client):
+    name = quote('สมชาย ใจดี')
+    status, payload = client('PUT', f'/profiles/{name}', {'income_data': INCOME, 'withholding_tax': 1000})
+    assert status == 200 and payload['id'] > 0
+
+    status, profile = client('GET', f'/profiles/{name}')
+    assert status == 200
+    assert profile['name'] == 'สมชาย ใจดี' and profile['income_data'] == INCOME
+
+    assert client('DELETE', f'/profiles/{name}') == (200, {'deleted': True})
+    assert client('GET', f'/profiles/{name}')[0] == 404
+    assert client('DELETE', f'/profiles/{name}')[0] == 404
+
+
+def test_profiles_are_paged(client):
+    for i in range(25):
+        client('PUT', f'/profiles/user{i:02d}', {'income_data': INCOME})
+    names, cursor = [], None
+    while True:
+        path = '/profiles?limit=10' + (f'&cursor={cursor}' if cursor else '')
+        status, payload = client('GET', path)
+        assert status == 200 and len(payload['profiles']) <= 10
+        names += [profile['name'] for profile in payload['profiles']]
+        cursor = payload['next_cursor']
+        if cursor is None:
+            break
+    assert names == [f'user{i:02d}' for i in range(25)]
+
+    status, payload = client('GET', '/profiles?prefix=user1&sort=name&desc=true')
+    assert [profile['name'] for profile in payload['profiles']] == [f'user{i}' for i in range(19, 9, -1)]
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=abc', 'limit=100000', 'sort=income_data',
+                                   'desc=yes', 'cursor=not-a-cursor', 'cursor=WzEsMl0='])
+def test_profiles_rejects_bad_query(client, query):
+    assert client('GET', f'/profiles?{query}')[0] == 400
@@ -0,0 +1,90 @@
+"""ทดสอบ TaxSession เทียบกับ calculate_tax_complete() หลังการแก้ไขแต่ละครั้ง"""
+
+import random
+
+import pytest
+
+from tax_calculator import calculate_tax_complete
+from tax_session import TaxSession
+
+
+UPDATES = {
+    'income_40_1_2': [0, 300_000, 900_000, 3_000_000],
+    'income_40_4': [0, 30_000],
+    'income_40_5': [0, 10_000],
+    'income_40_8': [0, 400_000],
+    'expense_40_1_2': [None, 50_000],
+    'rmf': [0, 100_000, 600_000],
+    'ssf': [0, 200_000],
+    'life_insurance': [0, 150_000],
+    'spouse': [False, True],
+    'children': [0, 3],
+    'donation': [0, 20_000, 500_000],
+    'education_donation': [0, 30_000],
+    'withholding_tax': [0, 50_000],
+}
+
+# ย้ายเงินได้ระหว่างประเภทโดยเงินได้รวมและค่าใช้จ่ายรวมเท่าเดิม
+MOVES = [
+    {'income_40_1_2': 280_000, 'income_40_4': 30_000, 'income_40_5': 0},
+    {'income_40_1_2': 300_000, 'income_40_4': 0, 'income_40_5': 10_000},
+]
+
+
+def test_random_updates_match_full_calculation():
+    rng = random.Random(0)
+    income_data = {'income_40_1_2': 900_000}
+    deductions_data = {'rmf': 100_000}
+    withholding_tax = 0
+    session = TaxSession(income_data, deductions_data, withholding_tax)
+
+    for _ in range(300):
+        if rng.random() < 0.2:
+            fields = rng.choice(MOVES)
+        else:
+            fields = {name: rng.choice(UPDATES[name]) for name in rng.sample(sorted(UPDATES), rng.randint(1, 3))}
+        session.update(**fields)
+        for name, value in fields.items():
+            if name == 'withholding_tax':
+                withholding_tax = value
+            elif name.startswith(('income_', 'expense_')):
+                income_data[name] = value
+            else:
+                deductions_data[name] = value
+        income = {key: value for key, value in income_data.items() if value is not None}
+        assert session.to_dict() == calculate_tax_complete(income, deductions_data, withholding_tax), fields
+
+
+def test_only_affected_stages_recomputed():
+    session = TaxSession({'income_40_1_2': 900_000}, {'donation': 500_000})
+    assert session.last_recomputed == ('income', 'basic_deductions', 'donations', 'tax')
+
+    session.update(withholding_tax=10_000)
+    assert session.last_recomputed == ('tax',)
+    session.update(rmf=50_000)
+    assert session.last_recomputed == ('basic_deductions', 'donations', 'tax')
+    # เงินบริจาคเกินเพดานอยู่แล้ว เพิ่มอีกไม่เปลี่ยนผล
+    session.update(donation=600_000)
+    assert session.last_recomputed == ('donations',)
+    session.update(rmf=50_000)
+    assert session.last_recomputed == ()
+
+
+def test_income_moved_between_types_rebuilds_details():
+    # เงินได้รวมและค่าใช้จ่ายรวมเท่าเดิม (310,000 และ 103,000) แต่เงินได้ย้ายประเภท
+    session = TaxSession({'income_40_1_2': 300_000, 'income_40_5': 10_000}, {})
+    session.update(income_40_1_2=280_000, income_40_4=30_000, income_40_5=0)
+    expected = calculate_tax_complete({'income_40_1_2': 280_000, 'income_40_4': 30_000}, {})
+    assert session.to_dict() == expected
+    assert set(session.result.income_details) == {'40_1_2', '40_4'}
+    assert 'tax' in session.last_recomputed
+
+
+def test_invalid_update_keeps_state():
+    session = TaxSession({'income_40_1_2': 900_000}, {})
+    before = session.to_dict()
+    with pytest.raises(ValueError):
+        session.update(lottery=1)
+    with pytest.raises((ValueError, TypeError)):
+        session.update(rmf=-1)
+    assert session.to_dict() == before
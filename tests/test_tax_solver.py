@@ -0,0 +1,95 @@
+"""ทดสอบ tax_solver: แทนค่าคำตอบกลับใน calculate_tax_complete() แล้วต้องได้ตามเป้าหมาย"""
+
+import pytest
+
+from tax_calculator import calculate_tax_complete
+from tax_solver import solve_deduction_for_tax, solve_for_target, solve_salary_for_net_pay
+
+
+def test_bonus_with_income_40_1_2_only_keeps_existing_salary():
+    bonus = solve_for_target({'income_40_1_2': 600000}, {}, 'bonus', 'tax', 30000)
+    result = calculate_tax_complete({'income_40_1_2': 600000 + bonus}, {})
+    assert result['tax'] == pytest.approx(30000)
+
+
+def test_bonus_replaces_previous_bonus():
+    bonus = solve_for_target({'income_40_1_2': 650000, 'bonus': 50000}, {}, 'bonus', 'tax', 30000)
+    result = calculate_tax_complete({'income_40_1_2': 600000 + bonus}, {})
+    assert result['tax'] == pytest.approx(30000)
+
+
+def test_unreachable_bonus_target_returns_none():
+    # ภาษีของเงินเดือนเดิมเกินเป้าหมายแล้ว โบนัสเพิ่มเท่าใดก็ไม่ลดภาษี
+    assert solve_for_target({'income_40_1_2': 600000}, {}, 'bonus', 'tax', 20000) is None
+
+
+def test_salary_requires_salary_per_month_when_income_40_1_2_given():
+    with pytest.raises(ValueError):
+        solve_for_target({'income_40_1_2': 600000}, {}, 'salary_per_month', 'tax', 30000)
+
+
+def test_salary_for_net_pay_round_trip():
+    income_data = {'salary_months': 12, 'bonus': 20000}
+    salary = solve_salary_for_net_pay(income_data, {'social_security': 9000}, 800000)
+    result = calculate_tax_complete({'income_40_1_2': salary * 12 + 20000}, {'social_security': 9000})
+    assert result['net_income_after_tax'] == pytest.approx(800000)
+
+
+@pytest.mark.parametrize('income, target', [(800000, 30000), (1000000, 60000), (1200000, 60000)])
+def test_deduction_for_tax_does_not_exceed_target(income, target):
+    income_data = {'income_40_1_2': income}
+    rmf = solve_deduction_for_tax(income_data, {}, 'rmf', target)
+    assert calculate_tax_complete(income_data, {'rmf': rmf})['tax'] <= target
+    # น้อยกว่าหนึ่งสตางค์ภาษีจะเกินเป้าหมาย
+    assert calculate_tax_complete(income_data, {'rmf': rmf - 0.01})['tax'] > target
+
+
+def test_deduction_already_below_target_is_zero():
+    assert solve_deduction_for_tax({'income_40_1_2': 300000}, {}, 'rmf', 50000) == 0.0
+
+
+def test_unreachable_deduction_target_fails_fast(monkeypatch):
+    import tax_solver
+
+    calls = []
+    original = tax_solver.calculate_tax_record
+    monkeypatch.setattr(tax_solver, 'calculate_tax_record', lambda *args: calls.append(1) or original(*args))
+    assert solve_deduction_for_tax({'income_40_1_2': 1500000}, {}, 'rmf', 1000) is None
+    assert len(calls) <= 2
+
+
+def _count_calls(monkeypatch):
+    import tax_solver
+
+    calls = []
+    original = tax_solver.calculate_tax_record
+    monkeypatch.setattr(tax_solver, 'calculate_tax_record', lambda *args: calls.append(1) or original(*args))
+    return calls
+
+
+@pytest.mark.parametrize('net_pay', [100_000, 1_000_000, 50_000_000, 2_000_000_000])
+def test_salary_solve_uses_one_evaluation_for_any_range(monkeypatch, net_pay):
+    calls = _count_calls(monkeypatch)
+    income_data = {'salary_months': 12}
+    deductions = {'rmf': 200_000, 'donation': 50_000, 'education_donation': 10_000}
+    salary = solve_salary_for_net_pay(income_data, deductions, net_pay)
+    assert len(calls) == 1
+
+    result = calculate_tax_complete({'income_40_1_2': salary * 12}, deductions, detail=False)
+    assert result['net_income_after_tax'] == pytest.approx(net_pay)
+
+
+def test_deduction_solve_uses_at_most_two_evaluations(monkeypatch):
+    calls = _count_calls(monkeypatch)
+    income_data = {'income_40_1_2': 2_400_000, 'income_40_8': 500_000}
+    thai_esg = solve_deduction_for_tax(income_data, {'rmf': 100_000}, 'thai_esg', 500_000)
+    assert len(calls) <= 2
+    assert calculate_tax_complete(income_data, {'rmf': 100_000, 'thai_esg': thai_esg})['tax'] <= 500_000
+
+
+def test_salary_from_zero_includes_salary_expense():
+    # เงินเดือน 0 ไม่มีค่าใช้จ่าย 40(1)(2) แต่เงินเดือนที่มากกว่า 0 ได้ค่าใช้จ่ายทันที
+    income_data = {'salary_months': 12, 'income_40_8': 400_000}
+    salary = solve_for_target(income_data, {}, 'salary_per_month', 'tax', 20_000)
+    result = calculate_tax_complete({'income_40_1_2': salary * 12, 'income_40_8': 400_000}, {})
+    assert result['tax'] == pytest.approx(20_000)
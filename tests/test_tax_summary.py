@@ -0,0 +1,50 @@
+"""ทดสอบโหมดตัวเลขสรุป (detail=False) และการสร้างรายละเอียดเมื่อเรียกใช้ครั้งแรก"""
+
+import pytest
+
+from tax_calculator import calculate_tax_complete, calculate_tax_record
+from tax_models import TaxInput
+
+
+CASES = [
+    ({}, {}, 0),
+    ({'income_40_1_2': 600_000}, {'spouse': True, 'children': 2}, 20_000),
+    ({'income_40_1_2': 2_400_000, 'income_40_8': 500_000},
+     {'rmf': 400_000, 'ssf': 300_000, 'donation': 100_000, 'education_donation': 50_000}, 0),
+    ({'income_40_5': 3_000_000, 'income_40_6': 1_000_000}, {'life_insurance': 200_000, 'easy_e_receipt': True}, 500_000),
+]
+
+DETAIL_KEYS = {'income_details', 'deduction_details', 'tax_details'}
+
+
+@pytest.mark.parametrize('income_data, deductions_data, withholding_tax', CASES)
+def test_summary_matches_full_result(income_data, deductions_data, withholding_tax):
+    full = calculate_tax_complete(income_data, deductions_data, withholding_tax)
+    summary = calculate_tax_complete(income_data, deductions_data, withholding_tax, detail=False)
+    assert DETAIL_KEYS <= set(full)
+    assert not DETAIL_KEYS & set(summary)
+    assert summary == {key: value for key, value in full.items() if key not in DETAIL_KEYS}
+
+
+def test_details_built_once_on_first_use():
+    calls = []
+    result = calculate_tax_record(TaxInput.from_dicts(*CASES[2][:2], CASES[2][2]))
+    source = result._detail_source
+    result._detail_source = lambda: calls.append(1) or source()
+
+    result.to_summary_dict()
+    assert calls == []
+    details = result.deduction_details
+    assert result.tax_details is result.tax_details
+    assert result.to_dict()['deduction_details'] is details
+    assert calls == [1]
+
+
+def test_details_match_summary():
+    result = calculate_tax_complete(*CASES[2][:2], CASES[2][2])
+    income = result['income_details'].values()
+    assert sum(item['income'] for item in income) == pytest.approx(result['total_income'])
+    assert sum(item['expense'] for item in income) == pytest.approx(result['total_expenses'])
+    deductions = result['deduction_details']
+    assert deductions['rmf'] + deductions['ssf'] == pytest.approx(500_000)
+    assert sum(deductions.values()) == pytest.approx(result['total_deductions'])
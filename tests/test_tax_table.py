@@ -0,0 +1,87 @@
+"""ทดสอบ TaxTable เทียบกับการวนทีละขั้นแบบเดิมของ calculate_tax()"""
+
+import random
+
+import pytest
+
+import tax_calculator as tc
+from tax_calculator import TaxTable, calculate_tax
+
+
+def _linear_walk(net_income, brackets):
+    """calculate_tax() แบบเดิมก่อนมี TaxTable (วนทีละขั้นจนถึงขั้นของรายได้)"""
+    if net_income <= 0:
+        return 0, []
+    tax = 0
+    tax_details = []
+    for min_income, max_income, rate in brackets:
+        if net_income <= min_income:
+            continue
+        if max_income == float('inf'):
+            taxable_amount = net_income - (min_income - 1)
+            label = f'{min_income:,.0f} - ∞'
+        else:
+            taxable_amount = min(net_income, max_income) - (min_income - 1)
+            label = f'{min_income:,.0f} - {max_income:,}'
+        if taxable_amount > 0 and rate > 0:
+            bracket_tax = taxable_amount * rate
+            tax += bracket_tax
+            tax_details.append({'range': label, 'taxable_amount': taxable_amount,
+                                'rate': rate * 100, 'tax': bracket_tax})
+            if net_income <= max_income:
+                break
+    return tax, tax_details
+
+
+def _incomes(brackets, seed):
+    rng = random.Random(seed)
+    incomes = [-1.0, 0.0, 0.01, 1.0]
+    for lower, upper, _ in brackets:
+        incomes += [lower - 1, lower - 0.01, lower, lower + 0.01, lower + 1]
+        if upper != float('inf'):
+            incomes += [upper - 0.01, upper, upper + 0.01]
+    incomes += [rng.uniform(0, 5_000_000) for _ in range(300)]
+    # ขั้นสุดท้ายไม่มีเพดาน ต้องถูกต้องสำหรับรายได้สูงมากด้วย
+    incomes += [rng.uniform(5_000_000, 1e9) for _ in range(100)] + [5_000_001.0, 1e12]
+    return incomes
+
+
+def test_calculate_tax_matches_linear_walk():
+    for net_income in _incomes(tc.TAX_BRACKETS, 0):
+        assert calculate_tax(net_income) == _linear_walk(net_income, tc.TAX_BRACKETS), net_income
+
+
+# ขั้นที่อัตรา 0 อยู่กลางตาราง และขั้นที่ไม่ได้เริ่มที่ 0
+OTHER_BRACKETS = [
+    [(0, 100_000, 0), (100_001, 250_000, 0.1), (250_001, 400_000, 0), (400_001, float('inf'), 0.3)],
+    [(50_001, 80_000, 0.02), (80_001, 1_000_000, 0.25), (1_000_001, float('inf'), 0.4)],
+]
+
+
+@pytest.mark.parametrize('brackets', [tc.TAX_BRACKETS] + OTHER_BRACKETS)
+def test_table_matches_linear_walk(brackets):
+    table = TaxTable(brackets)
+    for net_income in _incomes(brackets, len(brackets)):
+        expected_tax, expected_details = _linear_walk(net_income, brackets)
+        assert table.tax(net_income) == expected_tax, net_income
+        assert table.details(net_income) == expected_details, net_income
+
+
+def test_bracket_index():
+    table = tc.get_tax_table()
+    assert table.bracket_index(0) == -1
+    assert table.bracket_index(150_000) == 0
+    assert table.bracket_index(150_001) == 0
+    assert table.bracket_index(150_001.01) == 1
+    assert table.bracket_index(1e12) == len(table.brackets) - 1
+
+
+def test_table_recompiled_when_brackets_change(monkeypatch):
+    table = tc.get_tax_table()
+    assert tc.get_tax_table() is table
+
+    brackets = [(0, 100_000, 0), (100_001, float('inf'), 0.1)]
+    monkeypatch.setattr(tc, 'TAX_BRACKETS', brackets)
+    changed = tc.get_tax_table()
+    assert changed is not table
+    assert changed.tax(200_000) == _linear_walk(200_000, brackets)[0]